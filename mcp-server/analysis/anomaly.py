@@ -0,0 +1,136 @@
+"""Anomaly detection — turns quotes / capital flow / limit pools / northbound data into bus events.
+
+一次数据抓取喂给所有检测器; 去重与推送交给 EventBus, 检测器只负责判断.
+"""
+
+from __future__ import annotations
+
+import logging
+
+from data_sources.base import QuoteData
+from utils.event_bus import Event, EventBus
+
+logger = logging.getLogger(__name__)
+
+LIMIT_UP = "limit_up"
+LIMIT_DOWN = "limit_down"
+VOLUME_SURGE = "volume_surge"
+MAIN_FORCE_REVERSAL = "main_force_reversal"
+NORTHBOUND_SWING = "northbound_swing"
+
+DEFAULT_THRESHOLDS = {
+    "volume_ratio": 3.0,          # 量比
+    "main_force_min_wan": 1000,   # 主力反转: 新方向净额下限 (万)
+    "northbound_swing_yi": 20,    # 北向盘中自高点回落 / 自低点反弹 (亿)
+}
+
+
+def alert_thresholds(**overrides) -> dict:
+    """settings.yaml alerts 阈值, 缺省取 DEFAULT_THRESHOLDS."""
+    from config import get_config
+    cfg = get_config().get("alerts", {}) or {}
+    thresholds = {k: cfg.get(k, v) for k, v in DEFAULT_THRESHOLDS.items()}
+    thresholds.update(overrides)
+    return thresholds
+
+
+def limit_pct(code: str, name: str = "") -> float:
+    """涨跌停幅度: ST 5%, 创业板/科创板 20%, 北交所 30%, 其余 10%."""
+    if "ST" in name.upper():
+        return 0.05
+    if code.startswith(("300", "301", "688", "689")):
+        return 0.20
+    if code.startswith(("4", "8", "92")):
+        return 0.30
+    return 0.10
+
+
+class AnomalyDetector:
+    """异动检测器. 主力方向等跨调用状态保存在实例上 (daemon 模式下常驻)."""
+
+    def __init__(self, bus: EventBus | None = None, **thresholds):
+        self.bus = bus or EventBus()
+        self.thresholds = alert_thresholds(**thresholds)
+        self._main_force_sign: dict[str, int] = {}
+
+    def _publish(self, events: list[Event]) -> list[Event]:
+        return [e for e in events if self.bus.publish(e)]
+
+    def on_quotes(self, quotes: list[QuoteData]) -> list[Event]:
+        """实时行情: 封板/跌停 + 量比放量."""
+        events = []
+        min_vr = self.thresholds["volume_ratio"]
+        for q in quotes:
+            if q.pre_close > 0 and q.price > 0:
+                pct = limit_pct(q.code, q.name)
+                if q.price >= round(q.pre_close * (1 + pct), 2):
+                    events.append(Event(LIMIT_UP, q.code, f"{q.name}涨停{q.change_pct:.1f}%", 1,
+                                        {"name": q.name, "price": q.price, "change_pct": q.change_pct}))
+                elif q.price <= round(q.pre_close * (1 - pct), 2):
+                    events.append(Event(LIMIT_DOWN, q.code, f"{q.name}跌停{q.change_pct:.1f}%", 2,
+                                        {"name": q.name, "price": q.price, "change_pct": q.change_pct}))
+            if q.volume_ratio >= min_vr:
+                events.append(Event(VOLUME_SURGE, q.code, f"{q.name}量比{q.volume_ratio:.1f}放量", 1,
+                                    {"name": q.name, "volume_ratio": q.volume_ratio,
+                                     "change_pct": q.change_pct}))
+        return self._publish(events)
+
+    def on_capital_flow(self, code: str, flow: dict) -> list[Event]:
+        """资金流 (CapitalFlowManager.get_capital_flow 结构): 尾盘放量 + 主力方向反转."""
+        events = []
+        name = flow.get("name", "")
+        if flow.get("amount_surge_last_10min"):
+            events.append(Event(VOLUME_SURGE, code, f"{name or code}近10分钟成交额放大", 1,
+                                {"name": name, "window": "10min"}))
+        main = flow.get("main_force") or {}
+        net = main.get("main_net_inflow_wan")
+        # 净额不足阈值视为方向未明, 不更新记录的主力方向
+        if net is not None and abs(net) >= self.thresholds["main_force_min_wan"]:
+            sign = 1 if net > 0 else -1
+            prev = self._main_force_sign.get(code)
+            self._main_force_sign[code] = sign
+            if prev and sign != prev:
+                direction = "转为净流入" if sign > 0 else "转为净流出"
+                events.append(Event(MAIN_FORCE_REVERSAL, code, f"{name or code}主力{direction}{abs(net):.0f}万", 2,
+                                    {"name": name, "main_net_inflow_wan": net, "direction": sign}))
+        return self._publish(events)
+
+    def on_limit_pool(self, pool: dict) -> list[Event]:
+        """同花顺涨停/跌停池 (THSMarketScanner._fetch_limit_pool 结构)."""
+        pool_type = pool.get("pool_type") if pool else None
+        if pool_type not in (LIMIT_UP, LIMIT_DOWN):
+            return []
+        events = []
+        for s in pool.get("stocks", []):
+            code, name = s.get("code", ""), s.get("name", "")
+            if not code:
+                continue
+            if pool_type == LIMIT_DOWN:
+                events.append(Event(LIMIT_DOWN, code, f"{name}跌停", 2, {"name": name}))
+                continue
+            days = s.get("high_days") or ""
+            label = f"{name}涨停" + (f"({days})" if days else "")
+            level = 2 if s.get("is_again_limit") else 1
+            events.append(Event(LIMIT_UP, code, label, level,
+                                {"name": name, "high_days": s.get("high_days"),
+                                 "is_again_limit": s.get("is_again_limit", False)}))
+        return self._publish(events)
+
+    def on_northbound(self, flow: dict) -> list[Event]:
+        """北向实时流向 (NorthboundFlowSource.get_realtime_flow 结构): 盘中大幅回落 / 反弹."""
+        if not flow or "total_net_flow" not in flow:
+            return []
+        total = flow["total_net_flow"]
+        swing = self.thresholds["northbound_swing_yi"]
+        events = []
+        drop = flow.get("max_inflow", total) - total
+        rebound = total - flow.get("min_inflow", total)
+        data = {"total_net_flow": total, "max_inflow": flow.get("max_inflow"),
+                "min_inflow": flow.get("min_inflow"), "unit": flow.get("unit", "亿元")}
+        if drop >= swing:
+            events.append(Event(NORTHBOUND_SWING, "market:drop", f"北向自盘中高点回落{drop:.1f}亿", 2,
+                                dict(data, swing=round(-drop, 2))))
+        if rebound >= swing:
+            events.append(Event(NORTHBOUND_SWING, "market:rebound", f"北向自盘中低点反弹{rebound:.1f}亿", 2,
+                                dict(data, swing=round(rebound, 2))))
+        return self._publish(events)
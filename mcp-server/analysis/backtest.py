@@ -0,0 +1,346 @@
+"""Backtest — 在缓存日K上向量化回放 TradingScore V2, 按信号档统计命中率和前瞻收益.
+
+技术面/资金面/市场面逐根K线复算 (规则同 compute_technical / compute_capital / compute_stock_score),
+基本面与消息面没有历史数据, 取中性 50. 各维度分数只算一次 (build_panel),
+换权重或信号阈值只需重新加权分档 (evaluate), 可直接用于网格扫描.
+"""
+
+from __future__ import annotations
+
+import logging
+import sys
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from config import get_config
+
+logger = logging.getLogger(__name__)
+
+SIGNALS = ("STRONG_BUY", "BUY", "WATCH", "HOLD", "SELL", "STRONG_SELL")
+# 命中方向: 买入档看涨, 卖出档看跌, WATCH/HOLD 只给上涨比例
+DIRECTION = {"STRONG_BUY": 1, "BUY": 1, "SELL": -1, "STRONG_SELL": -1}
+
+DEFAULT_WEIGHTS = {"technical": 0.25, "capital": 0.30, "fundamental": 0.10, "sentiment": 0.20, "market": 0.15}
+# 与 scoring._get_signal 的缺省值一致
+DEFAULT_SIGNALS = {"strong_buy": 80, "buy": 65, "watch": 50, "hold": 35, "sell": 22, "strong_sell": 18}
+DEFAULT_HORIZONS = (1, 5, 10, 20)
+WARMUP = 20          # compute_technical 少于 20 根返回中性分, 回放同样跳过
+NEUTRAL = 50.0
+SQL_CHUNK = 500      # 单条 SQL 的代码数 (SQLite 变量数上限)
+
+
+def scoring_params(weights: dict | None = None, signals: dict | None = None) -> tuple[dict, dict]:
+    """settings.yaml scoring.weights / scoring.signals, 可按键覆盖. 权重归一化为和 1."""
+    cfg = get_config().get("scoring", {}) or {}
+    w = {k: float((cfg.get("weights") or {}).get(k, v)) for k, v in DEFAULT_WEIGHTS.items()}
+    w.update(weights or {})
+    total = sum(w.values())
+    if total > 0 and abs(total - 1.0) > 0.001:
+        w = {k: v / total for k, v in w.items()}
+    s = {k: float((cfg.get("signals") or {}).get(k, v)) for k, v in DEFAULT_SIGNALS.items()}
+    s.update(signals or {})
+    return w, s
+
+
+# ── 逐根K线的维度分数 ─────────────────────────────────────────
+
+
+def _rsi(close: pd.Series, length: int) -> pd.Series:
+    """Wilder RSI (pandas-ta 同口径, RMA 平滑)."""
+    diff = close.diff()
+    up = diff.clip(lower=0).ewm(alpha=1 / length, adjust=False).mean()
+    down = (-diff.clip(upper=0)).ewm(alpha=1 / length, adjust=False).mean()
+    return 100 * up / (up + down)
+
+
+def technical_scores(df: pd.DataFrame) -> tuple[np.ndarray, np.ndarray]:
+    """每根K线的技术面分数 (compute_technical 规则) 和 RSI14. 前 WARMUP-1 根为中性分."""
+    close = df["close"].astype(float)
+    high = df["high"].astype(float)
+    low = df["low"].astype(float)
+    score = np.full(len(df), NEUTRAL)
+
+    # MACD 12/26/9
+    macd = close.ewm(span=12, adjust=False).mean() - close.ewm(span=26, adjust=False).mean()
+    hist = (macd - macd.ewm(span=9, adjust=False).mean()).to_numpy()
+    prev_hist = np.roll(hist, 1)
+    prev_hist[0] = np.nan
+    score += np.select(
+        [(hist > 0) & (prev_hist <= 0), (hist < 0) & (prev_hist >= 0), hist > 0, hist < 0],
+        [6, -6, 2, -2], 0)
+
+    # RSI14 / RSI6
+    rsi = _rsi(close, 14).to_numpy()
+    score += np.select([rsi > 80, rsi > 70, rsi < 20, rsi < 30], [-4, -2, 4, 2], 0)
+    rsi6 = _rsi(close, 6).to_numpy()
+    score += np.select([rsi6 > 85, rsi6 < 15], [-2, 2], 0)
+
+    # KDJ (stoch 14/3/3)
+    lowest, highest = low.rolling(14).min(), high.rolling(14).max()
+    raw_k = 100 * (close - lowest) / (highest - lowest).replace(0, np.nan)
+    k_series = raw_k.rolling(3).mean()
+    d_series = k_series.rolling(3).mean()
+    k, d = k_series.to_numpy(), d_series.to_numpy()
+    pk, pd_ = k_series.shift(1).to_numpy(), d_series.shift(1).to_numpy()
+    cross = (k > d) & (pk <= pd_)
+    score += np.select(
+        [cross & (k > 80), cross, (k > d) & (k > 85), k > d, (k < d) & (k < 20), k < d],
+        [-1, 4, 0, 1, 2, -2], 0)
+
+    # 均线排列 / 突破
+    c = close.to_numpy()
+    ma5, ma10 = close.rolling(5).mean().to_numpy(), close.rolling(10).mean().to_numpy()
+    ma20_s = close.rolling(20).mean()
+    ma20 = ma20_s.to_numpy()
+    score += np.select([(c > ma5) & (ma5 > ma10) & (ma10 > ma20),
+                        (c < ma5) & (ma5 < ma10) & (ma10 < ma20)], [4, -4], 0)
+    breakout = (c > ma20) & (close.shift(1).to_numpy() <= ma20_s.shift(1).to_numpy())
+    score += np.where(breakout, 3, 0)
+    for window, above, below in ((60, 2, -1), (120, 1, -1)):
+        ma = close.rolling(window).mean().to_numpy()
+        score += np.where(np.isnan(ma), 0, np.where(c > ma, above, below))
+
+    # 布林带位置
+    std = close.rolling(20).std(ddof=0).to_numpy()
+    upper, lower = ma20 + 2 * std, ma20 - 2 * std
+    with np.errstate(invalid="ignore", divide="ignore"):
+        pos = np.where(upper > lower, (c - lower) / (upper - lower), np.nan)
+    score += np.select([pos > 0.95, pos < 0.05], [-3, 3], 0)
+
+    score = np.clip(score, 0, 100)
+    score[:WARMUP - 1] = NEUTRAL
+    return score, np.nan_to_num(rsi, nan=NEUTRAL)
+
+
+def capital_scores(df: pd.DataFrame) -> np.ndarray:
+    """每根K线的资金面分数 (compute_capital 规则).
+
+    量比取当日成交量 / 前 5 日均量, 成交额比同理; 换手率、盘口价差、主力资金无历史数据, 不计分.
+    """
+    change = df["close"].astype(float).pct_change().to_numpy() * 100
+    volume = df["volume"].astype(float)
+    amount = df["amount"].astype(float) if "amount" in df else pd.Series(np.nan, index=df.index)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        vr = (volume / volume.shift(1).rolling(5).mean()).to_numpy()
+        ar = (amount / amount.shift(1).rolling(5).mean()).to_numpy()
+    vr = np.where(np.isfinite(vr), vr, 0.0)
+    ar = np.where(np.isfinite(ar) & (amount.to_numpy() > 0), ar, np.nan)
+
+    score = np.full(len(df), NEUTRAL)
+    score += np.select([vr > 5, vr > 3, vr > 1.5, (vr > 0) & (vr < 0.5)], [8, 5, 2, -3], 0)
+    score += np.select([ar > 3, ar > 1.5, ar < 0.5], [5, 2, -2], 0)
+    # 量价背离
+    score += np.select([(change > 2) & (vr > 0) & (vr < 0.8), (change < -2) & (vr > 3)], [-4, -3], 0)
+    # 放量方向修正
+    score += np.select([(vr > 2) & (change > 3), (vr > 2) & (change < -3)], [-3, -5], 0)
+    return np.clip(score, 0, 100)
+
+
+def market_scores(index_df: pd.DataFrame | None) -> pd.Series | None:
+    """大盘指数日K → 按日期索引的市场面分数. 无指数数据返回 None (回放时取中性分).
+
+    市场情绪基础分无法回放, 以 50 为基准, 只复现 compute_stock_score 的连涨/连跌加减分.
+    """
+    if index_df is None or index_df.empty:
+        return None
+    closes = index_df.drop_duplicates("date", keep="last").set_index("date")["close"].astype(float)
+    closes.index = closes.index.astype(str)
+    sign = np.sign(closes.diff()).fillna(0)
+    streak = sign.groupby((sign != sign.shift()).cumsum()).cumcount() + 1
+    up = np.where(sign > 0, streak, 0)
+    down = np.where(sign < 0, streak, 0)
+    score = NEUTRAL + np.select([up >= 5, up >= 3], [-10, -5], 0) + np.select([down >= 5, down >= 3], [8, 4], 0)
+    return pd.Series(np.clip(score, 15, 85), index=closes.index)
+
+
+# ── 面板: 多只股票的维度分数与前瞻收益 ─────────────────────────
+
+
+@dataclass
+class Panel:
+    """按行堆叠的回放结果, 每行是一只股票的一个交易日."""
+    codes: np.ndarray
+    dates: np.ndarray
+    change_pct: np.ndarray
+    technical: np.ndarray
+    capital: np.ndarray
+    market: np.ndarray
+    rsi: np.ndarray
+    forward: dict[int, np.ndarray] = field(default_factory=dict)  # 持有 h 天收益 (%), 末尾不足 h 天为 NaN
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+
+def replay(df: pd.DataFrame, market: pd.Series | None = None,
+           horizons: tuple[int, ...] = DEFAULT_HORIZONS) -> pd.DataFrame:
+    """单只股票日K (date/open/high/low/close/volume/amount, 按日期升序) 的逐日维度分数.
+
+    market 为 market_scores() 的结果; 首 WARMUP-1 根只用于指标预热, 不输出.
+    """
+    df = df.drop_duplicates("date", keep="last").reset_index(drop=True)
+    tech, rsi = technical_scores(df)
+    close = df["close"].astype(float)
+    dates = df["date"].astype(str)
+    out = pd.DataFrame({
+        "date": dates,
+        "change_pct": (close.pct_change() * 100).fillna(0).to_numpy(),
+        "technical": tech,
+        "capital": capital_scores(df),
+        "market": NEUTRAL if market is None else market.reindex(dates.to_numpy()).fillna(NEUTRAL).to_numpy(),
+        "rsi": rsi,
+    })
+    for h in horizons:
+        out[f"fwd_{h}"] = ((close.shift(-h) / close - 1) * 100).to_numpy()
+    return out.iloc[WARMUP - 1:]
+
+
+def build_panel(frames: dict[str, pd.DataFrame], index_df: pd.DataFrame | None = None,
+                horizons: tuple[int, ...] = DEFAULT_HORIZONS) -> Panel:
+    """多只股票 {code: 日K} → Panel. 不足 WARMUP 根的股票跳过."""
+    market = market_scores(index_df)
+    parts, codes = [], []
+    for code, df in frames.items():
+        if df is None or len(df) < WARMUP:
+            continue
+        part = replay(df, market, horizons)
+        parts.append(part)
+        codes.append(np.full(len(part), code, dtype=object))
+    if not parts:
+        empty = np.zeros(0)
+        return Panel(np.zeros(0, dtype=object), np.zeros(0, dtype=object), empty, empty, empty, empty, empty,
+                     {h: empty for h in horizons})
+    data = pd.concat(parts, ignore_index=True)
+    return Panel(
+        codes=np.concatenate(codes),
+        dates=data["date"].to_numpy(dtype=object),
+        change_pct=data["change_pct"].to_numpy(dtype=float),
+        technical=data["technical"].to_numpy(dtype=float),
+        capital=data["capital"].to_numpy(dtype=float),
+        market=data["market"].to_numpy(dtype=float),
+        rsi=data["rsi"].to_numpy(dtype=float),
+        forward={h: data[f"fwd_{h}"].to_numpy(dtype=float) for h in horizons},
+    )
+
+
+def code_counts(panel: Panel, loaded: int) -> dict:
+    """实际进入回放的股票数, 以及载入后因不足 WARMUP 根被 build_panel 跳过的数."""
+    used = len(np.unique(panel.codes)) if len(panel) else 0
+    return {"codes": used, "skipped_codes": loaded - used}
+
+
+# ── 加权、分档与统计 ───────────────────────────────────────────
+
+
+def score_panel(panel: Panel, weights: dict, signals: dict) -> tuple[np.ndarray, np.ndarray]:
+    """总分与信号档下标 (SIGNALS 顺序). 动量惩罚、10-90 截断与 RSI 降级同 compute_stock_score."""
+    total = (panel.technical * weights["technical"] + panel.capital * weights["capital"]
+             + NEUTRAL * (weights["fundamental"] + weights["sentiment"]) + panel.market * weights["market"])
+    chg = panel.change_pct
+    total = total - np.select([chg >= 9.5, chg >= 7, chg >= 5, chg <= -9.5, chg <= -7], [12, 6, 3, -8, -4], 0)
+    total = np.clip(total, 10, 90)
+    # 低于 sell 一律 STRONG_SELL (与 _get_signal 一致)
+    bucket = np.select(
+        [total >= signals["strong_buy"], total >= signals["buy"], total >= signals["watch"],
+         total >= signals["hold"], total >= signals["sell"]],
+        [0, 1, 2, 3, 4], 5)
+    watch = SIGNALS.index("WATCH")
+    bucket = np.where((panel.rsi > 80) & (bucket <= 1), watch, bucket)
+    bucket = np.where((panel.rsi < 20) & (bucket >= 4), watch, bucket)
+    return total, bucket
+
+
+def _stats(returns: np.ndarray, direction: int | None) -> dict:
+    returns = returns[~np.isnan(returns)]
+    if len(returns) == 0:
+        return {"count": 0}
+    up = float((returns > 0).mean())
+    stats = {
+        "count": int(len(returns)),
+        "mean": round(float(returns.mean()), 3),
+        "median": round(float(np.median(returns)), 3),
+        "up_rate": round(up, 4),
+    }
+    if direction is not None:
+        stats["hit_rate"] = round(up if direction > 0 else float((returns < 0).mean()), 4)
+    return stats
+
+
+def evaluate(panel: Panel, weights: dict | None = None, signals: dict | None = None) -> dict:
+    """按信号档统计各持有期的样本数、平均/中位收益 (%)、上涨比例与命中率.
+
+    "all" 为全部样本的基准; 各档 excess 为该档平均收益减基准平均收益.
+    """
+    weights, signals = scoring_params(weights, signals)
+    total, bucket = score_panel(panel, weights, signals)
+    baseline = {f"{h}d": _stats(r, None) for h, r in panel.forward.items()}
+    buckets = {}
+    for i, name in enumerate(SIGNALS):
+        mask = bucket == i
+        per_h = {}
+        for h, r in panel.forward.items():
+            s = _stats(r[mask], DIRECTION.get(name))
+            if s["count"] and baseline[f"{h}d"]["count"]:
+                s["excess"] = round(s["mean"] - baseline[f"{h}d"]["mean"], 3)
+            per_h[f"{h}d"] = s
+        buckets[name] = {"count": int(mask.sum()), **per_h}
+    return {
+        "rows": len(panel),
+        "weights": {k: round(v, 4) for k, v in weights.items()},
+        "signals": signals,
+        "avg_score": round(float(total.mean()), 2) if len(total) else None,
+        "buckets": buckets,
+        "all": baseline,
+    }
+
+
+# ── 从 SQLiteKlineCache 载入 ──────────────────────────────────
+
+
+def _open_cache(db_path: str | None = None):
+    """工作区的 stock_data/cache.db (与 DataManager 的历史K线缓存同一文件)."""
+    from config import get_workspace_root
+    ws = get_workspace_root()
+    if str(ws) not in sys.path:
+        sys.path.insert(0, str(ws))
+    from stock_data.cache import SQLiteKlineCache
+    return SQLiteKlineCache(db_path or str(ws / "stock_data" / "cache.db"))
+
+
+def load_klines(codes: list[str] | None = None, start: str | None = None, end: str | None = None,
+                adjust: str = "", cache=None) -> dict[str, pd.DataFrame]:
+    """缓存日K {code: DataFrame}. codes=None 取缓存中全部代码; 多数据源重复日期保留最后一条."""
+    cache = cache or _open_cache()
+    if codes is None:
+        chunks = [cache.get_many(None, "daily", adjust, start, end)]
+    else:
+        chunks = [cache.get_many(codes[i:i + SQL_CHUNK], "daily", adjust, start, end)
+                  for i in range(0, len(codes), SQL_CHUNK)] or [pd.DataFrame()]
+    rows = pd.concat(chunks, ignore_index=True)
+    if rows.empty:
+        return {}
+    rows = rows.dropna(subset=["close"])
+    return {code: g.reset_index(drop=True) for code, g in rows.groupby("code", sort=False)}
+
+
+def run_backtest(codes: list[str] | None = None, start: str | None = None, end: str | None = None,
+                 horizons: tuple[int, ...] = DEFAULT_HORIZONS, weights: dict | None = None,
+                 signals: dict | None = None, index_code: str | None = None,
+                 adjust: str = "", cache=None) -> dict:
+    """载入缓存日K → 回放 → 分档统计. index_code 为缓存中的大盘指数日K (用于连涨/连跌修正)."""
+    cache = cache or _open_cache()
+    frames = load_klines(codes, start, end, adjust, cache)
+    index_df = None
+    if index_code:
+        index_df = frames.pop(index_code, None) if codes is None else \
+            load_klines([index_code], start, end, adjust, cache).get(index_code)
+        if index_df is None:
+            logger.warning(f"index {index_code} not in kline cache, market dimension stays neutral")
+    panel = build_panel(frames, index_df, horizons)
+    result = evaluate(panel, weights, signals)
+    result.update(code_counts(panel, len(frames)))
+    if len(panel):
+        result["period"] = {"start": str(panel.dates.min()), "end": str(panel.dates.max())}
+    return result
@@ -2,15 +2,20 @@
 
 from __future__ import annotations
 
+import functools
 import logging
 from dataclasses import dataclass, field
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
 from config import get_config
 from data_sources.base import QuoteData
+from utils.timing import span, timed
 from .technical import TechnicalSignal, compute_technical
 from .capital_flow import CapitalSignal, compute_capital
 
+if TYPE_CHECKING:
+    from data_sources.industry_index import IndustryIndex
+
 logger = logging.getLogger(__name__)
 
 
@@ -116,23 +121,54 @@ INDUSTRY_KEYWORDS = {
 }
 
 
-def _classify_industry(name: str) -> str:
-    """根据股票名称推断行业分类."""
-    if not name:
-        return "default"
+# 东财行业名 (f100) → PE 区间分组, 先于 INDUSTRY_KEYWORDS 匹配 (如 "化学制药" 应归医药而非化工)
+INDUSTRY_ALIASES = {
+    "酿酒": "白酒", "制药": "医药", "中药": "医药", "医疗": "医药", "生物制品": "医药",
+    "房地产": "地产", "食品": "消费", "饮料": "消费", "家电": "消费", "旅游": "消费",
+    "光伏": "新能源", "风电": "新能源", "电池": "新能源", "电网": "电力",
+    "能源金属": "有色", "贵金属": "有色", "小金属": "有色", "燃气": "石油",
+    "航天": "军工", "航空": "军工", "船舶": "军工",
+    "电子元件": "科技", "计算机": "科技", "软件": "科技", "互联网": "科技", "通信": "科技",
+    "游戏": "科技", "消费电子": "科技",
+}
+
+
+@functools.lru_cache(maxsize=8192)
+def _match_industry(text: str, aliases: bool) -> str:
+    if aliases:
+        for kw, industry in INDUSTRY_ALIASES.items():
+            if kw in text:
+                return industry
     for industry, keywords in INDUSTRY_KEYWORDS.items():
         for kw in keywords:
-            if kw in name:
+            if kw in text:
                 return industry
     return "default"
 
 
+def _classify_industry(name: str, code: str = "", index: IndustryIndex | None = None) -> str:
+    """行业分类: 优先查行业索引 (东财真实行业), 索引缺失时按股票名称关键词推断.
+
+    index 缺省为进程共享索引 get_industry_index() (可用 set_industry_index 替换).
+    """
+    if code:
+        if index is None:
+            from data_sources.industry_index import get_industry_index
+            index = get_industry_index()
+        real = index.get(code)
+        if real:
+            return _match_industry(real, True)
+    if not name:
+        return "default"
+    return _match_industry(name, False)
+
+
 def _get_pe_ranges(industry: str) -> dict:
     """获取行业PE合理区间."""
     return INDUSTRY_PE_RANGES.get(industry, INDUSTRY_PE_RANGES["default"])
 
 
-def _compute_fundamental(quote: QuoteData) -> dict:
+def _compute_fundamental(quote: QuoteData, industry_index: IndustryIndex | None = None) -> dict:
     """Compute fundamental score from PE/PB data."""
     score = 50.0
     signals = []
@@ -145,7 +181,7 @@ def _compute_fundamental(quote: QuoteData) -> dict:
         return {"score": score, "signals": signals, "pe": pe, "pb": pb}
 
     # PE scoring with industry classification
-    industry = _classify_industry(quote.name)
+    industry = _classify_industry(quote.name, quote.code, industry_index)
     pe_ranges = _get_pe_ranges(industry)
     
     if pe < pe_ranges["undervalued"]:
@@ -178,6 +214,7 @@ def _compute_fundamental(quote: QuoteData) -> dict:
     score = max(0, min(100, score))
     return {"score": round(score, 1), "signals": signals, "pe": pe, "pb": pb, "market_cap": quote.market_cap}
 
+@timed("scoring.compute_stock_score")
 def compute_stock_score(
     quote: QuoteData,
     daily_df: Any,
@@ -185,6 +222,7 @@ def compute_stock_score(
     avg_amount: float = 0,
     extra: dict = None,
     capital_flow_data: dict = None,  # 新增：主力资金数据
+    industry_index: IndustryIndex | None = None,
 ) -> StockScore:
     """Compute TradingScore V2 for a single stock.
 
@@ -193,6 +231,7 @@ def compute_stock_score(
     
     Args:
         capital_flow_data: 主力资金数据 (来自主力接口或龙虎榜)
+        industry_index: PE 分档用的行业索引, 缺省为进程共享索引
     """
     if extra is None:
         extra = {}
@@ -211,9 +250,11 @@ def compute_stock_score(
         w_sent /= w_total
         w_mkt /= w_total
 
-    tech = compute_technical(daily_df)
-    cap = compute_capital(quote, avg_volume=avg_volume, avg_amount=avg_amount, main_force_data=capital_flow_data)
-    fund = _compute_fundamental(quote)
+    with span("scoring.technical"):
+        tech = compute_technical(daily_df)
+    with span("scoring.capital"):
+        cap = compute_capital(quote, avg_volume=avg_volume, avg_amount=avg_amount, main_force_data=capital_flow_data)
+    fund = _compute_fundamental(quote, industry_index)
 
     sent_score = 50.0
     sent_signals = []
@@ -0,0 +1,204 @@
+"""Parameter sweep — 多进程网格扫描 scoring.weights / scoring.signals, 按样本外表现排序.
+
+父进程回放一次 (backtest.build_panel), 把维度分数与前瞻收益放进一块 SharedMemory;
+工作进程只读映射同一块内存, 每个网格点只做加权 + 分档, 不复制数据.
+样本内/样本外按日期切分, 切分点前留出持有期长度的隔离带, 避免前瞻收益跨越切分点.
+"""
+
+from __future__ import annotations
+
+import itertools
+import logging
+import math
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from .backtest import (
+    DIRECTION, SIGNALS, Panel, build_panel, code_counts, load_klines, scoring_params, score_panel,
+)
+
+logger = logging.getLogger(__name__)
+
+COLUMNS = ("change_pct", "technical", "capital", "market", "rsi", "forward", "in_sample", "out_sample")
+BUY = [SIGNALS.index(s) for s, d in DIRECTION.items() if d > 0]
+SELL = [SIGNALS.index(s) for s, d in DIRECTION.items() if d < 0]
+OBJECTIVES = ("spread", "buy_mean", "buy_hit")
+CHUNK = 32           # 每个任务的网格点数, 摊薄进程间调度开销
+
+_shared: dict = {}   # 工作进程内: SharedMemory 句柄与数组视图
+
+
+def grid(weights: dict[str, list[float]] | None = None,
+         signals: dict[str, list[float]] | None = None) -> list[tuple[dict, dict]]:
+    """笛卡尔积网格. 未列出的键取 settings.yaml 当前值; 权重在评估时归一化.
+
+    阈值组合须保持 strong_buy > buy > watch > hold > sell, 不满足的组合被剔除.
+    """
+    weights, signals = weights or {}, signals or {}
+    w_keys, s_keys = list(weights), list(signals)
+    points = []
+    for w_vals in itertools.product(*(weights[k] for k in w_keys)):
+        for s_vals in itertools.product(*(signals[k] for k in s_keys)):
+            w, s = scoring_params(dict(zip(w_keys, w_vals)), dict(zip(s_keys, s_vals)))
+            order = [s["strong_buy"], s["buy"], s["watch"], s["hold"], s["sell"]]
+            if sum(w.values()) <= 0 or any(a <= b for a, b in zip(order, order[1:])):
+                continue
+            points.append((dict(zip(w_keys, w_vals)), dict(zip(s_keys, s_vals))))
+    return points
+
+
+def default_grid() -> list[tuple[dict, dict]]:
+    """以当前配置为中心的网格: 各权重 ±0.1 (步长 0.05), buy/strong_buy/sell 阈值 ±6 (步长 3)."""
+    w, s = scoring_params()
+    steps = (-0.1, -0.05, 0, 0.05, 0.1)
+    weights = {k: sorted({round(max(0.0, w[k] + d), 4) for d in steps})
+               for k in ("technical", "capital", "market")}
+    signals = {k: [s[k] + d for d in (-6, -3, 0, 3, 6)] for k in ("strong_buy", "buy", "sell")}
+    return grid(weights, signals)
+
+
+def split_masks(dates: np.ndarray, split: str, embargo: int) -> tuple[np.ndarray, np.ndarray]:
+    """样本内 = 切分日前 embargo 个交易日之前; 样本外 = 切分日及之后."""
+    days = np.unique(dates)
+    idx = int(np.searchsorted(days, split))
+    cutoff = days[max(0, idx - embargo)] if len(days) else split
+    return dates < cutoff, dates >= split
+
+
+def metrics(bucket: np.ndarray, forward: np.ndarray, mask: np.ndarray) -> dict:
+    """mask 范围内买入档/卖出档的样本数、平均收益 (%) 与命中率, 及多空收益差."""
+    valid = mask & ~np.isnan(forward)
+    out = {}
+    for side, idx, sign in (("buy", BUY, 1), ("sell", SELL, -1)):
+        sel = valid & np.isin(bucket, idx)
+        r = forward[sel]
+        out[f"{side}_count"] = int(len(r))
+        out[f"{side}_mean"] = round(float(r.mean()), 4) if len(r) else None
+        out[f"{side}_hit"] = round(float((r * sign > 0).mean()), 4) if len(r) else None
+    if out["buy_mean"] is not None and out["sell_mean"] is not None:
+        out["spread"] = round(out["buy_mean"] - out["sell_mean"], 4)
+    else:
+        out["spread"] = None
+    return out
+
+
+def _share(panel: Panel, horizon: int, in_sample: np.ndarray, out_sample: np.ndarray):
+    """面板数组拷入一块 SharedMemory, 返回 (句柄, 形状)."""
+    cols = [panel.change_pct, panel.technical, panel.capital, panel.market, panel.rsi,
+            panel.forward[horizon], in_sample, out_sample]
+    shape = (len(cols), len(panel))
+    shm = shared_memory.SharedMemory(create=True, size=max(1, math.prod(shape) * 8))
+    block = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+    for i, col in enumerate(cols):
+        block[i] = col
+    return shm, shape
+
+
+def _attach(name: str, shape: tuple[int, int]):
+    """工作进程初始化: 只读映射父进程的共享块."""
+    shm = shared_memory.SharedMemory(name=name)
+    block = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+    block.flags.writeable = False
+    _shared.update(shm=shm, block=block)
+
+
+def _evaluate_points(points: list[tuple[dict, dict]]) -> list[dict]:
+    block = _shared["block"]
+    col = dict(zip(COLUMNS, block))
+    empty = np.zeros(0, dtype=object)
+    # 只需打分用到的列; codes/dates 不进共享块
+    panel = Panel(empty, empty, col["change_pct"], col["technical"], col["capital"], col["market"], col["rsi"])
+    in_sample, out_sample = col["in_sample"] > 0, col["out_sample"] > 0
+    results = []
+    for w_over, s_over in points:
+        weights, signals = scoring_params(w_over, s_over)
+        _, bucket = score_panel(panel, weights, signals)
+        results.append({
+            "weights": {k: round(v, 4) for k, v in weights.items()},
+            "signals": signals,
+            "in_sample": metrics(bucket, col["forward"], in_sample),
+            "out_of_sample": metrics(bucket, col["forward"], out_sample),
+        })
+    return results
+
+
+def rank(results: list[dict], objective: str = "spread", min_count: int = 30) -> list[dict]:
+    """按样本外 objective 降序; 样本外买入档 (spread 还要求卖出档) 不足 min_count 的排在最后."""
+    def key(r):
+        oos = r["out_of_sample"]
+        enough = oos["buy_count"] >= min_count and (objective != "spread" or oos["sell_count"] >= min_count)
+        value = oos.get(objective)
+        return (enough and value is not None, value if value is not None else -math.inf)
+    return sorted(results, key=key, reverse=True)
+
+
+def run_sweep(panel: Panel, points: list[tuple[dict, dict]], split: str, horizon: int = 5,
+              workers: int | None = None, objective: str = "spread", min_count: int = 30,
+              top: int = 20) -> dict:
+    """在 panel 上评估全部网格点, 返回按样本外表现排序的前 top 个配置.
+
+    workers=1 时在本进程内执行 (调试/小网格). 工作进程用 spawn 启动, 不继承调用方 (如 daemon 事件循环) 的线程状态.
+    """
+    if objective not in OBJECTIVES:
+        raise ValueError(f"unknown objective: {objective}, expected one of {OBJECTIVES}")
+    if horizon not in panel.forward:
+        raise ValueError(f"horizon {horizon} not in panel (have {sorted(panel.forward)})")
+    in_sample, out_sample = split_masks(panel.dates, split, horizon)
+    shm, shape = _share(panel, horizon, in_sample, out_sample)
+    chunks = [points[i:i + CHUNK] for i in range(0, len(points), CHUNK)]
+    workers = workers or os.cpu_count() or 1
+    try:
+        if workers <= 1 or len(chunks) <= 1:
+            _attach(shm.name, shape)
+            try:
+                results = [r for chunk in chunks for r in _evaluate_points(chunk)]
+            finally:
+                _shared.pop("block", None)
+                _shared.pop("shm").close()
+        else:
+            with ProcessPoolExecutor(max_workers=min(workers, len(chunks)), initializer=_attach,
+                                     initargs=(shm.name, shape),
+                                     mp_context=multiprocessing.get_context("spawn")) as pool:
+                results = [r for batch in pool.map(_evaluate_points, chunks) for r in batch]
+    finally:
+        shm.close()
+        shm.unlink()
+
+    ranked = rank(results, objective, min_count)
+    w, s = scoring_params()
+    current = next((r for r in results if r["weights"] == {k: round(v, 4) for k, v in w.items()}
+                    and r["signals"] == s), None)
+    return {
+        "points": len(results),
+        "rows": {"in_sample": int(in_sample.sum()), "out_of_sample": int(out_sample.sum())},
+        "split": split,
+        "horizon": horizon,
+        "objective": objective,
+        "current": current,
+        "top": ranked[:top],
+    }
+
+
+def sweep(codes: list[str] | None = None, start: str | None = None, end: str | None = None,
+          split: str | None = None, points: list[tuple[dict, dict]] | None = None,
+          horizon: int = 5, index_code: str | None = None, cache=None, **kwargs) -> dict:
+    """载入缓存日K → 回放一次 → 网格扫描. split 缺省取样本日期的 70% 分位."""
+    frames = load_klines(codes, start, end, cache=cache)
+    index_df = None
+    if index_code:
+        index_df = frames.pop(index_code, None) if codes is None else \
+            load_klines([index_code], start, end, cache=cache).get(index_code)
+    panel = build_panel(frames, index_df, (horizon,))
+    if not len(panel):
+        return {"error": "no cached klines", **code_counts(panel, len(frames))}
+    if split is None:
+        days = np.unique(panel.dates)
+        split = str(days[int(len(days) * 0.7)])
+    result = run_sweep(panel, points if points is not None else default_grid(), split, horizon, **kwargs)
+    result.update(code_counts(panel, len(frames)))
+    return result
+
@@ -4,8 +4,10 @@ from __future__ import annotations
 
 import logging
 from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
 
-import pandas as pd
+if TYPE_CHECKING:
+    import pandas as pd  # 仅用于注解, 运行时由调用方传入 DataFrame
 
 logger = logging.getLogger(__name__)
 
@@ -0,0 +1,216 @@
+"""Intraday recorder — append-only fixed-width numpy records, one file per trading day and stream.
+
+分钟线/快照按定长记录追加写入 (flock 互斥), 读取走 memmap 不整体载入;
+已记录的分钟不再重复写, 下次轮询只需拉取/解析增量, 全天序列可回放.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+from datetime import datetime
+from typing import Iterable
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+from utils.cache import CACHE_DIR, _file_lock
+
+logger = logging.getLogger(__name__)
+
+INTRADAY_DIR = os.path.join(CACHE_DIR, "intraday")
+CN_TZ = ZoneInfo("Asia/Shanghai")
+
+# minute 为 HHMM 整数 (如 931), 快照 ts 为 HHMMSS
+MINUTE_BAR = np.dtype([
+    ("code", "S6"), ("minute", "<u2"), ("price", "<f4"), ("amount", "<f8"),
+    ("avg_price", "<f4"), ("volume", "<i8"),
+])
+FLOW_BAR = np.dtype([
+    ("code", "S6"), ("minute", "<u2"), ("main_net", "<f8"), ("small_net", "<f8"),
+    ("mid_net", "<f8"), ("big_net", "<f8"), ("super_big_net", "<f8"),
+])
+QUOTE_SNAPSHOT = np.dtype([
+    ("code", "S6"), ("ts", "<u4"), ("price", "<f4"), ("change_pct", "<f4"),
+    ("volume", "<f8"), ("amount", "<f8"), ("volume_ratio", "<f4"),
+    ("outer_vol", "<f8"), ("inner_vol", "<f8"),
+])
+
+STREAMS = {"bars": MINUTE_BAR, "flow": FLOW_BAR, "quotes": QUOTE_SNAPSHOT}
+
+
+def trading_day(now: datetime | None = None) -> str:
+    return (now or datetime.now(CN_TZ)).strftime("%Y%m%d")
+
+
+def parse_minute(text: str) -> int:
+    """'0931' / '09:31' / '2025-01-02 09:31' → 931."""
+    return int(text.strip()[-5:].replace(":", "")[-4:])
+
+
+def _trading_index(hhmm: int) -> int:
+    """HHMM → 当日第几个交易分钟 (9:30=0, 午休不计, 15:00=240)."""
+    m = hhmm // 100 * 60 + hhmm % 100
+    if m <= 11 * 60 + 30:
+        return max(0, m - (9 * 60 + 30))
+    if m < 13 * 60:
+        return 120
+    return min(240, 120 + m - 13 * 60)
+
+
+def minutes_since(hhmm: int, now: datetime | None = None) -> int:
+    """从 hhmm 到现在经过的交易分钟数."""
+    now = now or datetime.now(CN_TZ)
+    return max(0, _trading_index(now.hour * 100 + now.minute) - _trading_index(hhmm))
+
+
+def closed_minutes(rows: Iterable[dict], day: str, now: datetime | None = None,
+                   field: str = "minute") -> list[dict]:
+    """去掉可能尚未收盘的分钟线: 当天不早于当前分钟的 (盘中最新一根); 收盘后的 15:00 及历史交易日全部保留."""
+    now = now or datetime.now(CN_TZ)
+    today = now.strftime("%Y%m%d")
+    if day < today:
+        return list(rows)
+    if day > today:
+        return []
+    hhmm = now.hour * 100 + now.minute
+    return [r for r in rows if r[field] < hhmm]
+
+
+class IntradayRecorder:
+    """单一数据流 (bars / flow / quotes) 的日内记录器.
+
+    同一进程内按 (day, code) 缓存最后记录的时间, 文件大小变化 (其他进程写入) 时重新扫描.
+    """
+
+    def __init__(self, stream: str, root: str = INTRADAY_DIR):
+        self.stream = stream
+        self.dtype = STREAMS[stream]
+        self.time_field = "ts" if stream == "quotes" else "minute"
+        self.root = root
+        self._last: dict[str, tuple[int, dict[bytes, int]]] = {}  # day -> (文件大小, code -> 最后时间)
+
+    def path(self, day: str) -> str:
+        return os.path.join(self.root, f"{day}.{self.stream}")
+
+    def read(self, day: str | None = None) -> np.ndarray:
+        """整天记录的 memmap 视图 (只读). 末尾不完整的记录 (写入中) 被忽略."""
+        path = self.path(day or trading_day())
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            return np.zeros(0, self.dtype)
+        count = size // self.dtype.itemsize
+        if count == 0:
+            return np.zeros(0, self.dtype)
+        return np.memmap(path, dtype=self.dtype, mode="r", shape=(count,))
+
+    def series(self, code: str, day: str | None = None) -> np.ndarray:
+        """单只标的按时间排序的记录, 同一时间点保留最后写入的一条."""
+        data = self.read(day)
+        rows = data[data["code"] == code.encode()]
+        if len(rows) == 0:
+            return np.array(rows)
+        # 逆序后 unique 取首次出现 = 原序最后一次写入
+        times = rows[self.time_field][::-1]
+        _, idx = np.unique(times, return_index=True)
+        return np.array(rows[::-1][idx])
+
+    def last_time(self, code: str, day: str | None = None) -> int | None:
+        day = day or trading_day()
+        path = self.path(day)
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        cached = self._last.get(day)
+        if cached is None or cached[0] != size:
+            data = self.read(day)
+            index: dict[bytes, int] = {}
+            if len(data):
+                codes, inverse = np.unique(data["code"], return_inverse=True)
+                latest = np.zeros(len(codes), dtype=np.int64)
+                np.maximum.at(latest, inverse, data[self.time_field].astype(np.int64))
+                index = dict(zip(codes.tolist(), latest.tolist()))
+            cached = self._last[day] = (size, index)
+        return cached[1].get(code.encode())
+
+    def append(self, code: str, rows: Iterable[dict], day: str | None = None) -> int:
+        """追加晚于已记录时间的行, 返回实际写入条数.
+
+        已记录时间在持锁后重新确认 (last_time 按文件大小发现其他进程的写入), 写完后的索引与
+        文件大小同在锁内更新, 多个进程同时追加也不会重复写同一分钟.
+        """
+        day = day or trading_day()
+        rows = list(rows)
+        last = self.last_time(code, day)
+        if not any(last is None or r[self.time_field] > last for r in rows):
+            return 0  # 快速路径: 已记录时间只增不减, 锁外判定为旧数据即可返回
+        fields = [f for f in self.dtype.names if f != "code"]
+        os.makedirs(self.root, exist_ok=True)
+        path = self.path(day)
+        with _file_lock(path):
+            last = self.last_time(code, day)
+            fresh = [r for r in rows if last is None or r[self.time_field] > last]
+            if not fresh:
+                return 0
+            arr = np.zeros(len(fresh), self.dtype)
+            arr["code"] = code.encode()
+            for f in fields:
+                arr[f] = [r.get(f, 0) for r in fresh]
+            size = os.path.getsize(path) if os.path.exists(path) else 0
+            with open(path, "ab") as fh:
+                # 截掉崩溃残留的半条记录, 保持定长对齐
+                fh.truncate(size - size % self.dtype.itemsize)
+                fh.write(arr.tobytes())
+            # last_time 刚在锁内按当前文件重建/确认过索引, 补上本次写入即与新文件大小一致
+            index = self._last[day][1]
+            index[code.encode()] = int(arr[self.time_field].max())
+            self._last[day] = (os.path.getsize(path), index)
+        return len(fresh)
+
+    def splice(self, code: str, rows: list[dict], now: datetime | None = None) -> list[dict]:
+        """本次拉取的 rows (按时间升序, 可带 "day") 接在已记录的更早部分之后, 返回完整序列.
+
+        已收盘的分钟写入记录; 盘中最新一根可能尚未收盘, 下次再写 (见 closed_minutes).
+        """
+        if not rows:
+            return rows
+        day = rows[0].get("day") or trading_day()
+        first = rows[0][self.time_field]
+        earlier = [r for r in to_dicts(self.series(code, day)) if r[self.time_field] < first]
+        same_day = [r for r in rows if r.get("day", day) == day]
+        self.append(code, closed_minutes(same_day, day, now, self.time_field), day)
+        return earlier + rows
+
+    def record_quotes(self, quotes: Iterable) -> int:
+        """QuoteData 快照按 timestamp (YYYYMMDDHHMMSS) 归档到对应交易日."""
+        by_day: dict[str, dict[str, list[dict]]] = {}
+        for q in quotes:
+            stamp = str(getattr(q, "timestamp", "") or "")
+            if len(stamp) < 14 or not stamp[:14].isdigit():
+                continue
+            row = {f: getattr(q, f, 0) or 0 for f in self.dtype.names if f not in ("code", "ts")}
+            row["ts"] = int(stamp[8:14])
+            by_day.setdefault(stamp[:8], {}).setdefault(q.code, []).append(row)
+        return sum(self.append(code, rows, day)
+                   for day, per_code in by_day.items() for code, rows in per_code.items())
+
+
+def to_dicts(rows: np.ndarray) -> list[dict]:
+    """记录数组 → dict 列表 (code 解码为 str)."""
+    names = rows.dtype.names
+    out = []
+    for rec in rows.tolist():
+        d = dict(zip(names, rec))
+        if "code" in d:
+            d["code"] = d["code"].decode()
+        out.append(d)
+    return out
+
+
+_recorders: dict[str, IntradayRecorder] = {}
+
+
+def get_recorder(stream: str) -> IntradayRecorder:
+    rec = _recorders.get(stream)
+    if rec is None:
+        rec = _recorders[stream] = IntradayRecorder(stream)
+    return rec
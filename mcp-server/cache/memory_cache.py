@@ -1,62 +1,214 @@
-"""In-memory LRU cache with TTL for real-time and short-lived data."""
+"""In-memory LRU cache with TTL, bounded by entry count and estimated bytes."""
 
 from __future__ import annotations
 
+import dataclasses
 import logging
+import sys
+import threading
 import time
 from collections import OrderedDict
-from typing import Any
+from typing import Any, Callable
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_NAMESPACE = "default"
+SAMPLE_ITEMS = 32    # 大容器只估算前 N 个元素, 按数量外推 (缓存值通常是同构列表)
+MAX_DEPTH = 6
+
+
+def estimate_size(value: Any, _depth: int = 0, _seen: set | None = None) -> int:
+    """近似深度字节数. DataFrame/ndarray 用自身统计; 容器递归, 元素多时抽样外推."""
+    if _seen is None:
+        _seen = set()
+    if id(value) in _seen:
+        return 0
+    _seen.add(id(value))
+    size = sys.getsizeof(value, 64)
+    if _depth >= MAX_DEPTH or isinstance(value, (str, bytes, bytearray, int, float, bool, type(None))):
+        return size
+
+    memory_usage = getattr(value, "memory_usage", None)
+    if callable(memory_usage):  # pandas DataFrame / Series
+        try:
+            usage = memory_usage(deep=True)
+            return int(usage.sum() if hasattr(usage, "sum") else usage)
+        except (TypeError, ValueError):
+            pass
+    nbytes = getattr(value, "nbytes", None)
+    if isinstance(nbytes, int):  # numpy ndarray
+        return size + nbytes
+
+    if isinstance(value, dict):
+        items = list(value.items())
+        sample = items[:SAMPLE_ITEMS]
+        inner = sum(estimate_size(k, _depth + 1, _seen) + estimate_size(v, _depth + 1, _seen) for k, v in sample)
+        return size + (inner * len(items) // len(sample) if sample else 0)
+    if isinstance(value, (list, tuple, set, frozenset)):
+        items = value if isinstance(value, (list, tuple)) else list(value)
+        sample = items[:SAMPLE_ITEMS]
+        inner = sum(estimate_size(v, _depth + 1, _seen) for v in sample)
+        return size + (inner * len(items) // len(sample) if sample else 0)
+
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        fields = [getattr(value, f.name, None) for f in dataclasses.fields(value)]
+        return size + sum(estimate_size(v, _depth + 1, _seen) for v in fields)
+    attrs = getattr(value, "__dict__", None)
+    if isinstance(attrs, dict):
+        return size + estimate_size(attrs, _depth + 1, _seen)
+    return size
+
+
+class _Entry:
+    __slots__ = ("value", "expires_at", "size", "namespace", "touched")
+
+    def __init__(self, value: Any, expires_at: float, size: int, namespace: str):
+        self.value = value
+        self.expires_at = expires_at
+        self.size = size
+        self.namespace = namespace
+        self.touched = time.monotonic()
+
 
 class MemoryCache:
-    """Thread-safe in-memory cache with TTL eviction and max capacity."""
+    """Thread-safe in-memory cache with TTL eviction, entry and byte limits.
+
+    Entries live in per-namespace LRU lists. The namespace comes from the ``namespace``
+    argument, or the key prefix before ``:`` ("realtime:600519_..." → "realtime").
+    A namespace over its quota evicts its own least recently used entries; when the
+    whole cache is over ``max_bytes`` / ``max_size``, the globally least recently
+    used entry goes first. Values larger than their budget are not cached.
+    """
 
-    def __init__(self, max_size: int = 2000, default_ttl: int = 30):
-        self._store: OrderedDict[str, tuple[Any, float]] = OrderedDict()
+    def __init__(self, max_size: int = 2000, default_ttl: int = 30, max_bytes: int | None = None,
+                 quotas: dict[str, int] | None = None, sizer: Callable[[Any], int] = estimate_size):
+        self._spaces: dict[str, OrderedDict[str, _Entry]] = {}
+        self._index: dict[str, _Entry] = {}
         self._max_size = max_size
         self._default_ttl = default_ttl
+        self._max_bytes = max_bytes
+        self._quotas = dict(quotas or {})
+        self._sizer = sizer
+        self._bytes = 0
+        self._space_bytes: dict[str, int] = {}
         self._hits = 0
         self._misses = 0
+        self._evictions = 0
+        self._rejected = 0
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def namespace_of(key: str) -> str:
+        return key.split(":", 1)[0] if ":" in key else DEFAULT_NAMESPACE
+
+    def _remove(self, key: str) -> _Entry | None:
+        entry = self._index.pop(key, None)
+        if entry is not None:
+            del self._spaces[entry.namespace][key]
+            self._bytes -= entry.size
+            self._space_bytes[entry.namespace] -= entry.size
+        return entry
 
     def get(self, key: str) -> Any | None:
-        entry = self._store.get(key)
-        if entry is None:
-            self._misses += 1
-            return None
-        value, expires_at = entry
-        if time.time() > expires_at:
-            del self._store[key]
-            self._misses += 1
-            return None
-        self._store.move_to_end(key)
-        self._hits += 1
-        return value
-
-    def set(self, key: str, value: Any, ttl: int | None = None):
+        with self._lock:
+            entry = self._index.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            if time.time() > entry.expires_at:
+                self._remove(key)
+                self._misses += 1
+                return None
+            self._spaces[entry.namespace].move_to_end(key)
+            entry.touched = time.monotonic()
+            self._hits += 1
+            return entry.value
+
+    def set(self, key: str, value: Any, ttl: int | None = None, namespace: str | None = None):
         ttl = ttl or self._default_ttl
-        expires_at = time.time() + ttl
-        if key in self._store:
-            self._store.move_to_end(key)
-        self._store[key] = (value, expires_at)
-        while len(self._store) > self._max_size:
-            self._store.popitem(last=False)
+        namespace = namespace or self.namespace_of(key)
+        size = self._sizer(value)
+        quota = self._quotas.get(namespace)
+        with self._lock:
+            self._remove(key)
+            if (quota is not None and size > quota) or (self._max_bytes is not None and size > self._max_bytes):
+                self._rejected += 1
+                logger.debug(f"MemoryCache: {key} ({size} B) exceeds {namespace} budget, not cached")
+                return
+            entry = _Entry(value, time.time() + ttl, size, namespace)
+            self._spaces.setdefault(namespace, OrderedDict())[key] = entry
+            self._index[key] = entry
+            self._bytes += size
+            self._space_bytes[namespace] = self._space_bytes.get(namespace, 0) + size
+            self._evict(namespace)
+
+    def _evict(self, namespace: str):
+        quota = self._quotas.get(namespace)
+        space = self._spaces[namespace]
+        while quota is not None and self._space_bytes[namespace] > quota and space:
+            self._remove(next(iter(space)))
+            self._evictions += 1
+        while self._index and (len(self._index) > self._max_size
+                               or (self._max_bytes is not None and self._bytes > self._max_bytes)):
+            # 各命名空间 LRU 头部中最久未访问的
+            oldest = min((s for s in self._spaces.values() if s),
+                         key=lambda s: next(iter(s.values())).touched)
+            self._remove(next(iter(oldest)))
+            self._evictions += 1
 
     def invalidate(self, key: str):
-        self._store.pop(key, None)
+        with self._lock:
+            self._remove(key)
+
+    def clear_namespace(self, namespace: str):
+        with self._lock:
+            for key in list(self._spaces.get(namespace, ())):
+                self._remove(key)
 
     def clear(self):
-        self._store.clear()
-        self._hits = 0
-        self._misses = 0
+        with self._lock:
+            self._spaces.clear()
+            self._index.clear()
+            self._space_bytes.clear()
+            self._bytes = 0
+            self._hits = 0
+            self._misses = 0
+            self._evictions = 0
+            self._rejected = 0
+
+    def __len__(self) -> int:
+        return len(self._index)
 
     def stats(self) -> dict:
-        total = self._hits + self._misses
-        return {
-            "size": len(self._store),
-            "max_size": self._max_size,
-            "hits": self._hits,
-            "misses": self._misses,
-            "hit_rate": round(self._hits / max(total, 1) * 100, 1),
+        with self._lock:
+            total = self._hits + self._misses
+            return {
+                "size": len(self._index),
+                "max_size": self._max_size,
+                "bytes": self._bytes,
+                "max_bytes": self._max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / max(total, 1) * 100, 1),
+                "evictions": self._evictions,
+                "rejected": self._rejected,
+                "namespaces": {
+                    ns: {"entries": len(space), "bytes": self._space_bytes.get(ns, 0), "quota": self._quotas.get(ns)}
+                    for ns, space in self._spaces.items()
+                },
+            }
+
+    @classmethod
+    def from_config(cls, cfg: dict | None = None, **overrides) -> "MemoryCache":
+        """settings.yaml memory_cache: max_entries / max_mb / quota_mb."""
+        if cfg is None:
+            from config import get_config
+            cfg = get_config().get("memory_cache", {}) or {}
+        mb = 1024 * 1024
+        kwargs = {
+            "max_size": int(cfg.get("max_entries", 2000)),
+            "max_bytes": int(cfg["max_mb"] * mb) if cfg.get("max_mb") else None,
+            "quotas": {ns: int(v * mb) for ns, v in (cfg.get("quota_mb") or {}).items()},
         }
+        kwargs.update(overrides)
+        return cls(**kwargs)
@@ -4,10 +4,23 @@ from .base import QuoteData, FallbackChain, RealtimeSource, HistorySource
 from .sina import SinaRealtimeSource
 from .tencent import TencentRealtimeSource
 from .eastmoney import EastMoneyRealtimeSource
-from .manager import DataManager
+
+
+def __getattr__(name):
+    # DataManager 依赖 pandas, QuoteBatch 依赖 numpy, 按需加载以保持子模块导入轻量
+    if name == "DataManager":
+        from .manager import DataManager
+        return DataManager
+    if name in ("QuoteBatch", "QuoteRow"):
+        from . import quote_batch
+        return getattr(quote_batch, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 __all__ = [
     "QuoteData",
+    "QuoteBatch",
+    "QuoteRow",
     "FallbackChain",
     "RealtimeSource",
     "HistorySource",
@@ -6,17 +6,26 @@ import asyncio
 import logging
 import time
 from abc import ABC, abstractmethod
-from dataclasses import dataclass, field
-from typing import Any
+from dataclasses import asdict, dataclass, field
+from typing import TYPE_CHECKING, Any, Callable
 
-import pandas as pd
+if TYPE_CHECKING:
+    import pandas as pd
+
+from utils.cache import load_source_health, update_source_health
+from utils.metrics import CIRCUIT_TRIPS
+from utils.timing import span
 
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+@dataclass(slots=True)
 class QuoteData:
-    """Real-time quote snapshot for a single stock."""
+    """Real-time quote snapshot for a single stock.
+
+    Slotted (no per-instance __dict__); use dataclasses.asdict/replace instead of vars().
+    Large batches are better held as a columnar QuoteBatch (data_sources.quote_batch).
+    """
     code: str
     name: str
     price: float
@@ -87,6 +96,16 @@ class SourceHealth:
     def avg_latency(self) -> float:
         return self.total_latency / max(self.success_count, 1)
 
+    def to_state(self) -> dict:
+        state = asdict(self)
+        state.pop("name")
+        return state
+
+    @classmethod
+    def from_state(cls, name: str, state: dict) -> "SourceHealth":
+        known = {k: v for k, v in state.items() if k in cls.__dataclass_fields__ and k != "name"}
+        return cls(name=name, **known)
+
 
 class RealtimeSource(ABC):
     """Abstract base for real-time quote providers."""
@@ -118,14 +137,86 @@ class HistorySource(ABC):
 
 @dataclass
 class FallbackChain:
-    """Manages ordered data source fallback with circuit breakers."""
+    """Manages ordered data source fallback with circuit breakers.
+
+    With ``state_key`` set, health counters and circuit state are persisted
+    (see ``utils.cache.update_source_health``) so short-lived CLI processes
+    inherit open circuits instead of re-probing dead sources. Only state
+    changes (failures, recovery after failures) are written immediately;
+    plain success counters are batched and flushed every
+    ``SUCCESS_FLUSH_SECONDS`` or by ``flush()``. Writes run in a worker
+    thread so the file lock never blocks the event loop.
+    """
+
+    SUCCESS_FLUSH_SECONDS = 30.0
 
     sources: list[RealtimeSource] = field(default_factory=list)
     health: dict[str, SourceHealth] = field(default_factory=dict)
+    state_key: str | None = None
+    state_path: str | None = None
+    # 未落盘的成功计数: {source: [次数, 总延迟, 最近成功时间]}
+    _pending: dict[str, list[float]] = field(default_factory=dict, repr=False)
+    _last_flush: float = field(default_factory=time.monotonic, repr=False)
 
     def add_source(self, source: RealtimeSource):
         self.sources.append(source)
-        self.health[source.name] = SourceHealth(name=source.name)
+        state = {}
+        if self.state_key:
+            try:
+                state = load_source_health(self.state_key, self.state_path).get(source.name, {})
+            except Exception as e:
+                logger.debug(f"Load persisted health for {source.name} failed: {e}")
+        self.health[source.name] = SourceHealth.from_state(source.name, state)
+
+    def _persist(self, name: str, pending: list[float] | None,
+                 apply: Callable[[SourceHealth], None] | None) -> dict:
+        """Merge batched successes and an optional event into the shared store (runs in a thread)."""
+        def _merge(state: dict) -> dict:
+            fresh = SourceHealth.from_state(name, state)
+            if pending:
+                # 只累加计数, 不改熔断状态: 期间其他进程可能已打开熔断
+                count, latency, last = pending
+                fresh.success_count += int(count)
+                fresh.total_latency += latency
+                fresh.last_success = max(fresh.last_success, last)
+            if apply is not None:
+                apply(fresh)
+            return fresh.to_state()
+
+        return update_source_health(self.state_key, name, _merge, self.state_path)
+
+    async def _store(self, name: str, apply: Callable[[SourceHealth], None] | None = None):
+        pending = self._pending.pop(name, None)
+        if pending is None and apply is None:
+            return
+        try:
+            state = await asyncio.to_thread(self._persist, name, pending, apply)
+            self.health[name] = SourceHealth.from_state(name, state)
+        except Exception as e:
+            logger.debug(f"Persist health for {name} failed: {e}")
+
+    async def _record(self, name: str, apply: Callable[[SourceHealth], None], state_change: bool,
+                      latency: float = 0.0):
+        """Apply a health event in memory; persist it now if it changes state, else batch it as a success."""
+        h = self.health[name]
+        apply(h)
+        if not self.state_key:
+            return
+        if state_change:
+            await self._store(name, apply)
+            return
+        pending = self._pending.setdefault(name, [0, 0.0, 0.0])
+        pending[0] += 1
+        pending[1] += latency
+        pending[2] = h.last_success
+        if time.monotonic() - self._last_flush >= self.SUCCESS_FLUSH_SECONDS:
+            await self.flush()
+
+    async def flush(self):
+        """Write batched success counters for every source."""
+        self._last_flush = time.monotonic()
+        for name in list(self._pending):
+            await self._store(name)
 
     async def fetch_quotes(self, codes: list[str]) -> list[QuoteData]:
         last_error = None
@@ -136,15 +227,23 @@ class FallbackChain:
                 continue
             try:
                 t0 = time.time()
-                result = await source.fetch_quotes(codes)
-                h.record_success(time.time() - t0)
-                if result:
-                    return result
+                with span(f"chain.{self.state_key or 'realtime'}.{source.name}"):
+                    result = await source.fetch_quotes(codes)
+                latency = time.time() - t0
             except Exception as e:
-                h.record_failure()
+                was_open = h.circuit_open
+                await self._record(source.name, lambda s: s.record_failure(), state_change=True)
+                if self.health[source.name].circuit_open and not was_open:
+                    CIRCUIT_TRIPS.inc(chain=self.state_key or "realtime", source=source.name)
                 last_error = e
                 logger.warning(f"{source.name} failed: {e}")
                 continue
+            # 之前有失败 (含熔断恢复) 的成功是状态变化, 立即落盘
+            recovered = h.consecutive_failures > 0 or h.circuit_open
+            await self._record(source.name, lambda s: s.record_success(latency), state_change=recovered,
+                               latency=latency)
+            if result:
+                return result
         logger.error(f"All sources exhausted for {codes[:3]}..., last error: {last_error}")
         return []
 
@@ -10,6 +10,8 @@ import logging
 import asyncio
 from typing import Optional
 
+from utils.timing import timed
+
 logger = logging.getLogger(__name__)
 
 
@@ -68,6 +70,7 @@ class CapitalFlowManager:
         
         return {"error": str(last_error), "retries": max_retries}
 
+    @timed("capital_flow.batch")
     async def get_capital_flows_batch(self, codes: list[str]) -> dict[str, dict]:
         """批量获取资金流数据 (高效版).
         
@@ -134,6 +137,7 @@ class CapitalFlowManager:
         
         return results
 
+    @timed("capital_flow.single")
     async def get_capital_flow(self, code: str) -> dict:
         """获取资金流数据 (带降级).
         
@@ -261,6 +265,7 @@ class CapitalFlowManager:
 
         return result
 
+    @timed("capital_flow.batch")
     async def get_capital_flows_batch(self, codes: list[str]) -> dict[str, dict]:
         """批量获取资金流数据 (高效版).
         
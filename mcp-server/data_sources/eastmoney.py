@@ -7,6 +7,8 @@ from datetime import datetime
 
 import httpx
 
+from utils.timing import timed
+
 from .base import QuoteData, RealtimeSource
 
 logger = logging.getLogger(__name__)
@@ -38,6 +40,7 @@ class EastMoneyRealtimeSource(RealtimeSource):
             )
         return self._client
 
+    @timed("provider.eastmoney.quotes")
     async def fetch_quotes(self, codes: list[str]) -> list[QuoteData]:
         client = await self._get_client()
         secids = ",".join(_code_to_secid(c) for c in codes)
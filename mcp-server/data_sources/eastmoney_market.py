@@ -4,6 +4,8 @@ from __future__ import annotations
 import logging
 import httpx
 
+from utils.timing import timed
+
 logger = logging.getLogger(__name__)
 
 HEADERS = {
@@ -11,6 +13,10 @@ HEADERS = {
     "Referer": "https://data.eastmoney.com",
 }
 
+# 全市场列表接口 (单页上限 100 条) 与沪深京 A 股筛选条件: 沪深主板 / 创业板 / 科创板 / 北交所
+CLIST_URL = "https://push2.eastmoney.com/api/qt/clist/get"
+A_SHARE_FS = "m:0 t:6,m:0 t:80,m:1 t:2,m:1 t:23,m:0 t:81 s:2048"
+
 
 class EastMoneyMarketData:
     """东方财富市场数据源. 所有接口有 10s 超时 + 异常保护."""
@@ -198,6 +204,7 @@ class EastMoneyMarketData:
     _sentiment_cache = None
     _sentiment_cache_ts = 0
 
+    @timed("provider.eastmoney.market_sentiment")
     async def get_market_sentiment(self, extra_data: dict = None) -> dict:
         import time
         now = time.time()
@@ -280,16 +287,85 @@ class EastMoneyMarketData:
                 return self._sentiment_cache
             return {"score": 50.0, "signals": ["大盘数据获取失败(中性)"], "indices": {}}
 
-    async def get_minute_flow(self, code: str, lmt: int = 120) -> dict:
+    async def get_minute_flow(self, code: str, lmt: int = 120, record: bool = True) -> dict:
         """获取个股分钟级资金流数据 (东方财富降级链路).
         
+        已收盘的分钟写入日内记录器 (cache/intraday_recorder.py), 之后同一交易日的调用只拉取
+        记录之后的增量分钟, 与已记录部分拼接后按原口径计算.
+        
         Args:
             code: 6 位股票代码
             lmt: 返回 K 线数量 (默认 120 条=2 小时)
+            record: 是否使用/写入日内记录
         """
         code = code.strip().zfill(6)
+        recorder = None
+        fetch_lmt = lmt
+        if record:
+            from cache.intraday_recorder import get_recorder, minutes_since
+            recorder = get_recorder("flow")
+            last = recorder.last_time(code)
+            if last is not None:
+                # 多拉 2 根: 与已记录部分重叠一根用于校验连续, 末根可能尚未收盘
+                fetch_lmt = min(lmt, minutes_since(last) + 2)
+
+        try:
+            data = await self._fetch_minute_flow(code, fetch_lmt)
+            rows = _parse_flow_klines(data.get("data", {}).get("klines", []))
+            if recorder is not None and rows:
+                known = recorder.series(code, rows[0]["day"])
+                if fetch_lmt < lmt and (not len(known) or rows[0]["minute"] > int(known["minute"][-1])):
+                    # 增量与记录之间有缺口, 退回全量拉取
+                    data = await self._fetch_minute_flow(code, lmt)
+                    rows = _parse_flow_klines(data.get("data", {}).get("klines", []))
+                rows = recorder.splice(code, rows)[-lmt:]
+            merged = rows
+
+            if not merged:
+                return {"code": code, "error": "no minute flow data"}
+
+            latest = merged[-1]
+            main_net = latest["main_net"]
+            small_net = latest["small_net"]
+            mid_net = latest["mid_net"]
+            big_net = latest["big_net"]
+            super_big_net = latest["super_big_net"]
+
+            total_amount = sum(abs(r["main_net"]) for r in merged)
+
+            last_10 = merged[-10:]
+            last_10_flow = [{"time": f"{r['minute'] // 100:02d}:{r['minute'] % 100:02d}"[-4:],
+                             "main_net": round(r["main_net"] / 1e4, 2)} for r in last_10]
+
+            recent_amount = sum(abs(r["main_net"]) for r in last_10)
+            avg_amount = total_amount / len(merged) * 10
+            amount_surge = recent_amount > avg_amount * 1.5 if avg_amount else False
+
+            return {
+                "code": code,
+                "name": data.get("data", {}).get("name", ""),
+                "last_price": float(data.get("data", {}).get("price", 0)),
+                "change_pct": round(float(data.get("data", {}).get("chg", 0)), 2),
+                "total_amount": round(total_amount / 1e8, 2),
+                "data_points": len(merged),
+                "amount_surge_last_10min": amount_surge,
+                "last_10min_flow": last_10_flow[-3:] if last_10_flow else [],
+                "main_force": {
+                    "main_net_inflow_wan": round(main_net / 1e4, 2),
+                    "super_big_net_wan": round(super_big_net / 1e4, 2),
+                    "big_net_wan": round(big_net / 1e4, 2),
+                    "mid_net_wan": round(mid_net / 1e4, 2),
+                    "small_net_wan": round(small_net / 1e4, 2),
+                    "signal": "主力流入" if main_net > 0 else ("主力流出" if main_net < 0 else "中性"),
+                },
+                "source": "em_minute",
+            }
+        except Exception as e:
+            logger.warning(f"EM minute flow failed for {code}: {e}")
+            return {"code": code, "error": str(e)}
+
+    async def _fetch_minute_flow(self, code: str, lmt: int) -> dict:
         secid = f"1.{code}" if code.startswith(("6", "5")) else f"0.{code}"
-        
         params = {
             "secid": secid,
             "lmt": lmt,
@@ -298,58 +374,30 @@ class EastMoneyMarketData:
             "fields2": "f51,f52,f53,f54,f55,f56,f57,f58,f59,f60,f61,f62,f63,f64,f65",
             "ut": "b2884a393a59ad64002292a3e90d46a5",
         }
-        
-        try:
-            async with httpx.AsyncClient(timeout=10, headers=HEADERS) as client:
-                resp = await client.get(self.MAIN_FLOW_URL, params=params)
-                data = resp.json()
-                
-                klines = data.get("data", {}).get("klines", [])
-                if not klines:
-                    return {"code": code, "error": "no minute flow data"}
-                
-                latest = klines[-1].split(",")
-                if len(latest) < 4:
-                    return {"code": code, "error": "incomplete data"}
-                
-                def sf(s):
-                    try: return float(s)
-                    except: return 0.0
-                
-                main_net = sf(latest[1])
-                small_net = sf(latest[2])
-                mid_net = sf(latest[3])
-                big_net = sf(latest[4]) if len(latest) > 4 else 0
-                super_big_net = sf(latest[5]) if len(latest) > 5 else 0
-                
-                total_amount = sum(abs(sf(k.split(",")[1])) for k in klines)
-                
-                last_10 = klines[-10:] if len(klines) >= 10 else klines
-                last_10_flow = [{"time": k.split(",")[0][-4:], "main_net": round(sf(k.split(",")[1]) / 1e4, 2)} for k in last_10]
-                
-                recent_amount = sum(abs(sf(k.split(",")[1])) for k in last_10)
-                avg_amount = total_amount / len(klines) * 10 if klines else 0
-                amount_surge = recent_amount > avg_amount * 1.5 if avg_amount else False
-                
-                return {
-                    "code": code,
-                    "name": data.get("data", {}).get("name", ""),
-                    "last_price": float(data.get("data", {}).get("price", 0)),
-                    "change_pct": round(float(data.get("data", {}).get("chg", 0)), 2),
-                    "total_amount": round(total_amount / 1e8, 2),
-                    "data_points": len(klines),
-                    "amount_surge_last_10min": amount_surge,
-                    "last_10min_flow": last_10_flow[-3:] if last_10_flow else [],
-                    "main_force": {
-                        "main_net_inflow_wan": round(main_net / 1e4, 2),
-                        "super_big_net_wan": round(super_big_net / 1e4, 2),
-                        "big_net_wan": round(big_net / 1e4, 2),
-                        "mid_net_wan": round(mid_net / 1e4, 2),
-                        "small_net_wan": round(small_net / 1e4, 2),
-                        "signal": "主力流入" if main_net > 0 else ("主力流出" if main_net < 0 else "中性"),
-                    },
-                    "source": "em_minute",
-                }
-        except Exception as e:
-            logger.warning(f"EM minute flow failed for {code}: {e}")
-            return {"code": code, "error": str(e)}
+        async with httpx.AsyncClient(timeout=10, headers=HEADERS) as client:
+            resp = await client.get(self.MAIN_FLOW_URL, params=params)
+            return resp.json()
+
+
+def _parse_flow_klines(klines: list[str]) -> list[dict]:
+    """'2025-01-02 09:31,main,small,mid,big,super' → 行 dict (净额单位: 元)."""
+    def sf(s):
+        try: return float(s)
+        except (ValueError, TypeError): return 0.0
+
+    rows = []
+    for k in klines:
+        parts = k.split(",")
+        if len(parts) < 4:
+            continue
+        stamp = parts[0]
+        rows.append({
+            "day": stamp[:10].replace("-", ""),
+            "minute": int(stamp[-5:].replace(":", "")),
+            "main_net": sf(parts[1]),
+            "small_net": sf(parts[2]),
+            "mid_net": sf(parts[3]),
+            "big_net": sf(parts[4]) if len(parts) > 4 else 0.0,
+            "super_big_net": sf(parts[5]) if len(parts) > 5 else 0.0,
+        })
+    return rows
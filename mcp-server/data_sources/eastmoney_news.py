@@ -1,14 +1,20 @@
 """东方财富新闻/快讯抓取 + 基于关键词的情绪评分."""
 
 from __future__ import annotations
+import asyncio
 import json
 import logging
 import re
 import time
-from dataclasses import dataclass, field
+from dataclasses import asdict, dataclass, field
 from typing import Optional
 import httpx
 
+from config import get_config
+from utils.cache import cache_get, cache_set
+from utils.keyword_matcher import SentimentLexicon
+from utils.timing import timed
+
 logger = logging.getLogger(__name__)
 
 HEADERS = {
@@ -46,6 +52,20 @@ class EastMoneyNewsFetcher:
     """东方财富快讯和个股新闻."""
 
     KUAIXUN_API = "https://newsapi.eastmoney.com/kuaixun/v1/getlist_102_ajaxResult_{limit}_{page}_.html"
+    SEARCH_API = "https://search-api-web.eastmoney.com/search/jsonp"
+    BATCH_CONCURRENCY = 5
+
+    def __init__(self):
+        self._client: httpx.AsyncClient | None = None
+
+    async def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(timeout=10, headers=HEADERS)
+        return self._client
+
+    async def close(self):
+        if self._client and not self._client.is_closed:
+            await self._client.aclose()
 
     async def get_market_news(self, limit: int = 30) -> list[NewsItem]:
         """获取财经快讯(7x24)."""
@@ -85,10 +105,36 @@ class EastMoneyNewsFetcher:
             logger.warning("EastMoney market news failed: %s", e)
             return []
 
-    async def get_stock_news(self, code: str, name: str = "", limit: int = 10) -> list[NewsItem]:
-        """获取个股相关新闻(东方财富搜索)."""
+    async def get_stock_news(self, code: str, name: str = "", limit: int = 10,
+                             use_cache: bool = True) -> list[NewsItem]:
+        """获取个股相关新闻(东方财富搜索). 结果按 cache_ttl.news 缓存, 跨进程共享."""
+        key = f"stock_news_{code}_{limit}"
+        if use_cache:
+            cached = cache_get(key)
+            if cached is not None:
+                return [NewsItem(**n) for n in cached]
+        items = await self._search_stock_news(code, name, limit)
+        if items:
+            ttl = get_config().get("cache_ttl", {}).get("news", 1800)
+            cache_set(key, [asdict(n) for n in items], ttl_seconds=ttl)
+        return items
+
+    @timed("provider.eastmoney.stock_news_batch")
+    async def get_stock_news_batch(self, stocks: list[tuple[str, str]], limit: int = 10,
+                                   concurrency: int = BATCH_CONCURRENCY) -> dict[str, list[NewsItem]]:
+        """批量获取个股新闻: [(code, name), ...] → {code: news}. 并发数受 Semaphore 限制."""
+        sem = asyncio.Semaphore(concurrency)
+
+        async def _one(code: str, name: str) -> list[NewsItem]:
+            async with sem:
+                return await self.get_stock_news(code, name, limit)
+
+        results = await asyncio.gather(*(_one(c, n) for c, n in stocks))
+        return {code: news for (code, _), news in zip(stocks, results)}
+
+    async def _search_stock_news(self, code: str, name: str, limit: int) -> list[NewsItem]:
         search_term = name or code
-        url = "https://search-api-web.eastmoney.com/search/jsonp"
+        url = self.SEARCH_API
         cb = "jQuery_news_%d" % int(time.time() * 1000)
         search_params = {
             "cb": cb,
@@ -110,10 +156,10 @@ class EastMoneyNewsFetcher:
             }),
         }
         try:
-            async with httpx.AsyncClient(timeout=10) as client:
-                resp = await client.get(url, params=search_params, headers=HEADERS)
-                resp.raise_for_status()
-                text = resp.text
+            client = await self._get_client()
+            resp = await client.get(url, params=search_params)
+            resp.raise_for_status()
+            text = resp.text
 
             json_match = re.search(cb + r"\((.*)\)", text, re.DOTALL)
             if not json_match:
@@ -158,25 +204,11 @@ class EastMoneyNewsFetcher:
     NEGATIVE_CONTEXT = ["跌幅", "降幅", "亏损", "收窄", "减少"]
 
     def _score_sentiment(self, text: str) -> tuple[float, list[str]]:
-        """基于关键词的简单情绪评分 (-5 to +5)."""
-        score = 0.0
-        matched = []
-        for kw in BULLISH_KEYWORDS:
-            if kw in text:
-                # Check if this bullish word appears in a negative context
-                neg_context = any(neg + kw in text or kw + neg in text for neg in self.NEGATIVE_CONTEXT)
-                if neg_context:
-                    score -= 0.5
-                    matched.append(f"~{kw}(反向)")
-                else:
-                    score += 1.0
-                    matched.append(f"+{kw}")
-        for kw in BEARISH_KEYWORDS:
-            if kw in text:
-                score -= 1.0
-                matched.append(f"-{kw}")
-        score = max(-5.0, min(5.0, score))
-        return round(score, 1), matched
+        """基于关键词的简单情绪评分 (-5 to +5). 利好词处于反向语境 (如 "亏损收窄") 时记 -0.5."""
+        return _LEXICON.score(text)
+
+
+_LEXICON = SentimentLexicon(BULLISH_KEYWORDS, BEARISH_KEYWORDS, EastMoneyNewsFetcher.NEGATIVE_CONTEXT)
 
 
 async def get_market_sentiment_from_news(limit: int = 20) -> dict:
@@ -0,0 +1,175 @@
+"""行业分类索引: 代码 → 东财行业 (f100), 每周从 clist 全量刷新一次, 落盘 JSON, 进程内为 dict.
+
+评分和热点板块聚合只做内存查找, 不再每次调用联网或靠股票名猜行业.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+
+import httpx
+
+from utils.cache import CACHE_DIR, _atomic_write_json, _file_lock, _read_json
+from .eastmoney_market import A_SHARE_FS, CLIST_URL
+
+logger = logging.getLogger(__name__)
+
+INDUSTRY_INDEX = os.path.join(CACHE_DIR, "industry_index.json")
+REFRESH_SECONDS = 7 * 86400
+RETRY_SECONDS = 3600  # 刷新失败后一小时内不再重试, 断网时不拖慢每次调用
+MISS_SECONDS = 86400  # 查无行业 (f100 为 "-" 或缺失) 的代码一天内不再补查
+ULIST_URL = "https://push2.eastmoney.com/api/qt/ulist.np/get"
+HEADERS = {"User-Agent": "Mozilla/5.0", "Referer": "https://quote.eastmoney.com"}
+
+
+def _secid(code: str) -> str:
+    return f"{'1' if code.startswith(('6', '5')) else '0'}.{code}"
+
+
+class IndustryIndex:
+    """code → industry. 首次访问时从磁盘载入; refresh() 全量重建, add() 补录个别新代码.
+
+    查无行业的代码记入 misses (连同查询时间落盘), MISS_SECONDS 内 add() 不再为其联网.
+    """
+
+    PAGE_SIZE = 100
+    MAX_PAGES = 80
+
+    def __init__(self, path: str = INDUSTRY_INDEX, max_age: float = REFRESH_SECONDS):
+        self.path = path
+        self.max_age = max_age
+        self._industries: dict[str, str] | None = None
+        self._misses: dict[str, float] = {}
+        self.updated_at = 0.0
+        self._retry_at = 0.0
+        self._add_retry_at = 0.0
+        self._refreshing: asyncio.Task | None = None
+
+    def _load(self) -> dict[str, str]:
+        if self._industries is None:
+            data = _read_json(self.path)
+            self._industries = dict(data.get("industries", {}))
+            self._misses = {c: float(t) for c, t in (data.get("misses") or {}).items()}
+            self.updated_at = float(data.get("updated_at", 0))
+        return self._industries
+
+    def _save(self):
+        with _file_lock(self.path):
+            _atomic_write_json(self.path, {"updated_at": self.updated_at, "industries": self._industries,
+                                           "misses": self._misses})
+
+    def __len__(self) -> int:
+        return len(self._load())
+
+    def get(self, code: str) -> str:
+        return self._load().get(code, "")
+
+    def lookup(self, codes: list[str]) -> dict[str, str]:
+        industries = self._load()
+        return {c: industries[c] for c in codes if c in industries}
+
+    @property
+    def stale(self) -> bool:
+        self._load()
+        return time.time() - self.updated_at > self.max_age
+
+    async def refresh(self) -> int:
+        """clist 全量拉取 (f12 代码, f100 行业), 原子替换索引文件. 返回条目数."""
+        async with httpx.AsyncClient(timeout=10, headers=HEADERS) as client:
+            async def page(no: int) -> dict:
+                resp = await client.get(CLIST_URL, params={
+                    "pn": no, "pz": self.PAGE_SIZE, "po": 1, "np": 1, "fltt": 2,
+                    "fid": "f12", "fs": A_SHARE_FS, "fields": "f12,f100",
+                })
+                resp.raise_for_status()
+                return resp.json().get("data") or {}
+
+            first = await page(1)
+            pages = min(self.MAX_PAGES, -(-int(first.get("total", 0) or 0) // self.PAGE_SIZE))
+            rest = await asyncio.gather(*(page(n) for n in range(2, pages + 1)))
+        industries, misses, now = {}, {}, time.time()
+        for data in (first, *rest):
+            for item in data.get("diff") or []:
+                code, industry = str(item.get("f12", "")), item.get("f100", "")
+                if code and industry and industry != "-":
+                    industries[code] = industry
+                elif code:
+                    misses[code] = now
+        if not industries:
+            raise ValueError("empty industry list")
+        self._industries, self._misses, self.updated_at = industries, misses, now
+        self._save()
+        return len(industries)
+
+    async def ensure_fresh(self) -> bool:
+        """过期 (默认 7 天) 时刷新; 失败保留旧索引. 返回是否发生刷新."""
+        if not self.stale or time.time() < self._retry_at:
+            return False
+        try:
+            count = await self.refresh()
+            logger.info(f"industry index refreshed: {count} codes")
+            return True
+        except Exception as e:
+            self._retry_at = time.time() + RETRY_SECONDS
+            logger.warning(f"industry index refresh failed: {e}")
+            return False
+
+    def refresh_in_background(self) -> bool:
+        """过期时在当前事件循环里后台刷新, 调用方不等待 (照用现有索引). 返回是否启动了刷新."""
+        if self._refreshing is not None and not self._refreshing.done():
+            return False
+        if not self.stale or time.time() < self._retry_at:
+            return False
+        self._refreshing = asyncio.get_running_loop().create_task(self.ensure_fresh())
+        return True
+
+    async def add(self, codes: list[str]) -> dict[str, str]:
+        """索引里没有的代码 (次新股等) 用 ulist 补查并写回索引; 近期查无行业的代码跳过."""
+        industries, now = self._load(), time.time()
+        codes = [c for c in codes if c and c not in industries and now - self._misses.get(c, 0) > MISS_SECONDS]
+        if not codes or now < self._add_retry_at:
+            return {}
+        try:
+            async with httpx.AsyncClient(timeout=10, headers=HEADERS) as client:
+                resp = await client.get(ULIST_URL, params={
+                    "fltt": 2, "secids": ",".join(_secid(c) for c in codes), "fields": "f12,f100",
+                    "ut": "b2884a393a59ad64002292a3e90d46a5",
+                })
+                data = resp.json()
+        except Exception as e:
+            self._add_retry_at = now + RETRY_SECONDS
+            logger.warning(f"industry lookup failed: {e}")
+            return {}
+        found = {}
+        for item in (data.get("data") or {}).get("diff") or []:
+            code, industry = str(item.get("f12", "")), item.get("f100", "")
+            if code and industry and industry != "-":
+                found[code] = industry
+        industries.update(found)
+        for code in codes:
+            if code in found:
+                self._misses.pop(code, None)
+            else:
+                self._misses[code] = now
+        self._save()
+        return found
+
+
+_index: IndustryIndex | None = None
+
+
+def get_industry_index() -> IndustryIndex:
+    global _index
+    if _index is None:
+        _index = IndustryIndex()
+    return _index
+
+
+def set_industry_index(index: IndustryIndex | None) -> IndustryIndex | None:
+    """替换进程共享索引 (测试/回测用独立索引), 返回原索引; None 恢复为默认路径的索引."""
+    global _index
+    previous, _index = _index, index
+    return previous
@@ -12,12 +12,15 @@ from typing import Any
 import pandas as pd
 
 from .base import FallbackChain, QuoteData
+from .quote_batch import QuoteBatch
 from .sina import SinaRealtimeSource
 from .tencent import TencentRealtimeSource
 from .eastmoney import EastMoneyRealtimeSource
 from .ths import THSRealtimeSource
 from cache.memory_cache import MemoryCache
 from config import get_config, get_workspace_root
+from utils.metrics import CACHE_LOOKUPS, METRICS, Family, chain_families, memory_cache_families
+from utils.timing import TIMINGS, span, timed
 
 logger = logging.getLogger(__name__)
 
@@ -33,21 +36,21 @@ class DataManager:
     """
 
     def __init__(self):
-        self._realtime_chain = FallbackChain()
+        self._realtime_chain = FallbackChain(state_key="realtime")
         self._realtime_chain.add_source(TencentRealtimeSource())
         self._realtime_chain.add_source(SinaRealtimeSource())
         self._realtime_chain.add_source(EastMoneyRealtimeSource())
         self._realtime_chain.add_source(THSRealtimeSource())
 
         cfg = get_config()
-        self._cache = MemoryCache(
-            max_size=2000,
+        self._cache = MemoryCache.from_config(
             default_ttl=cfg.get("cache_ttl", {}).get("realtime", 30),
         )
 
         self._history_mgr = None
         self._history_init_attempted = False
         self._warmed_codes: set[str] = set()
+        METRICS.add_collector("data_manager", self.metric_families)
 
     def _get_history_manager(self):
         """Lazy-init the existing stock_data.StockDataManager."""
@@ -71,17 +74,24 @@ class DataManager:
             return None
 
     async def get_realtime_quotes(self, codes: list[str]) -> list[QuoteData]:
-        cache_key = "rt:" + "_".join(sorted(codes))
+        batch = await self.get_quote_batch(codes)
+        return batch.to_quotes()
+
+    @timed("dm.realtime_quotes")
+    async def get_quote_batch(self, codes: list[str]) -> QuoteBatch:
+        """Realtime quotes as a columnar QuoteBatch; this is the form kept in the memory cache."""
+        cache_key = "realtime:" + "_".join(sorted(codes))
         cached = self._cache.get(cache_key)
         if cached is not None:
             logger.debug(f"Cache hit for realtime {len(codes)} codes")
             return cached
 
-        result = await self._realtime_chain.fetch_quotes(codes)
-        if result:
-            self._cache.set(cache_key, result, ttl=get_config()["cache_ttl"]["realtime"])
-        return result
+        batch = QuoteBatch.from_quotes(await self._realtime_chain.fetch_quotes(codes))
+        if len(batch):
+            self._cache.set(cache_key, batch, ttl=get_config()["cache_ttl"]["realtime"])
+        return batch
 
+    @timed("dm.daily_klines")
     def get_daily_klines(
         self,
         code: str,
@@ -96,26 +106,29 @@ class DataManager:
 
         end = date.today().strftime("%Y-%m-%d")
         start = (date.today() - timedelta(days=days)).strftime("%Y-%m-%d")
-
         # First try cache
         try:
-            df = mgr.get_daily(code=code, start=start, end=end, adjust=adjust, use_cache=True)
+            with span("dm.daily_klines.cache"):
+                df = mgr.get_daily(code=code, start=start, end=end, adjust=adjust, use_cache=True)
         except Exception as e:
             logger.warning(f"get_daily cached failed for {code}: {e}")
             df = pd.DataFrame()
+        CACHE_LOOKUPS.inc(tier="kline_sqlite", result="hit" if len(df) >= MIN_KLINE_ROWS else "miss")
 
         # Auto-warm: if cache insufficient and not already warmed this session
         if len(df) < MIN_KLINE_ROWS and code not in self._warmed_codes:
             self._warmed_codes.add(code)
             logger.info(f"Auto-warming {code}: cache has {len(df)} rows, fetching from source")
             try:
-                df = mgr.get_daily(code=code, start=start, end=end, adjust=adjust, use_cache=False)
+                with span("dm.daily_klines.warm"):
+                    df = mgr.get_daily(code=code, start=start, end=end, adjust=adjust, use_cache=False)
                 logger.info(f"Warmed {code}: got {len(df)} rows from source")
             except Exception as e:
                 logger.warning(f"Warm fetch failed for {code}: {e}")
 
         return df
 
+    @timed("dm.minute_klines")
     def get_minute_klines(
         self,
         code: str,
@@ -149,7 +162,8 @@ class DataManager:
 
         for code in codes:
             try:
-                df = mgr.get_daily(code=code, start=start, end=end, adjust="", use_cache=False)
+                with span("dm.warm_klines.fetch"):
+                    df = mgr.get_daily(code=code, start=start, end=end, adjust="", use_cache=False)
                 rows = len(df)
                 results[code] = rows
                 self._warmed_codes.add(code)
@@ -172,13 +186,29 @@ class DataManager:
             "realtime_chain": self._realtime_chain.health_report(),
             "memory_cache": self._cache.stats(),
             "warmed_codes": len(self._warmed_codes),
+            "timings": TIMINGS.snapshot(),
         }
         mgr = self._get_history_manager()
         if mgr:
             report["history"] = mgr.health_report()
         return report
 
+    def metric_families(self) -> list:
+        """/metrics 抓取时的数据源与缓存状态. 历史K线管理器未初始化时不触发初始化."""
+        families = chain_families("realtime", self._realtime_chain.health_report())
+        families += memory_cache_families("memory", self._cache.stats())
+        families.append(Family("warmed_codes", "gauge", "Codes auto-warmed by this process")
+                        .add(len(self._warmed_codes)))
+        mgr = self._history_mgr
+        if mgr is not None:
+            families += chain_families("history", mgr.chain.health_report())
+            rows = mgr.cache.stats()["rows"]
+            families.append(Family("cache_entries", "gauge", "Entries currently held per cache tier")
+                            .add(rows, tier="kline_sqlite"))
+        return families
+
     async def close(self):
+        await self._realtime_chain.flush()
         for source in self._realtime_chain.sources:
             if hasattr(source, "close"):
                 await source.close()
@@ -0,0 +1,181 @@
+"""全市场快照扫描: 一次拉取沪深京全部 A 股行情 (东方财富 clist), 在 DataFrame 上向量化跑任意筛选.
+
+排行接口每个维度一次请求且最多 50 行; 这里一个周期一次快照, 筛选数量不再增加请求.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+import httpx
+import numpy as np
+import pandas as pd
+
+from .eastmoney_market import A_SHARE_FS, CLIST_URL
+from .quote_batch import QuoteBatch
+
+logger = logging.getLogger(__name__)
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7)",
+    "Referer": "https://quote.eastmoney.com",
+}
+
+FIELDS = {
+    "f12": "code", "f14": "name", "f2": "price", "f3": "change_pct", "f5": "volume",
+    "f6": "amount", "f8": "turnover_rate", "f10": "volume_ratio", "f15": "high",
+    "f16": "low", "f17": "open", "f18": "pre_close",
+}
+NUMERIC = [c for c in FIELDS.values() if c not in ("code", "name")]
+
+
+@dataclass
+class Screen:
+    """一个向量化筛选: mask(df) 选行, 按 sort 排序取前 limit 条."""
+    name: str
+    mask: Callable[[pd.DataFrame], pd.Series]
+    sort: str
+    ascending: bool = False
+    limit: int | None = None
+
+
+def default_screens(min_change: float = 5.0, min_amount: float = 5e8) -> list[Screen]:
+    return [
+        Screen("big_gainers", lambda d: d["change_pct"] >= min_change, "change_pct", limit=15),
+        Screen("big_losers", lambda d: d["change_pct"] <= -min_change, "change_pct", ascending=True, limit=10),
+        Screen("high_amount", lambda d: d["amount"] >= min_amount, "amount", limit=10),
+        Screen("volume_surge", lambda d: (d["volume_ratio"] >= 3) & (d["amount"] >= 1e8), "volume_ratio", limit=10),
+        Screen("high_turnover", lambda d: d["turnover_rate"] >= 15, "turnover_rate", limit=10),
+        Screen("gap_up", lambda d: d["gap_pct"] >= 3, "gap_pct", limit=10),
+        Screen("gap_down", lambda d: d["gap_pct"] <= -3, "gap_pct", ascending=True, limit=10),
+    ]
+
+
+def to_records(df: pd.DataFrame) -> list[dict]:
+    """与 SinaMarketScanner 排行条目同结构 (缺失值记为 0)."""
+    df = df.fillna({c: 0.0 for c in NUMERIC + ["gap_pct"]})
+    return [
+        {
+            "code": r.code,
+            "name": r.name,
+            "price": float(r.price),
+            "change_pct": float(r.change_pct),
+            "volume_ratio": float(r.volume_ratio),
+            "turnover_rate": float(r.turnover_rate),
+            "amount": float(r.amount),
+            "amount_display": f"{r.amount / 1e8:.1f}亿",
+            "gap_pct": float(r.gap_pct),
+        }
+        for r in df.itertuples(index=False)
+    ]
+
+
+def run_screens(df: pd.DataFrame, screens: list[Screen]) -> tuple[dict[str, list[dict]], dict[str, int]]:
+    """返回 (各筛选的前 limit 条, 各筛选命中总数)."""
+    hits, counts = {}, {}
+    for s in screens:
+        matched = df[s.mask(df).fillna(False).to_numpy(dtype=bool)]
+        counts[s.name] = len(matched)
+        top = matched.sort_values(s.sort, ascending=s.ascending, kind="stable")
+        hits[s.name] = to_records(top.head(s.limit) if s.limit else top)
+    return hits, counts
+
+
+class MarketSnapshotScanner:
+    """全 A 快照扫描器. 快照在 ttl 秒内复用, 同一周期多次筛选只拉一次."""
+
+    PAGE_SIZE = 100          # clist 单页上限
+    MAX_PAGES = 80
+
+    def __init__(self, ttl: float | None = None):
+        if ttl is None:
+            from config import get_config
+            ttl = (get_config().get("cache_ttl", {}) or {}).get("realtime", 30)
+        self.ttl = ttl
+        self._client: httpx.AsyncClient | None = None
+        self._snapshot: pd.DataFrame | None = None
+        self._fetched_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(timeout=10, headers=HEADERS)
+        return self._client
+
+    async def close(self):
+        if self._client and not self._client.is_closed:
+            await self._client.aclose()
+
+    async def _fetch_page(self, page: int) -> dict:
+        client = await self._get_client()
+        params = {
+            "pn": page, "pz": self.PAGE_SIZE, "po": 1, "np": 1, "fltt": 2, "invt": 2,
+            "fid": "f3", "fs": A_SHARE_FS, "fields": ",".join(FIELDS),
+        }
+        resp = await client.get(CLIST_URL, params=params)
+        resp.raise_for_status()
+        return resp.json().get("data") or {}
+
+    async def _fetch_rows(self) -> list[dict]:
+        first = await self._fetch_page(1)
+        rows = list(first.get("diff") or [])
+        pages = min(self.MAX_PAGES, -(-int(first.get("total", 0) or 0) // self.PAGE_SIZE))
+        if pages > 1:
+            rest = await asyncio.gather(*(self._fetch_page(p) for p in range(2, pages + 1)),
+                                        return_exceptions=True)
+            for page_data in rest:
+                if isinstance(page_data, BaseException):
+                    logger.warning(f"EM clist page failed: {page_data}")
+                    continue
+                rows.extend(page_data.get("diff") or [])
+        return rows
+
+    async def snapshot(self, force: bool = False) -> pd.DataFrame:
+        """全市场快照 DataFrame (停牌/无成交的数值为 NaN, 已剔除新股首日)."""
+        async with self._lock:
+            if not force and self._snapshot is not None and time.time() - self._fetched_at < self.ttl:
+                return self._snapshot
+            rows = await self._fetch_rows()
+            df = pd.DataFrame(rows, columns=list(FIELDS)).rename(columns=FIELDS)
+            df[NUMERIC] = df[NUMERIC].apply(pd.to_numeric, errors="coerce")
+            df = df.drop_duplicates("code")
+            # 新股首日无涨跌幅限制, 与排行扫描一致剔除
+            df = df[~(df["change_pct"].abs() > 44)].reset_index(drop=True)
+            df["gap_pct"] = np.round((df["open"] / df["pre_close"] - 1) * 100, 2)
+            self._snapshot, self._fetched_at = df, time.time()
+            return df
+
+    async def quote_batch(self, force: bool = False) -> QuoteBatch:
+        """快照的列式 QuoteBatch 形式, 供逐只评分等需要 QuoteData 属性的批处理."""
+        return QuoteBatch.from_frame(await self.snapshot(force), source="em_snapshot")
+
+    async def screen(self, screens: list[Screen]) -> tuple[dict[str, list[dict]], dict[str, int]]:
+        return run_screens(await self.snapshot(), screens)
+
+    async def get_top(self, field: str, count: int = 20, ascending: bool = False) -> list[dict]:
+        df = await self.snapshot()
+        return to_records(df.dropna(subset=[field]).sort_values(field, ascending=ascending, kind="stable").head(count))
+
+    async def scan_anomalies(self, min_change: float = 5.0, min_amount: float = 5e8) -> dict:
+        """与 SinaMarketScanner.scan_anomalies 同结构, 统计覆盖全市场; 额外给出放量/高换手/跳空筛选."""
+        df = await self.snapshot()
+        if df.empty:
+            return {}
+        hits, counts = run_screens(df, default_screens(min_change, min_amount))
+        result = dict(hits)
+        result["stats"] = {
+            "gainers_above_5pct": counts["big_gainers"],
+            "losers_below_5pct": counts["big_losers"],
+            "amount_above_5yi": counts["high_amount"],
+            "volume_surge": counts["volume_surge"],
+            "high_turnover": counts["high_turnover"],
+            "gap_up": counts["gap_up"],
+            "gap_down": counts["gap_down"],
+            "universe": len(df),
+        }
+        result["source"] = "em_snapshot"
+        return result
@@ -6,9 +6,13 @@ import logging
 import re
 import time
 from dataclasses import dataclass, field
-from typing import Optional
+from typing import Callable, Optional
 import httpx
 
+from utils.keyword_matcher import LexiconHits, SentimentLexicon
+from utils.near_dup import cluster_near_duplicates
+from .news_store import NewsStore, get_news_store, news_uid
+
 logger = logging.getLogger(__name__)
 
 UA = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36"
@@ -37,6 +41,12 @@ class NewsItem:
     sentiment: float = 0.0
     keywords: list[str] = field(default_factory=list)
     importance: int = 0  # 0=normal, 1=important, 2=critical
+    uid: str = ""  # 源内 ID 或标题哈希, 用于增量入库去重
+    source_count: int = 1  # 近重复聚类后, 报道同一事件的源数
+    # 抓取时标题的扫描结果 (不入库), boost_importance 据此加权而不再重扫
+    hits: Optional[LexiconHits] = field(default=None, repr=False, compare=False)
+
+SkipFn = Callable[[str, str], bool]
 
 
 VIP_PERSONS = ["特朗普", "川普", "Trump", "马斯克", "Musk", "鲍威尔", "Powell",
@@ -46,24 +56,20 @@ SECTOR_KEYWORDS = ["降息", "加息", "关税", "制裁", "芯片", "AI", "人
                    "黄金", "原油", "地缘", "战争", "军事"]
 
 
+# 情绪词/反向语境/VIP/板块词编译为单个 Aho-Corasick 自动机, 每条标题一次扫描
+LEXICON = SentimentLexicon(BULLISH_KW, BEARISH_KW, NEG_CONTEXT, VIP_PERSONS, SECTOR_KEYWORDS)
+
+
 def score_sentiment(text: str) -> tuple[float, list[str]]:
     """基于关键词的情绪评分 (-5 to +5)."""
-    score = 0.0
-    matched = []
-    for kw in BULLISH_KW:
-        if kw in text:
-            neg = any(n + kw in text or kw + n in text for n in NEG_CONTEXT)
-            if neg:
-                score -= 0.5
-                matched.append(f"~{kw}(反向)")
-            else:
-                score += 1.0
-                matched.append(f"+{kw}")
-    for kw in BEARISH_KW:
-        if kw in text:
-            score -= 1.0
-            matched.append(f"-{kw}")
-    return round(max(-5.0, min(5.0, score)), 1), matched
+    return LEXICON.score(text)
+
+
+def scan_title(title: str) -> tuple[float, list[str], LexiconHits]:
+    """标题只扫描一次: 返回情绪分/关键词和命中集 (含 VIP/板块), 命中集存到 NewsItem.hits."""
+    hits = LEXICON.scan(title)
+    sentiment, kw = LEXICON.score_hits(hits)
+    return sentiment, kw, hits
 
 
 class CailiansheSource:
@@ -71,7 +77,8 @@ class CailiansheSource:
 
     API_URL = "https://www.cls.cn/nodeapi/updateTelegraphList"
 
-    async def fetch(self, limit: int = 30) -> list[NewsItem]:
+    async def fetch(self, limit: int = 30, skip: SkipFn | None = None,
+                    raise_errors: bool = False) -> list[NewsItem]:
         params = {"app": "CailianpressWeb", "os": "web", "sv": "8.4.6", "rn": str(limit)}
         try:
             async with httpx.AsyncClient(timeout=10) as c:
@@ -92,16 +99,21 @@ class CailiansheSource:
                 if isinstance(pub_time, (int, float)):
                     import datetime
                     pub_time = datetime.datetime.fromtimestamp(pub_time).strftime("%Y-%m-%d %H:%M:%S")
+                uid = news_uid(n.get("id"), title)
+                if skip and skip(uid, pub_time):
+                    continue
                 importance = 2 if n.get("level", "") == "A" else (1 if n.get("level", "") == "B" else 0)
-                sentiment, kw = score_sentiment(title)
+                sentiment, kw, hits = scan_title(title)
                 items.append(NewsItem(
                     title=title[:200], time=pub_time, source="财联社",
                     url=f"https://www.cls.cn/detail/{n.get('id', '')}",
-                    sentiment=sentiment, keywords=kw, importance=importance,
+                    sentiment=sentiment, keywords=kw, importance=importance, uid=uid, hits=hits,
                 ))
             return items
         except Exception as e:
             logger.warning("CLS news failed: %s", e)
+            if raise_errors:
+                raise
             return []
 
 
@@ -110,7 +122,8 @@ class Jin10Source:
 
     API_URL = "https://flash-api.jin10.com/get_flash_list"
 
-    async def fetch(self, limit: int = 30) -> list[NewsItem]:
+    async def fetch(self, limit: int = 30, skip: SkipFn | None = None,
+                    raise_errors: bool = False) -> list[NewsItem]:
         import datetime
         now = datetime.datetime.now()
         params = {
@@ -137,18 +150,23 @@ class Jin10Source:
                 if not title:
                     continue
                 pub_time = n.get("time", "")
+                uid = news_uid(n.get("id"), title)
+                if skip and skip(uid, pub_time):
+                    continue
                 importance = 1 if content.get("important", 0) else 0
                 star = content.get("star", 0)
                 if star and star >= 3:
                     importance = 2
-                sentiment, kw = score_sentiment(title)
+                sentiment, kw, hits = scan_title(title)
                 items.append(NewsItem(
                     title=title[:200], time=pub_time, source="金十数据",
-                    sentiment=sentiment, keywords=kw, importance=importance,
+                    sentiment=sentiment, keywords=kw, importance=importance, uid=uid, hits=hits,
                 ))
             return items
         except Exception as e:
             logger.warning("Jin10 news failed: %s", e)
+            if raise_errors:
+                raise
             return []
 
 
@@ -157,7 +175,8 @@ class EastMoneySource:
 
     API_URL = "https://newsapi.eastmoney.com/kuaixun/v1/getlist_102_ajaxResult_{limit}_{page}_.html"
 
-    async def fetch(self, limit: int = 30) -> list[NewsItem]:
+    async def fetch(self, limit: int = 30, skip: SkipFn | None = None,
+                    raise_errors: bool = False) -> list[NewsItem]:
         url = self.API_URL.format(limit=limit, page=1)
         try:
             async with httpx.AsyncClient(timeout=10) as c:
@@ -172,7 +191,10 @@ class EastMoneySource:
                 title = n.get("title", "") or n.get("digest", "")
                 if not title:
                     continue
-                sentiment, kw = score_sentiment(title)
+                uid = news_uid(n.get("id") or n.get("newsid"), title)
+                if skip and skip(uid, n.get("showtime", "")):
+                    continue
+                sentiment, kw, hits = scan_title(title)
                 digest = n.get("digest", "")
                 if digest and digest != title:
                     s2, kw2 = score_sentiment(digest)
@@ -180,11 +202,13 @@ class EastMoneySource:
                     kw.extend(kw2)
                 items.append(NewsItem(
                     title=title[:200], time=n.get("showtime", ""), source="东方财富",
-                    url=n.get("url_w", ""), sentiment=sentiment, keywords=list(set(kw)),
+                    url=n.get("url_w", ""), sentiment=sentiment, keywords=list(set(kw)), uid=uid, hits=hits,
                 ))
             return items
         except Exception as e:
             logger.warning("EastMoney news failed: %s", e)
+            if raise_errors:
+                raise
             return []
 
 
@@ -195,7 +219,8 @@ class SinaLiveSource:
 
     API_URL = "https://zhibo.sina.com.cn/api/zhibo/feed"
 
-    async def fetch(self, limit: int = 30) -> list[NewsItem]:
+    async def fetch(self, limit: int = 30, skip: SkipFn | None = None,
+                    raise_errors: bool = False) -> list[NewsItem]:
         params = {"page": "1", "page_size": str(limit), "zhibo_id": "152", "tag_id": "0", "dire": "f", "dpc": "1"}
         try:
             async with httpx.AsyncClient(timeout=10) as c:
@@ -213,15 +238,20 @@ class SinaLiveSource:
                 if not title or len(title) < 5:
                     continue
                 pub_time = n.get("create_time", "")
+                uid = news_uid(n.get("id"), title)
+                if skip and skip(uid, pub_time):
+                    continue
                 importance = 1 if n.get("is_top", 0) or n.get("is_red", 0) else 0
-                sentiment, kw = score_sentiment(title)
+                sentiment, kw, hits = scan_title(title)
                 items.append(NewsItem(
                     title=title[:200], time=pub_time, source="新浪财经",
-                    sentiment=sentiment, keywords=kw, importance=importance,
+                    sentiment=sentiment, keywords=kw, importance=importance, uid=uid, hits=hits,
                 ))
             return items
         except Exception as e:
             logger.warning("Sina live news failed: %s", e)
+            if raise_errors:
+                raise
             return []
 
 
@@ -230,7 +260,8 @@ class WallStreetCNSource:
 
     API_URL = "https://api-one-wscn.awtmt.com/apiv1/content/lives"
 
-    async def fetch(self, limit: int = 30) -> list[NewsItem]:
+    async def fetch(self, limit: int = 30, skip: SkipFn | None = None,
+                    raise_errors: bool = False) -> list[NewsItem]:
         params = {"channel": "global-channel", "client": "pc", "limit": str(limit), "first_page": "true", "accept": "live"}
         try:
             async with httpx.AsyncClient(timeout=10) as c:
@@ -249,22 +280,26 @@ class WallStreetCNSource:
                 import datetime
                 ts = n.get("display_time", 0)
                 pub_time = datetime.datetime.fromtimestamp(ts).strftime("%Y-%m-%d %H:%M:%S") if ts else ""
+                uid = news_uid(n.get("id"), title)
+                if skip and skip(uid, pub_time):
+                    continue
                 importance = 1 if n.get("score", 0) and n["score"] > 50 else 0
-                sentiment, kw = score_sentiment(title)
+                sentiment, kw, hits = scan_title(title)
                 items.append(NewsItem(
                     title=title[:200], time=pub_time, source="华尔街见闻",
-                    sentiment=sentiment, keywords=kw, importance=importance,
+                    sentiment=sentiment, keywords=kw, importance=importance, uid=uid, hits=hits,
                 ))
             return items
         except Exception as e:
             logger.warning("WallStreetCN news failed: %s", e)
+            if raise_errors:
+                raise
             return []
 
 
-async def aggregate_news(limit_per_source: int = 20) -> dict:
-    """从多源聚合新闻并返回结构化结果."""
-    import asyncio
-    sources = [
+def default_sources() -> list[tuple[str, object]]:
+    """(源名, 抓取器) 列表; 源名同时是 NewsStore 里的 source 键."""
+    return [
         ("cls", CailiansheSource()),
         ("jin10", Jin10Source()),
         ("eastmoney", EastMoneySource()),
@@ -272,7 +307,43 @@ async def aggregate_news(limit_per_source: int = 20) -> dict:
         ("wallstreetcn", WallStreetCNSource()),
     ]
 
-    tasks = [src.fetch(limit_per_source) for _, src in sources]
+
+def boost_importance(n: NewsItem) -> None:
+    """VIP 人物与重点板块事件提升重要度 (入库时计算一次). 复用抓取时的标题扫描结果."""
+    hits = n.hits if n.hits is not None else LEXICON.scan(n.title)
+    vip = LEXICON.first_vip(hits)
+    if vip:
+        n.importance = max(n.importance, 2)
+        n.keywords.append(f"VIP:{vip}")
+    if hits.sector and n.importance < 1:
+        n.importance = 1
+
+
+def merge_near_duplicates(news: list[NewsItem]) -> list[NewsItem]:
+    """同一事件的不同表述聚为一簇, 保留首条; 多源报道提升重要度 (2 源→important, 3 源+→critical)."""
+    unique = []
+    for cluster in cluster_near_duplicates([n.title for n in news]):
+        members = [news[i] for i in cluster]
+        head = members[0]
+        head.source_count = len({m.source for m in members})
+        head.importance = max(m.importance for m in members)
+        if head.source_count >= 3:
+            head.importance = 2
+        elif head.source_count == 2:
+            head.importance = max(head.importance, 1)
+        unique.append(head)
+    return unique
+
+
+async def aggregate_news(limit_per_source: int = 20, store: NewsStore | None = None) -> dict:
+    """从多源增量拉取新闻入库, 再基于库内各源最新条目返回结构化结果."""
+    import asyncio
+    store = store or get_news_store()
+    sources = default_sources()
+
+    # 只解析/评分高水位之后且未入库的条目. 库操作都是同步 SQLite, 放到线程里, 不阻塞 daemon 事件循环
+    skippers = await asyncio.to_thread(lambda: {name: store.skipper(name) for name, _ in sources})
+    tasks = [src.fetch(limit_per_source, skip=skippers[name]) for name, src in sources]
     try:
         results = await asyncio.wait_for(
             asyncio.gather(*tasks, return_exceptions=True),
@@ -283,32 +354,29 @@ async def aggregate_news(limit_per_source: int = 20) -> dict:
 
     all_news = []
     source_status = {}
+    fetched = {}
     for (name, _), result in zip(sources, results):
         if isinstance(result, Exception):
-            source_status[name] = {"status": "error", "error": str(result), "count": 0}
-        else:
-            source_status[name] = {"status": "ok", "count": len(result)}
-            all_news.extend(result)
-
-    # Boost importance for VIP person mentions and key sector events
-    for n in all_news:
-        for vip in VIP_PERSONS:
-            if vip in n.title:
-                n.importance = max(n.importance, 2)
-                n.keywords.append(f"VIP:{vip}")
-                break
-        for sk in SECTOR_KEYWORDS:
-            if sk in n.title and n.importance < 1:
-                n.importance = 1
-
-    # Deduplicate by title similarity
-    seen_titles = set()
-    unique_news = []
-    for n in all_news:
-        short = n.title[:30]
-        if short not in seen_titles:
-            seen_titles.add(short)
-            unique_news.append(n)
+            source_status[name] = {"status": "error", "error": str(result), "count": 0, "new": 0}
+            continue
+        for n in result:
+            boost_importance(n)
+        fetched[name] = result
+
+    def _store_round():
+        new = {name: store.ingest(name, items) for name, items in fetched.items()}
+        latest = {name: store.latest(name, limit_per_source) for name, _ in sources}
+        store.prune()
+        return new, latest
+
+    new, latest = await asyncio.to_thread(_store_round)
+    for name in fetched:
+        source_status[name] = {"status": "ok", "new": new[name]}
+    for name, _ in sources:
+        source_status.setdefault(name, {"status": "timeout", "new": 0})["count"] = len(latest[name])
+        all_news.extend(latest[name])
+
+    unique_news = merge_near_duplicates(all_news)
 
     # Sort: importance desc, then time desc
     unique_news.sort(key=lambda x: (-x.importance, x.time or ""), reverse=False)
@@ -328,9 +396,11 @@ async def aggregate_news(limit_per_source: int = 20) -> dict:
     else:
         sentiment = "neutral"
 
-    critical = [{"title": n.title, "source": n.source, "time": n.time, "sentiment": n.sentiment}
+    critical = [{"title": n.title, "source": n.source, "time": n.time, "sentiment": n.sentiment,
+                 "source_count": n.source_count}
                 for n in unique_news if n.importance >= 2][:5]
-    important = [{"title": n.title, "source": n.source, "time": n.time, "sentiment": n.sentiment}
+    important = [{"title": n.title, "source": n.source, "time": n.time, "sentiment": n.sentiment,
+                  "source_count": n.source_count}
                  for n in unique_news if n.importance == 1][:10]
     top_movers = [{"title": n.title, "source": n.source, "time": n.time, "sentiment": n.sentiment, "keywords": n.keywords[:3]}
                   for n in sorted(unique_news, key=lambda x: abs(x.sentiment), reverse=True)][:5]
@@ -341,6 +411,7 @@ async def aggregate_news(limit_per_source: int = 20) -> dict:
         "bullish_count": bullish,
         "bearish_count": bearish,
         "total_news": len(unique_news),
+        "duplicates_merged": len(all_news) - len(unique_news),
         "sources": source_status,
         "critical_news": critical,
         "important_news": important,
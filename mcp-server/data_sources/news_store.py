@@ -0,0 +1,155 @@
+"""SQLite 新闻库: 按源 ID/内容哈希去重, 入库时保存情绪分, 每个源维护时间高水位."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from pathlib import Path
+from typing import Callable
+
+from utils.cache import CACHE_DIR
+
+NEWS_DB = os.path.join(CACHE_DIR, "news.db")
+KEEP_SECONDS = 3 * 86400
+SEEN_WINDOW = 1000  # 每源加载最近多少条 uid 用于去重
+
+
+def news_uid(source_id, title: str) -> str:
+    """源内唯一 ID; 源未提供时退化为标题内容哈希."""
+    if source_id not in (None, ""):
+        return str(source_id)
+    return "h:" + hashlib.md5(title.strip().encode("utf-8")).hexdigest()[:16]
+
+
+class NewsStore:
+    """增量新闻存储. 轮询时只解析/评分高水位之后且未见过的条目."""
+
+    def __init__(self, db_path: str | Path = NEWS_DB) -> None:
+        self.db_path = str(db_path)
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._init_db()
+
+    def _conn(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=10)
+
+    def _init_db(self) -> None:
+        with self._conn() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS news (
+                    source TEXT NOT NULL,
+                    uid TEXT NOT NULL,
+                    title TEXT NOT NULL,
+                    time TEXT NOT NULL DEFAULT '',
+                    source_name TEXT NOT NULL DEFAULT '',
+                    url TEXT NOT NULL DEFAULT '',
+                    sentiment REAL NOT NULL DEFAULT 0,
+                    keywords TEXT NOT NULL DEFAULT '[]',
+                    importance INTEGER NOT NULL DEFAULT 0,
+                    ingested_at REAL NOT NULL,
+                    PRIMARY KEY (source, uid)
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_news_source_time ON news(source, time)")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS news_cursor (
+                    source TEXT PRIMARY KEY,
+                    high_water TEXT NOT NULL DEFAULT '',
+                    updated_at REAL NOT NULL DEFAULT 0
+                )
+                """
+            )
+            conn.commit()
+
+    def cursor(self, source: str) -> str:
+        with self._conn() as conn:
+            row = conn.execute("SELECT high_water FROM news_cursor WHERE source=?", (source,)).fetchone()
+        return row[0] if row else ""
+
+    def skipper(self, source: str) -> Callable[[str, str], bool]:
+        """返回 skip(uid, time): 早于高水位或已入库的条目直接跳过, 不再评分."""
+        high_water = self.cursor(source)
+        with self._conn() as conn:
+            seen = {r[0] for r in conn.execute(
+                "SELECT uid FROM news WHERE source=? ORDER BY ingested_at DESC LIMIT ?",
+                (source, SEEN_WINDOW),
+            )}
+
+        def skip(uid: str, pub_time: str) -> bool:
+            if pub_time and high_water and str(pub_time) < high_water:
+                return True
+            return uid in seen
+        return skip
+
+    def ingest(self, source: str, items: list) -> int:
+        """写入新条目 (已存在的忽略), 推进高水位. 返回新增条数."""
+        if not items:
+            return 0
+        now = time.time()
+        rows = [
+            (source, n.uid or news_uid(None, n.title), n.title, str(n.time or ""), n.source, n.url,
+             n.sentiment, json.dumps(n.keywords, ensure_ascii=False), n.importance, now)
+            for n in items
+        ]
+        high_water = max((r[3] for r in rows), default="")
+        with self._conn() as conn:
+            before = conn.total_changes
+            conn.executemany(
+                """
+                INSERT OR IGNORE INTO news
+                    (source,uid,title,time,source_name,url,sentiment,keywords,importance,ingested_at)
+                VALUES (?,?,?,?,?,?,?,?,?,?)
+                """,
+                rows,
+            )
+            added = conn.total_changes - before
+            if high_water:
+                conn.execute(
+                    """
+                    INSERT INTO news_cursor (source, high_water, updated_at) VALUES (?,?,?)
+                    ON CONFLICT(source) DO UPDATE SET
+                        high_water=MAX(high_water, excluded.high_water),
+                        updated_at=excluded.updated_at
+                    """,
+                    (source, high_water, now),
+                )
+            conn.commit()
+        return added
+
+    def latest(self, source: str, limit: int = 20) -> list:
+        """某源最新的 limit 条 (按发布时间倒序)."""
+        from .multi_news import NewsItem
+        with self._conn() as conn:
+            rows = conn.execute(
+                """
+                SELECT uid,title,time,source_name,url,sentiment,keywords,importance
+                FROM news WHERE source=? ORDER BY time DESC, ingested_at DESC LIMIT ?
+                """,
+                (source, limit),
+            ).fetchall()
+        return [
+            NewsItem(title=r[1], time=r[2], source=r[3], url=r[4], sentiment=r[5],
+                     keywords=json.loads(r[6]), importance=r[7], uid=r[0])
+            for r in rows
+        ]
+
+    def prune(self, keep_seconds: int = KEEP_SECONDS) -> int:
+        with self._conn() as conn:
+            cur = conn.execute("DELETE FROM news WHERE ingested_at<?", (time.time() - keep_seconds,))
+            conn.commit()
+            return cur.rowcount
+
+
+_store: NewsStore | None = None
+
+
+def get_news_store() -> NewsStore:
+    global _store
+    if _store is None:
+        _store = NewsStore()
+    return _store
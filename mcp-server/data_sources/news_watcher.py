@@ -0,0 +1,157 @@
+"""常驻新闻监听: 每个源按自适应间隔独立轮询, 新条目经 async 迭代器 / 回调实时推送."""
+
+from __future__ import annotations
+
+import asyncio
+import inspect
+import logging
+from collections import deque
+from dataclasses import dataclass
+from typing import AsyncIterator, Awaitable, Callable, Union
+
+from .multi_news import NewsItem, boost_importance, default_sources
+from .news_store import NewsStore, get_news_store
+
+logger = logging.getLogger(__name__)
+
+NewsCallback = Callable[[str, NewsItem], Union[None, Awaitable[None]]]
+
+
+@dataclass
+class _SourceState:
+    interval: float
+    polls: int = 0
+    new_items: int = 0
+    errors: int = 0
+
+
+class NewsWatcher:
+    """多源新闻监听器.
+
+    有新条目时该源轮询间隔减半 (下限 min_interval), 空轮询逐步放大 (上限 max_interval),
+    出错按 2 倍退避. 快讯源活跃时关键新闻 (importance>=2) 几秒内即可推送.
+    """
+
+    def __init__(
+        self,
+        sources: list[tuple[str, object]] | None = None,
+        store: NewsStore | None = None,
+        min_interval: float = 5.0,
+        max_interval: float = 120.0,
+        initial_interval: float = 15.0,
+        limit: int = 20,
+        min_importance: int = 0,
+        history: int = 200,
+    ):
+        self.sources = sources if sources is not None else default_sources()
+        self.store = store or get_news_store()
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.limit = limit
+        self.min_importance = min_importance
+        self.state = {name: _SourceState(initial_interval) for name, _ in self.sources}
+        self.recent: deque[tuple[str, NewsItem]] = deque(maxlen=history)
+        self._callbacks: list[NewsCallback] = []
+        self._subscribers: list[asyncio.Queue] = []
+        self._tasks: list[asyncio.Task] = []
+
+    def on_news(self, callback: NewsCallback) -> NewsCallback:
+        """注册回调 callback(source, item), 支持同步或 async 函数; 可作装饰器."""
+        self._callbacks.append(callback)
+        return callback
+
+    async def stream(self, maxsize: int = 1000) -> AsyncIterator[tuple[str, NewsItem]]:
+        """async for source, item in watcher.stream(): ..."""
+        queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self._subscribers.append(queue)
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            self._subscribers.remove(queue)
+
+    def __aiter__(self):
+        return self.stream()
+
+    async def poll_once(self, name: str, src) -> list[NewsItem]:
+        """轮询一个源: 只评分/入库未见过的条目, 返回新条目并推送."""
+        # 库操作是同步 SQLite, 放到线程里: 常驻监听不阻塞 daemon 其他客户端
+        skip = await asyncio.to_thread(self.store.skipper, name)
+        # 源默认吞掉异常返回 [], 这里要让失败抛出, 才能计数并退避
+        items = await src.fetch(self.limit, skip=skip, raise_errors=True)
+        for n in items:
+            boost_importance(n)
+        if items:
+            await asyncio.to_thread(self.store.ingest, name, items)
+        # 关键新闻优先推送
+        items.sort(key=lambda n: -n.importance)
+        for n in items:
+            if n.importance >= self.min_importance:
+                await self._emit(name, n)
+        return items
+
+    async def _emit(self, name: str, item: NewsItem):
+        self.recent.append((name, item))
+        for queue in self._subscribers:
+            if queue.full():
+                queue.get_nowait()  # 慢消费者丢最旧的
+            queue.put_nowait((name, item))
+        for cb in self._callbacks:
+            try:
+                result = cb(name, item)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                logger.warning(f"news callback failed: {e}")
+
+    def _adapt(self, st: _SourceState, new_count: int, failed: bool):
+        if failed:
+            st.interval = min(self.max_interval, st.interval * 2)
+        elif new_count:
+            st.interval = max(self.min_interval, st.interval / 2)
+        else:
+            st.interval = min(self.max_interval, st.interval * 1.5)
+
+    async def _run_source(self, name: str, src):
+        st = self.state[name]
+        while True:
+            failed = False
+            new = []
+            try:
+                new = await self.poll_once(name, src)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                failed = True
+                st.errors += 1
+                logger.warning(f"news watcher {name} poll failed: {e}")
+            st.polls += 1
+            st.new_items += len(new)
+            self._adapt(st, len(new), failed)
+            await asyncio.sleep(st.interval)
+
+    def start(self):
+        """在当前事件循环中为每个源启动轮询任务."""
+        if self._tasks:
+            return
+        self._tasks = [asyncio.create_task(self._run_source(name, src), name=f"news-watch-{name}")
+                       for name, src in self.sources]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    close = stop
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    def status(self) -> dict:
+        return {
+            name: {"interval": round(st.interval, 1), "polls": st.polls,
+                   "new_items": st.new_items, "errors": st.errors}
+            for name, st in self.state.items()
+        }
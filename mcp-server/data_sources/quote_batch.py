@@ -0,0 +1,167 @@
+"""列式行情批: 一批 QuoteData 按字段存为 NumPy 数组, 供全市场/自选股批量扫描与评分.
+
+5000 只股票的快照若存为 QuoteData 列表是 5000 个对象 × 21 个字段对象; 这里每个数值字段
+一个 float64 数组, 文本字段一个 list. 筛选用列上的向量运算, 逐只处理用 QuoteRow 视图
+(只存批引用与行号, 属性按需从列中读取), 需要真正的 QuoteData 时再 to_quotes().
+
+    batch = QuoteBatch.from_quotes(quotes)
+    hot = batch.take((batch["volume_ratio"] > 2) | (batch["amount"] > 3e9))
+    for q in hot:                       # QuoteRow, 与 QuoteData 同名只读属性
+        compute_stock_score(q, ...)
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import sys
+from typing import TYPE_CHECKING, Iterable, Iterator
+
+import numpy as np
+
+from .base import QuoteData
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+FIELDS = tuple(f.name for f in dataclasses.fields(QuoteData))
+TEXT_FIELDS = ("code", "name", "timestamp", "source")
+NUMERIC_FIELDS = tuple(f for f in FIELDS if f not in TEXT_FIELDS)
+
+
+class QuoteRow:
+    """QuoteBatch 中一行的只读视图, 可代替 QuoteData 传给只读取属性的代码 (评分/异动检测)."""
+
+    __slots__ = ("_batch", "_i")
+
+    def __init__(self, batch: "QuoteBatch", i: int):
+        self._batch = batch
+        self._i = i
+
+    def to_quote(self) -> QuoteData:
+        return QuoteData(**{f: getattr(self, f) for f in FIELDS})
+
+    def __repr__(self) -> str:
+        return f"QuoteRow({self.code!r}, price={self.price})"
+
+
+def _text_getter(name: str):
+    return property(lambda self: self._batch._columns[name][self._i])
+
+
+def _numeric_getter(name: str):
+    # 返回 Python float, 与 QuoteData 一致 (JSON 序列化/格式化不受 numpy 标量影响)
+    return property(lambda self: float(self._batch._columns[name][self._i]))
+
+
+for _name in FIELDS:
+    setattr(QuoteRow, _name, _text_getter(_name) if _name in TEXT_FIELDS else _numeric_getter(_name))
+del _name
+
+
+class QuoteBatch:
+    """列式行情批. 数值列为 float64 ndarray, 文本列为 list[str], 各列等长."""
+
+    __slots__ = ("_columns", "_length", "_positions")
+
+    def __init__(self, columns: dict[str, "np.ndarray | list[str]"]):
+        lengths = {len(v) for v in columns.values()}
+        if len(lengths) > 1:
+            raise ValueError(f"QuoteBatch columns differ in length: {sorted(lengths)}")
+        length = lengths.pop() if lengths else 0
+        self._columns = {
+            f: (list(columns.get(f, [""] * length)) if f in TEXT_FIELDS
+                else np.asarray(columns[f], dtype=np.float64) if f in columns else np.zeros(length))
+            for f in FIELDS
+        }
+        self._length = length
+        self._positions: dict[str, int] | None = None
+
+    @classmethod
+    def from_quotes(cls, quotes: Iterable[QuoteData | None]) -> "QuoteBatch":
+        """QuoteData 列表 → 列式 (跳过 None, 与各数据源 fetch_quotes 返回值兼容)."""
+        quotes = [q for q in quotes if q is not None]
+        n = len(quotes)
+        columns: dict = {f: [getattr(q, f) for q in quotes] for f in TEXT_FIELDS}
+        for f in NUMERIC_FIELDS:
+            columns[f] = np.fromiter((getattr(q, f) or 0.0 for q in quotes), dtype=np.float64, count=n)
+        return cls(columns)
+
+    @classmethod
+    def from_frame(cls, df: "pd.DataFrame", source: str = "") -> "QuoteBatch":
+        """DataFrame (如 MarketSnapshotScanner.snapshot()) → 列式; 缺失列为 0 / 空串, NaN 记为 0."""
+        columns: dict = {}
+        for f in FIELDS:
+            if f not in df.columns:
+                continue
+            if f in TEXT_FIELDS:
+                columns[f] = df[f].fillna("").astype(str).tolist()
+            else:
+                columns[f] = np.nan_to_num(df[f].to_numpy(dtype=np.float64, na_value=np.nan))
+        if source and "source" not in columns:
+            columns["source"] = [source] * len(df)
+        if not columns:
+            columns["code"] = [""] * len(df)
+        return cls(columns)
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __iter__(self) -> Iterator[QuoteRow]:
+        return (QuoteRow(self, i) for i in range(self._length))
+
+    def __getitem__(self, key: "int | str") -> "QuoteRow | np.ndarray | list[str]":
+        """batch[i] → 第 i 行视图; batch["price"] → 整列."""
+        if isinstance(key, str):
+            return self._columns[key]
+        if key < 0:
+            key += self._length
+        if not 0 <= key < self._length:
+            raise IndexError(f"QuoteBatch index {key} out of range")
+        return QuoteRow(self, key)
+
+    @property
+    def codes(self) -> list[str]:
+        return self._columns["code"]
+
+    def get(self, code: str) -> QuoteRow | None:
+        """按代码取行 (重复代码取第一条)."""
+        if self._positions is None:
+            positions: dict[str, int] = {}
+            for i, c in enumerate(self._columns["code"]):
+                positions.setdefault(c, i)
+            self._positions = positions
+        i = self._positions.get(code)
+        return None if i is None else QuoteRow(self, i)
+
+    def take(self, selector: "np.ndarray | list[int] | list[bool]") -> "QuoteBatch":
+        """按布尔掩码或行号选出子批."""
+        idx = np.asarray(selector)
+        if idx.dtype == bool:
+            idx = np.flatnonzero(idx)
+        idx = idx.astype(np.intp, copy=False)
+        return QuoteBatch({
+            f: ([col[i] for i in idx] if f in TEXT_FIELDS else col[idx])
+            for f, col in self._columns.items()
+        })
+
+    def to_quotes(self) -> list[QuoteData]:
+        numeric = {f: self._columns[f].tolist() for f in NUMERIC_FIELDS}
+        return [
+            QuoteData(**{f: (self._columns[f][i] if f in TEXT_FIELDS else numeric[f][i]) for f in FIELDS})
+            for i in range(self._length)
+        ]
+
+    def memory_usage(self, deep: bool = True) -> int:
+        """近似字节数 (MemoryCache 估算大小时调用); 文本列按前 32 个元素外推."""
+        total = 0
+        for f, col in self._columns.items():
+            if f not in TEXT_FIELDS:
+                total += col.nbytes
+            elif col:
+                sample = col[:32]
+                per_item = sum(map(sys.getsizeof, sample)) / len(sample) if deep else 0
+                total += int(len(col) * (8 + per_item))
+        return total
+
+    def __repr__(self) -> str:
+        return f"QuoteBatch({self._length} quotes)"
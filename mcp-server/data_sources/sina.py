@@ -8,6 +8,8 @@ from datetime import datetime
 
 import httpx
 
+from utils.timing import timed
+
 from .base import QuoteData, RealtimeSource
 
 logger = logging.getLogger(__name__)
@@ -86,6 +88,7 @@ class SinaRealtimeSource(RealtimeSource):
             )
         return self._client
 
+    @timed("provider.sina.quotes")
     async def fetch_quotes(self, codes: "list[str]") -> "list[QuoteData]":
         client = await self._get_client()
         sina_codes = [_code_to_sina(c) for c in codes]
@@ -13,6 +13,8 @@ from datetime import datetime
 
 import httpx
 
+from utils.timing import timed
+
 from .base import QuoteData, RealtimeSource
 
 logger = logging.getLogger(__name__)
@@ -112,6 +114,7 @@ class TencentRealtimeSource(RealtimeSource):
             )
         return self._client
 
+    @timed("provider.tencent.quotes")
     async def fetch_quotes(self, codes: list[str]) -> list[QuoteData]:
         client = await self._get_client()
         tencent_codes = [_code_to_tencent(c) for c in codes]
@@ -5,6 +5,7 @@ import re
 import json
 import httpx
 from data_sources.base import QuoteData, RealtimeSource
+from utils.timing import timed
 
 
 THS_FIELD_MAP = {
@@ -37,6 +38,7 @@ class THSRealtimeSource(RealtimeSource):
             return code  # SH
         return code  # SZ (10jqka auto-detects)
 
+    @timed("provider.ths.quotes")
     async def fetch_quotes(self, codes: list[str]) -> list[QuoteData | None]:
         results: list[QuoteData | None] = []
         async with httpx.AsyncClient(timeout=8, headers=self.HEADERS) as client:
@@ -1,6 +1,7 @@
 """同花顺 A-share market scanning APIs: 涨停/跌停/炸板池 + 分钟级资金流."""
 
 from __future__ import annotations
+import asyncio
 import json
 import logging
 import re
@@ -45,52 +46,121 @@ class THSMarketScanner:
     FRIED_PLATE_URL = "https://data.10jqka.com.cn/dataapi/limit_up/fried_plate_pool"
     CAPITAL_URL = "https://d.10jqka.com.cn/v4/time/hs_{code}/capital.js"
 
-    async def get_limit_up_pool(self, page: int = 1, limit: int = 100) -> dict:
-        """获取涨停池数据."""
+    POOL_URLS = {
+        "limit_up": LIMIT_UP_URL,
+        "limit_down": LIMIT_DOWN_URL,
+        "fried_plate": FRIED_PLATE_URL,
+    }
+    MAX_PAGES = 20
+
+    def __init__(self):
+        self._client: httpx.AsyncClient | None = None
+        # 上次各池的页数: 下次直接并发拉这么多页, 池子规模不变时一个往返即拿全
+        self._pool_pages: dict[str, int] = {}
+
+    async def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(timeout=10, headers=HEADERS)
+        return self._client
+
+    async def close(self):
+        if self._client and not self._client.is_closed:
+            await self._client.aclose()
+
+    async def get_limit_up_pool(self, page: int | None = None, limit: int = 100) -> dict:
+        """获取涨停池数据. page 为空时拉取全部分页."""
         return await self._fetch_limit_pool(self.LIMIT_UP_URL, page, limit, "limit_up")
 
-    async def get_limit_down_pool(self, page: int = 1, limit: int = 100) -> dict:
-        """获取跌停池数据."""
+    async def get_limit_down_pool(self, page: int | None = None, limit: int = 100) -> dict:
+        """获取跌停池数据. page 为空时拉取全部分页."""
         return await self._fetch_limit_pool(self.LIMIT_DOWN_URL, page, limit, "limit_down")
 
-    async def get_fried_plate_pool(self, page: int = 1, limit: int = 100) -> dict:
-        """获取炸板池数据."""
+    async def get_fried_plate_pool(self, page: int | None = None, limit: int = 100) -> dict:
+        """获取炸板池数据. page 为空时拉取全部分页."""
         return await self._fetch_limit_pool(self.FRIED_PLATE_URL, page, limit, "fried_plate")
 
-    async def _fetch_limit_pool(self, url: str, page: int, limit: int, pool_type: str) -> dict:
-        params = {"page": page, "limit": limit}
-        async with httpx.AsyncClient(timeout=10, headers=HEADERS) as client:
-            resp = await client.get(url, params=params)
-            resp.raise_for_status()
-            data = resp.json()
-
+    async def get_limit_pools(self, *pool_types: str, limit: int = 100) -> dict[str, dict]:
+        """并发拉取多个池 (默认涨停/跌停/炸板), 单池异常记为 {"error": ...} 不影响其他池."""
+        pool_types = pool_types or tuple(self.POOL_URLS)
+        results = await asyncio.gather(
+            *(self._fetch_limit_pool(self.POOL_URLS[p], None, limit, p) for p in pool_types),
+            return_exceptions=True,
+        )
+        pools = {}
+        for pool_type, r in zip(pool_types, results):
+            if isinstance(r, Exception):
+                logger.warning(f"THS {pool_type} pool failed: {r}")
+                r = {"error": str(r) or type(r).__name__, "pool_type": pool_type}
+            pools[pool_type] = r
+        return pools
+
+    async def _fetch_page(self, url: str, page: int, limit: int) -> dict:
+        client = await self._get_client()
+        resp = await client.get(url, params={"page": page, "limit": limit})
+        resp.raise_for_status()
+        return resp.json()
+
+    async def _fetch_limit_pool(self, url: str, page: int | None, limit: int, pool_type: str) -> dict:
+        if page is not None:
+            pages = [await self._fetch_page(url, page, limit)]
+        else:
+            # 按上次页数并发预取, 第 1 页的 page.total 表明还缺页时再并发补齐
+            guess = self._pool_pages.get(pool_type, 1)
+            pages = await self._gather_pages(url, range(1, guess + 1), limit)
+            first = pages[0]
+            if isinstance(first, BaseException):
+                raise first
+            total = (first.get("data") or {}).get("page", {}).get("total", 0) or 0
+            needed = min(self.MAX_PAGES, max(1, -(-int(total) // limit)))
+            if needed > guess:
+                pages += await self._gather_pages(url, range(guess + 1, needed + 1), limit)
+            self._pool_pages[pool_type] = needed
+            pages = pages[:needed]
+
+        data = pages[0]
         if data.get("status_code") != 0:
             return {"error": data.get("status_msg", "unknown error"), "pool_type": pool_type}
 
-        raw_info = data.get("data", {}).get("info", [])
         page_info = data.get("data", {}).get("page", {})
-
         stocks = []
-        for item in raw_info:
-            stocks.append({
-                "code": item.get("code", ""),
-                "name": item.get("name", ""),
-                "market_type": item.get("market_type", ""),
-                "change_tag": item.get("change_tag", ""),
-                "is_again_limit": bool(item.get("is_again_limit", 0)),
-                "is_new": bool(item.get("is_new", 0)),
-                "high_days": item.get("high_days_value"),
-            })
-
-        return {
+        seen = set()
+        missing = []
+        for no, page_data in enumerate(pages, start=page or 1):
+            if isinstance(page_data, BaseException) or page_data.get("status_code") != 0:
+                missing.append(no)
+                continue
+            for item in page_data.get("data", {}).get("info", []):
+                code = item.get("code", "")
+                if code in seen:  # 翻页期间池子变动可能导致重复
+                    continue
+                seen.add(code)
+                stocks.append({
+                    "code": code,
+                    "name": item.get("name", ""),
+                    "market_type": item.get("market_type", ""),
+                    "change_tag": item.get("change_tag", ""),
+                    "is_again_limit": bool(item.get("is_again_limit", 0)),
+                    "is_new": bool(item.get("is_new", 0)),
+                    "high_days": item.get("high_days_value"),
+                })
+
+        result = {
             "pool_type": pool_type,
             "total": page_info.get("total", 0),
             "count": len(stocks),
             "stocks": stocks,
         }
+        if missing:
+            result["missing_pages"] = missing
+        return result
+
+    async def _gather_pages(self, url: str, page_nos: range, limit: int) -> list:
+        return list(await asyncio.gather(
+            *(self._fetch_page(url, p, limit) for p in page_nos), return_exceptions=True,
+        ))
 
-    async def get_capital_flow(self, code: str) -> dict:
-        """获取单股分钟级资金流数据."""
+    async def get_capital_flow(self, code: str, record: bool = True) -> dict:
+        """获取单股分钟级资金流数据. record=True 时已收盘的分钟线写入日内记录."""
         code = code.strip().zfill(6)
         url = self.CAPITAL_URL.format(code=code)
         headers = {
@@ -136,6 +206,9 @@ class THSMarketScanner:
                 except (ValueError, TypeError):
                     continue
 
+        if record and flow_points:
+            self._record_bars(code, flow_points, str(stock_data.get("date", "")))
+
         total_amount = sum(p["amount"] for p in flow_points)
         last_price = flow_points[-1]["price"] if flow_points else 0
         change_pct = round((last_price - pre_close) / pre_close * 100, 2) if pre_close else 0
@@ -156,3 +229,18 @@ class THSMarketScanner:
             "amount_surge_last_10min": amount_surge,
             "last_10min_flow": recent_10[-3:] if recent_10 else [],
         }
+
+    @staticmethod
+    def _record_bars(code: str, flow_points: list[dict], day: str):
+        """该接口只提供全天数据 (无法按起点增量拉取), 这里只追加记录中还没有的已收盘分钟.
+
+        day 取接口返回的 date: 开盘前/周末/节假日返回的是上一交易日数据, 按其实际日期归档.
+        """
+        from cache.intraday_recorder import closed_minutes, get_recorder, parse_minute
+        if not (len(day) == 8 and day.isdigit()):
+            return  # 没有可靠日期, 不归档
+        try:
+            rows = [dict(p, minute=parse_minute(p["time"])) for p in flow_points]
+            get_recorder("bars").append(code, closed_minutes(rows, day), day)
+        except (OSError, ValueError) as e:
+            logger.warning(f"intraday record failed for {code}: {e}")
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""News sentiment scoring throughput benchmark.
+
+Compares the compiled Aho-Corasick lexicon against the per-keyword `in`
+loop it replaced, on synthetic headlines, and checks both agree.
+
+Usage:
+    .venv/bin/python3 scripts/bench_sentiment.py [--count 5000] [--seed 1]
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from data_sources.multi_news import (
+    BEARISH_KW, BULLISH_KW, LEXICON, NEG_CONTEXT, SECTOR_KEYWORDS, VIP_PERSONS,
+)
+
+FILLER = "国家统计局今日发布数据显示前三季度国内生产总值同比保持平稳企业经营状况持续改善市场预期稳定"
+
+
+def make_headlines(count: int, seed: int) -> list[str]:
+    """~70 字标题, 每条 0-3 个关键词."""
+    rng = random.Random(seed)
+    vocab = BULLISH_KW + BEARISH_KW + NEG_CONTEXT + VIP_PERSONS + SECTOR_KEYWORDS
+    titles = []
+    for _ in range(count):
+        parts = [FILLER[rng.randint(0, 30):rng.randint(31, len(FILLER))] for _ in range(3)]
+        for _ in range(rng.randint(0, 3)):
+            parts.insert(rng.randint(0, len(parts)), rng.choice(vocab))
+        titles.append("".join(parts))
+    return titles
+
+
+def legacy_scan(text: str):
+    """旧实现: 逐词 in + 反向语境拼串, 再逐个扫 VIP/板块词."""
+    score = 0.0
+    matched = []
+    for kw in BULLISH_KW:
+        if kw in text:
+            if any(n + kw in text or kw + n in text for n in NEG_CONTEXT):
+                score -= 0.5
+                matched.append(f"~{kw}(反向)")
+            else:
+                score += 1.0
+                matched.append(f"+{kw}")
+    for kw in BEARISH_KW:
+        if kw in text:
+            score -= 1.0
+            matched.append(f"-{kw}")
+    vip = next((v for v in VIP_PERSONS if v in text), None)
+    sector = any(sk in text for sk in SECTOR_KEYWORDS)
+    return (round(max(-5.0, min(5.0, score)), 1), matched), vip, sector
+
+
+def lexicon_scan(text: str):
+    hits = LEXICON.scan(text)
+    return LEXICON.score_hits(hits), LEXICON.first_vip(hits), bool(hits.sector)
+
+
+def bench(fn, titles, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for t in titles:
+            fn(t)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark news sentiment keyword matching")
+    parser.add_argument("--count", type=int, default=5000, help="Number of headlines")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    titles = make_headlines(args.count, args.seed)
+    mismatches = sum(1 for t in titles if legacy_scan(t) != lexicon_scan(t))
+
+    legacy = bench(legacy_scan, titles, args.repeat)
+    compiled = bench(lexicon_scan, titles, args.repeat)
+    print(f"headlines: {len(titles)}  avg_len: {sum(map(len, titles)) / len(titles):.1f}  mismatches: {mismatches}")
+    print(f"legacy   : {legacy * 1e3:8.1f} ms  {len(titles) / legacy:10.0f} headlines/s")
+    print(f"compiled : {compiled * 1e3:8.1f} ms  {len(titles) / compiled:10.0f} headlines/s  ({legacy / compiled:.2f}x)")
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,396 @@
+#!/usr/bin/env python3
+"""End-to-end benchmark suite for scoring, the K-line cache, news aggregation and tool pipelines.
+
+Every case runs at several universe sizes against local fixtures: synthetic K-lines in a
+throwaway workspace, and HTTP served by a synthetic quote transport (or a recorded
+QUANT_HTTP fixture via --fixtures). No network is touched and runs are repeatable.
+p50/p95 come from timed repeats after a warm-up run. Peak memory and live allocated
+blocks come from one extra tracemalloc-traced run. Results are compared with a stored
+baseline; the exit code is 1 when a case regresses past --threshold.
+
+Usage:
+    .venv/bin/python3 scripts/bench_suite.py [--sizes 10,100,1000,5000] [--repeat 5] [--only compute_]
+    .venv/bin/python3 scripts/bench_suite.py --save-baseline
+    .venv/bin/python3 scripts/bench_suite.py --threshold 0.25 --json /tmp/bench.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import hashlib
+import importlib.util
+import inspect
+import json
+import math
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT.parent))
+
+QUANT_PATH = ROOT.parent / "skills" / "trading-quant" / "scripts" / "quant.py"
+DEFAULT_SIZES = (10, 100, 1000, 5000)
+DEFAULT_BASELINE = os.path.expanduser("~/.openclaw/workspace-trading/cache/bench_baseline.json")
+BARS = 120
+NOISE_FLOOR_MS = 1.0     # 绝对差低于此值不算回归 (计时抖动)
+NOISE_FLOOR_KIB = 64.0
+
+
+class Skip(Exception):
+    """用例在当前环境不可用 (如未安装 mcp)."""
+
+
+CASES: dict[str, Callable[["Sandbox", int], Callable[[], Any]]] = {}
+
+
+def case(name: str):
+    """注册用例: fn(sandbox, size) 完成准备并返回被计时的无参可调用 (可返回协程)."""
+    def decorator(fn):
+        CASES[name] = fn
+        return fn
+    return decorator
+
+
+# ── fixtures ─────────────────────────────────────────────────
+
+
+def make_codes(n: int) -> list[str]:
+    """沪深各半的合成代码."""
+    return [f"{600000 + i // 2}" if i % 2 == 0 else f"{1 + i // 2:06d}" for i in range(n)]
+
+
+def _seed(code: str) -> int:
+    return int(hashlib.md5(code.encode()).hexdigest()[:8], 16)
+
+
+def make_klines(code: str, bars: int = BARS):
+    import numpy as np
+    import pandas as pd
+    rng = np.random.default_rng(_seed(code))
+    close = 10 * np.exp(np.cumsum(rng.normal(0, 0.02, bars)))
+    # 截止今天: DataManager 按今天往前取窗口
+    dates = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=bars).strftime("%Y-%m-%d")
+    volume = rng.uniform(1e6, 1e7, bars)
+    return pd.DataFrame({
+        "code": code, "date": dates, "frequency": "daily", "source": "bench", "adjust": "",
+        "open": close * 0.995, "high": close * 1.01, "low": close * 0.99, "close": close,
+        "volume": volume, "amount": volume * close,
+    })
+
+
+def tencent_line(code: str) -> str:
+    """qt.gtimg.cn 格式的一行行情 (价格由代码确定)."""
+    seed = _seed(code)
+    pre = 5 + seed % 2000 / 10
+    chg = (seed % 1900) / 100 - 9.5
+    price = round(pre * (1 + chg / 100), 2)
+    parts = [""] * 50
+    parts[1], parts[2], parts[3], parts[4], parts[5] = f"股票{code}", code, str(price), str(pre), str(pre)
+    parts[6], parts[7], parts[8] = str(10000 + seed % 90000), str(6000 + seed % 5000), str(5000 + seed % 5000)
+    parts[9], parts[19] = str(price - 0.01), str(price)
+    parts[30], parts[32], parts[33], parts[34] = "20250103150000", f"{chg:.2f}", str(price * 1.01), str(price * 0.99)
+    parts[37], parts[38], parts[39], parts[46] = str(5000 + seed % 500000), f"{seed % 1500 / 100:.2f}", "25", "3"
+    parts[49] = f"{0.5 + seed % 250 / 100:.2f}"
+    prefix = "sh" if code.startswith(("5", "6", "9")) else "sz"
+    return f'v_{prefix}{code}="' + "~".join(parts) + '";'
+
+
+def fixture_transport():
+    """腾讯行情按请求的代码生成, 其他接口一律 404 (各数据源按失败降级)."""
+    import httpx
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.host == "qt.gtimg.cn":
+            symbols = str(request.url).split("q=", 1)[-1].split(",")
+            return httpx.Response(200, text="\n".join(tencent_line(s[2:]) for s in symbols if len(s) == 8))
+        return httpx.Response(404, request=request)
+
+    return httpx.MockTransport(handler)
+
+
+class Sandbox:
+    """临时工作区: HOME / TRADING_WORKSPACE 指向临时目录, 预置 K 线缓存, HTTP 走夹具.
+
+    必须在导入项目模块之前进入 (CACHE_DIR 等路径在导入时确定).
+    """
+
+    def __init__(self, max_codes: int, fixtures: str | None = None):
+        self.max_codes = max_codes
+        self.fixtures = fixtures
+        self._stack = contextlib.ExitStack()
+        self.loop = asyncio.new_event_loop()
+
+    def __enter__(self) -> "Sandbox":
+        self.dir = Path(self._stack.enter_context(tempfile.TemporaryDirectory(prefix="bench-")))
+        self._saved_env = {k: os.environ.get(k) for k in ("HOME", "TRADING_WORKSPACE")}
+        os.environ["HOME"] = str(self.dir)
+        os.environ["TRADING_WORKSPACE"] = str(self.dir)
+        from utils.http_replay import FixtureStore, ReplayTransport, patch_clients
+        transport = ReplayTransport(FixtureStore(self.fixtures)) if self.fixtures else fixture_transport()
+        self._stack.enter_context(patch_clients(transport))
+        self.codes = make_codes(self.max_codes)
+        self.cache_path = self.dir / "stock_data" / "cache.db"
+        self._klines = None
+        return self
+
+    def __exit__(self, *exc):
+        self.loop.close()
+        self._stack.close()
+        for k, v in self._saved_env.items():
+            if v is None:
+                os.environ.pop(k, None)
+            else:
+                os.environ[k] = v
+
+    def kline_cache(self):
+        """预置全部代码日K的 SQLiteKlineCache (首次调用时写入)."""
+        from stock_data.cache import SQLiteKlineCache
+        cache = SQLiteKlineCache(self.cache_path)
+        if self._klines is None:
+            import pandas as pd
+            self._klines = {c: make_klines(c) for c in self.codes}
+            cache.upsert(pd.concat(self._klines.values(), ignore_index=True))
+        return cache
+
+    def klines(self, code: str):
+        self.kline_cache()
+        return self._klines[code]
+
+
+# ── cases ────────────────────────────────────────────────────
+
+
+@case("compute_technical")
+def _technical(sb: Sandbox, size: int):
+    from analysis.technical import compute_technical
+    frames = [sb.klines(c) for c in sb.codes[:size]]
+    return lambda: [compute_technical(df) for df in frames]
+
+
+@case("compute_stock_score")
+def _score(sb: Sandbox, size: int):
+    from analysis.scoring import compute_stock_score
+    from data_sources.tencent import _parse_tencent_parts
+    rows = []
+    for code in sb.codes[:size]:
+        quote = _parse_tencent_parts(tencent_line(code).split('"')[1].split("~"))
+        df = sb.klines(code)
+        rows.append((quote, df, float(df["volume"].tail(5).mean()), float(df["amount"].tail(5).mean())))
+    return lambda: [compute_stock_score(q, df, avg_volume=v, avg_amount=a) for q, df, v, a in rows]
+
+
+@case("sqlite_read")
+def _sqlite_read(sb: Sandbox, size: int):
+    import pandas as pd
+    cache = sb.kline_cache()
+    codes = sb.codes[:size]
+    start = (pd.Timestamp.today() - pd.Timedelta(days=90)).strftime("%Y-%m-%d")
+    return lambda: [cache.get(code=c, frequency="daily", adjust="", start=start) for c in codes]
+
+
+@case("sqlite_write")
+def _sqlite_write(sb: Sandbox, size: int):
+    import pandas as pd
+    from stock_data.cache import SQLiteKlineCache
+    cache = SQLiteKlineCache(sb.dir / f"write_{size}.db")
+    rows = pd.concat([sb.klines(c).tail(60) for c in sb.codes[:size]], ignore_index=True)
+    return lambda: cache.upsert(rows)
+
+
+@case("normalize_kline")
+def _normalize_kline(sb: Sandbox, size: int):
+    from stock_data.utils import normalize_kline_df
+    # baostock 形状的原始返回: 全部字段为字符串
+    cols = ["date", "open", "high", "low", "close", "volume", "amount"]
+    raws = {c: sb.klines(c)[cols].astype(str) for c in sb.codes[:size]}
+    return lambda: [normalize_kline_df(raw, c, "baostock", "daily", "") for c, raw in raws.items()]
+
+
+@case("news_aggregate")
+def _news(sb: Sandbox, size: int):
+    from data_sources.multi_news import NewsItem, aggregate_news, default_sources
+    from data_sources.news_store import NewsStore
+    store = NewsStore(sb.dir / f"news_{size}.db")
+    sources = [name for name, _ in default_sources()]
+    topics = ["央行降息", "芯片出口管制", "新能源车销量", "黄金创新高", "原油减产", "AI 大模型发布"]
+    for i, name in enumerate(sources):
+        items = [NewsItem(title=f"{topics[(i + j) % len(topics)]} 第{j}条 {name}", source=name,
+                          time=f"2025-01-03 {9 + j // 3600 % 6:02d}:{j // 60 % 60:02d}:{j % 60:02d}",
+                          uid=f"{name}-{j}")
+                 for j in range(math.ceil(size / len(sources)))]
+        store.ingest(name, items)
+    limit = math.ceil(size / len(sources))
+    return lambda: aggregate_news(limit_per_source=limit, store=store)
+
+
+def _load_quant():
+    spec = importlib.util.spec_from_file_location("quant_cli", QUANT_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@case("quant:stock_analysis")
+def _quant_stock_analysis(sb: Sandbox, size: int):
+    sb.kline_cache()
+    quant = _load_quant()
+    arg = ",".join(sb.codes[:size])
+    # 不受 tool_timeout 限制, 测完整耗时
+    return lambda: quant.registry.dispatch("stock_analysis", [arg], timeout=3600)
+
+
+def _load_server():
+    try:
+        import server
+    except ImportError as e:
+        raise Skip(f"MCP server unavailable: {e}")
+    return server
+
+
+@case("mcp:get_stock_analysis")
+def _mcp_stock_analysis(sb: Sandbox, size: int):
+    sb.kline_cache()
+    server = _load_server()
+    arg = ",".join(sb.codes[:size])
+    return lambda: server.get_stock_analysis.__wrapped__(arg)
+
+
+@case("mcp:get_closing_summary")
+def _mcp_closing_summary(sb: Sandbox, size: int):
+    sb.kline_cache()
+    server = _load_server()
+    codes = sb.codes[:size]
+    server._load_watchlist = lambda: {"priority": codes, "observe": [], "research": []}
+    return lambda: server.get_closing_summary.__wrapped__()
+
+
+# ── runner ───────────────────────────────────────────────────
+
+
+def percentile(values: list[float], q: float) -> float:
+    """线性插值分位数 (q 取 0-100)."""
+    ordered = sorted(values)
+    if not ordered:
+        return float("nan")
+    pos = (len(ordered) - 1) * q / 100
+    lo, hi = math.floor(pos), math.ceil(pos)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (pos - lo)
+
+
+def _call(fn: Callable[[], Any], loop: asyncio.AbstractEventLoop) -> Any:
+    result = fn()
+    if inspect.isawaitable(result):
+        result = loop.run_until_complete(result)
+    return result
+
+
+def measure(fn: Callable[[], Any], loop: asyncio.AbstractEventLoop, repeat: int = 5, warmup: int = 1) -> dict:
+    """计时 repeat 次 (先预热 warmup 次), 再用 tracemalloc 跑一次记录峰值内存与存活内存块数."""
+    for _ in range(warmup):
+        _call(fn, loop)
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        _call(fn, loop)
+        times.append((time.perf_counter() - started) * 1000)
+    tracemalloc.start()
+    try:
+        result = _call(fn, loop)
+        _, peak = tracemalloc.get_traced_memory()
+        blocks = sum(s.count for s in tracemalloc.take_snapshot().statistics("filename"))
+    finally:
+        tracemalloc.stop()
+    del result
+    return {
+        "p50_ms": round(percentile(times, 50), 3),
+        "p95_ms": round(percentile(times, 95), 3),
+        "min_ms": round(min(times), 3),
+        "peak_kib": round(peak / 1024, 1),
+        "blocks": blocks,
+        "repeat": repeat,
+    }
+
+
+def run_suite(sb: Sandbox, names: list[str], sizes: list[int], repeat: int = 5) -> dict:
+    """{case: {size: 统计 | {"skipped": 原因}}}."""
+    results: dict[str, dict] = {}
+    for name in names:
+        per_size = results[name] = {}
+        for size in sizes:
+            try:
+                fn = CASES[name](sb, size)
+            except Skip as e:
+                per_size[str(size)] = {"skipped": str(e)}
+                break
+            per_size[str(size)] = measure(fn, sb.loop, repeat)
+            print(f"  {name:<26} {size:>6}  p50 {per_size[str(size)]['p50_ms']:>10.2f} ms"
+                  f"  p95 {per_size[str(size)]['p95_ms']:>10.2f} ms"
+                  f"  peak {per_size[str(size)]['peak_kib']:>10.1f} KiB", file=sys.stderr)
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float = 0.2) -> list[dict]:
+    """与基线对比: p50 或峰值内存超出 threshold 比例 (且超出噪声下限) 记为回归."""
+    regressions = []
+    for name, per_size in results.items():
+        for size, cur in per_size.items():
+            base = (baseline.get(name) or {}).get(size)
+            if not base or "skipped" in cur or "skipped" in base:
+                continue
+            for metric, floor in (("p50_ms", NOISE_FLOOR_MS), ("peak_kib", NOISE_FLOOR_KIB)):
+                if cur[metric] > base[metric] * (1 + threshold) and cur[metric] - base[metric] > floor:
+                    regressions.append({
+                        "case": name, "size": int(size), "metric": metric,
+                        "baseline": base[metric], "current": cur[metric],
+                        "ratio": round(cur[metric] / base[metric], 2) if base[metric] else None,
+                    })
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark scoring, caches, news and tool pipelines offline")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)), help="Comma-separated universe sizes")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", default="", help="Run cases whose name contains this substring")
+    parser.add_argument("--fixtures", help="Replay HTTP from a QUANT_HTTP_RECORD fixture instead of synthetic quotes")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="Write results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed slowdown ratio before flagging")
+    parser.add_argument("--json", help="Also write the full report to this path")
+    args = parser.parse_args()
+
+    sizes = sorted(int(s) for s in args.sizes.split(",") if s)
+    names = [n for n in CASES if args.only in n]
+    baseline_path = Path(args.baseline)
+    with Sandbox(max(sizes), args.fixtures) as sb:
+        results = run_suite(sb, names, sizes, args.repeat)
+
+    report = {"sizes": sizes, "repeat": args.repeat, "results": results}
+    if args.save_baseline:
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        merged = json.loads(baseline_path.read_text()) if baseline_path.exists() else {}
+        merged.update(results)
+        baseline_path.write_text(json.dumps(merged, indent=2, ensure_ascii=False))
+        report["baseline_saved"] = str(baseline_path)
+    elif baseline_path.exists():
+        report["regressions"] = compare(results, json.loads(baseline_path.read_text()), args.threshold)
+    else:
+        report["note"] = f"no baseline at {baseline_path}, run with --save-baseline"
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.json:
+        Path(args.json).write_text(text)
+    print(text)
+    sys.exit(1 if report.get("regressions") else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -12,7 +12,7 @@ import os
 import sys
 from datetime import date, datetime, timedelta
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
 _ws = Path(__file__).resolve().parent.parent
 if str(_ws) not in sys.path:
@@ -20,9 +20,10 @@ if str(_ws) not in sys.path:
 
 from mcp.server.fastmcp import FastMCP
 
-from data_sources.manager import DataManager
 from analysis.scoring import compute_stock_score, StockScore
 from config import get_config
+from tools.registry import ToolOutput, with_timeout
+from utils.fanout import fan_out, market_timeouts
 
 # Global market data sources
 from data_sources.tencent_hk import TencentHKRealtimeSource
@@ -31,6 +32,9 @@ from data_sources.tencent_us import TencentUSRealtimeSource
 from data_sources.ths_market import THSMarketScanner
 from data_sources.eastmoney_northbound import NorthboundFlowSource
 
+if TYPE_CHECKING:
+    from data_sources.manager import DataManager  # pandas, 首次调用时再加载
+
 logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s [%(name)s] %(levelname)s: %(message)s",
@@ -48,6 +52,7 @@ _data_mgr: DataManager | None = None
 def _get_data_manager() -> DataManager:
     global _data_mgr
     if _data_mgr is None:
+        from data_sources.manager import DataManager
         _data_mgr = DataManager()
     return _data_mgr
 
@@ -83,7 +88,8 @@ def _clean_code(code: str) -> str:
 
 
 @mcp.tool()
-async def get_stock_analysis(codes: str = "") -> str:
+@with_timeout("stock_analysis", sections=("stocks", "summary"))
+async def get_stock_analysis(codes: str = "", out: ToolOutput | None = None) -> str:
     """获取股票多维度量化分析。
 
     输入: codes - 逗号分隔的股票代码(如 "600519,000858")。为空则分析全部自选股。
@@ -101,20 +107,22 @@ async def get_stock_analysis(codes: str = "") -> str:
     if not code_list:
         return json.dumps({"error": "无股票代码，请提供codes参数或配置watchlist.json"}, ensure_ascii=False)
 
-    quotes = await dm.get_realtime_quotes(code_list)
-    quote_map = {q.code: q for q in quotes}
+    quotes = await dm.get_quote_batch(code_list)
 
-    results = []
+    out = ToolOutput() if out is None else out
+    out["timestamp"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    results = out["stocks"] = []  # 边算边填, 超时返回已评分的股票
     for code in code_list:
         cc = _clean_code(code)
         if len(cc) != 6:
             continue
-        quote = quote_map.get(cc)
+        quote = quotes.get(cc)
         if not quote:
             results.append({"code": cc, "error": "实时行情获取失败"})
             continue
 
-        daily_df = dm.get_daily_klines(cc, days=60)
+        # SQLite 读取/缺数据预热放到线程里, 事件循环不被阻塞, 工具超时才能生效
+        daily_df = await asyncio.to_thread(dm.get_daily_klines, cc, 60)
         avg_volume = 0.0
         avg_amount = 0.0
         if daily_df is not None and len(daily_df) >= 5:
@@ -127,15 +135,14 @@ async def get_stock_analysis(codes: str = "") -> str:
             avg_volume=avg_volume, avg_amount=avg_amount,
         )
         results.append(score.to_dict())
+    out.complete("stocks")
 
-    summary = _build_summary(results)
-    return json.dumps(
-        {"timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"), "stocks": results, "summary": summary},
-        ensure_ascii=False, indent=2,
-    )
+    out.section("summary", _build_summary(results))
+    return json.dumps(out, ensure_ascii=False, indent=2)
 
 
 @mcp.tool()
+@with_timeout("morning_brief")
 async def get_morning_brief() -> str:
     """获取盘前晨报数据包。
 
@@ -198,6 +205,7 @@ async def get_morning_brief() -> str:
 
 
 @mcp.tool()
+@with_timeout("closing_summary")
 async def get_closing_summary() -> str:
     """获取收盘复盘数据包。
 
@@ -222,19 +230,19 @@ async def get_closing_summary() -> str:
         summary_data["note"] = "自选股列表为空"
         return json.dumps(summary_data, ensure_ascii=False, indent=2)
 
-    quotes = await dm.get_realtime_quotes(all_codes)
-    quote_map = {q.code: q for q in quotes}
+    quotes = await dm.get_quote_batch(all_codes)
 
     scored: list[dict] = []
     for code in all_codes:
         cc = _clean_code(code)
         if len(cc) != 6:
             continue
-        quote = quote_map.get(cc)
+        quote = quotes.get(cc)
         if not quote:
             continue
 
-        daily_df = dm.get_daily_klines(cc, days=60)
+        # SQLite 读取/缺数据预热放到线程里, 事件循环不被阻塞, 工具超时才能生效
+        daily_df = await asyncio.to_thread(dm.get_daily_klines, cc, 60)
         avg_volume = 0.0
         avg_amount = 0.0
         if daily_df is not None and len(daily_df) >= 5:
@@ -267,6 +275,7 @@ async def get_closing_summary() -> str:
 
 
 @mcp.tool()
+@with_timeout("system_health")
 async def get_system_health() -> str:
     """获取MCP Server健康状态和数据源状态。
 
@@ -279,6 +288,7 @@ async def get_system_health() -> str:
 
 
 @mcp.tool()
+@with_timeout("warm_klines")
 async def warm_klines(days: int = 90) -> str:
     """预热全部自选股的历史K线数据。
 
@@ -376,6 +386,7 @@ def _load_global_watchlist() -> dict:
 
 
 @mcp.tool()
+@with_timeout("us_market")
 async def get_us_stock_analysis(symbols: str = "") -> str:
     """获取美股实时行情与分析。
 
@@ -442,6 +453,7 @@ async def get_us_stock_analysis(symbols: str = "") -> str:
 
 
 @mcp.tool()
+@with_timeout("hk_market")
 async def get_hk_stock_analysis(codes: str = "") -> str:
     """获取港股实时行情。
 
@@ -488,6 +500,7 @@ async def get_hk_stock_analysis(codes: str = "") -> str:
 
 
 @mcp.tool()
+@with_timeout("commodity")
 async def get_commodity_analysis(codes: str = "") -> str:
     """获取贵金属和原油实时行情。
 
@@ -534,85 +547,91 @@ async def get_commodity_analysis(codes: str = "") -> str:
 
 
 @mcp.tool()
-async def get_global_overview() -> str:
+@with_timeout("global_overview", sections=("a_shares", "us_stocks", "hk_stocks", "commodities"))
+async def get_global_overview(out: ToolOutput | None = None) -> str:
     """获取全球市场概览 — A股+美股+港股+贵金属+原油。
 
     一次调用获取所有市场自选股的实时行情汇总。
     输出: JSON格式包含各市场的价格和涨跌数据。
     """
-    overview = {
+    overview = ToolOutput() if out is None else out
+    overview.update({
         "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
         "type": "global_overview",
         "markets": {},
-    }
+    })
 
-    # A-shares
-    try:
-        dm = _get_data_manager()
+    async def _into(market, job):
+        # 每个市场完成即写入, 工具整体超时时返回已到的市场
+        result = await job
+        if result is not None:
+            overview["markets"][market] = result
+        overview.complete(market)
+        return result
+
+    async def _a_shares():
         wl = _load_watchlist()
         a_codes = wl.get("priority", []) + wl.get("observe", [])
-        if a_codes:
-            a_quotes = await dm.get_realtime_quotes(a_codes[:10])
-            overview["markets"]["a_shares"] = {
-                "count": len(a_quotes),
-                "stocks": [
-                    {"code": q.code, "name": q.name, "price": q.price, "change_pct": q.change_pct}
-                    for q in a_quotes if q
-                ],
-            }
-    except Exception as e:
-        overview["markets"]["a_shares"] = {"error": str(e)}
+        if not a_codes:
+            return None
+        a_quotes = await _get_data_manager().get_realtime_quotes(a_codes[:10])
+        return {
+            "count": len(a_quotes),
+            "stocks": [
+                {"code": q.code, "name": q.name, "price": q.price, "change_pct": q.change_pct}
+                for q in a_quotes if q
+            ],
+        }
 
-    # US stocks (Tencent primary)
-    try:
-        wl_global = _load_global_watchlist()
-        us_syms = wl_global.get("us", [])
-        if us_syms:
-            tencent_us = _get_us_tencent_source()
-            us_quotes = await tencent_us.fetch_quotes(us_syms)
-            overview["markets"]["us_stocks"] = {
-                "count": len([q for q in us_quotes if q]),
-                "stocks": [
-                    {"symbol": q.code, "name": q.name, "price": q.price, "change_pct": q.change_pct}
-                    for q in us_quotes if q
-                ],
-            }
-    except Exception as e:
-        overview["markets"]["us_stocks"] = {"error": str(e)}
+    async def _us_stocks():
+        us_syms = _load_global_watchlist().get("us", [])
+        if not us_syms:
+            return None
+        us_quotes = await _get_us_tencent_source().fetch_quotes(us_syms)
+        return {
+            "count": len([q for q in us_quotes if q]),
+            "stocks": [
+                {"symbol": q.code, "name": q.name, "price": q.price, "change_pct": q.change_pct}
+                for q in us_quotes if q
+            ],
+        }
 
-    # HK stocks
-    try:
-        hk = _get_hk_source()
-        if "wl_global" not in dir():
-            wl_global = _load_global_watchlist()
-        hk_codes = wl_global.get("hk", [])
-        if hk_codes:
-            hk_quotes = await hk.fetch_quotes(hk_codes)
-            overview["markets"]["hk_stocks"] = {
-                "count": len(hk_quotes),
-                "stocks": [
-                    {"code": q.code, "name": q.name, "price": q.price, "change_pct": q.change_pct}
-                    for q in hk_quotes if q
-                ],
-            }
-    except Exception as e:
-        overview["markets"]["hk_stocks"] = {"error": str(e)}
+    async def _hk_stocks():
+        hk_codes = _load_global_watchlist().get("hk", [])
+        if not hk_codes:
+            return None
+        hk_quotes = await _get_hk_source().fetch_quotes(hk_codes)
+        return {
+            "count": len(hk_quotes),
+            "stocks": [
+                {"code": q.code, "name": q.name, "price": q.price, "change_pct": q.change_pct}
+                for q in hk_quotes if q
+            ],
+        }
 
-    # Commodities
-    try:
-        com = _get_commodity_source()
+    async def _commodities():
         com_codes = _load_global_watchlist().get("commodity", list(COMMODITY_MAP.keys()))
-        if com_codes:
-            com_quotes = await com.fetch_quotes(com_codes)
-            overview["markets"]["commodities"] = {
-                "count": len(com_quotes),
-                "items": [
-                    {"code": q.code, "name": q.name, "price": q.price, "change_pct": q.change_pct}
-                    for q in com_quotes if q
-                ],
-            }
-    except Exception as e:
-        overview["markets"]["commodities"] = {"error": str(e)}
+        if not com_codes:
+            return None
+        com_quotes = await _get_commodity_source().fetch_quotes(com_codes)
+        return {
+            "count": len(com_quotes),
+            "items": [
+                {"code": q.code, "name": q.name, "price": q.price, "change_pct": q.change_pct}
+                for q in com_quotes if q
+            ],
+        }
+
+    # 各市场独立主机, 并发请求: 总耗时取最慢的市场
+    _, errors = await fan_out({
+        "a_shares": _into("a_shares", _a_shares()),
+        "us_stocks": _into("us_stocks", _us_stocks()),
+        "hk_stocks": _into("hk_stocks", _hk_stocks()),
+        "commodities": _into("commodities", _commodities()),
+    }, market_timeouts())
+    for market, error in errors.items():
+        overview["markets"][market] = {"error": error}
+        overview.complete(market)
 
     return json.dumps(overview, ensure_ascii=False, indent=2)
 
@@ -620,6 +639,7 @@ async def get_global_overview() -> str:
 
 
 @mcp.tool()
+@with_timeout("market_anomaly")
 async def get_market_anomaly() -> str:
     """获取A股市场异动扫描 — 涨停池/跌停池/炸板池。
 
@@ -632,42 +652,28 @@ async def get_market_anomaly() -> str:
         "type": "market_anomaly",
     }
 
-    try:
-        limit_up = await scanner.get_limit_up_pool()
-        result["limit_up"] = limit_up
-
+    # 三个池并发, 各池内分页也并发拉全
+    pools = await scanner.get_limit_pools("limit_up", "limit_down", "fried_plate")
+    limit_up = result["limit_up"] = pools["limit_up"]
+    summary = result["summary"] = {}
+    if "error" not in limit_up:
         first_limit = [s for s in limit_up.get("stocks", []) if s.get("change_tag") == "FIRST_LIMIT"]
         again_limit = [s for s in limit_up.get("stocks", []) if s.get("is_again_limit")]
-        result["summary"] = {
+        summary.update({
             "total_limit_up": limit_up.get("total", 0),
             "first_limit_count": len(first_limit),
             "again_limit_count": len(again_limit),
-        }
-    except Exception as e:
-        result["limit_up"] = {"error": str(e)}
-
-    try:
-        limit_down = await scanner.get_limit_down_pool()
-        result["limit_down"] = limit_down
-        if "summary" not in result:
-            result["summary"] = {}
-        result["summary"]["total_limit_down"] = limit_down.get("total", 0)
-    except Exception as e:
-        result["limit_down"] = {"error": str(e)}
-
-    try:
-        fried = await scanner.get_fried_plate_pool()
-        result["fried_plate"] = fried
-        if "summary" not in result:
-            result["summary"] = {}
-        result["summary"]["total_fried"] = fried.get("total", 0)
-    except Exception as e:
-        result["fried_plate"] = {"error": str(e)}
+        })
+    result["limit_down"] = pools["limit_down"]
+    summary["total_limit_down"] = pools["limit_down"].get("total", 0)
+    result["fried_plate"] = pools["fried_plate"]
+    summary["total_fried"] = pools["fried_plate"].get("total", 0)
 
     return json.dumps(result, ensure_ascii=False, indent=2)
 
 
 @mcp.tool()
+@with_timeout("capital_flow")
 async def get_capital_flow(codes: str = "") -> str:
     """获取个股分钟级资金流数据。
 
@@ -713,6 +719,7 @@ async def get_capital_flow(codes: str = "") -> str:
 
 
 @mcp.tool()
+@with_timeout("northbound_flow")
 async def get_northbound_flow() -> str:
     """获取北向资金(沪深港通)实时流入/流出数据。
 
@@ -756,4 +763,6 @@ def _build_summary(results: list[dict]) -> dict:
 
 
 if __name__ == "__main__":
+    from utils.metrics import maybe_start_http_server
+    maybe_start_http_server()
     mcp.run()
@@ -0,0 +1,189 @@
+"""Tool registry — name → coroutine dispatch with per-tool timeouts from settings.yaml."""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import functools
+import inspect
+import json
+import logging
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable
+
+from config import get_config
+from utils.metrics import TOOL_CALLS
+from utils.profiler import profile_requested, profiling
+from utils.timing import collect, span, timings_enabled
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT = 60.0
+
+
+class ToolOutput(dict):
+    """工具输出, 分段写入. 超时时已写入的内容作为部分结果返回.
+
+    out.section(key, value) 写入并标记分段完成; 直接 out[key] = ... 只写入不标记,
+    适合边算边填的列表 (超时时返回已处理的部分).
+    """
+
+    def __init__(self, sections: tuple[str, ...] = ()):
+        super().__init__()
+        self.sections = sections
+        self.completed: set[str] = set()
+
+    def section(self, key: str, value: Any) -> Any:
+        self[key] = value
+        self.completed.add(key)
+        return value
+
+    def complete(self, key: str):
+        """标记分段完成 (内容已写在别处, 如嵌套的 out["markets"][key])."""
+        self.completed.add(key)
+
+    def pending(self) -> list[str]:
+        return [s for s in self.sections if s not in self.completed]
+
+
+ToolFunc = Callable[[list[str], ToolOutput], Awaitable[Any]]
+
+
+@dataclass
+class ToolSpec:
+    name: str
+    func: ToolFunc
+    sections: tuple[str, ...] = ()
+    timeout_key: str = ""
+
+
+def get_tool_timeout(key: str) -> float | None:
+    """settings.yaml tool_timeout[key], 缺省取 tool_timeout.default. <=0 表示不限时."""
+    timeouts = get_config().get("tool_timeout", {}) or {}
+    value = timeouts.get(key, timeouts.get("default", DEFAULT_TIMEOUT))
+    value = float(value)
+    return value if value > 0 else None
+
+
+def timeout_payload(name: str, timeout: float | None, partial: dict | None = None,
+                    pending: list[str] | None = None) -> dict:
+    """超时返回: 已完成部分 + timed_out_sections."""
+    payload = dict(partial or {})
+    payload["timed_out"] = True
+    payload["timeout_s"] = timeout
+    payload["timed_out_sections"] = pending or [name]
+    return payload
+
+
+class ToolRegistry:
+    """工具注册表. 每个工具按配置的预算包在 asyncio.wait_for 里执行."""
+
+    def __init__(self):
+        self._tools: dict[str, ToolSpec] = {}
+
+    def tool(self, name: str, sections: tuple[str, ...] = (), timeout_key: str = ""):
+        """注册工具. sections 声明输出分段, 用于超时时报告未完成部分."""
+        def decorator(func: ToolFunc) -> ToolFunc:
+            self._tools[name] = ToolSpec(name, func, tuple(sections), timeout_key or name)
+            return func
+        return decorator
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._tools
+
+    def names(self) -> list[str]:
+        return list(self._tools)
+
+    def timeout_for(self, name: str) -> float | None:
+        return get_tool_timeout(self._tools[name].timeout_key)
+
+    async def dispatch(self, name: str, args: list[str], timeout: float | None = None,
+                       timings: bool | None = None, profile: bool | None = None) -> Any:
+        """执行工具. 超时返回部分结果与 timed_out_sections, 不抛异常.
+
+        timings 为真 (缺省看 timings_enabled()) 且结果是 dict 时附带 _timings 分阶段耗时.
+        profile 为真 (缺省看 QUANT_PROFILE) 时剖析本次调用, 结果附带 _profile (文件路径与 Top-N).
+        """
+        spec = self._tools[name]
+        if timeout is None:
+            timeout = self.timeout_for(name)
+        out = ToolOutput(spec.sections)
+        status = "error"
+        profiled = profile_requested(name) if profile is None else profile
+        with _maybe_profiling(name, profiled) as prof, span(f"tool.{name}"), collect() as collected:
+            try:
+                result = await asyncio.wait_for(spec.func(args, out), timeout)
+                status = "ok"
+            except asyncio.TimeoutError:
+                status = "timeout"
+                logger.warning(f"tool {name} timed out after {timeout}s, pending={out.pending()}")
+                result = timeout_payload(name, timeout, out, out.pending())
+            finally:
+                TOOL_CALLS.inc(tool=name, status=status)
+        result = out if result is None else result
+        if (timings_enabled() if timings is None else timings) and isinstance(result, dict):
+            result["_timings"] = collected.summary()
+        if prof is not None and isinstance(result, dict):
+            result["_profile"] = prof.report()
+        return result
+
+
+def _maybe_profiling(name: str, enabled: bool) -> contextlib.AbstractContextManager:
+    return profiling(name) if enabled else contextlib.nullcontext()
+
+
+def _with_fields(text: str, **fields) -> str:
+    """JSON 对象输出追加 _timings / _profile 等字段; 非 JSON 对象原样返回."""
+    try:
+        payload = json.loads(text)
+    except (TypeError, ValueError):
+        return text
+    if not isinstance(payload, dict):
+        return text
+    payload.update(fields)
+    return json.dumps(payload, ensure_ascii=False, indent=2)
+
+
+def with_timeout(key: str, sections: tuple[str, ...] = ()):
+    """MCP 工具装饰器: 按 tool_timeout[key] 限时, 超时返回 JSON 而非挂起.
+
+    工具声明了 out 参数时传入 ToolOutput(sections) (对 MCP 隐藏该参数), 与 ToolRegistry
+    一样返回 JSON 序列化的 out 或自行返回文本; 超时时返回 out 中已写入的部分和未完成的分段.
+    """
+    def decorator(func: Callable[..., Awaitable[str]]):
+        signature = inspect.signature(func)
+        wants_out = "out" in signature.parameters
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs) -> str:
+            timeout = get_tool_timeout(key)
+            status = "error"
+            out = ToolOutput(tuple(sections))
+            if wants_out:
+                kwargs["out"] = out
+            profiled = profile_requested(func.__name__)
+            with _maybe_profiling(func.__name__, profiled) as prof, span(f"tool.{func.__name__}"), \
+                    collect() as collected:
+                try:
+                    text = await asyncio.wait_for(func(*args, **kwargs), timeout)
+                    status = "ok"
+                except asyncio.TimeoutError:
+                    status = "timeout"
+                    logger.warning(f"tool {func.__name__} timed out after {timeout}s, pending={out.pending()}")
+                    payload = timeout_payload(key, timeout, out, out.pending() if sections else None)
+                    text = json.dumps(payload, ensure_ascii=False, indent=2, default=str)
+                finally:
+                    TOOL_CALLS.inc(tool=func.__name__, status=status)
+            if text is None:
+                text = json.dumps(out, ensure_ascii=False, indent=2, default=str)
+            if timings_enabled():
+                text = _with_fields(text, _timings=collected.summary())
+            if prof is not None:
+                text = _with_fields(text, _profile=prof.report())
+            return text
+
+        if wants_out:
+            wrapper.__signature__ = signature.replace(
+                parameters=[p for name, p in signature.parameters.items() if name != "out"])
+        return wrapper
+    return decorator
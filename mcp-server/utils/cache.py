@@ -1,15 +1,22 @@
 """JSON 文件缓存系统: 支持普通 KV 缓存 + 按日历史记录."""
 
+import fcntl
 import json
 import os
+import tempfile
 import time
 import logging
+from contextlib import contextmanager
 from datetime import datetime, timedelta
+from typing import Callable
+
+from .metrics import CACHE_LOOKUPS
 
 logger = logging.getLogger(__name__)
 
 CACHE_DIR = os.path.expanduser("~/.openclaw/workspace-trading/cache")
 DAILY_LOG_FILE = os.path.join(CACHE_DIR, "daily_market_log.json")
+SOURCE_HEALTH_FILE = os.path.join(CACHE_DIR, "source_health.json")
 
 _kline_consecutive_cache = {"data": None, "ts": 0, "ttl": 600}  # 10 min cache
 
@@ -37,12 +44,75 @@ def cache_get(key: str) -> dict | None:
         with open(path) as f:
             entry = json.load(f)
         if time.time() - entry["ts"] > entry["ttl"]:
+            CACHE_LOOKUPS.inc(tier="file", result="miss")
             return None
+        CACHE_LOOKUPS.inc(tier="file", result="hit")
         return entry["data"]
     except (FileNotFoundError, json.JSONDecodeError, KeyError):
+        CACHE_LOOKUPS.inc(tier="file", result="miss")
         return None
 
 
+@contextmanager
+def _file_lock(path: str):
+    """跨进程互斥锁 (flock 旁路 .lock 文件)."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + ".lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _atomic_write_json(path: str, data: dict):
+    """先写临时文件再 rename, 读者永远看不到半截 JSON."""
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-", suffix=".json")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def _read_json(path: str) -> dict:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def load_source_health(chain: str, path: str | None = None) -> dict[str, dict]:
+    """读取某条降级链路已持久化的数据源健康/熔断状态. 返回 {source: state}."""
+    return _read_json(path or SOURCE_HEALTH_FILE).get(chain, {})
+
+
+def update_source_health(
+    chain: str,
+    source: str,
+    apply: Callable[[dict], dict],
+    path: str | None = None,
+) -> dict:
+    """原子更新单个数据源的状态.
+
+    在文件锁内读取最新持久化状态, 交给 apply 生成新状态后整体替换写回,
+    多个并发的 quant.py 进程不会互相覆盖计数.
+    """
+    path = path or SOURCE_HEALTH_FILE
+    with _file_lock(path):
+        data = _read_json(path)
+        state = apply(data.get(chain, {}).get(source, {}))
+        data.setdefault(chain, {})[source] = state
+        _atomic_write_json(path, data)
+    return state
+
+
 def save_daily_snapshot(date: str, data: dict):
     """保存某日市场快照. date 格式 YYYY-MM-DD.
     
@@ -0,0 +1,103 @@
+"""进程内事件总线: 发布/订阅 + 按 (类型, 标的) 去重窗口. 生产者只管发布, 告警消费者按类型订阅."""
+
+from __future__ import annotations
+
+import asyncio
+import inspect
+import logging
+import time
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from typing import Awaitable, Callable, Union
+
+logger = logging.getLogger(__name__)
+
+ALL = "*"
+DEFAULT_DEDUP_WINDOW = 300.0
+
+
+@dataclass
+class Event:
+    """一条异动事件. key 为去重键 (个股代码, 全市场事件用 "market")."""
+    type: str
+    key: str
+    message: str
+    level: int = 1          # 0 提示 / 1 关注 / 2 重要
+    data: dict = field(default_factory=dict)
+    ts: float = field(default_factory=time.time)
+    seq: int = 0
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+Handler = Callable[[Event], Union[None, Awaitable[None]]]
+
+
+def dedup_windows() -> dict[str, float]:
+    """settings.yaml alerts.dedup_window (秒)."""
+    from config import get_config
+    return dict((get_config().get("alerts", {}) or {}).get("dedup_window", {}) or {})
+
+
+class EventBus:
+    """同步发布; async 订阅者被调度为任务, drain() 等待其完成.
+
+    同一 (type, key) 在 dedup_window 内重复发布会被丢弃, 避免每次轮询都刷屏.
+    """
+
+    def __init__(self, windows: dict[str, float] | None = None, history: int = 500,
+                 clock: Callable[[], float] = time.monotonic):
+        self.windows = dedup_windows() if windows is None else dict(windows)
+        self.history: deque[Event] = deque(maxlen=history)
+        self.seq = 0
+        self._clock = clock
+        self._last: dict[tuple[str, str], float] = {}
+        self._handlers: dict[str, list[Handler]] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+    def subscribe(self, event_type: str = ALL, handler: Handler | None = None):
+        """订阅某类事件 ("*" 为全部). 不传 handler 时作装饰器使用."""
+        if handler is None:
+            return lambda fn: self.subscribe(event_type, fn)
+        self._handlers.setdefault(event_type, []).append(handler)
+        return handler
+
+    def unsubscribe(self, event_type: str, handler: Handler):
+        handlers = self._handlers.get(event_type, [])
+        if handler in handlers:
+            handlers.remove(handler)
+
+    def window(self, event_type: str) -> float:
+        return float(self.windows.get(event_type, self.windows.get("default", DEFAULT_DEDUP_WINDOW)))
+
+    def publish(self, event: Event) -> bool:
+        """发布事件, 去重窗口内的重复事件返回 False."""
+        now = self._clock()
+        dedup_key = (event.type, event.key)
+        last = self._last.get(dedup_key)
+        if last is not None and now - last < self.window(event.type):
+            return False
+        self._last[dedup_key] = now
+        self.seq += 1
+        event.seq = self.seq
+        self.history.append(event)
+        for handler in self._handlers.get(event.type, []) + self._handlers.get(ALL, []):
+            try:
+                result = handler(event)
+                if inspect.isawaitable(result):
+                    task = asyncio.ensure_future(result)
+                    self._tasks.add(task)
+                    task.add_done_callback(self._tasks.discard)
+            except Exception as e:
+                logger.warning(f"event handler failed for {event.type}: {e}")
+        return True
+
+    async def drain(self):
+        """等待已调度的 async 订阅者执行完."""
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+    def since(self, seq: int = 0, types: set[str] | None = None) -> list[Event]:
+        """seq 之后发布的事件 (按发布顺序)."""
+        return [e for e in self.history if e.seq > seq and (not types or e.type in types)]
@@ -0,0 +1,54 @@
+"""并发扇出: 多个独立数据源并行请求, 单个超时/异常互不影响."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any, Awaitable
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MARKET_TIMEOUT = 10.0
+
+
+def market_timeouts(**overrides: float) -> dict[str, float]:
+    """settings.yaml market_timeout (秒), 可按调用覆盖个别市场."""
+    from config import get_config
+    timeouts = dict(get_config().get("market_timeout", {}) or {})
+    timeouts.update(overrides)
+    return timeouts
+
+
+async def fan_out(
+    jobs: dict[str, Awaitable[Any]],
+    timeouts: dict[str, float] | float | None = None,
+) -> tuple[dict[str, Any], dict[str, str]]:
+    """并行执行 jobs, 返回 (results, errors).
+
+    总耗时取决于最慢的一路而不是各路之和; 某一路超时或抛异常只记入 errors[name].
+    """
+    names = list(jobs)
+
+    def _limit(name: str) -> float | None:
+        if isinstance(timeouts, dict):
+            return timeouts.get(name, timeouts.get("default", DEFAULT_MARKET_TIMEOUT))
+        return timeouts
+
+    outcomes = await asyncio.gather(
+        *(asyncio.wait_for(jobs[name], _limit(name)) for name in names),
+        return_exceptions=True,
+    )
+    results: dict[str, Any] = {}
+    errors: dict[str, str] = {}
+    for name, outcome in zip(names, outcomes):
+        if isinstance(outcome, asyncio.TimeoutError):
+            errors[name] = f"timeout after {_limit(name)}s"
+        elif isinstance(outcome, Exception):
+            errors[name] = str(outcome) or type(outcome).__name__
+        elif isinstance(outcome, BaseException):
+            raise outcome
+        else:
+            results[name] = outcome
+            continue
+        logger.warning(f"fan_out {name} failed: {errors[name]}")
+    return results, errors
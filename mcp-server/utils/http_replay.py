@@ -0,0 +1,255 @@
+"""HTTP 录制/回放: httpx 传输层替身, 让整条数据链路可以离线、可复现地运行.
+
+录制: RecordingTransport 把真实响应 (解压后的正文) 写入 gzip 压缩的 JSONL 夹具文件.
+回放: ReplayTransport 按请求指纹返回录制的响应, 可注入固定/随机/录制时的延迟和失败.
+patch_clients() 让之后创建的所有 httpx.AsyncClient 默认走指定传输层, 数据源代码无需改动.
+
+    QUANT_HTTP_RECORD=fixtures/morning.jsonl.gz quant.py stock_analysis 600519   # 录制
+    QUANT_HTTP_REPLAY=fixtures/morning.jsonl.gz quant.py stock_analysis 600519   # 离线回放
+"""
+
+from __future__ import annotations
+
+import asyncio
+import base64
+import contextlib
+import gzip
+import hashlib
+import json
+import logging
+import os
+import random
+import re
+import time
+from typing import Iterator
+from urllib.parse import urlencode
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# 时间戳/JSONP 回调名等每次请求都不同的参数, 不参与指纹
+VOLATILE_PARAMS = frozenset({"_", "cb", "callback", "rnd"})
+CALLBACK_PARAMS = ("cb", "callback")
+# 正文已解压保存, 回放时不能再带这些头
+_DROP_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection"}
+
+
+def request_key(request: httpx.Request, ignore: frozenset[str] = VOLATILE_PARAMS) -> str:
+    """请求指纹: 方法 + 地址 + 排序后的查询参数 (去掉易变参数) + 请求体摘要."""
+    url = request.url
+    params = sorted((k, v) for k, v in url.params.multi_items() if k not in ignore)
+    key = f"{request.method} {url.scheme}://{url.host}{url.path}"
+    if params:
+        key += "?" + urlencode(params)
+    body = request.content
+    if body:
+        key += "#" + hashlib.sha1(body).hexdigest()[:16]
+    return key
+
+
+def _callback(request: httpx.Request) -> str:
+    return next((request.url.params[p] for p in CALLBACK_PARAMS if p in request.url.params), "")
+
+
+class FixtureStore:
+    """gzip JSONL 夹具文件, 每行一条录制的响应. 同一指纹可有多条, 回放时按录制顺序取用."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.entries: dict[str, list[dict]] = {}
+        if os.path.exists(path):
+            self.load()
+
+    def __len__(self) -> int:
+        return sum(len(v) for v in self.entries.values())
+
+    def load(self):
+        self.entries = {}
+        with gzip.open(self.path, "rt", encoding="utf-8") as fh:
+            for line in fh:
+                if line.strip():
+                    entry = json.loads(line)
+                    self.entries.setdefault(entry["key"], []).append(entry)
+
+    def add(self, request: httpx.Request, status: int, headers: dict, content: bytes, elapsed: float):
+        entry = {
+            "key": request_key(request),
+            "method": request.method,
+            "url": str(request.url),
+            "callback": _callback(request),
+            "status": status,
+            "headers": headers,
+            "body": base64.b64encode(content).decode(),
+            "elapsed": round(elapsed, 4),
+        }
+        self.entries.setdefault(entry["key"], []).append(entry)
+
+    def save(self):
+        """原子写入 (先写临时文件再替换)."""
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        # 不写文件名和 mtime, 相同内容的夹具文件字节一致
+        with open(tmp, "wb") as raw, gzip.GzipFile(filename="", fileobj=raw, mode="wb", mtime=0) as fh:
+            for entries in self.entries.values():
+                for entry in entries:
+                    fh.write((json.dumps(entry, ensure_ascii=False) + "\n").encode("utf-8"))
+        os.replace(tmp, self.path)
+
+
+class RecordingTransport(httpx.AsyncBaseTransport):
+    """透传到真实网络并录制响应. 多个客户端共用, 客户端关闭时不关闭底层连接池 (用 close())."""
+
+    def __init__(self, store: FixtureStore, inner: httpx.AsyncBaseTransport | None = None):
+        self.store = store
+        self.inner = inner or httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        started = time.perf_counter()
+        response = await self.inner.handle_async_request(request)
+        try:
+            content = await response.aread()
+        finally:
+            await response.aclose()
+        headers = {k: v for k, v in response.headers.items() if k.lower() not in _DROP_HEADERS}
+        self.store.add(request, response.status_code, headers, content, time.perf_counter() - started)
+        return httpx.Response(response.status_code, headers=headers, content=content, request=request)
+
+    async def aclose(self):
+        pass
+
+    async def close(self):
+        await self.inner.aclose()
+
+
+class ReplayTransport(httpx.AsyncBaseTransport):
+    """按指纹回放录制的响应.
+
+    latency: None 不延迟; 数字为固定秒数; (lo, hi) 为均匀随机; "recorded" 用录制时的耗时.
+    failure_rate: 以该概率抛 httpx.ConnectError. faults: URL 子串 → 状态码或异常, 命中即注入.
+    随机性由 (seed, 指纹, 第几次请求) 决定, 与并发调度顺序无关, 同一 seed 每次运行结果相同.
+    同一指纹的请求次数多于录制条数时, 重复返回最后一条; 没有录制的请求抛 httpx.ConnectError.
+    """
+
+    def __init__(self, store: FixtureStore, latency: float | tuple[float, float] | str | None = None,
+                 failure_rate: float = 0.0, faults: dict[str, int | Exception] | None = None,
+                 seed: int = 0):
+        self.store = store
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.faults = dict(faults or {})
+        self.seed = seed
+        self.calls: dict[str, int] = {}
+        self.misses: list[str] = []
+
+    def _rng(self, key: str, n: int) -> random.Random:
+        return random.Random(f"{self.seed}:{key}:{n}")
+
+    def _delay(self, entry: dict, rng: random.Random) -> float:
+        if self.latency is None:
+            return 0.0
+        if self.latency == "recorded":
+            return float(entry.get("elapsed", 0))
+        if isinstance(self.latency, (tuple, list)):
+            return rng.uniform(*self.latency)
+        return float(self.latency)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        key = request_key(request)
+        n = self.calls.get(key, 0)
+        self.calls[key] = n + 1
+        url = str(request.url)
+        for pattern, fault in self.faults.items():
+            if pattern in url:
+                if isinstance(fault, Exception):
+                    raise fault
+                return httpx.Response(int(fault), content=b"", request=request)
+        entries = self.store.entries.get(key)
+        if not entries:
+            self.misses.append(key)
+            raise httpx.ConnectError(f"no recorded response for {key}", request=request)
+        entry = entries[min(n, len(entries) - 1)]
+        rng = self._rng(key, n)
+        delay = self._delay(entry, rng)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if self.failure_rate and rng.random() < self.failure_rate:
+            raise httpx.ConnectError(f"injected failure for {key}", request=request)
+        content = base64.b64decode(entry["body"])
+        # JSONP: 把录制时的回调名换成本次请求的回调名
+        callback = _callback(request)
+        if callback and entry.get("callback") and callback != entry["callback"]:
+            content = re.sub(rb"^\s*" + re.escape(entry["callback"].encode()), callback.encode(), content, count=1)
+        return httpx.Response(entry["status"], headers=entry["headers"], content=content, request=request)
+
+    async def aclose(self):
+        pass
+
+
+@contextlib.contextmanager
+def patch_clients(transport: httpx.AsyncBaseTransport) -> Iterator[httpx.AsyncBaseTransport]:
+    """期间新建的 httpx.AsyncClient 未显式指定 transport/mounts 时使用 transport."""
+    original = httpx.AsyncClient.__init__
+
+    def __init__(self, *args, **kwargs):
+        if kwargs.get("transport") is None and not kwargs.get("mounts"):
+            kwargs["transport"] = transport
+        original(self, *args, **kwargs)
+
+    httpx.AsyncClient.__init__ = __init__
+    try:
+        yield transport
+    finally:
+        httpx.AsyncClient.__init__ = original
+
+
+@contextlib.asynccontextmanager
+async def recording(path: str):
+    """录制期间的全部 httpx 请求, 退出时写入 path (追加到已有夹具之后)."""
+    store = FixtureStore(path)
+    transport = RecordingTransport(store)
+    try:
+        with patch_clients(transport):
+            yield store
+    finally:
+        store.save()
+        await transport.close()
+
+
+@contextlib.asynccontextmanager
+async def replaying(path: str, **options):
+    """用 path 中的夹具回放全部 httpx 请求; options 见 ReplayTransport."""
+    transport = ReplayTransport(FixtureStore(path), **options)
+    with patch_clients(transport):
+        yield transport
+    if transport.misses:
+        logger.warning(f"http replay: {len(transport.misses)} requests had no fixture")
+
+
+def _latency_from_env(value: str):
+    if not value:
+        return None
+    if value == "recorded":
+        return value
+    if "," in value:
+        lo, hi = value.split(",", 1)
+        return float(lo), float(hi)
+    return float(value)
+
+
+def from_env() -> contextlib.AbstractAsyncContextManager:
+    """QUANT_HTTP_RECORD / QUANT_HTTP_REPLAY 指定夹具文件时返回对应上下文, 否则空上下文.
+
+    回放参数: QUANT_HTTP_LATENCY (秒 / "lo,hi" / recorded), QUANT_HTTP_FAILURE_RATE, QUANT_HTTP_SEED.
+    """
+    record, replay = os.environ.get("QUANT_HTTP_RECORD"), os.environ.get("QUANT_HTTP_REPLAY")
+    if record:
+        return recording(record)
+    if replay:
+        return replaying(
+            replay,
+            latency=_latency_from_env(os.environ.get("QUANT_HTTP_LATENCY", "")),
+            failure_rate=float(os.environ.get("QUANT_HTTP_FAILURE_RATE", 0) or 0),
+            seed=int(os.environ.get("QUANT_HTTP_SEED", 0) or 0),
+        )
+    return contextlib.nullcontext()
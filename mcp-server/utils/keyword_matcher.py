@@ -0,0 +1,129 @@
+"""Aho-Corasick 多模式匹配: 模式集编译一次, 每段文本单次线性扫描返回全部命中."""
+
+from __future__ import annotations
+
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Iterable
+
+
+class KeywordMatcher:
+    """Aho-Corasick 自动机. find() 与逐个 `pattern in text` 的结果集合完全一致 (含重叠命中)."""
+
+    def __init__(self, patterns: Iterable[str]):
+        self.patterns: list[str] = list(dict.fromkeys(p for p in patterns if p))
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._out: list[tuple[int, ...]] = [()]
+        for pid, pattern in enumerate(self.patterns):
+            self._insert(pattern, pid)
+        self._link()
+
+    def _insert(self, pattern: str, pid: int):
+        state = 0
+        for ch in pattern:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(())
+                self._goto[state][ch] = nxt
+            state = nxt
+        self._out[state] += (pid,)
+
+    def _link(self):
+        """BFS 构建 fail 指针, 并把 fail 链上的输出合并到各状态."""
+        goto, fail, out = self._goto, self._fail, self._out
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in goto[state].items():
+                queue.append(nxt)
+                f = fail[state]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[nxt] = goto[f].get(ch, 0) if state else 0
+                out[nxt] += out[fail[nxt]]
+
+    def find(self, text: str) -> set[int]:
+        """返回 text 中出现过的模式 id 集合."""
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        hits: set[int] = set()
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                hits.update(out[state])
+        return hits
+
+    def find_all(self, text: str) -> set[str]:
+        return {self.patterns[pid] for pid in self.find(text)}
+
+
+@dataclass
+class LexiconHits:
+    """一次扫描的命中结果 (均为各自词表中的下标)."""
+    bullish: set[int] = field(default_factory=set)
+    negated: set[int] = field(default_factory=set)  # 处于反向语境的利好词
+    bearish: set[int] = field(default_factory=set)
+    vip: set[int] = field(default_factory=set)
+    sector: set[int] = field(default_factory=set)
+
+
+class SentimentLexicon:
+    """情绪词表 + VIP/板块词编译成一个自动机.
+
+    反向语境 (n+kw / kw+n, 如 "亏损收窄") 作为组合模式一并编译, 不再对每个命中逐个拼串检查.
+    """
+
+    def __init__(self, bullish: list[str], bearish: list[str], neg_context: list[str],
+                 vip: list[str] = (), sectors: list[str] = ()):
+        self.bullish = list(bullish)
+        self.bearish = list(bearish)
+        self.vip = list(vip)
+        self.sectors = list(sectors)
+        tagged: dict[str, list[tuple[str, int]]] = {}
+        for kind, words in (("bullish", self.bullish), ("bearish", self.bearish),
+                            ("vip", self.vip), ("sector", self.sectors)):
+            for i, w in enumerate(words):
+                tagged.setdefault(w, []).append((kind, i))
+        for i, kw in enumerate(self.bullish):
+            for n in neg_context:
+                tagged.setdefault(n + kw, []).append(("negated", i))
+                tagged.setdefault(kw + n, []).append(("negated", i))
+        self._matcher = KeywordMatcher(tagged)
+        self._tags = [tuple(tagged[p]) for p in self._matcher.patterns]
+
+    def scan(self, text: str) -> LexiconHits:
+        hits = LexiconHits()
+        for pid in self._matcher.find(text):
+            for kind, i in self._tags[pid]:
+                getattr(hits, kind).add(i)
+        return hits
+
+    def score_hits(self, hits: LexiconHits) -> tuple[float, list[str]]:
+        """情绪评分 (-5 to +5), matched 顺序与词表顺序一致."""
+        score = 0.0
+        matched = []
+        for i in sorted(hits.bullish):
+            kw = self.bullish[i]
+            if i in hits.negated:
+                score -= 0.5
+                matched.append(f"~{kw}(反向)")
+            else:
+                score += 1.0
+                matched.append(f"+{kw}")
+        for i in sorted(hits.bearish):
+            score -= 1.0
+            matched.append(f"-{self.bearish[i]}")
+        return round(max(-5.0, min(5.0, score)), 1), matched
+
+    def score(self, text: str) -> tuple[float, list[str]]:
+        return self.score_hits(self.scan(text))
+
+    def first_vip(self, hits: LexiconHits) -> str | None:
+        """按 VIP 列表顺序返回第一个命中的人物."""
+        return self.vip[min(hits.vip)] if hits.vip else None
@@ -0,0 +1,251 @@
+"""Prometheus 文本格式指标: 计数器/仪表 + 抓取时采集的健康报告 + 分阶段耗时直方图.
+
+热路径只做计数 (工具调用、熔断跳闸、缓存命中); 数据源成功/失败次数、熔断状态、缓存大小等
+已有统计在抓取时由 collector 从 health_report / stats 读取, 不重复记账.
+耗时直方图直接导出 utils.timing.TIMINGS (span 名作为 stage 标签).
+
+    QUANT_METRICS_PORT=9464 quant.py daemon      # curl 127.0.0.1:9464/metrics
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from typing import TYPE_CHECKING, Callable, Iterable
+
+from .timing import BUCKETS_MS, TIMINGS
+
+if TYPE_CHECKING:
+    from http.server import ThreadingHTTPServer  # 导出端口启用时才加载
+
+logger = logging.getLogger(__name__)
+
+PREFIX = "quant_"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Family:
+    """一个指标族: 名称、类型、说明和 (后缀, 标签, 值) 样本."""
+
+    def __init__(self, name: str, kind: str, help: str = ""):
+        self.name = name if name.startswith(PREFIX) else PREFIX + name
+        self.kind = kind
+        self.help = help
+        self.samples: list[tuple[str, dict, float]] = []
+
+    def add(self, value: float, suffix: str = "", **labels) -> "Family":
+        self.samples.append((suffix, labels, value))
+        return self
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines += [f"{self.name}{suffix}{_format_labels(labels)} {_format_value(value)}"
+                  for suffix, labels, value in self.samples]
+        return lines
+
+
+class Counter:
+    """单调递增计数器, 按标签组合分别计数."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str = ""):
+        self.name, self.help = name, help
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(tuple(sorted(labels.items())), 0.0)
+
+    def collect(self) -> Family:
+        family = Family(self.name, self.kind, self.help)
+        with self._lock:
+            for key, value in self._values.items():
+                family.add(value, **dict(key))
+        return family
+
+
+class Gauge(Counter):
+    """可增可减的当前值."""
+
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[tuple(sorted(labels.items()))] = float(value)
+
+
+class MetricsRegistry:
+    """进程内指标表. collector 为抓取时调用的函数, 返回若干 Family."""
+
+    def __init__(self):
+        self._metrics: dict[str, Counter] = {}
+        self._collectors: dict[str, Callable[[], Iterable[Family]]] = {}
+
+    def counter(self, name: str, help: str = "") -> Counter:
+        return self._metrics.setdefault(name, Counter(name, help))
+
+    def gauge(self, name: str, help: str = "") -> Gauge:
+        return self._metrics.setdefault(name, Gauge(name, help))
+
+    def add_collector(self, key: str, collector: Callable[[], Iterable[Family]]):
+        """按 key 注册 (同 key 覆盖, 重建的 DataManager 不会重复导出)."""
+        self._collectors[key] = collector
+
+    def remove_collector(self, key: str):
+        self._collectors.pop(key, None)
+
+    def collect(self) -> list[Family]:
+        families = [m.collect() for m in list(self._metrics.values())]
+        families.append(_stage_histograms())
+        for key, collector in list(self._collectors.items()):
+            try:
+                families.extend(collector())
+            except Exception as e:
+                logger.debug(f"metrics collector {key} failed: {e}")
+        return families
+
+    def render(self) -> str:
+        """Prometheus 文本格式. 同名族 (多个 collector 产出) 合并输出."""
+        merged: dict[str, Family] = {}
+        for family in self.collect():
+            if family.name in merged:
+                merged[family.name].samples.extend(family.samples)
+            else:
+                merged[family.name] = family
+        lines = []
+        for family in merged.values():
+            if family.samples:
+                lines += family.render()
+        return "\n".join(lines) + "\n"
+
+
+def _stage_histograms() -> Family:
+    """TIMINGS 各 span 转为累计桶直方图 (秒)."""
+    family = Family("stage_duration_seconds", "histogram", "Duration of instrumented stages (utils.timing spans)")
+    for name, (counts, count, total) in TIMINGS.histograms().items():
+        cumulative = 0
+        for bound, n in zip(BUCKETS_MS, counts):
+            cumulative += n
+            family.add(cumulative, "_bucket", stage=name, le=_format_value(bound / 1000))
+        family.add(count, "_bucket", stage=name, le="+Inf")
+        family.add(total / 1000, "_sum", stage=name)
+        family.add(count, "_count", stage=name)
+    return family
+
+
+METRICS = MetricsRegistry()
+
+TOOL_CALLS = METRICS.counter("tool_calls_total", "Tool invocations by outcome (ok / timeout / error)")
+CIRCUIT_TRIPS = METRICS.counter("circuit_breaker_trips_total", "Circuit breaker closed-to-open transitions")
+CACHE_LOOKUPS = METRICS.counter("cache_lookups_total", "Cache lookups by tier and result (hit / miss)")
+
+
+def chain_families(chain: str, report: dict) -> list[Family]:
+    """FallbackChain / DataSourceChain 的 health_report → 数据源请求计数、熔断状态与平均延迟."""
+    requests = Family("source_requests_total", "counter", "Data source calls by outcome")
+    circuit = Family("source_circuit_open", "gauge", "1 while the source circuit breaker is open")
+    latency = Family("source_avg_latency_seconds", "gauge", "Mean successful call latency")
+    for source, h in report.items():
+        requests.add(h.get("success", 0), chain=chain, source=source, outcome="success")
+        requests.add(h.get("fail", 0), chain=chain, source=source, outcome="failure")
+        circuit.add(1 if h.get("circuit_open") else 0, chain=chain, source=source)
+        if "avg_latency_ms" in h:
+            latency.add(h["avg_latency_ms"] / 1000, chain=chain, source=source)
+        elif "avg_latency" in h:
+            latency.add(h["avg_latency"], chain=chain, source=source)
+    return [requests, circuit, latency]
+
+
+def memory_cache_families(tier: str, stats: dict) -> list[Family]:
+    """MemoryCache.stats() → 条目数、容量、字节数 (按命名空间)、命中/未命中与淘汰计数."""
+    families = [
+        Family("cache_entries", "gauge", "Entries currently held per cache tier").add(stats["size"], tier=tier),
+        Family("cache_capacity", "gauge", "Maximum entries per cache tier").add(stats["max_size"], tier=tier),
+        Family(CACHE_LOOKUPS.name, "counter", CACHE_LOOKUPS.help)
+        .add(stats["hits"], tier=tier, result="hit").add(stats["misses"], tier=tier, result="miss"),
+    ]
+    if "bytes" in stats:
+        used = Family("cache_bytes", "gauge", "Estimated bytes held per cache namespace")
+        quota = Family("cache_quota_bytes", "gauge", "Byte budget per cache namespace (total: whole tier)")
+        for ns, info in stats.get("namespaces", {}).items():
+            used.add(info["bytes"], tier=tier, namespace=ns)
+            if info.get("quota"):
+                quota.add(info["quota"], tier=tier, namespace=ns)
+        if stats.get("max_bytes"):
+            quota.add(stats["max_bytes"], tier=tier, namespace="total")
+        families += [
+            used, quota,
+            Family("cache_evictions_total", "counter", "Entries evicted to stay within budget")
+            .add(stats.get("evictions", 0), tier=tier),
+        ]
+    return families
+
+
+def start_http_server(port: int, host: str = "127.0.0.1", registry: MetricsRegistry = METRICS) -> ThreadingHTTPServer:
+    """后台线程提供 GET /metrics. 返回 server, 调用方用 shutdown() 停止. port=0 时由系统分配."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?", 1)[0] not in ("/metrics", "/"):
+                self.send_error(404)
+                return
+            body = registry.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            logger.debug("metrics %s", format % args)
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    logger.info(f"metrics exporter on http://{host}:{server.server_address[1]}/metrics")
+    return server
+
+
+def configured_port() -> int:
+    """环境变量 QUANT_METRICS_PORT, 否则 settings.yaml metrics.port; 0 表示不启用."""
+    env = os.environ.get("QUANT_METRICS_PORT")
+    if env:
+        return int(env)
+    from config import get_config
+    return int((get_config().get("metrics", {}) or {}).get("port", 0) or 0)
+
+
+def maybe_start_http_server() -> ThreadingHTTPServer | None:
+    """按配置启动导出端口; 未配置或端口被占用时返回 None (不影响主流程)."""
+    port = configured_port()
+    if port <= 0:
+        return None
+    try:
+        return start_http_server(port)
+    except OSError as e:
+        logger.warning(f"metrics exporter not started on port {port}: {e}")
+        return None
@@ -0,0 +1,101 @@
+"""近重复文本聚类: 字符 shingle + MinHash LSH, 近线性时间把同一事件的不同表述归为一簇."""
+
+from __future__ import annotations
+
+import random
+import re
+import zlib
+
+_PRIME = (1 << 61) - 1
+_NOISE = re.compile(r"[\s\W_]+", re.UNICODE)
+_NUMBER = re.compile(r"\d+(?:\.\d+)?")
+
+
+def shingles(text: str, k: int = 2, max_chars: int = 64) -> set[int]:
+    """去标点空白后取前 max_chars 个字符的 k-gram 哈希. 中文标题用 2-gram 效果最好."""
+    norm = _NOISE.sub("", text)[:max_chars].lower()
+    if len(norm) <= k:
+        return {zlib.crc32(norm.encode("utf-8"))} if norm else set()
+    return {zlib.crc32(norm[i:i + k].encode("utf-8")) for i in range(len(norm) - k + 1)}
+
+
+def numbers(text: str) -> frozenset[str]:
+    return frozenset(_NUMBER.findall(text))
+
+
+def jaccard(a: set, b: set) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class MinHasher:
+    """num_perm 个随机线性哈希 (a*x+b mod p) 下的最小值作为签名.
+
+    每个 shingle 的哈希向量只算一次并缓存, 签名 = 各向量逐位取 min.
+    """
+
+    def __init__(self, num_perm: int = 48, seed: int = 42):
+        rng = random.Random(seed)
+        self.params = [(rng.randrange(1, _PRIME), rng.randrange(0, _PRIME)) for _ in range(num_perm)]
+        self._vectors: dict[int, tuple[int, ...]] = {}
+
+    def _vector(self, x: int) -> tuple[int, ...]:
+        vec = self._vectors.get(x)
+        if vec is None:
+            vec = self._vectors[x] = tuple((a * x + b) % _PRIME for a, b in self.params)
+        return vec
+
+    def signature(self, items: set[int]) -> tuple[int, ...]:
+        if not items:
+            return tuple(_PRIME for _ in self.params)
+        return tuple(map(min, *(self._vector(x) for x in items)))
+
+
+class _UnionFind:
+    def __init__(self, n: int):
+        self.parent = list(range(n))
+
+    def find(self, i: int) -> int:
+        while self.parent[i] != i:
+            self.parent[i] = self.parent[self.parent[i]]
+            i = self.parent[i]
+        return i
+
+    def union(self, i: int, j: int):
+        ri, rj = self.find(i), self.find(j)
+        if ri != rj:
+            # 以更早出现的下标为根, 簇内顺序稳定
+            self.parent[max(ri, rj)] = min(ri, rj)
+
+
+def _same_event(a: set, b: set, na: frozenset, nb: frozenset, threshold: float) -> bool:
+    # 两条都带数字却没有一个相同 (如 "涨0.5%" / "跌1.2%") 视为不同事件
+    if na and nb and not (na & nb):
+        return False
+    return jaccard(a, b) >= threshold
+
+
+def cluster_near_duplicates(texts: list[str], threshold: float = 0.3,
+                            num_perm: int = 48, bands: int = 24) -> list[list[int]]:
+    """返回簇列表 (原下标, 按首次出现排序). LSH 分桶出候选对, 再用真实 Jaccard >= threshold 确认."""
+    sets = [shingles(t) for t in texts]
+    nums = [numbers(t) for t in texts]
+    hasher = MinHasher(num_perm)
+    rows = num_perm // bands
+    uf = _UnionFind(len(texts))
+    buckets: dict[tuple, list[int]] = {}
+    for i, s in enumerate(sets):
+        if not s:
+            continue
+        sig = hasher.signature(s)
+        for band in range(bands):
+            members = buckets.setdefault((band,) + sig[band * rows:(band + 1) * rows], [])
+            for j in members:
+                if uf.find(i) != uf.find(j) and _same_event(s, sets[j], nums[i], nums[j], threshold):
+                    uf.union(i, j)
+            members.append(i)
+    clusters: dict[int, list[int]] = {}
+    for i in range(len(texts)):
+        clusters.setdefault(uf.find(i), []).append(i)
+    return sorted(clusters.values(), key=lambda c: c[0])
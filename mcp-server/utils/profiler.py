@@ -0,0 +1,251 @@
+"""按次开启的性能剖析: 采样 (默认) 或 cProfile, 输出火焰图折叠栈 + Top-N 摘要.
+
+采样模式: 后台线程每 interval 秒读取一次 sys._current_frames(), 只统计事件循环主线程与
+asyncio 默认线程池 (to_thread) 的调用栈, 被测代码不做任何插桩, 开销与调用次数无关.
+cProfile 模式 (QUANT_PROFILE_MODE=cprofile, 或解释器不支持采样时) 为确定性剖析, 开销较大,
+折叠栈只有单层 (函数自身耗时), 另存 .prof 可用 pstats/snakeviz 查看.
+
+    quant.py --profile stock_analysis 600519          # 结果带 _profile: 文件路径与 Top-N
+    QUANT_PROFILE=get_stock_analysis,warm_klines       # MCP 工具按名称开启
+    flamegraph.pl cache/profiles/stock_analysis-*.collapsed > out.svg
+"""
+
+from __future__ import annotations
+
+import collections
+import contextlib
+import logging
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Iterator
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INTERVAL = 0.005
+TOP_N = 30
+IDLE_FRAMES = frozenset({"select", "poll", "epoll", "_run_once"})  # 事件循环空转等待 I/O
+
+
+def profile_dir() -> str:
+    from .cache import CACHE_DIR
+    return os.path.join(CACHE_DIR, "profiles")
+
+
+def _label(code) -> str:
+    """折叠栈里的帧名: 函数 (相对路径:定义行). 分号是折叠栈分隔符, 不能出现在帧名中."""
+    filename = code.co_filename
+    for root in sys.path[1:]:
+        if root and filename.startswith(root + os.sep):
+            filename = filename[len(root) + 1:]
+            break
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})".replace(";", ":")
+
+
+def _default_threads(name: str) -> bool:
+    return name == "MainThread" or name.startswith("asyncio_")
+
+
+class SamplingProfiler:
+    """统计式采样剖析器. stacks 为 {(根帧, ..., 叶帧): 采样次数}."""
+
+    def __init__(self, interval: float = DEFAULT_INTERVAL,
+                 thread_filter: Callable[[str], bool] = _default_threads):
+        self.interval = interval
+        self.thread_filter = thread_filter
+        self.stacks: collections.Counter[tuple[str, ...]] = collections.Counter()
+        self.samples = 0
+        self.elapsed = 0.0
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._labels: dict = {}
+        self._names: dict[int, str] = {}
+
+    def _thread_name(self, ident: int) -> str:
+        name = self._names.get(ident)
+        if name is None:
+            self._names = {t.ident: t.name for t in threading.enumerate()}
+            name = self._names.get(ident, f"thread-{ident}")
+        return name
+
+    def _sample(self):
+        own = threading.get_ident()
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            name = self._thread_name(ident)
+            if not self.thread_filter(name):
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                label = self._labels.get(code)
+                if label is None:
+                    label = self._labels[code] = _label(code)
+                stack.append(label)
+                frame = frame.f_back
+            if name != "MainThread":
+                stack.append(name)
+            self.stacks[tuple(reversed(stack))] += 1
+        self.samples += 1
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def start(self):
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="quant-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.elapsed = time.perf_counter() - self._started
+
+    def collapsed(self) -> list[str]:
+        """Brendan Gregg 折叠栈格式: "根;...;叶 次数", 按次数降序."""
+        return [f"{';'.join(stack)} {n}" for stack, n in self.stacks.most_common()]
+
+    def top(self, n: int = TOP_N) -> dict:
+        """按自身 (叶帧) 与累计 (出现在栈中) 采样数排序的前 n 个函数."""
+        total = sum(self.stacks.values()) or 1
+        own, inclusive = collections.Counter(), collections.Counter()
+        for stack, count in self.stacks.items():
+            own[stack[-1]] += count
+            for label in set(stack):
+                inclusive[label] += count
+        idle = sum(c for stack, c in self.stacks.items() if stack[-1].split(" ", 1)[0] in IDLE_FRAMES)
+
+        def rows(counter):
+            return [{"function": label, "samples": c, "pct": round(c * 100 / total, 1)}
+                    for label, c in counter.most_common(n)]
+
+        return {"self": rows(own), "cumulative": rows(inclusive), "idle_pct": round(idle * 100 / total, 1)}
+
+
+class CProfileProfiler:
+    """cProfile 后备: 只剖析调用 start() 的线程 (事件循环主线程)."""
+
+    def __init__(self):
+        import cProfile
+        self._profile = cProfile.Profile()
+        self.samples = 0
+        self.elapsed = 0.0
+
+    def start(self):
+        self._started = time.perf_counter()
+        self._profile.enable()
+
+    def stop(self):
+        self._profile.disable()
+        self.elapsed = time.perf_counter() - self._started
+        import pstats
+        self.stats = pstats.Stats(self._profile)
+        self.samples = sum(calls for _, calls, _, _, _ in self.stats.stats.values())
+
+    def _rows(self):
+        for (filename, line, func), (_, ncalls, tottime, cumtime, _) in self.stats.stats.items():
+            label = f"{func} ({os.path.basename(filename)}:{line})".replace(";", ":")
+            yield label, ncalls, tottime, cumtime
+
+    def collapsed(self) -> list[str]:
+        """单层折叠栈, 值为函数自身耗时 (微秒)."""
+        rows = sorted(self._rows(), key=lambda r: -r[2])
+        return [f"{label} {int(tottime * 1e6)}" for label, _, tottime, _ in rows if tottime > 0]
+
+    def top(self, n: int = TOP_N) -> dict:
+        rows = list(self._rows())
+
+        def fmt(key):
+            return [{"function": label, "calls": calls, "self_ms": round(tot * 1000, 2), "cum_ms": round(cum * 1000, 2)}
+                    for label, calls, tot, cum in sorted(rows, key=key)[:n]]
+
+        return {"self": fmt(lambda r: -r[2]), "cumulative": fmt(lambda r: -r[3])}
+
+    def dump(self, path: str):
+        self.stats.dump_stats(path)
+
+
+class Profile:
+    """profiling() 的结果: 剖析器与输出文件路径."""
+
+    def __init__(self, name: str, profiler, base: str):
+        self.name = name
+        self.profiler = profiler
+        self.base = base
+        self.files: dict[str, str] = {}
+
+    @property
+    def mode(self) -> str:
+        return "sample" if isinstance(self.profiler, SamplingProfiler) else "cprofile"
+
+    def write(self, top_n: int = TOP_N):
+        os.makedirs(os.path.dirname(self.base), exist_ok=True)
+        self.files["collapsed"] = f"{self.base}.collapsed"
+        with open(self.files["collapsed"], "w") as fh:
+            fh.write("\n".join(self.profiler.collapsed()) + "\n")
+        self.files["summary"] = f"{self.base}.txt"
+        with open(self.files["summary"], "w") as fh:
+            fh.write(self.summary_text(top_n))
+        if isinstance(self.profiler, CProfileProfiler):
+            self.files["pstats"] = f"{self.base}.prof"
+            self.profiler.dump(self.files["pstats"])
+
+    def summary_text(self, top_n: int = TOP_N) -> str:
+        top = self.profiler.top(top_n)
+        p = self.profiler
+        lines = [f"# {self.name}  mode={self.mode}  elapsed={p.elapsed:.3f}s  "
+                 f"{p.samples} {'samples' if self.mode == 'sample' else 'calls'}"]
+        if "idle_pct" in top:
+            lines.append(f"# event loop idle (waiting on I/O): {top['idle_pct']}%")
+        for title in ("self", "cumulative"):
+            lines.append(f"\n## top {top_n} by {title}")
+            for row in top[title]:
+                if self.mode == "sample":
+                    lines.append(f"{row['samples']:>8} {row['pct']:6.1f}%  {row['function']}")
+                else:
+                    lines.append(f"{row['self_ms']:>10.2f}ms {row['cum_ms']:>10.2f}ms {row['calls']:>8}  {row['function']}")
+        return "\n".join(lines) + "\n"
+
+    def report(self, top_n: int = 10) -> dict:
+        """工具输出的 _profile 字段."""
+        top = self.profiler.top(top_n)
+        return {"mode": self.mode, "elapsed_s": round(self.profiler.elapsed, 3), "samples": self.profiler.samples,
+                "files": self.files, "top_self": top["self"], **({"idle_pct": top["idle_pct"]} if "idle_pct" in top else {})}
+
+
+def _make_profiler(mode: str | None, interval: float):
+    mode = (mode or os.environ.get("QUANT_PROFILE_MODE") or "sample").lower()
+    if mode == "sample" and hasattr(sys, "_current_frames"):
+        return SamplingProfiler(interval)
+    return CProfileProfiler()
+
+
+@contextlib.contextmanager
+def profiling(name: str, mode: str | None = None, interval: float | None = None,
+              out_dir: str | None = None) -> Iterator[Profile]:
+    """剖析 with 块, 退出时写入 <out_dir>/<name>-<时间>-<pid>.{collapsed,txt[,prof]}."""
+    interval = interval or float(os.environ.get("QUANT_PROFILE_INTERVAL", 0) or DEFAULT_INTERVAL)
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    base = os.path.join(out_dir or profile_dir(), f"{name}-{stamp}-{os.getpid()}")
+    result = Profile(name, _make_profiler(mode, interval), base)
+    result.profiler.start()
+    try:
+        yield result
+    finally:
+        result.profiler.stop()
+        try:
+            result.write()
+            logger.info(f"profile {name}: {result.files['summary']}")
+        except OSError as e:
+            logger.warning(f"write profile for {name} failed: {e}")
+
+
+def profile_requested(name: str) -> bool:
+    """QUANT_PROFILE=all 或逗号分隔的工具名列表."""
+    names = {n.strip() for n in os.environ.get("QUANT_PROFILE", "").split(",") if n.strip()}
+    return "all" in names or name in names
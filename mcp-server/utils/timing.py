@@ -0,0 +1,198 @@
+"""分阶段耗时统计: span 上下文管理器 / timed 装饰器 → 进程内直方图.
+
+    with span("dm.daily_klines"):
+        ...
+
+    @timed("scoring.compute_stock_score")
+    def compute_stock_score(...): ...
+
+每个 span 结束时记入全局 TIMINGS (按名称的固定桶直方图, 供 get_system_health 展示),
+并记入当前上下文的 collect() 收集器 (单次工具调用的 _timings 字段).
+收集器放在 contextvar 里, asyncio.gather 派生的子任务共享同一个收集器.
+嵌套 span 各自计时 (父 span 包含子 span), 并发的同名 span 耗时相加, 可能超过墙钟时间.
+"""
+
+from __future__ import annotations
+
+import bisect
+import contextlib
+import contextvars
+import functools
+import inspect
+import os
+import threading
+import time
+from typing import Callable, Iterator
+
+# 直方图桶上界 (ms), 最后一个桶为 +inf
+BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 30000)
+
+
+class Histogram:
+    """固定桶耗时直方图 (ms). 分位数按桶内线性插值估算."""
+
+    __slots__ = ("counts", "count", "total", "min", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+
+    def observe(self, ms: float):
+        self.counts[bisect.bisect_left(BUCKETS_MS, ms)] += 1
+        self.count += 1
+        self.total += ms
+        self.min = min(self.min, ms)
+        self.max = max(self.max, ms)
+
+    def percentile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = self.count * q / 100
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                lo = BUCKETS_MS[i - 1] if i else 0.0
+                hi = BUCKETS_MS[i] if i < len(BUCKETS_MS) else self.max
+                value = lo + (hi - lo) * (rank - seen) / n
+                return max(self.min, min(self.max, value))
+            seen += n
+        return self.max
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "total_ms": round(self.total, 1),
+            "avg_ms": round(self.total / self.count, 2) if self.count else 0.0,
+            "p50_ms": round(self.percentile(50), 2),
+            "p95_ms": round(self.percentile(95), 2),
+            "max_ms": round(self.max, 2),
+            "buckets": {f"le_{b}": n for b, n in zip(BUCKETS_MS + ("inf",), self.counts) if n},
+        }
+
+
+class TimingRegistry:
+    """名称 → Histogram. 线程安全 (K 线读取可能在 to_thread 里)."""
+
+    def __init__(self):
+        self._hists: dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def record(self, name: str, ms: float):
+        with self._lock:
+            hist = self._hists.get(name)
+            if hist is None:
+                hist = self._hists[name] = Histogram()
+            hist.observe(ms)
+
+    def get(self, name: str) -> Histogram | None:
+        return self._hists.get(name)
+
+    def histograms(self) -> dict[str, tuple[list[int], int, float]]:
+        """各 span 的 (桶计数副本, 次数, 总耗时 ms), 供指标导出."""
+        with self._lock:
+            return {name: (list(h.counts), h.count, h.total) for name, h in sorted(self._hists.items())}
+
+    def snapshot(self) -> dict[str, dict]:
+        """按名称排序的各阶段统计."""
+        with self._lock:
+            return {name: self._hists[name].to_dict() for name in sorted(self._hists)}
+
+    def reset(self):
+        with self._lock:
+            self._hists.clear()
+
+
+TIMINGS = TimingRegistry()
+
+_collector: contextvars.ContextVar[dict | None] = contextvars.ContextVar("timing_collector", default=None)
+
+
+def _finish(name: str, started: float):
+    ms = (time.perf_counter() - started) * 1000
+    TIMINGS.record(name, ms)
+    collected = _collector.get()
+    if collected is not None:
+        entry = collected.get(name)
+        if entry is None:
+            collected[name] = [1, ms, ms]
+        else:
+            entry[0] += 1
+            entry[1] += ms
+            entry[2] = max(entry[2], ms)
+
+
+@contextlib.contextmanager
+def span(name: str) -> Iterator[None]:
+    """计时一个阶段 (同步/异步代码均可用 with). 异常时照样记录耗时."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        _finish(name, started)
+
+
+def timed(name: str) -> Callable:
+    """函数级 span, 支持普通函数与协程函数."""
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    _finish(name, started)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _finish(name, started)
+        return wrapper
+    return decorator
+
+
+class Collection:
+    """collect() 的结果: 本次调用内各阶段的次数/总耗时/单次最大耗时."""
+
+    def __init__(self):
+        self.stages: dict[str, list] = {}
+        self.started = time.perf_counter()
+        self.elapsed_ms = 0.0
+
+    def summary(self) -> dict:
+        """_timings 字段: 总耗时 + 按总耗时降序的各阶段."""
+        elapsed = self.elapsed_ms or (time.perf_counter() - self.started) * 1000
+        stages = sorted(self.stages.items(), key=lambda kv: -kv[1][1])
+        return {
+            "elapsed_ms": round(elapsed, 1),
+            "stages": {name: {"count": n, "total_ms": round(total, 1), "max_ms": round(peak, 1)}
+                       for name, (n, total, peak) in stages},
+        }
+
+
+@contextlib.contextmanager
+def collect() -> Iterator[Collection]:
+    """收集本上下文 (含 gather 出的子任务) 内结束的全部 span."""
+    collection = Collection()
+    token = _collector.set(collection.stages)
+    try:
+        yield collection
+    finally:
+        _collector.reset(token)
+        collection.elapsed_ms = (time.perf_counter() - collection.started) * 1000
+
+
+def timings_enabled() -> bool:
+    """工具输出是否附带 _timings: 环境变量 QUANT_TIMINGS, 否则 settings.yaml timing.tool_output."""
+    env = os.environ.get("QUANT_TIMINGS")
+    if env is not None:
+        return env.lower() in ("1", "true", "yes", "on")
+    from config import get_config
+    return bool((get_config().get("timing", {}) or {}).get("tool_output", False))
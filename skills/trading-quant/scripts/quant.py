@@ -21,349 +21,525 @@ except ImportError:
     def get_nb_consecutive_outflow_days(): return 0
     async def calc_consecutive_from_klines(): return {"consecutive_up_days": 0, "consecutive_down_days": 0}
 
+from tools.registry import ToolOutput, ToolRegistry, get_tool_timeout
+from utils.fanout import fan_out, market_timeouts
+
 os.environ.setdefault("PYTHONPATH",
     f"{os.path.join(os.path.dirname(__file__), '..', '..', '..', 'mcp-server')}:"
     f"{os.path.join(os.path.dirname(__file__), '..', '..', '..')}"
 )
 
-async def main():
-    if len(sys.argv) < 2:
-        print(json.dumps({"error": "Usage: quant.py <tool> [args...]"}))
-        sys.exit(1)
+DAEMON_SOCKET = os.environ.get(
+    "QUANT_DAEMON_SOCKET",
+    os.path.expanduser("~/.openclaw/workspace-trading/cache/quant.sock"),
+)
+_IPC_LIMIT = 64 * 1024 * 1024  # 单条 JSON 响应上限
+DAEMON_REPLY_MARGIN = 5.0  # 等 daemon 回复: 工具超时之外留的余量 (秒)
+PING_TIMEOUT = 2.0
 
-    tool = sys.argv[1]
-    args = sys.argv[2:]
+_dm = None
+_shared: dict = {}
+registry = ToolRegistry()
 
-    from data_sources.manager import DataManager
-    from data_sources.tencent import TencentRealtimeSource
-    from data_sources.tencent_us import TencentUSRealtimeSource
-    from data_sources.tencent_hk import TencentHKRealtimeSource
-    from data_sources.sina_commodity import SinaCommoditySource
-    from data_sources.ths_market import THSMarketScanner
-    from data_sources.eastmoney_northbound import NorthboundFlowSource
-    from data_sources.sina_market import SinaMarketScanner
-    from data_sources.eastmoney_news import EastMoneyNewsFetcher
-    from data_sources.multi_news import aggregate_news
-    from data_sources.eastmoney_market import EastMoneyMarketData
-    from analysis.scoring import compute_stock_score
 
-    dm = DataManager()
+def _get_dm():
+    """进程内共享的 DataManager (daemon 模式下常驻, 缓存保持温热)."""
+    global _dm
+    if _dm is None:
+        from data_sources.manager import DataManager
+        _dm = DataManager()
+    return _dm
+
+
+async def _daily_klines(codes: list[str]) -> dict:
+    """批量读取日K {code: DataFrame}. SQLite 读取与缺数据时的同步预热放到线程里执行,
+    daemon 的事件循环不被阻塞, 工具超时也能照常生效."""
+    dm = _get_dm()
+    return await asyncio.to_thread(lambda: {c: dm.get_daily_klines(c) for c in codes})
+
+
+def _shared_instance(cls):
+    """按类复用数据源实例, 让持有连接池的 client 在多次调用间复用."""
+    inst = _shared.get(cls)
+    if inst is None:
+        inst = _shared[cls] = cls()
+    return inst
+
+
+def _get_detector():
+    """进程内共享的异动检测器 + 事件总线 (daemon 模式下去重窗口和主力方向跨调用保持)."""
+    from analysis.anomaly import AnomalyDetector
+    return _shared_instance(AnomalyDetector)
 
-    if tool == "stock_analysis":
-        codes = args[0].split(",") if args else []
-        if not codes:
-            codes_from_wl = _load_watchlist_codes("priority") + _load_watchlist_codes("observe")
-            codes = codes_from_wl[:20]
-        src = TencentRealtimeSource()
-        quotes = await src.fetch_quotes(codes)
-        results = []
-        news_fetcher = EastMoneyNewsFetcher()
-        em_market = EastMoneyMarketData()
-        try:
-            market_sentiment = await em_market.get_market_sentiment()
-        except Exception:
-            market_sentiment = None
-        for q in quotes:
-            df = dm.get_daily_klines(q.code)
-            news_extra = {}
-            
-            # 批量获取主力资金数据 (优化：只获取异动标的)
-            # 筛选条件：成交额>30 亿 或 量比>2.0
-            abnormal_codes = []
-            for quote in quotes:
-                if quote.amount > 3e9 or quote.volume_ratio > 2.0:  # 30 亿或量比 2.0
-                    abnormal_codes.append(quote.code)
-            
-            # 批量调用 (仅异动标的)
-            flow_results = {}
-            if abnormal_codes:
-                from data_sources.capital_flow_manager import CapitalFlowManager
-                flow_mgr = CapitalFlowManager()
-                flow_results = await flow_mgr.get_capital_flows_batch(abnormal_codes)
-                await flow_mgr.close()
-            
-            # 获取当前股票资金流数据 (从批量结果中取)
-            main_force_data = None
-            if q.code in flow_results:
-                flow_data = flow_results[q.code]
-                main_force_data = flow_data.get("main_force")
-            
-            try:
-                stock_news = await news_fetcher.get_stock_news(q.code, q.name or "", limit=5)
-                if stock_news:
-                    avg_s = sum(n.sentiment for n in stock_news) / len(stock_news)
-                    news_extra = {"news_sentiment": round(avg_s, 2), "news_count": len(stock_news),
-                                  "top_news": [n.title for n in stock_news[:2]]}
-            except Exception:
-                pass
-            if market_sentiment:
-                news_extra["market_sentiment"] = market_sentiment
-                kline_cons = await calc_consecutive_from_klines()
-                news_extra["consecutive_up_days"] = kline_cons.get("consecutive_up_days", 0)
-                news_extra["consecutive_down_days"] = kline_cons.get("consecutive_down_days", 0)
-                news_extra["nb_consecutive_outflow_days"] = get_nb_consecutive_outflow_days()
-            score = compute_stock_score(q, df, extra=news_extra, capital_flow_data=main_force_data)
-            d = score.to_dict()
-            tech = d.get("score", {}).get("technical", {})
-            indicators = tech.get("indicators", {})
-            # Add high/low/open from quote data
-            d["open"] = q.open
-            d["high"] = q.high
-            d["low"] = q.low
-            if indicators:
-                key_levels = {}
-                for k in ("ma5", "ma10", "ma20", "ma60"):
-                    if k in indicators and indicators[k] > 0:
-                        key_levels[k] = round(indicators[k], 2)
-                if key_levels:
-                    d["key_levels"] = key_levels
-            results.append(d)
-        await src.close()
-        print(json.dumps({"stocks": results, "count": len(results)}, ensure_ascii=False))
-
-    elif tool == "us_stock":
-        symbols = args[0].split(",") if args else (_load_watchlist_codes("us") or ["AAPL","NVDA","TSLA","SPY","QQQ"])
-        src = TencentUSRealtimeSource()
-        results = []
-        try:
-            quotes = await src.fetch_quotes(symbols)
-            for q in (quotes or []):
-                if q:
-                    results.append({
-                        "code": q.code, "name": q.name, "price": q.price,
-                        "change_pct": q.change_pct, "pe": q.pe,
-                        "market_cap": q.market_cap, "source": q.source
-                    })
-        except Exception as e:
-            import logging
-            logging.getLogger(__name__).warning(f"Tencent US failed: {e}, trying yfinance")
 
-        ok_codes = {r["code"] for r in results}
-        missing = [s for s in symbols if s not in ok_codes]
-        if missing:
+def _record_quotes(quotes):
+    """行情快照追加到日内记录 (cache/intraday_recorder.py), 可盘后回放."""
+    try:
+        from cache.intraday_recorder import get_recorder
+        get_recorder("quotes").record_quotes(quotes)
+    except OSError:
+        pass
+
+
+def _events(events) -> list[dict]:
+    return [e.to_dict() for e in events]
+
+
+async def _close_shared():
+    global _dm
+    for inst in list(_shared.values()):
+        if hasattr(inst, "close"):
             try:
-                import yfinance as yf
-                tickers = yf.Tickers(" ".join(missing))
-                for sym in missing:
-                    try:
-                        info = tickers.tickers[sym].fast_info
-                        price = float(info.get("lastPrice", info.get("previousClose", 0)))
-                        prev = float(info.get("previousClose", price))
-                        chg = round((price - prev) / prev * 100, 2) if prev > 0 else 0
-                        results.append({
-                            "code": sym, "name": sym, "price": price,
-                            "change_pct": chg, "pe": 0, "market_cap": 0, "source": "yfinance"
-                        })
-                    except Exception:
-                        pass
+                await inst.close()
             except Exception:
                 pass
-        print(json.dumps({"stocks": results, "count": len(results)}, ensure_ascii=False))
+    _shared.clear()
+    if _dm is not None:
+        await _dm.close()
+        _dm = None
 
-    elif tool == "hk_stock":
-        codes = args[0].split(",") if args else (_load_watchlist_codes("hk") or ["00700","09988","03690"])
-        src = TencentHKRealtimeSource()
-        quotes = await src.fetch_quotes(codes)
-        results = []
+
+def _merge_fan_out(out: ToolOutput, errors: dict, empty) -> ToolOutput:
+    """并发扇出收尾: 失败的分段补空值, 错误原因放 errors."""
+    for section in out.pending():
+        out.setdefault(section, empty.copy())
+    if errors:
+        out["errors"] = errors
+    return out
+
+
+# 工具注册表: 各工具按需导入, 单次调用只加载用到的数据源 (pandas 仅 K 线相关工具需要).
+# 超时预算见 settings.yaml tool_timeout; 声明 sections 的工具超时时返回已完成分段.
+
+@registry.tool("stock_analysis", sections=("stocks",))
+async def _stock_analysis(args: list[str], out: ToolOutput):
+    from data_sources.tencent import TencentRealtimeSource
+    from data_sources.eastmoney_news import EastMoneyNewsFetcher
+    from data_sources.eastmoney_market import EastMoneyMarketData
+    from analysis.scoring import compute_stock_score
+    from data_sources.capital_flow_manager import CapitalFlowManager
+    codes = args[0].split(",") if args else []
+    if not codes:
+        codes_from_wl = _load_watchlist_codes("priority") + _load_watchlist_codes("observe")
+        codes = codes_from_wl[:20]
+    src = _shared_instance(TencentRealtimeSource)
+    quotes = await src.fetch_quotes(codes)
+    _record_quotes(quotes)
+    results = out["stocks"] = []  # 超时时返回已评分的个股
+    news_fetcher = _shared_instance(EastMoneyNewsFetcher)
+    em_market = _shared_instance(EastMoneyMarketData)
+
+    # 主力资金只查异动标的 (成交额>30 亿 或 量比>2.0), 与个股新闻一起在循环外批量并发获取
+    abnormal_codes = [q.code for q in quotes if q.amount > 3e9 or q.volume_ratio > 2.0]
+
+    async def _flows():
+        if not abnormal_codes:
+            return {}
+        return await _shared_instance(CapitalFlowManager).get_capital_flows_batch(abnormal_codes)
+
+    market_sentiment, flow_results, news_by_code = await asyncio.gather(
+        em_market.get_market_sentiment(),
+        _flows(),
+        news_fetcher.get_stock_news_batch([(q.code, q.name or "") for q in quotes], limit=5),
+        return_exceptions=True,
+    )
+    if isinstance(market_sentiment, Exception):
+        market_sentiment = None
+    if isinstance(flow_results, Exception):
+        flow_results = {}
+    if isinstance(news_by_code, Exception):
+        news_by_code = {}
+    detector = _get_detector()
+    alerts = detector.on_quotes(quotes)
+    for code, flow in flow_results.items():
+        alerts += detector.on_capital_flow(code, flow or {})
+    out["alerts"] = _events(alerts)
+    market_extra = {}
+    if market_sentiment:
+        kline_cons = await calc_consecutive_from_klines()
+        market_extra = {
+            "market_sentiment": market_sentiment,
+            "consecutive_up_days": kline_cons.get("consecutive_up_days", 0),
+            "consecutive_down_days": kline_cons.get("consecutive_down_days", 0),
+            "nb_consecutive_outflow_days": get_nb_consecutive_outflow_days(),
+        }
+
+    klines = await _daily_klines([q.code for q in quotes])
+    for q in quotes:
+        df = klines.get(q.code)
+        news_extra = {}
+        main_force_data = (flow_results.get(q.code) or {}).get("main_force")
+        stock_news = news_by_code.get(q.code)
+        if stock_news:
+            avg_s = sum(n.sentiment for n in stock_news) / len(stock_news)
+            news_extra = {"news_sentiment": round(avg_s, 2), "news_count": len(stock_news),
+                          "top_news": [n.title for n in stock_news[:2]]}
+        news_extra.update(market_extra)
+        score = compute_stock_score(q, df, extra=news_extra, capital_flow_data=main_force_data)
+        d = score.to_dict()
+        tech = d.get("score", {}).get("technical", {})
+        indicators = tech.get("indicators", {})
+        # Add high/low/open from quote data
+        d["open"] = q.open
+        d["high"] = q.high
+        d["low"] = q.low
+        if indicators:
+            key_levels = {}
+            for k in ("ma5", "ma10", "ma20", "ma60"):
+                if k in indicators and indicators[k] > 0:
+                    key_levels[k] = round(indicators[k], 2)
+            if key_levels:
+                d["key_levels"] = key_levels
+        results.append(d)
+    out.section("stocks", results)
+    out["count"] = len(results)
+    return out
+
+
+@registry.tool("us_stock", timeout_key="us_market")
+async def _us_stock(args: list[str], out: ToolOutput):
+    from data_sources.tencent_us import TencentUSRealtimeSource
+    symbols = args[0].split(",") if args else (_load_watchlist_codes("us") or ["AAPL","NVDA","TSLA","SPY","QQQ"])
+    src = _shared_instance(TencentUSRealtimeSource)
+    results = []
+    try:
+        quotes = await src.fetch_quotes(symbols)
         for q in (quotes or []):
             if q:
                 results.append({
                     "code": q.code, "name": q.name, "price": q.price,
-                    "change_pct": q.change_pct, "pe": q.pe, "pb": q.pb,
-                    "source": q.source
+                    "change_pct": q.change_pct, "pe": q.pe,
+                    "market_cap": q.market_cap, "source": q.source
                 })
-        print(json.dumps({"stocks": results, "count": len(results)}, ensure_ascii=False))
+    except Exception as e:
+        import logging
+        logging.getLogger(__name__).warning(f"Tencent US failed: {e}, trying yfinance")
 
-    elif tool == "commodity":
-        codes = args[0].split(",") if args else (_load_watchlist_codes("commodity") or ["XAU","XAG","WTI","BRENT","COPPER","COPPER_CN","ALUMINUM","IRON_ORE"])
-        src = SinaCommoditySource()
-        quotes = await src.fetch_quotes(codes)
-        results = []
-        for q in (quotes or []):
-            if q:
-                item = {
-                    "code": q.code, "name": q.name, "price": q.price,
-                    "change_pct": q.change_pct, "open": q.open, "high": q.high,
-                    "low": q.low, "pre_close": q.pre_close, "source": q.source,
-                }
-                if q.high > 0 and q.low > 0:
-                    item["daily_range_pct"] = round((q.high - q.low) / q.low * 100, 2)
-                if abs(q.change_pct) >= 3:
-                    item["alert"] = "large_move"
-                results.append(item)
-        summary = {"bullish": 0, "bearish": 0}
-        for r in results:
-            if r["change_pct"] > 0.5:
-                summary["bullish"] += 1
-            elif r["change_pct"] < -0.5:
-                summary["bearish"] += 1
-        print(json.dumps({"commodities": results, "count": len(results), "sentiment": summary}, ensure_ascii=False))
-
-    elif tool == "market_anomaly":
-        scanner = THSMarketScanner()
-        up = await scanner.get_limit_up_pool()
-        down = await scanner.get_limit_down_pool()
-        up_count = up.get("total", 0) if up else 0
-        down_count = down.get("total", 0) if down else 0
-        first_limit = sum(1 for s in (up.get("stocks", []) if up else []) if s.get("change_tag") == "FIRST_LIMIT")
-        again_limit = sum(1 for s in (up.get("stocks", []) if up else []) if s.get("is_again_limit"))
-        sentiment = "very_bullish" if up_count > 80 and down_count < 5 else (
-            "bullish" if up_count > 40 and down_count < 10 else (
-                "bearish" if down_count > 30 else "neutral"
-            ))
-        stats = {
-            "limit_up_total": up_count, "limit_down_total": down_count,
-            "first_limit": first_limit, "again_limit": again_limit,
-            "market_sentiment": sentiment,
-            "up_down_ratio": f"{up_count}:{down_count}",
-        }
-        up_stocks = up.get("stocks", []) if up else []
-        industry_map = await _batch_get_industries([s.get("code", "") for s in up_stocks])
-        sector_names = {}
-        for s in up_stocks:
-            code = s.get("code", "")
-            name = s.get("name", "")
-            industry = industry_map.get(code, "")
-            if industry:
-                s["industry"] = industry
-                sector_names.setdefault(industry, []).append(name)
-        hot_sectors = sorted(sector_names.items(), key=lambda x: -len(x[1]))[:8]
-        stats["hot_sectors"] = [{"sector": s, "count": len(names), "samples": names[:3]} for s, names in hot_sectors]
-        print(json.dumps({"limit_up": up, "limit_down": down, "stats": stats}, ensure_ascii=False))
-
-    elif tool == "capital_flow":
-        codes = args[0].split(",") if args else []
-        from data_sources.capital_flow_manager import CapitalFlowManager
-        manager = CapitalFlowManager()
+    ok_codes = {r["code"] for r in results}
+    missing = [s for s in symbols if s not in ok_codes]
+    if missing:
+        try:
+            import yfinance as yf
+            tickers = yf.Tickers(" ".join(missing))
+            for sym in missing:
+                try:
+                    info = tickers.tickers[sym].fast_info
+                    price = float(info.get("lastPrice", info.get("previousClose", 0)))
+                    prev = float(info.get("previousClose", price))
+                    chg = round((price - prev) / prev * 100, 2) if prev > 0 else 0
+                    results.append({
+                        "code": sym, "name": sym, "price": price,
+                        "change_pct": chg, "pe": 0, "market_cap": 0, "source": "yfinance"
+                    })
+                except Exception:
+                    pass
+        except Exception:
+            pass
+    return {"stocks": results, "count": len(results)}
+
+
+@registry.tool("hk_stock", timeout_key="hk_market")
+async def _hk_stock(args: list[str], out: ToolOutput):
+    from data_sources.tencent_hk import TencentHKRealtimeSource
+    codes = args[0].split(",") if args else (_load_watchlist_codes("hk") or ["00700","09988","03690"])
+    src = _shared_instance(TencentHKRealtimeSource)
+    quotes = await src.fetch_quotes(codes)
+    results = []
+    for q in (quotes or []):
+        if q:
+            results.append({
+                "code": q.code, "name": q.name, "price": q.price,
+                "change_pct": q.change_pct, "pe": q.pe, "pb": q.pb,
+                "source": q.source
+            })
+    return {"stocks": results, "count": len(results)}
+
+
+@registry.tool("commodity")
+async def _commodity(args: list[str], out: ToolOutput):
+    from data_sources.sina_commodity import SinaCommoditySource
+    codes = args[0].split(",") if args else (_load_watchlist_codes("commodity") or ["XAU","XAG","WTI","BRENT","COPPER","COPPER_CN","ALUMINUM","IRON_ORE"])
+    src = _shared_instance(SinaCommoditySource)
+    quotes = await src.fetch_quotes(codes)
+    results = []
+    for q in (quotes or []):
+        if q:
+            item = {
+                "code": q.code, "name": q.name, "price": q.price,
+                "change_pct": q.change_pct, "open": q.open, "high": q.high,
+                "low": q.low, "pre_close": q.pre_close, "source": q.source,
+            }
+            if q.high > 0 and q.low > 0:
+                item["daily_range_pct"] = round((q.high - q.low) / q.low * 100, 2)
+            if abs(q.change_pct) >= 3:
+                item["alert"] = "large_move"
+            results.append(item)
+    summary = {"bullish": 0, "bearish": 0}
+    for r in results:
+        if r["change_pct"] > 0.5:
+            summary["bullish"] += 1
+        elif r["change_pct"] < -0.5:
+            summary["bearish"] += 1
+    return {"commodities": results, "count": len(results), "sentiment": summary}
+
+
+@registry.tool("market_anomaly")
+async def _market_anomaly(args: list[str], out: ToolOutput):
+    from data_sources.ths_market import THSMarketScanner
+    scanner = _shared_instance(THSMarketScanner)
+    pools = await scanner.get_limit_pools("limit_up", "limit_down")
+    up, down = pools["limit_up"], pools["limit_down"]
+    up_count = up.get("total", 0) if up else 0
+    down_count = down.get("total", 0) if down else 0
+    first_limit = sum(1 for s in (up.get("stocks", []) if up else []) if s.get("change_tag") == "FIRST_LIMIT")
+    again_limit = sum(1 for s in (up.get("stocks", []) if up else []) if s.get("is_again_limit"))
+    sentiment = "very_bullish" if up_count > 80 and down_count < 5 else (
+        "bullish" if up_count > 40 and down_count < 10 else (
+            "bearish" if down_count > 30 else "neutral"
+        ))
+    stats = {
+        "limit_up_total": up_count, "limit_down_total": down_count,
+        "first_limit": first_limit, "again_limit": again_limit,
+        "market_sentiment": sentiment,
+        "up_down_ratio": f"{up_count}:{down_count}",
+    }
+    up_stocks = up.get("stocks", []) if up else []
+    industry_map = await _industries_for([s.get("code", "") for s in up_stocks])
+    sector_names = {}
+    for s in up_stocks:
+        code = s.get("code", "")
+        name = s.get("name", "")
+        industry = industry_map.get(code, "")
+        if industry:
+            s["industry"] = industry
+            sector_names.setdefault(industry, []).append(name)
+    hot_sectors = sorted(sector_names.items(), key=lambda x: -len(x[1]))[:8]
+    stats["hot_sectors"] = [{"sector": s, "count": len(names), "samples": names[:3]} for s, names in hot_sectors]
+    detector = _get_detector()
+    alerts = detector.on_limit_pool(up) + detector.on_limit_pool(down)
+    return {"limit_up": up, "limit_down": down, "stats": stats, "alerts": _events(alerts)}
+
+
+@registry.tool("capital_flow")
+async def _capital_flow(args: list[str], out: ToolOutput):
+    from data_sources.capital_flow_manager import CapitalFlowManager
+    codes = args[0].split(",") if args else []
+    manager = _shared_instance(CapitalFlowManager)
+    results = {}
+    for code in codes[:5]:
+        results[code] = await manager.get_capital_flow(code)
+        _get_detector().on_capital_flow(code, results[code])  # 结果按代码索引, 事件经 alerts 工具查看
+    return results
+
+
+@registry.tool("ak_test")
+async def _ak_test(args: list[str], out: ToolOutput):
+    """测试 AKShare 数据源."""
+    codes = args[0].split(",") if args else []
+    try:
+        import akshare as ak
         results = {}
         for code in codes[:5]:
-            results[code] = await manager.get_capital_flow(code)
-        await manager.close()
-        print(json.dumps(results, ensure_ascii=False))
-    
-    elif tool == "ak_test":
-        """测试 AKShare 数据源."""
-        codes = args[0].split(",") if args else []
-        try:
-            import akshare as ak
-            results = {}
-            for code in codes[:5]:
-                market = 'sz' if code.startswith(('0', '3')) else 'sh'
-                df = ak.stock_individual_fund_flow(stock=code, market=market)
-                if len(df) > 0:
-                    latest = df.iloc[-1]
-                    results[code] = {
-                        "date": latest.get("日期", ""),
-                        "close": latest.get("收盘价", 0),
-                        "change_pct": latest.get("涨跌幅", 0),
-                        "main_net_inflow": latest.get("主力净流入 - 净额", 0),
-                        "super_big_net": latest.get("超大单净流入 - 净额", 0),
-                        "big_net": latest.get("大单净流入 - 净额", 0),
-                    }
-            print(json.dumps({"akshare": results, "count": len(results)}, ensure_ascii=False))
-        except Exception as e:
-            print(json.dumps({"error": str(e)}, ensure_ascii=False))
-
-    elif tool == "northbound_flow":
-        src = NorthboundFlowSource()
-        data = await src.get_realtime_flow()
-        print(json.dumps(data, ensure_ascii=False))
-
-    elif tool == "global_overview":
-        # A-shares
-        a_src = TencentRealtimeSource()
-        a_codes = (_load_watchlist_codes("priority") + _load_watchlist_codes("observe"))[:20]
-        a_quotes = await a_src.fetch_quotes(a_codes) if a_codes else []
-        await a_src.close()
-        # US
-        us_src = TencentUSRealtimeSource()
-        us_syms = _load_watchlist_codes("us")[:9]
-        us_quotes = await us_src.fetch_quotes(us_syms) if us_syms else []
-        # HK
-        hk_src = TencentHKRealtimeSource()
-        hk_codes = _load_watchlist_codes("hk")[:6]
-        hk_quotes = await hk_src.fetch_quotes(hk_codes) if hk_codes else []
-        # Commodities
-        comm_src = SinaCommoditySource()
-        comm_codes = _load_watchlist_codes("commodity")[:20]
-        comm_quotes = await comm_src.fetch_quotes(comm_codes) if comm_codes else []
+            market = 'sz' if code.startswith(('0', '3')) else 'sh'
+            df = ak.stock_individual_fund_flow(stock=code, market=market)
+            if len(df) > 0:
+                latest = df.iloc[-1]
+                results[code] = {
+                    "date": latest.get("日期", ""),
+                    "close": latest.get("收盘价", 0),
+                    "change_pct": latest.get("涨跌幅", 0),
+                    "main_net_inflow": latest.get("主力净流入 - 净额", 0),
+                    "super_big_net": latest.get("超大单净流入 - 净额", 0),
+                    "big_net": latest.get("大单净流入 - 净额", 0),
+                }
+        return {"akshare": results, "count": len(results)}
+    except Exception as e:
+        return {"error": str(e)}
 
-        def _fmt(q, include_fundamentals=False):
-            if not q: return None
-            r = {"code": q.code, "name": q.name, "price": q.price, "change_pct": q.change_pct}
-            if include_fundamentals and q.pe > 0:
-                r["pe"] = q.pe
-            if include_fundamentals and q.pb > 0:
-                r["pb"] = q.pb
-            if q.volume > 0:
-                r["volume"] = q.volume
-            return r
-
-        result = {
-            "a_shares": [_fmt(q, True) for q in a_quotes if q],
-            "us_stocks": [_fmt(q, True) for q in us_quotes if q],
-            "hk_stocks": [_fmt(q, True) for q in hk_quotes if q],
-            "commodities": [_fmt(q) for q in comm_quotes if q],
-        }
-        print(json.dumps(result, ensure_ascii=False))
 
-    elif tool == "system_health":
-        report = dm.health_report()
-        print(json.dumps(report, ensure_ascii=False))
+@registry.tool("northbound_flow")
+async def _northbound_flow(args: list[str], out: ToolOutput):
+    from data_sources.eastmoney_northbound import NorthboundFlowSource
+    src = _shared_instance(NorthboundFlowSource)
+    data = await src.get_realtime_flow()
+    data["alerts"] = _events(_get_detector().on_northbound(data))
+    return data
 
-    elif tool == "warm_klines":
-        codes = args[0].split(",") if args else _load_watchlist_codes("priority")
-        result = dm.warm_klines(codes)
-        print(json.dumps(result, ensure_ascii=False))
 
-    elif tool == "weekly_review":
-        codes = args[0].split(",") if args else []
-        if not codes:
-            codes = (_load_watchlist_codes("priority") + _load_watchlist_codes("observe"))[:20]
-        import pandas as pd
-        import datetime
+@registry.tool("alerts")
+async def _alerts(args: list[str], out: ToolOutput):
+    """事件总线上的异动事件 (daemon 常驻时累积各工具调用检测到的事件).
 
-        src = TencentRealtimeSource()
+    用法: alerts [类型,类型...] [since_seq]
+    """
+    bus = _get_detector().bus
+    types = set(args[0].split(",")) if args and args[0] else None
+    since = int(args[1]) if len(args) > 1 else 0
+    events = bus.since(since, types)
+    return {"alerts": _events(events), "count": len(events), "last_seq": bus.seq}
+
+
+@registry.tool("global_overview", sections=("a_shares", "us_stocks", "hk_stocks", "commodities"))
+async def _global_overview(args: list[str], out: ToolOutput):
+    from data_sources.tencent import TencentRealtimeSource
+    from data_sources.tencent_us import TencentUSRealtimeSource
+    from data_sources.tencent_hk import TencentHKRealtimeSource
+    from data_sources.sina_commodity import SinaCommoditySource
+    def _fmt(q, include_fundamentals=False):
+        if not q: return None
+        r = {"code": q.code, "name": q.name, "price": q.price, "change_pct": q.change_pct}
+        if include_fundamentals and q.pe > 0:
+            r["pe"] = q.pe
+        if include_fundamentals and q.pb > 0:
+            r["pb"] = q.pb
+        if q.volume > 0:
+            r["volume"] = q.volume
+        return r
+
+    async def _market(section, src_cls, codes, include_fundamentals=True):
+        quotes = await _shared_instance(src_cls).fetch_quotes(codes) if codes else []
+        out.section(section, [_fmt(q, include_fundamentals) for q in quotes if q])
+
+    # 各市场并发请求, 单个市场超时/失败只影响自己的分段
+    _, errors = await fan_out({
+        "a_shares": _market("a_shares", TencentRealtimeSource,
+                            (_load_watchlist_codes("priority") + _load_watchlist_codes("observe"))[:20]),
+        "us_stocks": _market("us_stocks", TencentUSRealtimeSource, _load_watchlist_codes("us")[:9]),
+        "hk_stocks": _market("hk_stocks", TencentHKRealtimeSource, _load_watchlist_codes("hk")[:6]),
+        "commodities": _market("commodities", SinaCommoditySource,
+                               _load_watchlist_codes("commodity")[:20], include_fundamentals=False),
+    }, market_timeouts())
+    return _merge_fan_out(out, errors, [])
+
+
+@registry.tool("system_health")
+async def _system_health(args: list[str], out: ToolOutput):
+    report = _get_dm().health_report()
+    return report
+
+
+@registry.tool("intraday")
+async def _intraday(args: list[str], out: ToolOutput):
+    """回放日内记录. 用法: intraday <code> [bars|flow|quotes] [YYYYMMDD]"""
+    from cache.intraday_recorder import STREAMS, get_recorder, to_dicts, trading_day
+    if not args:
+        return {"error": "Usage: intraday <code> [bars|flow|quotes] [YYYYMMDD]"}
+    stream = args[1] if len(args) > 1 else "bars"
+    if stream not in STREAMS:
+        return {"error": f"Unknown stream: {stream}", "available": list(STREAMS)}
+    day = args[2] if len(args) > 2 else trading_day()
+    rows = to_dicts(get_recorder(stream).series(args[0].zfill(6), day))
+    return {"code": args[0].zfill(6), "stream": stream, "day": day, "count": len(rows), "records": rows}
+
+
+@registry.tool("backtest")
+async def _backtest(args: list[str], out: ToolOutput):
+    """缓存日K回放评分模型. 用法: backtest [codes|all] [start] [end] [index_code]"""
+    from analysis.backtest import run_backtest
+    codes = None if not args or args[0] == "all" else [c.zfill(6) for c in args[0].split(",")]
+    start = args[1] if len(args) > 1 else None
+    end = args[2] if len(args) > 2 else None
+    index_code = args[3] if len(args) > 3 else None
+    return await asyncio.to_thread(run_backtest, codes, start, end, index_code=index_code)
+
+
+@registry.tool("sweep")
+async def _sweep(args: list[str], out: ToolOutput):
+    """权重/阈值网格扫描. 用法: sweep [codes|all] [split_date] [grid.json|JSON] [horizon] [index_code]
+
+    index_code (如 000001 上证指数) 缺省时大盘维度恒为中性分, 网格里的 market 权重不起作用.
+    """
+    from analysis.sweep import grid, sweep
+    codes = None if not args or args[0] == "all" else [c.zfill(6) for c in args[0].split(",")]
+    split = args[1] if len(args) > 1 and args[1] else None
+    points = None
+    if len(args) > 2 and args[2]:
+        spec = args[2]
+        if os.path.exists(spec):
+            with open(spec, encoding="utf-8") as f:
+                spec = f.read()
+        try:
+            spec = json.loads(spec)
+        except json.JSONDecodeError as e:
+            return {"error": f"invalid grid JSON: {e}"}
+        points = grid(spec.get("weights"), spec.get("signals"))
+    horizon = int(args[3]) if len(args) > 3 and args[3] else 5
+    index_code = args[4] if len(args) > 4 and args[4] else None
+    return await asyncio.to_thread(sweep, codes, split=split, points=points, horizon=horizon,
+                                   index_code=index_code)
+
+
+@registry.tool("warm_klines")
+async def _warm_klines(args: list[str], out: ToolOutput):
+    from data_sources.industry_index import get_industry_index
+    codes = args[0].split(",") if args else _load_watchlist_codes("priority")
+    dm = _get_dm()
+    result = await asyncio.to_thread(dm.warm_klines, codes)
+    await get_industry_index().ensure_fresh()  # 盘前顺带刷新过期 (>7 天) 的行业索引
+    return result
+
+
+@registry.tool("weekly_review", sections=("a_shares", "us_stocks", "hk_stocks", "commodities", "northbound"))
+async def _weekly_review(args: list[str], out: ToolOutput):
+    from data_sources.tencent import TencentRealtimeSource
+    from data_sources.tencent_us import TencentUSRealtimeSource
+    from data_sources.tencent_hk import TencentHKRealtimeSource
+    from data_sources.sina_commodity import SinaCommoditySource
+    from data_sources.eastmoney_northbound import NorthboundFlowSource
+    from analysis.scoring import compute_stock_score
+    codes = args[0].split(",") if args else []
+    if not codes:
+        codes = (_load_watchlist_codes("priority") + _load_watchlist_codes("observe"))[:20]
+    import pandas as pd
+    import datetime
+
+    def _score_week(q, df):
+        score = compute_stock_score(q, df)
+        d = score.to_dict()
+        if df is not None and len(df) >= 2:
+            bs_df = df[df["source"] == "baostock"].copy()
+            if len(bs_df) >= 2:
+                bs_df["date"] = pd.to_datetime(bs_df["date"])
+                bs_df = bs_df.sort_values("date")
+                today = datetime.date.today()
+                monday = today - datetime.timedelta(days=today.weekday())
+                week_start_rows = bs_df[bs_df["date"].dt.date >= monday]
+                if len(week_start_rows) > 0:
+                    week_open = float(week_start_rows.iloc[0]["open"])
+                    d["week_open"] = week_open
+                    d["week_change_pct"] = round((q.price - week_open) / week_open * 100, 2)
+                else:
+                    last_close = float(bs_df.iloc[-1]["close"])
+                    d["week_open"] = last_close
+                    d["week_change_pct"] = round((q.price - last_close) / last_close * 100, 2)
+        if "week_change_pct" not in d:
+            d["week_change_pct"] = d.get("change_pct", 0)
+            d["week_change_note"] = "日涨跌幅(K线数据不足)"
+        tech = d.get("score", {}).get("technical", {})
+        indicators = tech.get("indicators", {})
+        if indicators:
+            key_levels = {}
+            for k in ("ma5", "ma10", "ma20", "ma60"):
+                if k in indicators and indicators[k] > 0:
+                    key_levels[k] = round(indicators[k], 2)
+            if key_levels:
+                d["key_levels"] = key_levels
+        return d
+
+    async def _a_shares():
+        src = _shared_instance(TencentRealtimeSource)
         quotes = await src.fetch_quotes(codes)
+        quotes = [q for q in (quotes or []) if q]
         results = []
-        for q in (quotes or []):
-            if not q:
-                continue
-            df = dm.get_daily_klines(q.code)
-            score = compute_stock_score(q, df)
-            d = score.to_dict()
-            if df is not None and len(df) >= 2:
-                bs_df = df[df["source"] == "baostock"].copy()
-                if len(bs_df) >= 2:
-                    bs_df["date"] = pd.to_datetime(bs_df["date"])
-                    bs_df = bs_df.sort_values("date")
-                    today = datetime.date.today()
-                    monday = today - datetime.timedelta(days=today.weekday())
-                    week_start_rows = bs_df[bs_df["date"].dt.date >= monday]
-                    if len(week_start_rows) > 0:
-                        week_open = float(week_start_rows.iloc[0]["open"])
-                        d["week_open"] = week_open
-                        d["week_change_pct"] = round((q.price - week_open) / week_open * 100, 2)
-                    else:
-                        last_close = float(bs_df.iloc[-1]["close"])
-                        d["week_open"] = last_close
-                        d["week_change_pct"] = round((q.price - last_close) / last_close * 100, 2)
-            if "week_change_pct" not in d:
-                d["week_change_pct"] = d.get("change_pct", 0)
-                d["week_change_note"] = "日涨跌幅(K线数据不足)"
-            tech = d.get("score", {}).get("technical", {})
-            indicators = tech.get("indicators", {})
-            if indicators:
-                key_levels = {}
-                for k in ("ma5", "ma10", "ma20", "ma60"):
-                    if k in indicators and indicators[k] > 0:
-                        key_levels[k] = round(indicators[k], 2)
-                if key_levels:
-                    d["key_levels"] = key_levels
-            results.append(d)
-        await src.close()
-
-        us_src = TencentUSRealtimeSource()
+        a_shares = out["a_shares"] = {"stocks": results, "count": 0, "note": "week_change_pct = 周涨跌幅"}
+        klines = await _daily_klines([q.code for q in quotes])
+        for q in quotes:
+            results.append(_score_week(q, klines.get(q.code)))
+            a_shares["count"] = len(results)
+        out.section("a_shares", a_shares)
+
+    async def _us_stocks():
+        us_src = _shared_instance(TencentUSRealtimeSource)
         us_syms = _load_watchlist_codes("us")[:9]
         us_quotes = await us_src.fetch_quotes(us_syms) if us_syms else []
         us_data = []
@@ -376,8 +552,10 @@ async def main():
                 if q.market_cap > 0:
                     item["market_cap"] = q.market_cap
                 us_data.append(item)
+        out.section("us_stocks", {"stocks": us_data, "note": "change_pct = 最新交易日涨跌幅"})
 
-        hk_src = TencentHKRealtimeSource()
+    async def _hk_stocks():
+        hk_src = _shared_instance(TencentHKRealtimeSource)
         hk_codes = _load_watchlist_codes("hk")[:6]
         hk_quotes = await hk_src.fetch_quotes(hk_codes) if hk_codes else []
         hk_data = []
@@ -388,8 +566,10 @@ async def main():
                 if q.pe > 0:
                     item["pe"] = q.pe
                 hk_data.append(item)
+        out.section("hk_stocks", {"stocks": hk_data, "note": "change_pct = 最新交易日涨跌幅"})
 
-        comm_src = SinaCommoditySource()
+    async def _commodities():
+        comm_src = _shared_instance(SinaCommoditySource)
         comm_codes = _load_watchlist_codes("commodity")[:20]
         comm_quotes = await comm_src.fetch_quotes(comm_codes) if comm_codes else []
         comm_data = []
@@ -400,229 +580,288 @@ async def main():
                 if abs(q.change_pct) >= 3:
                     item["alert"] = "large_move"
                 comm_data.append(item)
+        out.section("commodities", {"stocks": comm_data, "note": "change_pct = 最新涨跌幅"})
+
+    async def _northbound():
+        nb_src = _shared_instance(NorthboundFlowSource)
+        out.section("northbound", await nb_src.get_realtime_flow())
+
+    # 各市场并发请求; A 股含逐只 K 线评分, 单独放宽超时
+    _, errors = await fan_out({
+        "a_shares": _a_shares(),
+        "us_stocks": _us_stocks(),
+        "hk_stocks": _hk_stocks(),
+        "commodities": _commodities(),
+        "northbound": _northbound(),
+    }, market_timeouts(a_shares=60))
+    _merge_fan_out(out, errors, {"stocks": []})
+    if "northbound" in errors:
+        out["northbound"] = {}
+
+    out["report_time"] = datetime.datetime.now().strftime("%Y-%m-%d %H:%M")
+    return out
+
+
+@registry.tool("market_scan")
+async def _market_scan(args: list[str], out: ToolOutput):
+    from data_sources.market_snapshot import MarketSnapshotScanner
+    from data_sources.sina_market import SinaMarketScanner
+    # 主路径: 全市场快照一次拉取后向量化筛选; 快照不可用时回退新浪排行接口
+    try:
+        result = await _shared_instance(MarketSnapshotScanner).scan_anomalies()
+    except Exception as e:
+        out["snapshot_error"] = str(e)
+        result = {}
+    if not result:
+        result = await _shared_instance(SinaMarketScanner).scan_anomalies()
+        result.update(out)
+    sector_map = {}
+    for group_key in ("big_gainers", "big_losers", "high_amount"):
+        for s in result.get(group_key, []):
+            name = s.get("name", "")
+            for keyword, sector in [
+                ("电", "电力/电气"), ("光", "光伏/光学"), ("锂", "锂电"),
+                ("铜", "铜/有色"), ("银", "白银/有色"), ("金", "黄金/贵金属"),
+                ("钢", "钢铁"), ("油", "石油/化工"), ("芯", "半导体"),
+                ("AI", "人工智能"), ("算", "算力"), ("军", "军工"),
+                ("药", "医药"), ("电池", "新能源"), ("风", "风电"),
+                ("核", "核电"), ("矿", "矿业"), ("煤", "煤炭"),
+                ("券", "券商"), ("银行", "银行"), ("保险", "保险"),
+                ("汽车", "汽车"), ("酒", "白酒/消费"), ("食", "食品/消费"),
+                ("储", "存储/半导体"), ("航", "航天/军工"), ("船", "造船"),
+            ]:
+                if keyword in name:
+                    sector_map.setdefault(sector, []).append(name)
+                    break
+    hot_sectors = sorted(sector_map.items(), key=lambda x: -len(x[1]))[:8]
+    result["sector_heatmap"] = [
+        {"sector": s, "count": len(names), "samples": names[:3]}
+        for s, names in hot_sectors
+    ]
+    return result
+
+
+@registry.tool("top_amount")
+async def _top_amount(args: list[str], out: ToolOutput):
+    from data_sources.market_snapshot import MarketSnapshotScanner
+    from data_sources.sina_market import SinaMarketScanner
+    count = int(args[0]) if args else 20
+    try:
+        result = await _shared_instance(MarketSnapshotScanner).get_top("amount", count)
+    except Exception:
+        result = []
+    if not result:
+        result = await _shared_instance(SinaMarketScanner).get_top_amount(count)
+    return {"top_amount": result, "count": len(result)}
 
-        nb_src = NorthboundFlowSource()
-        nb_data = await nb_src.get_realtime_flow()
 
-        output = {
-            "a_shares": {"stocks": results, "count": len(results), "note": "week_change_pct = 周涨跌幅"},
-            "us_stocks": {"stocks": us_data, "note": "change_pct = 最新交易日涨跌幅"},
-            "hk_stocks": {"stocks": hk_data, "note": "change_pct = 最新交易日涨跌幅"},
-            "commodities": {"stocks": comm_data, "note": "change_pct = 最新涨跌幅"},
-            "northbound": nb_data,
-            "report_time": datetime.datetime.now().strftime("%Y-%m-%d %H:%M"),
+@registry.tool("news_sentiment")
+async def _news_sentiment(args: list[str], out: ToolOutput):
+    from data_sources.eastmoney_news import EastMoneyNewsFetcher
+    from data_sources.multi_news import aggregate_news
+    if args:
+        fetcher = _shared_instance(EastMoneyNewsFetcher)
+        code = args[0]
+        name = args[1] if len(args) > 1 else ""
+        news = await fetcher.get_stock_news(code, name, limit=10)
+        avg_score = sum(n.sentiment for n in news) / len(news) if news else 0
+        bullish = sum(1 for n in news if n.sentiment > 0)
+        bearish = sum(1 for n in news if n.sentiment < 0)
+        headlines = [{"title": n.title, "sentiment": n.sentiment, "time": n.time, "keywords": n.keywords[:3]} for n in news[:5]]
+        return {
+            "code": code, "name": name,
+            "sentiment": "bullish" if avg_score > 0.3 else ("bearish" if avg_score < -0.3 else "neutral"),
+            "score": round(avg_score, 2),
+            "bullish_count": bullish, "bearish_count": bearish,
+            "news_count": len(news), "headlines": headlines,
         }
-        print(json.dumps(output, ensure_ascii=False))
-
-    elif tool == "market_scan":
-        scanner = SinaMarketScanner()
-        result = await scanner.scan_anomalies()
-        sector_map = {}
-        for group_key in ("big_gainers", "big_losers", "high_amount"):
-            for s in result.get(group_key, []):
-                name = s.get("name", "")
-                for keyword, sector in [
-                    ("电", "电力/电气"), ("光", "光伏/光学"), ("锂", "锂电"),
-                    ("铜", "铜/有色"), ("银", "白银/有色"), ("金", "黄金/贵金属"),
-                    ("钢", "钢铁"), ("油", "石油/化工"), ("芯", "半导体"),
-                    ("AI", "人工智能"), ("算", "算力"), ("军", "军工"),
-                    ("药", "医药"), ("电池", "新能源"), ("风", "风电"),
-                    ("核", "核电"), ("矿", "矿业"), ("煤", "煤炭"),
-                    ("券", "券商"), ("银行", "银行"), ("保险", "保险"),
-                    ("汽车", "汽车"), ("酒", "白酒/消费"), ("食", "食品/消费"),
-                    ("储", "存储/半导体"), ("航", "航天/军工"), ("船", "造船"),
-                ]:
-                    if keyword in name:
-                        sector_map.setdefault(sector, []).append(name)
-                        break
-        hot_sectors = sorted(sector_map.items(), key=lambda x: -len(x[1]))[:8]
-        result["sector_heatmap"] = [
-            {"sector": s, "count": len(names), "samples": names[:3]}
-            for s, names in hot_sectors
-        ]
-        print(json.dumps(result, ensure_ascii=False))
-
-    elif tool == "top_amount":
-        scanner = SinaMarketScanner()
-        result = await scanner.get_top_amount(int(args[0]) if args else 20)
-        print(json.dumps({"top_amount": result, "count": len(result)}, ensure_ascii=False))
-
-    elif tool == "news_sentiment":
-        if args:
-            fetcher = EastMoneyNewsFetcher()
-            code = args[0]
-            name = args[1] if len(args) > 1 else ""
-            news = await fetcher.get_stock_news(code, name, limit=10)
-            avg_score = sum(n.sentiment for n in news) / len(news) if news else 0
-            bullish = sum(1 for n in news if n.sentiment > 0)
-            bearish = sum(1 for n in news if n.sentiment < 0)
-            headlines = [{"title": n.title, "sentiment": n.sentiment, "time": n.time, "keywords": n.keywords[:3]} for n in news[:5]]
-            print(json.dumps({
-                "code": code, "name": name,
-                "sentiment": "bullish" if avg_score > 0.3 else ("bearish" if avg_score < -0.3 else "neutral"),
-                "score": round(avg_score, 2),
-                "bullish_count": bullish, "bearish_count": bearish,
-                "news_count": len(news), "headlines": headlines,
-            }, ensure_ascii=False))
+    else:
+        result = await aggregate_news(20)
+        return result
+
+
+@registry.tool("news_alerts")
+async def _news_alerts(args: list[str], out: ToolOutput):
+    """关键新闻推送: daemon 开启监听时直接读取已推送条目, 否则并发轮询各源一轮后读库内最近条目."""
+    from data_sources.news_watcher import NewsWatcher
+    min_importance = int(args[0]) if args else 2
+    watcher = _shared.get(NewsWatcher)
+    if watcher is not None and watcher.running:
+        items = list(watcher.recent)
+    else:
+        watcher = NewsWatcher()
+        polled = await asyncio.gather(*(watcher.poll_once(name, src) for name, src in watcher.sources),
+                                      return_exceptions=True)
+        for (name, _), result in zip(watcher.sources, polled):
+            if isinstance(result, BaseException):
+                out.setdefault("errors", {})[name] = str(result)
+        # poll_once 只返回库里没有的条目, 上次已入库的关键新闻要从库里读
+        items = await asyncio.to_thread(lambda: [
+            (name, n) for name, _ in watcher.sources for n in watcher.store.latest(name, watcher.limit)])
+        items.sort(key=lambda x: x[1].time)  # 与 watcher.recent 一致: 旧→新
+    alerts = [
+        {"source": name, "title": n.title, "time": n.time, "importance": n.importance,
+         "sentiment": n.sentiment, "keywords": n.keywords[:3]}
+        for name, n in reversed(items) if n.importance >= min_importance
+    ]
+    alerts.sort(key=lambda a: -a["importance"])  # 同级按最新在前
+    out.update(alerts=alerts, count=len(alerts), watching=watcher.running, sources=watcher.status())
+
+
+@registry.tool("gold_analysis", sections=("precious_metals", "etf_flows"))
+async def _gold_analysis(args: list[str], out: ToolOutput):
+    from data_sources.tencent import TencentRealtimeSource
+    from data_sources.sina_commodity import SinaCommoditySource
+    comm_src = _shared_instance(SinaCommoditySource)
+    gold_codes = ["XAU", "XAG", "GOLD_CN", "SILVER_CN"]
+    etf_codes = ["518880", "518800", "159934"]
+    import datetime
+    result = out
+    result["analysis_time"] = datetime.datetime.now().strftime("%Y-%m-%d %H:%M")
+
+    quotes = await comm_src.fetch_quotes(gold_codes)
+    result["precious_metals"] = []
+
+    for q in quotes:
+        if q is None:
+            continue
+        item = {
+            "code": q.code, "name": q.name, "price": q.price,
+            "change_pct": q.change_pct, "open": q.open, "high": q.high, "low": q.low,
+            "pre_close": q.pre_close,
+        }
+        if q.high > 0 and q.low > 0:
+            daily_range = q.high - q.low
+            pivot = (q.high + q.low + q.price) / 3
+            item["pivot"] = round(pivot, 2)
+            item["support_1"] = round(2 * pivot - q.high, 2)
+            item["resistance_1"] = round(2 * pivot - q.low, 2)
+            item["support_2"] = round(pivot - daily_range, 2)
+            item["resistance_2"] = round(pivot + daily_range, 2)
+            item["daily_range_pct"] = round(daily_range / q.price * 100, 2)
+
+        if q.pre_close > 0:
+            if q.price > q.pre_close * 1.01:
+                item["trend"] = "bullish"
+            elif q.price < q.pre_close * 0.99:
+                item["trend"] = "bearish"
+            else:
+                item["trend"] = "neutral"
+        result["precious_metals"].append(item)
+    out.section("precious_metals", result["precious_metals"])
+
+    etf_src = _shared_instance(TencentRealtimeSource)
+    etf_quotes = await etf_src.fetch_quotes(etf_codes)
+    result["etf_flows"] = []
+    for eq in etf_quotes:
+        if eq is None:
+            continue
+        etf_item = {
+            "code": eq.code, "name": eq.name, "price": eq.price,
+            "change_pct": eq.change_pct,
+            "volume_ratio": eq.volume_ratio,
+            "turnover_rate": eq.turnover_rate,
+        }
+        if eq.volume_ratio > 1.5:
+            etf_item["flow_signal"] = "资金流入(量比%.1f)" % eq.volume_ratio
+        elif eq.volume_ratio < 0.5:
+            etf_item["flow_signal"] = "资金流出(量比%.1f)" % eq.volume_ratio
+        else:
+            etf_item["flow_signal"] = "正常"
+        result["etf_flows"].append(etf_item)
+    out.section("etf_flows", result["etf_flows"])
+
+    # Overall sentiment
+    gold = next((m for m in result["precious_metals"] if m["code"] == "XAU"), None)
+    silver = next((m for m in result["precious_metals"] if m["code"] == "XAG"), None)
+    if gold and silver:
+        gold_silver_ratio = gold["price"] / silver["price"] if silver["price"] > 0 else 0
+        result["gold_silver_ratio"] = round(gold_silver_ratio, 2)
+        if gold_silver_ratio > 80:
+            result["ratio_signal"] = "金银比偏高(>80), 白银相对低估或避险情绪浓厚"
+        elif gold_silver_ratio < 60:
+            result["ratio_signal"] = "金银比偏低(<60), 工业需求旺盛"
         else:
-            result = await aggregate_news(20)
-            print(json.dumps(result, ensure_ascii=False))
-
-    elif tool == "gold_analysis":
-        from data_sources.sina_commodity import SinaCommoditySource
-        comm_src = SinaCommoditySource()
-        gold_codes = ["XAU", "XAG", "GOLD_CN", "SILVER_CN"]
-        etf_codes = ["518880", "518800", "159934"]
-        quotes = await comm_src.fetch_quotes(gold_codes)
-        etf_src = TencentRealtimeSource()
-        etf_quotes = await etf_src.fetch_quotes(etf_codes)
-        await etf_src.close()
-
-        result = {"precious_metals": [], "etf_flows": [], "analysis_time": ""}
-        import datetime
-        result["analysis_time"] = datetime.datetime.now().strftime("%Y-%m-%d %H:%M")
+            result["ratio_signal"] = "金银比正常区间(60-80)"
 
-        for q in quotes:
-            if q is None:
-                continue
-            item = {
-                "code": q.code, "name": q.name, "price": q.price,
-                "change_pct": q.change_pct, "open": q.open, "high": q.high, "low": q.low,
-                "pre_close": q.pre_close,
-            }
-            if q.high > 0 and q.low > 0:
-                daily_range = q.high - q.low
-                pivot = (q.high + q.low + q.price) / 3
-                item["pivot"] = round(pivot, 2)
-                item["support_1"] = round(2 * pivot - q.high, 2)
-                item["resistance_1"] = round(2 * pivot - q.low, 2)
-                item["support_2"] = round(pivot - daily_range, 2)
-                item["resistance_2"] = round(pivot + daily_range, 2)
-                item["daily_range_pct"] = round(daily_range / q.price * 100, 2)
-
-            if q.pre_close > 0:
-                if q.price > q.pre_close * 1.01:
-                    item["trend"] = "bullish"
-                elif q.price < q.pre_close * 0.99:
-                    item["trend"] = "bearish"
-                else:
-                    item["trend"] = "neutral"
-            result["precious_metals"].append(item)
-
-        for eq in etf_quotes:
-            if eq is None:
-                continue
-            etf_item = {
-                "code": eq.code, "name": eq.name, "price": eq.price,
-                "change_pct": eq.change_pct,
-                "volume_ratio": eq.volume_ratio,
-                "turnover_rate": eq.turnover_rate,
-            }
-            if eq.volume_ratio > 1.5:
-                etf_item["flow_signal"] = "资金流入(量比%.1f)" % eq.volume_ratio
-            elif eq.volume_ratio < 0.5:
-                etf_item["flow_signal"] = "资金流出(量比%.1f)" % eq.volume_ratio
-            else:
-                etf_item["flow_signal"] = "正常"
-            result["etf_flows"].append(etf_item)
-
-        # Overall sentiment
-        gold = next((m for m in result["precious_metals"] if m["code"] == "XAU"), None)
-        silver = next((m for m in result["precious_metals"] if m["code"] == "XAG"), None)
-        if gold and silver:
-            gold_silver_ratio = gold["price"] / silver["price"] if silver["price"] > 0 else 0
-            result["gold_silver_ratio"] = round(gold_silver_ratio, 2)
-            if gold_silver_ratio > 80:
-                result["ratio_signal"] = "金银比偏高(>80), 白银相对低估或避险情绪浓厚"
-            elif gold_silver_ratio < 60:
-                result["ratio_signal"] = "金银比偏低(<60), 工业需求旺盛"
-            else:
-                result["ratio_signal"] = "金银比正常区间(60-80)"
+    return result
 
-        print(json.dumps(result, ensure_ascii=False))
 
-    elif tool == "margin_data":
-        em = EastMoneyMarketData()
-        date = args[0] if args else ""
-        result = await em.get_margin_balance(date)
-        print(json.dumps(result, ensure_ascii=False))
+@registry.tool("margin_data")
+async def _margin_data(args: list[str], out: ToolOutput):
+    from data_sources.eastmoney_market import EastMoneyMarketData
+    em = _shared_instance(EastMoneyMarketData)
+    date = args[0] if args else ""
+    result = await em.get_margin_balance(date)
+    return result
 
-    elif tool == "lhb":
-        em = EastMoneyMarketData()
-        date = args[0] if args else ""
-        result = await em.get_lhb(date)
-        print(json.dumps(result, ensure_ascii=False))
 
-    elif tool == "main_flow":
-        em = EastMoneyMarketData()
-        codes = args[0].split(",") if args else []
-        results = {}
-        for code in codes[:10]:
-            results[code] = await em.get_main_flow(code)
-        print(json.dumps(results, ensure_ascii=False))
-
-    elif tool == "save_daily":
-        from data_sources.eastmoney_market import EastMoneyMarketData
-        from data_sources.eastmoney_northbound import NorthboundFlowSource
-        em = EastMoneyMarketData()
-        nb_src = NorthboundFlowSource()
-        from datetime import datetime as dt
-        today = dt.now().strftime("%Y-%m-%d")
-        mkt = await em.get_market_sentiment()
-        nb = await nb_src.get_realtime_flow()
-        hs300_pct = mkt.get("indices", {}).get("000300", {}).get("change_pct", 0)
-        nb_net = 0
-        if isinstance(nb, dict):
-            nb_net = nb.get("total_net", nb.get("net_inflow", 0))
-            if isinstance(nb_net, str):
-                try: nb_net = float(nb_net)
-                except (ValueError, TypeError): nb_net = 0
-        snapshot = {
-            "hs300_pct": hs300_pct,
-            "northbound_net": nb_net,
-            "sentiment_score": mkt.get("score", 50),
-        }
-        save_daily_snapshot(today, snapshot)
-        print(json.dumps({"saved": today, "snapshot": snapshot}, ensure_ascii=False))
+@registry.tool("lhb")
+async def _lhb(args: list[str], out: ToolOutput):
+    from data_sources.eastmoney_market import EastMoneyMarketData
+    em = _shared_instance(EastMoneyMarketData)
+    date = args[0] if args else ""
+    result = await em.get_lhb(date)
+    return result
 
-    else:
-        print(json.dumps({"error": f"Unknown tool: {tool}", "available": [
-            "stock_analysis", "weekly_review", "us_stock", "hk_stock", "commodity",
-            "market_anomaly", "market_scan", "top_amount", "capital_flow",
-            "northbound_flow", "global_overview", "system_health", "warm_klines",
-            "news_sentiment", "gold_analysis", "margin_data", "lhb", "main_flow", "save_daily"
-        ]}))
-
-async def _batch_get_industries(codes: list) -> dict:
-    """批量获取股票行业分类(东财 ulist API). 返回 {code: industry}."""
-    if not codes:
-        return {}
-    import httpx
-    codes = [c.strip().zfill(6) for c in codes if c.strip()]
-    secids = ",".join(
-        f"{'1' if c.startswith(('6', '5')) else '0'}.{c}" for c in codes
-    )
-    url = "https://push2.eastmoney.com/api/qt/ulist.np/get"
-    params = {
-        "fltt": 2,
-        "secids": secids,
-        "fields": "f12,f100",
-        "ut": "b2884a393a59ad64002292a3e90d46a5",
+
+@registry.tool("main_flow")
+async def _main_flow(args: list[str], out: ToolOutput):
+    from data_sources.eastmoney_market import EastMoneyMarketData
+    em = _shared_instance(EastMoneyMarketData)
+    codes = args[0].split(",") if args else []
+    results = {}
+    for code in codes[:10]:
+        results[code] = await em.get_main_flow(code)
+    return results
+
+
+@registry.tool("save_daily")
+async def _save_daily(args: list[str], out: ToolOutput):
+    from data_sources.eastmoney_market import EastMoneyMarketData
+    from data_sources.eastmoney_northbound import NorthboundFlowSource
+    em = _shared_instance(EastMoneyMarketData)
+    nb_src = _shared_instance(NorthboundFlowSource)
+    from datetime import datetime as dt
+    today = dt.now().strftime("%Y-%m-%d")
+    mkt = await em.get_market_sentiment()
+    nb = await nb_src.get_realtime_flow()
+    hs300_pct = mkt.get("indices", {}).get("000300", {}).get("change_pct", 0)
+    nb_net = 0
+    if isinstance(nb, dict):
+        nb_net = nb.get("total_net", nb.get("net_inflow", 0))
+        if isinstance(nb_net, str):
+            try: nb_net = float(nb_net)
+            except (ValueError, TypeError): nb_net = 0
+    snapshot = {
+        "hs300_pct": hs300_pct,
+        "northbound_net": nb_net,
+        "sentiment_score": mkt.get("score", 50),
     }
-    headers = {"User-Agent": "Mozilla/5.0", "Referer": "https://quote.eastmoney.com"}
-    try:
-        async with httpx.AsyncClient(timeout=10, headers=headers) as c:
-            resp = await c.get(url, params=params)
-            data = resp.json()
-            result = {}
-            for item in data.get("data", {}).get("diff", []):
-                code = str(item.get("f12", ""))
-                industry = item.get("f100", "")
-                if code and industry:
-                    result[code] = industry
-            return result
-    except Exception:
-        return {}
+    save_daily_snapshot(today, snapshot)
+    return {"saved": today, "snapshot": snapshot}
+
+
+async def run_tool(tool: str, args: list[str], timings: bool | None = None, profile: bool | None = None):
+    """执行单个工具 (按 settings.yaml tool_timeout 限时), 返回可 JSON 序列化的结果."""
+    if tool not in registry:
+        return {"error": f"Unknown tool: {tool}", "available": registry.names()}
+    return await registry.dispatch(tool, args, timings=timings, profile=profile)
+
+
+async def _industries_for(codes: list) -> dict:
+    """行业索引查找 {code: industry}. 缺失的个别代码 (次新股) 再补查, 查无行业的代码按 TTL 跳过.
+
+    全量刷新由 warm_klines 负责; 这里索引过期只在后台刷新, 不占用工具的超时预算.
+    """
+    from data_sources.industry_index import get_industry_index
+    index = get_industry_index()
+    index.refresh_in_background()
+    codes = [c.strip().zfill(6) for c in codes if c.strip()]
+    result = index.lookup(codes)
+    result.update(await index.add([c for c in codes if c not in result]))
+    return result
+
 
 def _load_watchlist_codes(category="priority"):
     wl_path = os.path.join(os.path.dirname(__file__), "..", "..", "..", "knowledge", "watchlist.json")
@@ -640,6 +879,138 @@ def _load_watchlist_codes(category="priority"):
     except Exception:
         return []
 
+async def _handle_daemon_client(reader, writer):
+    """daemon 连接处理: 每行一个 JSON 请求 {"tool", "args", "timings"?, "profile"?}, 回一行 JSON 响应."""
+    try:
+        line = await reader.readline()
+        if not line:
+            return
+        req = json.loads(line)
+        tool = req.get("tool", "")
+        if tool == "ping":
+            resp = {"result": {"pong": True, "pid": os.getpid()}}
+        else:
+            try:
+                resp = {"result": await run_tool(tool, list(req.get("args", [])), req.get("timings"),
+                                                 req.get("profile"))}
+            except Exception as e:
+                import traceback
+                resp = {"error": str(e), "trace": traceback.format_exc()[-300:]}
+        writer.write(json.dumps(resp, ensure_ascii=False).encode() + b"\n")
+        await writer.drain()
+    except Exception as e:
+        import logging
+        logging.getLogger(__name__).warning(f"daemon request failed: {e}")
+    finally:
+        writer.close()
+
+
+async def serve_daemon(socket_path: str = DAEMON_SOCKET):
+    """常驻进程: 复用 DataManager/数据源连接/内存缓存, 通过 Unix socket 提供工具调用."""
+    os.makedirs(os.path.dirname(socket_path), exist_ok=True)
+    if os.path.exists(socket_path):
+        if await _call_daemon("ping", [], socket_path) is not None:
+            print(json.dumps({"error": f"daemon already running on {socket_path}"}))
+            return
+        os.unlink(socket_path)
+    server = await asyncio.start_unix_server(_handle_daemon_client, path=socket_path, limit=_IPC_LIMIT)
+    os.chmod(socket_path, 0o600)
+    print(json.dumps({"daemon": "listening", "socket": socket_path, "pid": os.getpid()}), flush=True)
+    if os.environ.get("QUANT_NEWS_WATCH"):
+        from data_sources.news_watcher import NewsWatcher
+        _shared_instance(NewsWatcher).start()
+    from utils.metrics import maybe_start_http_server
+    exporter = maybe_start_http_server()
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        if exporter is not None:
+            exporter.shutdown()
+        await _close_shared()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+
+def _reply_timeout(tool: str) -> float | None:
+    """等待 daemon 回复的上限: 工具超时 + 余量. 不限时的批量工具 (warm_klines/backtest) 不设上限."""
+    if tool == "ping":
+        return PING_TIMEOUT
+    timeout = registry.timeout_for(tool) if tool in registry else get_tool_timeout("default")
+    return None if timeout is None else timeout + DAEMON_REPLY_MARGIN
+
+
+async def _call_daemon(tool: str, args: list[str], socket_path: str = DAEMON_SOCKET, profile: bool = False):
+    """尝试交给 daemon 执行. daemon 不在线或超时未回复 (事件循环卡住/被长任务占用) 时返回 None,
+    由调用方进程内执行."""
+    if os.environ.get("QUANT_NO_DAEMON") or not os.path.exists(socket_path):
+        return None
+    try:
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_unix_connection(socket_path, limit=_IPC_LIMIT), timeout=0.5
+        )
+    except (OSError, asyncio.TimeoutError):
+        return None
+    try:
+        req = {"tool": tool, "args": args}
+        if profile:
+            # 在 daemon 进程内剖析 (保留其缓存与连接状态), 输出写入 daemon 的缓存目录
+            req["profile"] = True
+        if os.environ.get("QUANT_TIMINGS") is not None:
+            # 客户端的 QUANT_TIMINGS 覆盖 daemon 进程的设置
+            from utils.timing import timings_enabled
+            req["timings"] = timings_enabled()
+        writer.write(json.dumps(req, ensure_ascii=False).encode() + b"\n")
+        await writer.drain()
+        line = await asyncio.wait_for(reader.readline(), _reply_timeout(tool))
+    except asyncio.TimeoutError:
+        import logging
+        logging.getLogger(__name__).warning(f"daemon did not reply to {tool} in time, running in-process")
+        return None
+    except OSError:
+        return None
+    finally:
+        writer.close()
+    if not line:
+        return None
+    return json.loads(line)
+
+
+async def main():
+    argv = sys.argv[1:]
+    profile = bool(argv) and argv[0] == "--profile"
+    if profile:
+        argv = argv[1:]
+    if not argv:
+        print(json.dumps({"error": "Usage: quant.py [--profile] <tool> [args...] | quant.py daemon [socket]"}))
+        sys.exit(1)
+
+    tool = argv[0]
+    args = argv[1:]
+
+    if tool == "daemon":
+        await serve_daemon(args[0] if args else DAEMON_SOCKET)
+        return
+
+    from utils.http_replay import from_env
+    # 录制/回放 HTTP 时必须在本进程执行, 不交给 daemon
+    replay = bool(os.environ.get("QUANT_HTTP_RECORD") or os.environ.get("QUANT_HTTP_REPLAY"))
+    resp = None if replay else await _call_daemon(tool, args, profile=profile)
+    if resp is not None:
+        if "error" in resp:
+            print(json.dumps(resp, ensure_ascii=False))
+            sys.exit(1)
+        print(json.dumps(resp["result"], ensure_ascii=False))
+        return
+
+    async with from_env():
+        try:
+            result = await run_tool(tool, args, profile=profile or None)
+        finally:
+            await _close_shared()
+    print(json.dumps(result, ensure_ascii=False))
+
+
 if __name__ == "__main__":
     try:
         asyncio.run(main())
@@ -4,9 +4,12 @@ from __future__ import annotations
 
 import sqlite3
 from pathlib import Path
+from typing import Callable
 
 import pandas as pd
 
+from .utils import dates_to_str
+
 
 class SQLiteKlineCache:
     """Simple SQLite cache with UPSERT for kline rows."""
@@ -40,6 +43,21 @@ class SQLiteKlineCache:
                 )
                 """
             )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS source_stat (
+                    source TEXT PRIMARY KEY,
+                    success INTEGER NOT NULL DEFAULT 0,
+                    fail INTEGER NOT NULL DEFAULT 0,
+                    total_latency REAL NOT NULL DEFAULT 0,
+                    last_success REAL,
+                    fail_streak INTEGER NOT NULL DEFAULT 0,
+                    open_until REAL NOT NULL DEFAULT 0,
+                    last_call REAL NOT NULL DEFAULT 0,
+                    updated_at TEXT NOT NULL DEFAULT (datetime('now'))
+                )
+                """
+            )
             conn.commit()
 
     def get(
@@ -65,25 +83,46 @@ class SQLiteKlineCache:
         with self._conn() as conn:
             return pd.read_sql_query(query, conn, params=args)
 
+    def get_many(
+        self,
+        codes: list[str] | None,
+        frequency: str,
+        adjust: str,
+        start: str | None = None,
+        end: str | None = None,
+    ) -> pd.DataFrame:
+        """Rows for many codes in one query (codes=None: every cached code), ordered by code, date."""
+        query = (
+            "SELECT code,date,source,open,high,low,close,volume,amount "
+            "FROM kline WHERE frequency=? AND adjust=?"
+        )
+        args: list[str] = [frequency, adjust]
+        if codes is not None:
+            if not codes:
+                return pd.DataFrame(columns=["code", "date", "source", "open", "high", "low", "close", "volume", "amount"])
+            query += f" AND code IN ({','.join('?' * len(codes))})"
+            args.extend(codes)
+        if start:
+            query += " AND date>=?"
+            args.append(start)
+        if end:
+            query += " AND date<=?"
+            args.append(end)
+        query += " ORDER BY code, date"
+        with self._conn() as conn:
+            return pd.read_sql_query(query, conn, params=args)
+
     def upsert(self, df: pd.DataFrame) -> None:
         if df is None or df.empty:
             return
-        rows = [
-            (
-                str(r.code),
-                str(r.date),
-                str(r.frequency),
-                str(r.source),
-                str(r.adjust),
-                float(r.open) if pd.notna(r.open) else None,
-                float(r.high) if pd.notna(r.high) else None,
-                float(r.low) if pd.notna(r.low) else None,
-                float(r.close) if pd.notna(r.close) else None,
-                float(r.volume) if pd.notna(r.volume) else None,
-                float(r.amount) if pd.notna(r.amount) else None,
-            )
-            for r in df.itertuples(index=False)
-        ]
+        # 按列转换后再拼行, 避免逐行 itertuples + notna (多年历史时是预热的主要开销)
+        text = [df[c].astype(str).tolist() for c in ("code", "frequency", "source", "adjust")]
+        numeric = []
+        for c in ("open", "high", "low", "close", "volume", "amount"):
+            col = pd.to_numeric(df[c], errors="coerce").astype(float)
+            numeric.append(col.astype(object).where(col.notna(), None).tolist())
+        code, frequency, source, adjust = text
+        rows = list(zip(code, dates_to_str(df["date"]), frequency, source, adjust, *numeric))
         with self._conn() as conn:
             conn.executemany(
                 """
@@ -103,6 +142,50 @@ class SQLiteKlineCache:
             )
             conn.commit()
 
+    _STAT_COLUMNS = (
+        "success", "fail", "total_latency", "last_success",
+        "fail_streak", "open_until", "last_call",
+    )
+
+    def load_source_stats(self) -> dict[str, dict]:
+        """Persisted source chain stats, keyed by source name."""
+        cols = ",".join(self._STAT_COLUMNS)
+        with self._conn() as conn:
+            rows = conn.execute(f"SELECT source,{cols} FROM source_stat").fetchall()
+        return {r[0]: dict(zip(self._STAT_COLUMNS, r[1:])) for r in rows}
+
+    def update_source_stat(self, source: str, apply: Callable[[dict], dict]) -> dict:
+        """Read-modify-write one source's stats inside a single write transaction."""
+        cols = ",".join(self._STAT_COLUMNS)
+        conn = self._conn()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(f"SELECT {cols} FROM source_stat WHERE source=?", (source,)).fetchone()
+            state = apply(dict(zip(self._STAT_COLUMNS, row)) if row else {})
+            values = [state.get(c) for c in self._STAT_COLUMNS]
+            conn.execute(
+                f"""
+                INSERT INTO source_stat (source,{cols}) VALUES (?,?,?,?,?,?,?,?)
+                ON CONFLICT(source) DO UPDATE SET
+                    success=excluded.success,
+                    fail=excluded.fail,
+                    total_latency=excluded.total_latency,
+                    last_success=excluded.last_success,
+                    fail_streak=excluded.fail_streak,
+                    open_until=excluded.open_until,
+                    last_call=excluded.last_call,
+                    updated_at=datetime('now')
+                """,
+                [source, *values],
+            )
+            conn.commit()
+            return state
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
     def stats(self) -> dict:
         with self._conn() as conn:
             row = conn.execute(
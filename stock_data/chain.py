@@ -3,8 +3,8 @@
 from __future__ import annotations
 
 import time
-from dataclasses import dataclass, field
-from typing import Callable
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Protocol
 
 
 @dataclass
@@ -21,6 +21,19 @@ class SourceStat:
     def avg_latency(self) -> float:
         return self.total_latency / self.success if self.success else 0.0
 
+    @classmethod
+    def from_state(cls, state: dict) -> "SourceStat":
+        known = {k: v for k, v in state.items() if k in cls.__dataclass_fields__ and v is not None}
+        return cls(**known)
+
+
+class StatStore(Protocol):
+    """Persistence backend for source stats (implemented by the SQLite caches)."""
+
+    def load_source_stats(self) -> dict[str, dict]: ...
+
+    def update_source_stat(self, source: str, apply: Callable[[dict], dict]) -> dict: ...
+
 
 class DataSourceChain:
     """Execute source calls by priority with reliability controls."""
@@ -29,15 +42,41 @@ class DataSourceChain:
     CIRCUIT_FAIL_THRESHOLD = 3
     CIRCUIT_RECOVER_SECONDS = 600
 
-    def __init__(self, priorities: dict[str, list[str]]):
+    def __init__(self, priorities: dict[str, list[str]], store: StatStore | None = None):
         self.priorities = priorities
         self.stats: dict[str, SourceStat] = {}
+        self.store = store
+        if store is not None:
+            try:
+                for source, state in store.load_source_stats().items():
+                    self.stats[source] = SourceStat.from_state(state)
+            except Exception:
+                pass
 
     def _stat(self, source: str) -> SourceStat:
         if source not in self.stats:
             self.stats[source] = SourceStat()
         return self.stats[source]
 
+    def _record(self, source: str, apply: Callable[[SourceStat], None]) -> None:
+        """Apply a stat update in memory and, with a store, atomically on disk.
+
+        The persisted row is the base for the update so concurrent processes
+        accumulate counts instead of overwriting each other.
+        """
+        if self.store is not None:
+            def _merge(state: dict) -> dict:
+                st = SourceStat.from_state(state)
+                apply(st)
+                return asdict(st)
+
+            try:
+                self.stats[source] = SourceStat.from_state(self.store.update_source_stat(source, _merge))
+                return
+            except Exception:
+                pass
+        apply(self._stat(source))
+
     def _available(self, source: str, now: float) -> bool:
         st = self._stat(source)
         if st.open_until > now:
@@ -55,22 +94,30 @@ class DataSourceChain:
                 continue
             st = self._stat(source)
             st.last_call = time.time()
-            started = time.time()
+            started = st.last_call
             try:
                 result = fetcher(source)
-                st.success += 1
-                st.total_latency += time.time() - started
-                st.last_success = time.time()
-                st.fail_streak = 0
+                self._record(source, lambda s: self._on_success(s, started))
                 return source, result
             except Exception as exc:
-                st.fail += 1
-                st.fail_streak += 1
+                self._record(source, lambda s: self._on_failure(s, started))
                 errors.append(f"{source}: {exc}")
-                if st.fail_streak >= self.CIRCUIT_FAIL_THRESHOLD:
-                    st.open_until = time.time() + self.CIRCUIT_RECOVER_SECONDS
         raise RuntimeError("all sources failed; " + " | ".join(errors))
 
+    def _on_success(self, st: SourceStat, started: float) -> None:
+        st.last_call = max(st.last_call, started)
+        st.success += 1
+        st.total_latency += time.time() - started
+        st.last_success = time.time()
+        st.fail_streak = 0
+
+    def _on_failure(self, st: SourceStat, started: float) -> None:
+        st.last_call = max(st.last_call, started)
+        st.fail += 1
+        st.fail_streak += 1
+        if st.fail_streak >= self.CIRCUIT_FAIL_THRESHOLD:
+            st.open_until = time.time() + self.CIRCUIT_RECOVER_SECONDS
+
     def health_report(self) -> dict:
         now = time.time()
         report = {}
@@ -22,7 +22,7 @@ class StockDataManager:
 
     def __init__(self, cache_db_path: str = "stock_data/cache.db") -> None:
         self.cache = SQLiteKlineCache(cache_db_path)
-        self.chain = DataSourceChain(self.PRIORITY)
+        self.chain = DataSourceChain(self.PRIORITY, store=self.cache)
         self.sources = {
             "sina": SinaSource(),
             "baostock": BaoStockSource(),
@@ -4,6 +4,7 @@ from __future__ import annotations
 
 from typing import Optional
 
+import numpy as np
 import pandas as pd
 
 STANDARD_COLUMNS = [
@@ -56,12 +57,90 @@ def to_baostock_symbol(code: str) -> str:
     return f"{_market_from_code(n)}.{n}"
 
 
-def _find_col(df: pd.DataFrame, names: list[str]) -> Optional[str]:
+# 标准列 → 候选源列名 (不区分大小写), 未知源或已知源返回格式变化时按此探测
+COLUMN_ALIASES = {
+    "date": ("date", "datetime", "time", "day", "日期", "时间"),
+    "open": ("open", "开盘"),
+    "high": ("high", "最高"),
+    "low": ("low", "最低"),
+    "close": ("close", "收盘"),
+    "volume": ("volume", "vol", "成交量"),
+    "amount": ("amount", "成交额", "turnover"),
+}
+REQUIRED_FIELDS = ("date", "open", "high", "low", "close", "volume")
+
+_SINA_MINUTE = {"date": "day", "open": "open", "high": "high", "low": "low", "close": "close",
+                "volume": "volume", "amount": "amount"}
+
+# 已知数据源的列映射 (标准列 → 源列), 列齐全时跳过列名探测; 同一源可能有多种返回格式.
+# 这些源的日期都是 ISO 格式 (或 date/datetime 对象), 按 ISO8601 解析, 不做格式推断.
+SOURCE_COLUMNS: dict[str, tuple[dict[str, str], ...]] = {
+    "baostock": ({"date": "date", "open": "open", "high": "high", "low": "low", "close": "close",
+                  "volume": "volume", "amount": "amount"},),
+    "sina": ({"date": "date", "open": "open", "high": "high", "low": "low", "close": "close",
+              "volume": "volume", "amount": "amount"}, _SINA_MINUTE),
+    "eastmoney": ({"date": "日期", "open": "开盘", "high": "最高", "low": "最低", "close": "收盘",
+                   "volume": "成交量", "amount": "成交额"}, _SINA_MINUTE),
+    "pytdx": ({"date": "datetime", "open": "open", "high": "high", "low": "low", "close": "close",
+               "volume": "vol", "amount": "amount"},),
+}
+
+DATE_FORMATS = ("str", "datetime64", "int64")
+DATE_STR_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def _resolve_columns(df: pd.DataFrame, source: str) -> dict[str, Optional[str]]:
+    """标准列 → 源列名 (amount 可缺失为 None)."""
+    present = set(df.columns)
+    for mapping in SOURCE_COLUMNS.get(source, ()):
+        if all(mapping[f] in present for f in REQUIRED_FIELDS):
+            amount = mapping.get("amount")
+            return {**{f: mapping[f] for f in REQUIRED_FIELDS}, "amount": amount if amount in present else None}
     lower_map = {str(c).strip().lower(): c for c in df.columns}
-    for name in names:
-        if name.lower() in lower_map:
-            return lower_map[name.lower()]
-    return None
+    return {
+        field: next((lower_map[a.lower()] for a in aliases if a.lower() in lower_map), None)
+        for field, aliases in COLUMN_ALIASES.items()
+    }
+
+
+def _to_float(col: pd.Series) -> np.ndarray:
+    """数值列 → float64 数组. 已是数值类型时不复制; 数字字符串由 NumPy 直接解析, 含非法值时退回 to_numeric."""
+    values = col.to_numpy()
+    if values.dtype.kind in "fiub":
+        return values.astype(np.float64, copy=False)
+    try:
+        return values.astype(np.float64)
+    except (TypeError, ValueError):
+        return pd.to_numeric(col, errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def _to_datetime64(col: pd.Series, iso: bool) -> np.ndarray:
+    """日期列 → datetime64[ns] 数组 (无法解析为 NaT)."""
+    if pd.api.types.is_datetime64_dtype(col.dtype):
+        return col.to_numpy(dtype="datetime64[ns]")
+    if iso and col.dtype == object and isinstance(col.iloc[0], str):
+        parsed = pd.to_datetime(col, format="ISO8601", errors="coerce")
+    else:
+        parsed = pd.to_datetime(col, errors="coerce")
+    return parsed.to_numpy(dtype="datetime64[ns]")
+
+
+def format_dates(dates: pd.Series | np.ndarray, date_format: str = "str"):
+    """datetime64 日期 → normalize_kline_df 的输出形式: 字符串 / datetime64 / int64 (Unix 秒)."""
+    if date_format == "datetime64":
+        return dates
+    if date_format == "int64":
+        return np.asarray(dates, dtype="datetime64[s]").astype(np.int64)
+    return pd.DatetimeIndex(dates).strftime(DATE_STR_FORMAT)
+
+
+def dates_to_str(col: pd.Series) -> list[str]:
+    """任一 DATE_FORMATS 形式的日期列 → 缓存使用的 "YYYY-MM-DD HH:MM:SS" 字符串."""
+    if pd.api.types.is_datetime64_dtype(col.dtype):
+        return list(format_dates(col.to_numpy()))
+    if pd.api.types.is_integer_dtype(col.dtype):
+        return list(format_dates(col.to_numpy().astype("datetime64[s]")))
+    return col.astype(str).tolist()
 
 
 def normalize_kline_df(
@@ -70,38 +149,48 @@ def normalize_kline_df(
     source: str,
     frequency: str,
     adjust: str,
+    date_format: str = "str",
 ) -> pd.DataFrame:
-    """Convert source-specific kline columns into the standard schema."""
+    """Convert source-specific kline columns into the standard schema.
+
+    date_format: "str" ("YYYY-MM-DD HH:MM:SS", SQLite 缓存使用的形式), "datetime64",
+    或 "int64" (Unix 秒); 后两者跳过日期格式化, 适合在内存中直接计算的长历史.
+    """
+    if date_format not in DATE_FORMATS:
+        raise ValueError(f"date_format must be one of {DATE_FORMATS}: {date_format!r}")
     if df is None or df.empty:
         return pd.DataFrame(columns=STANDARD_COLUMNS)
 
-    date_col = _find_col(df, ["date", "datetime", "time", "day", "日期", "时间"])
-    open_col = _find_col(df, ["open", "开盘"])
-    high_col = _find_col(df, ["high", "最高"])
-    low_col = _find_col(df, ["low", "最低"])
-    close_col = _find_col(df, ["close", "收盘"])
-    vol_col = _find_col(df, ["volume", "vol", "成交量"])
-    amt_col = _find_col(df, ["amount", "成交额", "turnover"])
-
-    required = [date_col, open_col, high_col, low_col, close_col, vol_col]
-    if any(col is None for col in required):
+    cols = _resolve_columns(df, source)
+    if any(cols[f] is None for f in REQUIRED_FIELDS):
         raise ValueError(f"missing required columns from source={source}: {list(df.columns)}")
 
-    out = pd.DataFrame(
+    dates = _to_datetime64(df[cols["date"]], iso=source in SOURCE_COLUMNS)
+    prices = {f: _to_float(df[cols[f]]) for f in ("open", "high", "low", "close", "volume")}
+    amount = _to_float(df[cols["amount"]]) if cols["amount"] else np.full(len(df), np.nan)
+
+    keep = ~np.isnat(dates)
+    for f in ("open", "high", "low", "close"):
+        keep &= ~np.isnan(prices[f])
+    if not keep.all():
+        dates, amount = dates[keep], amount[keep]
+        prices = {f: v[keep] for f, v in prices.items()}
+    # 数据源基本按时间升序返回, 已有序时省去排序
+    if len(dates) > 1 and not (dates[1:] >= dates[:-1]).all():
+        order = np.argsort(dates, kind="stable")
+        dates, amount = dates[order], amount[order]
+        prices = {f: v[order] for f, v in prices.items()}
+
+    n = len(dates)
+    return pd.DataFrame(
         {
-            "date": pd.to_datetime(df[date_col], errors="coerce"),
-            "open": pd.to_numeric(df[open_col], errors="coerce"),
-            "high": pd.to_numeric(df[high_col], errors="coerce"),
-            "low": pd.to_numeric(df[low_col], errors="coerce"),
-            "close": pd.to_numeric(df[close_col], errors="coerce"),
-            "volume": pd.to_numeric(df[vol_col], errors="coerce"),
-            "amount": pd.to_numeric(df[amt_col], errors="coerce") if amt_col else pd.NA,
-        }
+            "date": format_dates(dates, date_format),
+            **prices,
+            "amount": amount,
+            "code": np.full(n, normalize_code(code), dtype=object),
+            "source": np.full(n, source, dtype=object),
+            "frequency": np.full(n, frequency, dtype=object),
+            "adjust": np.full(n, adjust, dtype=object),
+        },
+        columns=STANDARD_COLUMNS,
     )
-    out = out.dropna(subset=["date", "open", "high", "low", "close"]).copy()
-    out["date"] = out["date"].dt.strftime("%Y-%m-%d %H:%M:%S")
-    out["code"] = normalize_code(code)
-    out["source"] = source
-    out["frequency"] = frequency
-    out["adjust"] = adjust
-    return out[STANDARD_COLUMNS].sort_values("date").reset_index(drop=True)
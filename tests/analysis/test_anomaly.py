@@ -0,0 +1,90 @@
+"""异动检测测试."""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "mcp-server"))
+
+from analysis.anomaly import (
+    LIMIT_DOWN, LIMIT_UP, MAIN_FORCE_REVERSAL, NORTHBOUND_SWING, VOLUME_SURGE,
+    AnomalyDetector, limit_pct,
+)
+from data_sources.base import QuoteData
+from utils.event_bus import EventBus
+
+
+def _quote(code, name, price, pre_close, volume_ratio=1.0):
+    return QuoteData(code=code, name=name, price=price, change_pct=round((price / pre_close - 1) * 100, 2),
+                     open=pre_close, high=price, low=price, pre_close=pre_close,
+                     volume=1e6, amount=1e8, volume_ratio=volume_ratio)
+
+
+def _detector(**thresholds):
+    return AnomalyDetector(EventBus({"default": 300}), **thresholds)
+
+
+class TestQuotes:
+    """实时行情检测"""
+
+    def test_limit_price_by_board(self):
+        assert limit_pct("600519", "贵州茅台") == 0.10
+        assert limit_pct("300750", "宁德时代") == 0.20
+        assert limit_pct("600000", "*ST某某") == 0.05
+
+        det = _detector()
+        events = det.on_quotes([
+            _quote("600519", "贵州茅台", 11.0, 10.0),
+            _quote("300750", "宁德时代", 11.0, 10.0),    # 创业板 +10% 未涨停
+            _quote("000001", "平安银行", 9.0, 10.0, volume_ratio=4.2),
+        ])
+        assert [(e.type, e.key) for e in events] == [
+            (LIMIT_UP, "600519"), (LIMIT_DOWN, "000001"), (VOLUME_SURGE, "000001")]
+
+    def test_repeat_fetch_deduplicated(self):
+        det = _detector()
+        quotes = [_quote("600519", "贵州茅台", 11.0, 10.0)]
+        assert len(det.on_quotes(quotes)) == 1
+        assert det.on_quotes(quotes) == []
+
+
+class TestCapitalFlow:
+    """主力反转 / 尾盘放量"""
+
+    def test_main_force_reversal_needs_prior_direction(self):
+        det = _detector(main_force_min_wan=1000)
+        flow = {"name": "贵州茅台", "main_force": {"main_net_inflow_wan": -5000}}
+        assert det.on_capital_flow("600519", flow) == []
+
+        flow["main_force"]["main_net_inflow_wan"] = 500   # 反转但金额不足
+        assert det.on_capital_flow("600519", flow) == []
+
+        flow["main_force"]["main_net_inflow_wan"] = 3000
+        flow["amount_surge_last_10min"] = True
+        events = det.on_capital_flow("600519", flow)
+        assert [e.type for e in events] == [VOLUME_SURGE, MAIN_FORCE_REVERSAL]
+        assert events[1].data["direction"] == 1
+        assert "转为净流入" in events[1].message
+
+
+class TestLimitPoolAndNorthbound:
+    """涨停池 + 北向"""
+
+    def test_limit_pool(self):
+        det = _detector()
+        pool = {"pool_type": "limit_up", "stocks": [
+            {"code": "600519", "name": "贵州茅台", "high_days": "3天3板", "is_again_limit": True},
+            {"code": "000858", "name": "五粮液"},
+        ]}
+        events = det.on_limit_pool(pool)
+        assert [(e.key, e.level) for e in events] == [("600519", 2), ("000858", 1)]
+        assert det.on_limit_pool({"pool_type": "fried_plate", "stocks": pool["stocks"]}) == []
+        # 行情和涨停池共用去重窗口
+        assert det.on_quotes([_quote("600519", "贵州茅台", 11.0, 10.0)]) == []
+
+    def test_northbound_swing(self):
+        det = _detector(northbound_swing_yi=20)
+        assert det.on_northbound({"total_net_flow": 10, "max_inflow": 25, "min_inflow": -5}) == []
+        events = det.on_northbound({"total_net_flow": 5, "max_inflow": 40, "min_inflow": -5})
+        assert [e.type for e in events] == [NORTHBOUND_SWING]
+        assert events[0].data["swing"] == -35
+        assert det.on_northbound({"note": "no data"}) == []
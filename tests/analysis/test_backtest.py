@@ -0,0 +1,203 @@
+"""评分回测引擎测试 (合成日K + 临时 SQLite 缓存)."""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "mcp-server"))
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from analysis import backtest as bt
+from stock_data.cache import SQLiteKlineCache
+
+
+def _klines(closes, volume=1e6, amount=1e8, start="2024-01-01"):
+    closes = np.asarray(closes, dtype=float)
+    n = len(closes)
+    vol = np.full(n, volume) if np.isscalar(volume) else np.asarray(volume, dtype=float)
+    return pd.DataFrame({
+        "date": pd.bdate_range(start, periods=n).strftime("%Y-%m-%d"),
+        "open": closes, "high": closes * 1.01, "low": closes * 0.99, "close": closes,
+        "volume": vol, "amount": np.full(n, amount),
+    })
+
+
+def _panel(**cols):
+    n = len(cols["change_pct"])
+    base = dict(codes=np.array(["000001"] * n, dtype=object), dates=np.array(["2024-01-02"] * n, dtype=object),
+                technical=np.full(n, 50.0), capital=np.full(n, 50.0), market=np.full(n, 50.0),
+                rsi=np.full(n, 50.0), forward={1: np.zeros(n)})
+    base.update({k: np.asarray(v, dtype=float) if k != "forward" else v for k, v in cols.items()})
+    return bt.Panel(**base)
+
+
+class TestScoringParams:
+    """权重/阈值读取与覆盖."""
+
+    def test_defaults_from_settings(self):
+        weights, signals = bt.scoring_params()
+        assert sum(weights.values()) == pytest.approx(1.0)
+        assert signals["strong_buy"] == 78
+        assert signals["buy"] == 63
+
+    def test_override_renormalizes(self):
+        weights, signals = bt.scoring_params({"technical": 1.25}, {"buy": 70})
+        assert sum(weights.values()) == pytest.approx(1.0)
+        assert weights["technical"] == pytest.approx(1.25 / 2.0)
+        assert signals["buy"] == 70
+
+
+class TestDimensionScores:
+    """逐根K线的维度分数."""
+
+    def test_technical_warmup_is_neutral(self):
+        tech, rsi = bt.technical_scores(_klines(np.linspace(10, 20, 60)))
+        assert (tech[:bt.WARMUP - 1] == 50).all()
+        assert len(tech) == len(rsi) == 60
+
+    def test_technical_rsi_extremes(self):
+        up, up_rsi = bt.technical_scores(_klines(10 * 1.01 ** np.arange(80)))
+        down, down_rsi = bt.technical_scores(_klines(10 * 0.99 ** np.arange(80)))
+        assert up_rsi[-1] > 80 and down_rsi[-1] < 20
+        assert ((up >= 0) & (up <= 100)).all() and ((down >= 0) & (down <= 100)).all()
+        # 单边上涨: 均线多头/站上 MA60 加分, 但超买扣分, 与 compute_technical 一样不会一路加满
+        assert up[-1] < 70
+
+    def test_capital_volume_surge(self):
+        closes = np.full(10, 10.0)
+        closes[-1] = 10.1
+        volume = np.full(10, 1e6)
+        volume[-1] = 6e6
+        cap = bt.capital_scores(_klines(closes, volume=volume))
+        # 量比 6 (+8), 成交额持平, 涨 1% 不触发背离
+        assert cap[-1] == 58
+        assert cap[5] == 50
+
+    def test_capital_heavy_selloff(self):
+        closes = np.full(10, 10.0)
+        closes[-1] = 9.5
+        volume = np.full(10, 1e6)
+        volume[-1] = 4e6
+        cap = bt.capital_scores(_klines(closes, volume=volume))
+        # 量比 4 (+5), 跌 5% 放量 (-3), 放量大跌 (-5)
+        assert cap[-1] == 47
+
+    def test_market_streaks(self):
+        index = _klines([10, 11, 12, 13, 14, 15, 14, 13, 12])
+        score = bt.market_scores(index)
+        assert score.iloc[3] == 45    # 连涨 3 天
+        assert score.iloc[5] == 40    # 连涨 5 天
+        assert score.iloc[8] == 54    # 连跌 3 天
+        assert bt.market_scores(None) is None
+
+
+def _random_klines(n=200, seed=7):
+    """随机游走日K, 夹带放量/缩量与大涨大跌, 覆盖各计分分支."""
+    rng = np.random.default_rng(seed)
+    closes = 10 * np.cumprod(1 + rng.normal(0, 0.025, n))
+    volume = 1e6 * rng.choice([0.3, 0.8, 1, 1.2, 2, 4, 7], n)
+    df = _klines(closes, volume=volume)
+    df["amount"] = volume * closes * rng.uniform(0.2, 6, n)
+    return df
+
+
+class TestParity:
+    """向量化回放与实时评分函数逐根一致."""
+
+    def test_capital_matches_compute_capital(self):
+        from analysis.capital_flow import compute_capital
+        from data_sources.base import QuoteData
+
+        df = _random_klines()
+        cap = bt.capital_scores(df)
+        close, volume, amount = (df[c].to_numpy() for c in ("close", "volume", "amount"))
+        for i in range(6, len(df)):
+            quote = QuoteData(code="000001", name="x", price=close[i],
+                              change_pct=(close[i] / close[i - 1] - 1) * 100, open=close[i], high=close[i],
+                              low=close[i], pre_close=close[i - 1], volume=volume[i], amount=amount[i],
+                              volume_ratio=volume[i] / volume[i - 5:i].mean())
+            expected = compute_capital(quote, avg_volume=volume[i - 5:i].mean(), avg_amount=amount[i - 5:i].mean())
+            assert cap[i] == pytest.approx(expected.score), f"bar {i}: {expected.signals}"
+
+    def test_technical_matches_compute_technical(self):
+        pytest.importorskip("pandas_ta")
+        from analysis.technical import compute_technical
+
+        df = _random_klines(260)
+        tech, _ = bt.technical_scores(df)
+        expected = np.array([compute_technical(df.iloc[:i + 1]).score for i in range(len(df))])
+        # 前 60 根指标 (EMA/RMA 起点) 口径不同, 之后逐根比对
+        agree = tech[60:] == expected[60:]
+        assert agree.mean() >= 0.95, np.flatnonzero(~agree)[:10] + 60
+
+
+class TestScorePanel:
+    """加权、动量惩罚与信号分档."""
+
+    def test_momentum_penalty_and_buckets(self):
+        panel = _panel(change_pct=[0, 9.8, -9.8], technical=[90, 90, 10], capital=[90, 90, 10])
+        weights, signals = bt.scoring_params()
+        total, bucket = bt.score_panel(panel, weights, signals)
+        # 90*0.55 + 50*0.45 = 72 → BUY; 涨停扣 12 → 60 WATCH; 10*0.55 + 50*0.45 + 8 = 36 → HOLD
+        assert total.tolist() == pytest.approx([72, 60, 36])
+        assert [bt.SIGNALS[i] for i in bucket] == ["BUY", "WATCH", "HOLD"]
+
+    def test_rsi_caps(self):
+        panel = _panel(change_pct=[0, 0], technical=[100, 0], capital=[100, 0], rsi=[85, 15])
+        weights, signals = bt.scoring_params({"fundamental": 0, "sentiment": 0, "market": 0})
+        _, bucket = bt.score_panel(panel, weights, signals)
+        assert [bt.SIGNALS[i] for i in bucket] == ["WATCH", "WATCH"]
+
+    def test_evaluate_hit_rates(self):
+        fwd = np.array([2.0, -1.0, -3.0, np.nan])
+        panel = _panel(change_pct=[0, 0, 0, 0], technical=[90, 90, 10, 10], capital=[90, 90, 10, 10],
+                       forward={5: fwd})
+        result = bt.evaluate(panel, {"fundamental": 0, "sentiment": 0, "market": 0})
+        buy = result["buckets"]["STRONG_BUY"]
+        assert buy["count"] == 2
+        assert buy["5d"]["hit_rate"] == 0.5
+        assert buy["5d"]["mean"] == 0.5
+        sell = result["buckets"]["STRONG_SELL"]
+        assert sell["count"] == 2
+        assert sell["5d"]["count"] == 1          # 末尾 NaN 不计入
+        assert sell["5d"]["hit_rate"] == 1.0
+        assert result["all"]["5d"]["count"] == 3
+        assert sum(b["count"] for b in result["buckets"].values()) == result["rows"] == 4
+
+
+class TestRunBacktest:
+    """从 SQLite 缓存载入并回测."""
+
+    def _cache(self, tmp_path, frames):
+        cache = SQLiteKlineCache(tmp_path / "cache.db")
+        for code, df in frames.items():
+            rows = df.assign(code=code, frequency="daily", source="sina", adjust="")
+            cache.upsert(rows)
+        return cache
+
+    def test_end_to_end(self, tmp_path):
+        rng = np.random.default_rng(1)
+        frames = {code: _klines(10 * np.exp(np.cumsum(rng.normal(0, 0.02, 150))))
+                  for code in ("600519", "000858", "300750")}
+        frames["000300"] = _klines(np.linspace(3000, 3500, 150))
+        frames["000001"] = _klines([10.0] * 10)   # 不足预热长度, 跳过
+        cache = self._cache(tmp_path, frames)
+
+        result = bt.run_backtest(["600519", "000858", "300750", "000001"], horizons=(1, 5),
+                                 index_code="000300", cache=cache)
+        assert result["codes"] == 3 and result["skipped_codes"] == 1
+        assert result["rows"] == 3 * (150 - bt.WARMUP + 1)
+        assert set(result["buckets"]) == set(bt.SIGNALS)
+        assert result["all"]["5d"]["count"] == 3 * (150 - bt.WARMUP + 1 - 5)
+        assert result["period"]["end"] == frames["600519"]["date"].iloc[-1]
+
+    def test_load_all_and_date_range(self, tmp_path):
+        frames = {"600519": _klines(np.linspace(10, 20, 40)), "000858": _klines(np.linspace(20, 10, 40))}
+        cache = self._cache(tmp_path, frames)
+        loaded = bt.load_klines(None, start="2024-01-10", cache=cache)
+        assert set(loaded) == {"600519", "000858"}
+        assert loaded["600519"]["date"].min() >= "2024-01-10"
+        assert bt.load_klines(["999999"], cache=cache) == {}
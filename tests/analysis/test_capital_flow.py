@@ -2,6 +2,7 @@
 
 import pytest
 import sys
+from dataclasses import asdict
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent.parent.parent / "mcp-server"))
@@ -15,7 +16,7 @@ class TestCapitalFlow:
     def test_volume_ratio_high(self, sample_quote_data):
         """测试高量比评分."""
         from data_sources.base import QuoteData
-        quote = QuoteData(**{**vars(sample_quote_data), "volume_ratio": 5.5})
+        quote = QuoteData(**{**asdict(sample_quote_data), "volume_ratio": 5.5})
         result = compute_capital(quote)
         
         assert isinstance(result, CapitalSignal)
@@ -25,7 +26,7 @@ class TestCapitalFlow:
     def test_volume_ratio_low(self, sample_quote_data):
         """测试低量比评分."""
         from data_sources.base import QuoteData
-        quote = QuoteData(**{**vars(sample_quote_data), "volume_ratio": 0.3})
+        quote = QuoteData(**{**asdict(sample_quote_data), "volume_ratio": 0.3})
         result = compute_capital(quote)
         
         assert result.score < 50  # 量比低应该扣分
@@ -34,7 +35,7 @@ class TestCapitalFlow:
     def test_turnover_rate_high(self, sample_quote_data):
         """测试高换手率评分."""
         from data_sources.base import QuoteData
-        quote = QuoteData(**{**vars(sample_quote_data), "turnover_rate": 16.0})
+        quote = QuoteData(**{**asdict(sample_quote_data), "turnover_rate": 16.0})
         result = compute_capital(quote)
         
         assert any("高度活跃" in s for s in result.signals)
@@ -42,7 +43,7 @@ class TestCapitalFlow:
     def test_turnover_rate_low(self, sample_quote_data):
         """测试低换手率评分."""
         from data_sources.base import QuoteData
-        quote = QuoteData(**{**vars(sample_quote_data), "turnover_rate": 0.5})
+        quote = QuoteData(**{**asdict(sample_quote_data), "turnover_rate": 0.5})
         result = compute_capital(quote)
         
         assert any("低迷" in s for s in result.signals)
@@ -95,7 +96,7 @@ class TestCapitalFlow:
     def test_price_volume_divergence_up(self, sample_quote_data):
         """测试量价背离 (上涨缩量)."""
         from data_sources.base import QuoteData
-        quote = QuoteData(**{**vars(sample_quote_data), "change_pct": 5.0, "volume_ratio": 0.5})
+        quote = QuoteData(**{**asdict(sample_quote_data), "change_pct": 5.0, "volume_ratio": 0.5})
         result = compute_capital(quote)
         
         assert any("量价背离" in s for s in result.signals)
@@ -103,7 +104,7 @@ class TestCapitalFlow:
     def test_price_volume_divergence_down(self, sample_quote_data):
         """测试量价背离 (下跌放量)."""
         from data_sources.base import QuoteData
-        quote = QuoteData(**{**vars(sample_quote_data), "change_pct": -5.0, "volume_ratio": 4.0})
+        quote = QuoteData(**{**asdict(sample_quote_data), "change_pct": -5.0, "volume_ratio": 4.0})
         result = compute_capital(quote)
         
         assert any("资金出逃" in s for s in result.signals)
@@ -111,7 +112,7 @@ class TestCapitalFlow:
     def test_momentum_penalty_high_gain(self, sample_quote_data):
         """测试动量惩罚 (大涨)."""
         from data_sources.base import QuoteData
-        quote = QuoteData(**{**vars(sample_quote_data), "change_pct": 9.8, "volume_ratio": 3.5})
+        quote = QuoteData(**{**asdict(sample_quote_data), "change_pct": 9.8, "volume_ratio": 3.5})
         result = compute_capital(quote)
         
         assert any("追高风险" in s for s in result.signals)
@@ -120,7 +121,7 @@ class TestCapitalFlow:
         """测试评分边界 (0-100)."""
         from data_sources.base import QuoteData
         # 极端情况：所有正面信号
-        quote = QuoteData(**{**vars(sample_quote_data), "volume_ratio": 6.0, "turnover_rate": 20.0})
+        quote = QuoteData(**{**asdict(sample_quote_data), "volume_ratio": 6.0, "turnover_rate": 20.0})
         result = compute_capital(quote)
         assert 0 <= result.score <= 100
     
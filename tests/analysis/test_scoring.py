@@ -7,6 +7,16 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent.parent / "mcp-server"))
 
 from analysis.scoring import compute_stock_score, _get_signal, _classify_industry
+from data_sources.industry_index import IndustryIndex, set_industry_index
+
+
+@pytest.fixture(autouse=True)
+def empty_industry_index(tmp_path):
+    """评分不读本机 ~/.openclaw 下的行业索引: 用 tmp_path 里的空索引."""
+    index = IndustryIndex(str(tmp_path / "industry_index.json"))
+    previous = set_industry_index(index)
+    yield index
+    set_industry_index(previous)
 
 
 class TestScoringEngine:
@@ -138,6 +148,25 @@ class TestScoringEngine:
         assert any("低估值" in s for s in score.fundamental["signals"])
 
 
+class TestIndustryIndexInjection:
+    """PE 分档的行业索引可注入, 评分结果不依赖本机索引文件."""
+
+    def test_injected_index(self, tmp_path, empty_industry_index):
+        import time
+        from data_sources.base import QuoteData
+
+        quote = QuoteData(code="002202", name="金风科技", price=28.0, change_pct=1.0, open=28.0, high=29.0,
+                          low=27.0, pre_close=27.7, volume=1e8, amount=1e9, pe=45.0)
+        index = IndustryIndex(str(tmp_path / "other.json"))
+        index._industries, index.updated_at = {"002202": "银行"}, time.time()
+
+        assert "银行" in compute_stock_score(quote, None, industry_index=index).fundamental["signals"][0]
+        assert _classify_industry("金风科技", "002202", index) == "银行"
+        # 缺省走共享索引 (此处为空索引), 回退到名称推断
+        assert "银行" not in compute_stock_score(quote, None).fundamental["signals"][0]
+        assert len(empty_industry_index) == 0
+
+
 class TestScoringBatch:
     """批量评分测试."""
     
@@ -0,0 +1,113 @@
+"""权重/阈值网格扫描测试."""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "mcp-server"))
+
+from analysis import sweep as sw
+from analysis.backtest import Panel
+
+
+def _panel(n=400, seed=0):
+    """技术面分数与 5 日收益正相关的合成面板, 前一半日期为样本内."""
+    rng = np.random.default_rng(seed)
+    tech = rng.uniform(0, 100, n)
+    cap = rng.uniform(20, 80, n)
+    fwd = (tech - 50) / 10 + rng.normal(0, 2, n)
+    fwd[-5:] = np.nan
+    dates = np.array([f"2024-{1 + i * 12 // n:02d}-{1 + i % 28:02d}" for i in range(n)], dtype=object)
+    return Panel(
+        codes=np.array(["600519"] * n, dtype=object), dates=dates,
+        change_pct=np.zeros(n), technical=tech, capital=cap, market=np.full(n, 50.0),
+        rsi=np.full(n, 50.0), forward={5: fwd},
+    )
+
+
+class TestGrid:
+    """网格生成."""
+
+    def test_product_and_invalid_thresholds(self):
+        points = sw.grid({"technical": [0.2, 0.4]}, {"buy": [60, 80]})
+        # buy=80 高于 strong_buy=78, 剔除
+        assert points == [({"technical": 0.2}, {"buy": 60}), ({"technical": 0.4}, {"buy": 60})]
+
+    def test_default_grid_is_large(self):
+        points = sw.default_grid()
+        assert len(points) > 1000
+        assert ({"technical": 0.25, "capital": 0.3, "market": 0.15},
+                {"strong_buy": 78.0, "buy": 63.0, "sell": 22.0}) in points
+
+
+class TestSplit:
+    """样本切分与统计."""
+
+    def test_embargo(self):
+        dates = np.array(["d01", "d02", "d03", "d04", "d05", "d06"], dtype=object)
+        ins, oos = sw.split_masks(dates, "d05", embargo=2)
+        assert ins.tolist() == [True, True, False, False, False, False]
+        assert oos.tolist() == [False, False, False, False, True, True]
+
+    def test_metrics(self):
+        bucket = np.array([0, 1, 5, 4, 2])
+        fwd = np.array([1.0, -1.0, -2.0, np.nan, 3.0])
+        m = sw.metrics(bucket, fwd, np.ones(5, dtype=bool))
+        assert m["buy_count"] == 2 and m["buy_mean"] == 0 and m["buy_hit"] == 0.5
+        assert m["sell_count"] == 1 and m["sell_hit"] == 1.0
+        assert m["spread"] == 2.0
+
+    def test_rank_requires_min_count(self):
+        results = [
+            {"out_of_sample": {"buy_count": 5, "sell_count": 5, "spread": 9.0}},
+            {"out_of_sample": {"buy_count": 50, "sell_count": 50, "spread": 1.0}},
+            {"out_of_sample": {"buy_count": 50, "sell_count": 50, "spread": None}},
+        ]
+        ranked = sw.rank(results, "spread", min_count=30)
+        assert [r["out_of_sample"]["spread"] for r in ranked] == [1.0, 9.0, None]
+
+
+class TestRunSweep:
+    """扫描执行."""
+
+    def test_ranks_informative_weight_first(self):
+        panel = _panel()
+        points = sw.grid({"technical": [0.0, 0.5], "capital": [0.5, 0.0]},
+                         {"strong_buy": [70], "buy": [60], "sell": [40], "hold": [45]})
+        result = sw.run_sweep(panel, points, split="2024-07-01", workers=1, min_count=5)
+        assert result["points"] == 4
+        best = result["top"][0]
+        assert best["weights"]["technical"] > 0
+        assert best["out_of_sample"]["spread"] > 0
+        assert result["rows"]["in_sample"] + result["rows"]["out_of_sample"] < len(panel)
+
+    def test_process_pool_matches_inline(self):
+        panel = _panel(seed=1)
+        points = sw.grid({"technical": [0.1, 0.3, 0.5, 0.7]}, {"buy": [55, 60, 65], "sell": [30, 40]})
+        inline = sw.run_sweep(panel, points, split="2024-07-01", workers=1, min_count=1, top=100)
+        sw.CHUNK, chunk = 4, sw.CHUNK
+        try:
+            pooled = sw.run_sweep(panel, points, split="2024-07-01", workers=2, min_count=1, top=100)
+        finally:
+            sw.CHUNK = chunk
+        assert pooled["top"] == inline["top"]
+
+    def test_shared_memory_released(self, monkeypatch):
+        created = []
+        share = sw._share
+
+        def _spy(*args):
+            shm, shape = share(*args)
+            created.append(shm.name)
+            return shm, shape
+
+        monkeypatch.setattr(sw, "_share", _spy)
+        sw.run_sweep(_panel(), sw.grid({"technical": [0.3]}), split="2024-07-01", workers=1)
+        with pytest.raises(FileNotFoundError):
+            sw.shared_memory.SharedMemory(name=created[0])
+
+    def test_bad_objective(self):
+        with pytest.raises(ValueError):
+            sw.run_sweep(_panel(), [], split="2024-07-01", objective="sharpe")
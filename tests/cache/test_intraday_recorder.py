@@ -0,0 +1,195 @@
+"""日内记录器测试."""
+
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "mcp-server"))
+
+from cache import intraday_recorder
+from cache.intraday_recorder import CN_TZ, IntradayRecorder, minutes_since, parse_minute, to_dicts
+from data_sources.base import QuoteData
+from data_sources.eastmoney_market import EastMoneyMarketData
+
+DAY = "20250102"
+
+
+def _bar(minute, price=10.0, amount=1e6):
+    return {"minute": minute, "price": price, "amount": amount, "avg_price": price, "volume": 100}
+
+
+class TestRecorder:
+    """追加写入与 memmap 读取"""
+
+    def test_append_skips_recorded_minutes(self, tmp_path):
+        rec = IntradayRecorder("bars", root=str(tmp_path))
+        assert rec.append("600519", [_bar(930), _bar(931)], DAY) == 2
+        assert rec.append("600519", [_bar(930), _bar(931), _bar(932)], DAY) == 1
+        assert rec.append("000858", [_bar(930)], DAY) == 1
+        assert rec.last_time("600519", DAY) == 932
+        assert (tmp_path / f"{DAY}.bars").stat().st_size == 4 * rec.dtype.itemsize
+
+        rows = to_dicts(rec.series("600519", DAY))
+        assert [r["minute"] for r in rows] == [930, 931, 932]
+        assert rows[0]["code"] == "600519" and rows[0]["amount"] == 1e6
+
+    def test_other_process_writes_and_torn_tail(self, tmp_path):
+        rec = IntradayRecorder("bars", root=str(tmp_path))
+        rec.append("600519", [_bar(930)], DAY)
+        other = IntradayRecorder("bars", root=str(tmp_path))
+        other.append("600519", [_bar(931)], DAY)
+        assert rec.last_time("600519", DAY) == 931  # 文件大小变化后重新扫描
+
+        with open(tmp_path / f"{DAY}.bars", "ab") as fh:
+            fh.write(b"\x00" * 5)  # 崩溃残留的半条记录
+        assert len(rec.read(DAY)) == 2
+        rec.append("600519", [_bar(932)], DAY)
+        assert [r["minute"] for r in to_dicts(rec.series("600519", DAY))] == [930, 931, 932]
+
+    def test_concurrent_writer_between_check_and_write(self, tmp_path):
+        """锁外判定后、持锁前另一进程写入: 锁内重新确认, 不重复写, 索引也包含对方写入的代码"""
+        rec = IntradayRecorder("bars", root=str(tmp_path))
+        other = IntradayRecorder("bars", root=str(tmp_path))
+        rec.append("600519", [_bar(930)], DAY)
+
+        real_last_time = rec.last_time
+        calls = []
+
+        def racing_last_time(code, day=None):
+            result = real_last_time(code, day)
+            calls.append(result)
+            if len(calls) == 1:
+                other.append("600519", [_bar(930), _bar(931)], DAY)
+                other.append("000858", [_bar(930)], DAY)
+            return result
+
+        rec.last_time = racing_last_time
+        assert rec.append("600519", [_bar(930), _bar(931), _bar(932)], DAY) == 1
+        assert calls == [930, 931]
+        rec.last_time = real_last_time
+        assert len(rec.read(DAY)) == 4
+        assert rec.append("000858", [_bar(930)], DAY) == 0
+        assert [r["minute"] for r in to_dicts(rec.series("600519", DAY))] == [930, 931, 932]
+
+    def test_splice_keeps_last_bar_open(self, tmp_path):
+        rec = IntradayRecorder("bars", root=str(tmp_path))
+        rec.append("600519", [_bar(930), _bar(931)], DAY)
+        now = datetime(2025, 1, 2, 9, 33, 20, tzinfo=CN_TZ)
+        merged = rec.splice("600519", [dict(_bar(932), day=DAY), dict(_bar(933, amount=5e5), day=DAY)], now)
+        assert [r["minute"] for r in merged] == [930, 931, 932, 933]
+        assert rec.last_time("600519", DAY) == 932  # 933 可能未收盘, 不落盘
+
+    def test_splice_records_close_bar_after_session(self, tmp_path):
+        rec = IntradayRecorder("bars", root=str(tmp_path))
+        rows = [dict(_bar(1459), day=DAY), dict(_bar(1500), day=DAY)]
+        rec.splice("600519", rows, datetime(2025, 1, 2, 15, 0, 30, tzinfo=CN_TZ))
+        assert rec.last_time("600519", DAY) == 1459  # 收盘竞价刚结束, 15:00 仍可能更新
+        rec.splice("600519", rows, datetime(2025, 1, 2, 15, 5, tzinfo=CN_TZ))
+        assert rec.last_time("600519", DAY) == 1500
+        rec.splice("000858", rows, datetime(2025, 1, 3, 9, 0, tzinfo=CN_TZ))
+        assert rec.last_time("000858", DAY) == 1500  # 历史交易日全部已收盘
+
+    def test_record_quotes(self, tmp_path):
+        rec = IntradayRecorder("quotes", root=str(tmp_path))
+        q = QuoteData(code="600519", name="贵州茅台", price=1500.5, change_pct=1.2, open=1490, high=1510,
+                      low=1488, pre_close=1482.7, volume=2e6, amount=3e9, volume_ratio=1.3,
+                      timestamp="20250102103000")
+        assert rec.record_quotes([q, QuoteData("000001", "x", 1, 0, 1, 1, 1, 1, 0, 0)]) == 1
+        row = to_dicts(rec.series("600519", DAY))[0]
+        assert row["ts"] == 103000 and row["price"] == pytest.approx(1500.5)
+
+
+class TestTHSBars:
+    """同花顺分时按接口返回的日期归档"""
+
+    @pytest.mark.parametrize("now, day, expected", [
+        (datetime(2025, 1, 2, 10, 0, 30, tzinfo=CN_TZ), "20250102", [958, 959]),   # 盘中: 末根未收盘
+        (datetime(2025, 1, 2, 15, 30, tzinfo=CN_TZ), "20250102", [958, 959, 1000]),
+        (datetime(2025, 1, 3, 10, 0, 30, tzinfo=CN_TZ), "20250102", [958, 959, 1000]),  # 节假日返回上一交易日
+    ])
+    def test_record_bars(self, tmp_path, monkeypatch, now, day, expected):
+        from data_sources.ths_market import THSMarketScanner
+
+        class Clock(datetime):
+            @classmethod
+            def now(cls, tz=None):
+                return now
+
+        rec = IntradayRecorder("bars", root=str(tmp_path))
+        monkeypatch.setattr(intraday_recorder, "get_recorder", lambda stream: rec)
+        monkeypatch.setattr(intraday_recorder, "datetime", Clock)
+        points = [{"time": t, "price": 10.0, "amount": 1e6, "avg_price": 10.0, "volume": 100}
+                  for t in ("0958", "0959", "1000")]
+        THSMarketScanner._record_bars("600519", points, day)
+        assert [r["minute"] for r in to_dicts(rec.series("600519", day))] == expected
+        assert not (tmp_path / f"{now:%Y%m%d}.bars").exists() or now.strftime("%Y%m%d") == day
+
+    def test_no_date_not_recorded(self, tmp_path, monkeypatch):
+        from data_sources.ths_market import THSMarketScanner
+
+        rec = IntradayRecorder("bars", root=str(tmp_path))
+        monkeypatch.setattr(intraday_recorder, "get_recorder", lambda stream: rec)
+        THSMarketScanner._record_bars("600519", [{"time": "0930", "price": 1.0}], "")
+        assert not list(tmp_path.iterdir())
+
+
+class TestTradingMinutes:
+    def test_minutes_since(self):
+        now = datetime(2025, 1, 2, 13, 5)
+        assert minutes_since(1125, now) == 10   # 午休不计
+        assert minutes_since(1300, now) == 5
+        assert parse_minute("2025-01-02 09:31") == parse_minute("0931") == 931
+
+
+class TestEastMoneyDelta:
+    """东财分钟资金流只拉增量"""
+
+    @pytest.mark.asyncio
+    async def test_second_call_fetches_delta(self, tmp_path, monkeypatch):
+        rec = IntradayRecorder("flow", root=str(tmp_path))
+        monkeypatch.setattr(intraday_recorder, "get_recorder", lambda stream: rec)
+        monkeypatch.setattr(intraday_recorder, "trading_day", lambda now=None: DAY)
+        monkeypatch.setattr(intraday_recorder, "minutes_since", lambda hhmm, now=None: 2)
+
+        full = [f"2025-01-02 09:{30 + i},{(i + 1) * 1e4},0,0,0,0" for i in range(6)]
+        calls = []
+
+        async def fake_fetch(code, lmt):
+            calls.append(lmt)
+            return {"data": {"name": "贵州茅台", "klines": full[-lmt:]}}
+
+        em = EastMoneyMarketData()
+        monkeypatch.setattr(em, "_fetch_minute_flow", fake_fetch)
+        first = await em.get_minute_flow("600519", lmt=120)
+        assert calls == [120]
+        assert rec.last_time("600519", DAY) == 935  # 历史交易日, 末根已收盘
+
+        full.append("2025-01-02 09:36,70000,0,0,0,0")
+        second = await em.get_minute_flow("600519", lmt=120)
+        assert calls == [120, 4]
+        assert second["data_points"] == first["data_points"] + 1 == 7
+        assert second["main_force"]["main_net_inflow_wan"] == 7.0
+        assert second["total_amount"] == round(sum(range(1, 8)) * 1e4 / 1e8, 2)
+
+    @pytest.mark.asyncio
+    async def test_gap_falls_back_to_full_fetch(self, tmp_path, monkeypatch):
+        rec = IntradayRecorder("flow", root=str(tmp_path))
+        rec.append("600519", [{"minute": 930, "main_net": 1.0}], DAY)
+        monkeypatch.setattr(intraday_recorder, "get_recorder", lambda stream: rec)
+        monkeypatch.setattr(intraday_recorder, "trading_day", lambda now=None: DAY)
+        monkeypatch.setattr(intraday_recorder, "minutes_since", lambda hhmm, now=None: 0)
+
+        full = [f"2025-01-02 09:{30 + i},1,0,0,0,0" for i in range(10)]
+        calls = []
+
+        async def fake_fetch(code, lmt):
+            calls.append(lmt)
+            return {"data": {"klines": full[-lmt:]}}
+
+        em = EastMoneyMarketData()
+        monkeypatch.setattr(em, "_fetch_minute_flow", fake_fetch)
+        result = await em.get_minute_flow("600519", lmt=120)
+        assert calls == [2, 120]
+        assert result["data_points"] == 10
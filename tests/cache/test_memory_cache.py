@@ -0,0 +1,116 @@
+"""内存缓存 (按字节淘汰) 测试."""
+
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "mcp-server"))
+
+from cache.memory_cache import MemoryCache, estimate_size
+from data_sources.base import QuoteData
+
+
+def _quote(code="600519", i=0):
+    # 解析出的行情每个字段都是新对象; 共享的常量对象只计一次
+    return QuoteData(code=code, name=f"股票{code}", price=1500.0 + i, change_pct=1.0 + i, open=1490.0 + i,
+                     high=1510.0 + i, low=1485.0 + i, pre_close=1485.0 + i, volume=1e6 + i, amount=1.5e9 + i)
+
+
+class TestEstimateSize:
+    """字节估算."""
+
+    def test_quote_list_scales_with_length(self):
+        one = estimate_size([_quote()])
+        many = estimate_size([_quote(str(600000 + i), i) for i in range(500)])
+        assert one > estimate_size(1.0) * 10
+        assert 300 * one < many < 700 * one
+
+    def test_dataframe_and_ndarray(self):
+        df = pd.DataFrame({"close": np.arange(10_000, dtype=float), "code": ["600519"] * 10_000})
+        assert estimate_size(df) > 80_000 + 10_000 * 50
+        assert estimate_size(np.zeros(1000)) >= 8000
+
+    def test_shared_and_cyclic_references(self):
+        item = "x" * 1000
+        shared = [item, item, item]
+        assert estimate_size(shared) < 2 * estimate_size(item)
+        cyclic = []
+        cyclic.append(cyclic)
+        assert estimate_size(cyclic) > 0
+
+
+class TestBudgets:
+    """配额与淘汰."""
+
+    def test_namespace_quota_evicts_own_lru(self):
+        cache = MemoryCache(quotas={"kline": 300}, sizer=lambda v: v)
+        cache.set("realtime:a", 500)
+        cache.set("kline:1", 100)
+        cache.set("kline:2", 100)
+        cache.get("kline:1")            # kline:2 变为最久未用
+        cache.set("kline:3", 150)
+        assert cache.get("kline:2") is None
+        assert cache.get("kline:1") == 100 and cache.get("kline:3") == 150
+        # 其他命名空间不受 kline 配额影响
+        assert cache.get("realtime:a") == 500
+        stats = cache.stats()
+        assert stats["namespaces"]["kline"] == {"entries": 2, "bytes": 250, "quota": 300}
+        assert stats["evictions"] == 1
+
+    def test_global_ceiling_evicts_oldest_across_namespaces(self):
+        cache = MemoryCache(max_bytes=1000, sizer=lambda v: v)
+        cache.set("news:old", 400)
+        time.sleep(0.001)
+        cache.set("kline:a", 400)
+        time.sleep(0.001)
+        cache.get("news:old")           # news:old 最近访问过
+        cache.set("realtime:b", 400)
+        assert cache.get("kline:a") is None
+        assert cache.stats()["bytes"] == 800
+
+    def test_oversized_value_rejected(self):
+        cache = MemoryCache(max_bytes=1000, quotas={"realtime": 100}, sizer=lambda v: v)
+        cache.set("realtime:x", 50)
+        cache.set("realtime:x", 200)    # 超出配额: 旧值也作废
+        cache.set("kline:y", 5000)
+        assert cache.get("realtime:x") is None and cache.get("kline:y") is None
+        assert cache.stats()["rejected"] == 2 and cache.stats()["bytes"] == 0
+
+    def test_entry_count_limit_and_ttl(self):
+        cache = MemoryCache(max_size=2, default_ttl=1)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.set("c", 3, ttl=1)
+        assert len(cache) == 2 and cache.get("a") is None
+        cache._index["c"].expires_at = time.time() - 1
+        assert cache.get("c") is None
+        assert cache.stats()["size"] == 1
+
+    def test_replace_and_clear_namespace(self):
+        cache = MemoryCache(sizer=lambda v: v)
+        cache.set("kline:a", 10)
+        cache.set("kline:a", 30)
+        cache.set("kline:b", 5, namespace="news")
+        assert cache.stats()["namespaces"]["kline"]["bytes"] == 30
+        cache.clear_namespace("kline")
+        assert cache.get("kline:a") is None and cache.get("kline:b") == 5
+        assert cache.stats()["bytes"] == 5
+
+
+class TestConfig:
+    """settings.yaml memory_cache."""
+
+    def test_from_config(self):
+        cache = MemoryCache.from_config({"max_entries": 10, "max_mb": 1, "quota_mb": {"kline": 0.5}}, default_ttl=5)
+        stats = cache.stats()
+        assert stats["max_size"] == 10 and stats["max_bytes"] == 1024 * 1024
+        cache.set("kline:x", pd.DataFrame({"v": np.zeros(100_000)}))   # ~800KB > 0.5MB 配额
+        assert cache.get("kline:x") is None
+
+    def test_defaults_from_settings(self):
+        stats = MemoryCache.from_config().stats()
+        assert stats["max_bytes"] and stats["max_size"] == 2000
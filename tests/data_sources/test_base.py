@@ -0,0 +1,136 @@
+"""数据源降级链路测试 (熔断状态持久化)."""
+
+import json
+import pytest
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "mcp-server"))
+
+from data_sources.base import FallbackChain, RealtimeSource, SourceHealth
+
+
+class _DeadSource(RealtimeSource):
+    name = "dead"
+
+    def __init__(self):
+        self.calls = 0
+
+    async def fetch_quotes(self, codes):
+        self.calls += 1
+        raise RuntimeError("connect timeout")
+
+
+class _OkSource(RealtimeSource):
+    name = "ok"
+
+    async def fetch_quotes(self, codes):
+        return ["quote"]
+
+
+def _chain(state_path):
+    chain = FallbackChain(state_key="realtime", state_path=str(state_path))
+    dead = _DeadSource()
+    chain.add_source(dead)
+    chain.add_source(_OkSource())
+    return chain, dead
+
+
+class TestFallbackChainPersistence:
+    """跨进程健康状态持久化测试."""
+
+    @pytest.mark.asyncio
+    async def test_open_circuit_survives_restart(self, tmp_path):
+        """熔断打开后, 新建的链路(模拟新进程)直接跳过故障源."""
+        state = tmp_path / "source_health.json"
+        chain, dead = _chain(state)
+        for _ in range(SourceHealth.CIRCUIT_FAIL_THRESHOLD):
+            assert await chain.fetch_quotes(["000001"]) == ["quote"]
+        assert dead.calls == SourceHealth.CIRCUIT_FAIL_THRESHOLD
+
+        fresh, fresh_dead = _chain(state)
+        assert fresh.health["dead"].circuit_open
+        assert await fresh.fetch_quotes(["000001"]) == ["quote"]
+        assert fresh_dead.calls == 0
+
+    @pytest.mark.asyncio
+    async def test_counts_accumulate_across_instances(self, tmp_path):
+        """两个实例各自写入时计数累加而不是互相覆盖."""
+        state = tmp_path / "source_health.json"
+        a, _ = _chain(state)
+        b, _ = _chain(state)
+        await a.fetch_quotes(["000001"])
+        await b.fetch_quotes(["000001"])
+        await a.flush()
+        await b.flush()
+
+        report = _chain(state)[0].health_report()
+        assert report["ok"]["success"] == 2
+        assert report["dead"]["fail"] == 2
+
+    @pytest.mark.asyncio
+    async def test_without_state_key_is_memory_only(self, tmp_path):
+        """未配置 state_key 时不落盘."""
+        chain = FallbackChain()
+        chain.add_source(_OkSource())
+        await chain.fetch_quotes(["000001"])
+        assert chain.health["ok"].success_count == 1
+        assert list(tmp_path.iterdir()) == []
+
+
+class TestHealthWrites:
+    """只有状态变化立即落盘, 成功计数批量写入."""
+
+    @pytest.mark.asyncio
+    async def test_success_is_batched(self, tmp_path):
+        state = tmp_path / "source_health.json"
+        chain = FallbackChain(state_key="realtime", state_path=str(state))
+        chain.add_source(_OkSource())
+        for _ in range(5):
+            await chain.fetch_quotes(["000001"])
+        assert not state.exists()
+        assert chain.health["ok"].success_count == 5
+        await chain.flush()
+        saved = json.loads(state.read_text())["realtime"]["ok"]
+        assert saved["success_count"] == 5 and saved["last_success"] > 0
+
+    @pytest.mark.asyncio
+    async def test_recovery_persisted_immediately(self, tmp_path):
+        state = tmp_path / "source_health.json"
+
+        class Flaky(RealtimeSource):
+            name = "flaky"
+            fail = True
+
+            async def fetch_quotes(self, codes):
+                if self.fail:
+                    raise ConnectionError("down")
+                return ["quote"]
+
+        chain = FallbackChain(state_key="realtime", state_path=str(state))
+        src = Flaky()
+        chain.add_source(src)
+        await chain.fetch_quotes(["000001"])
+        assert json.loads(state.read_text())["realtime"]["flaky"]["consecutive_failures"] == 1
+        src.fail = False
+        await chain.fetch_quotes(["000001"])
+        saved = json.loads(state.read_text())["realtime"]["flaky"]
+        assert saved["consecutive_failures"] == 0 and saved["success_count"] == 1
+
+    @pytest.mark.asyncio
+    async def test_flush_does_not_reset_remote_circuit(self, tmp_path):
+        """批量成功计数落盘时保留其他进程打开的熔断."""
+        state = tmp_path / "source_health.json"
+        chain = FallbackChain(state_key="realtime", state_path=str(state))
+        chain.add_source(_OkSource())
+        await chain.fetch_quotes(["000001"])
+        class DeadOk(_DeadSource):
+            name = "ok"
+
+        other = FallbackChain(state_key="realtime", state_path=str(state))
+        other.add_source(DeadOk())
+        for _ in range(SourceHealth.CIRCUIT_FAIL_THRESHOLD):
+            await other.fetch_quotes(["000001"])
+        await chain.flush()
+        assert chain.health["ok"].circuit_open
+        assert json.loads(state.read_text())["realtime"]["ok"]["success_count"] == 1
@@ -0,0 +1,73 @@
+"""个股新闻缓存与批量获取测试."""
+
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "mcp-server"))
+
+from data_sources.eastmoney_news import EastMoneyNewsFetcher, NewsItem
+
+
+@pytest.fixture
+def fetcher(tmp_path, monkeypatch):
+    monkeypatch.setattr("utils.cache.CACHE_DIR", str(tmp_path))
+    f = EastMoneyNewsFetcher()
+    f.calls = []
+    f.in_flight = 0
+    f.peak = 0
+
+    async def fake_search(code, name, limit):
+        f.calls.append(code)
+        f.in_flight += 1
+        f.peak = max(f.peak, f.in_flight)
+        await asyncio.sleep(0.01)
+        f.in_flight -= 1
+        if code == "000000":
+            return []
+        return [NewsItem(title=f"{name}业绩增长", time="2025-01-02", source="东方财富", sentiment=1.0,
+                         keywords=["+增长"])]
+
+    monkeypatch.setattr(f, "_search_stock_news", fake_search)
+    return f
+
+
+class TestStockNewsCache:
+    """cache_ttl.news 缓存"""
+
+    @pytest.mark.asyncio
+    async def test_second_call_hits_cache(self, fetcher):
+        first = await fetcher.get_stock_news("600519", "贵州茅台", limit=5)
+        second = await fetcher.get_stock_news("600519", "贵州茅台", limit=5)
+        assert fetcher.calls == ["600519"]
+        assert second == first
+        assert second[0].keywords == ["+增长"]
+
+    @pytest.mark.asyncio
+    async def test_empty_result_not_cached(self, fetcher):
+        await fetcher.get_stock_news("000000")
+        await fetcher.get_stock_news("000000")
+        assert fetcher.calls == ["000000", "000000"]
+
+    @pytest.mark.asyncio
+    async def test_bypass_cache(self, fetcher):
+        await fetcher.get_stock_news("600519", "贵州茅台")
+        await fetcher.get_stock_news("600519", "贵州茅台", use_cache=False)
+        assert fetcher.calls == ["600519", "600519"]
+
+
+class TestStockNewsBatch:
+    """批量并发"""
+
+    @pytest.mark.asyncio
+    async def test_bounded_concurrency(self, fetcher):
+        stocks = [(f"60{i:04d}", f"股票{i}") for i in range(12)]
+        result = await fetcher.get_stock_news_batch(stocks, limit=5, concurrency=3)
+        assert list(result) == [c for c, _ in stocks]
+        assert all(len(v) == 1 for v in result.values())
+        assert fetcher.peak == 3
+
+        await fetcher.get_stock_news_batch(stocks, limit=5)
+        assert len(fetcher.calls) == 12  # 第二轮全部命中缓存
@@ -0,0 +1,133 @@
+"""行业分类索引测试."""
+
+import sys
+import time
+from pathlib import Path
+
+import httpx
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "mcp-server"))
+
+from analysis.scoring import _classify_industry
+from data_sources import industry_index
+from data_sources.industry_index import IndustryIndex
+
+UNIVERSE = [{"f12": f"{i:06d}", "f100": "银行" if i % 2 else "化学制药"} for i in range(150)]
+UNIVERSE[7]["f100"] = "-"
+
+
+@pytest.fixture
+def http(monkeypatch):
+    """拦截 industry_index 内的 httpx 请求."""
+    calls = []
+    real_client = httpx.AsyncClient
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.path)
+        if request.url.path.endswith("/clist/get"):
+            page, size = int(request.url.params["pn"]), int(request.url.params["pz"])
+            return httpx.Response(200, json={"data": {"total": len(UNIVERSE),
+                                                      "diff": UNIVERSE[(page - 1) * size: page * size]}})
+        secids = request.url.params["secids"].split(",")
+        return httpx.Response(200, json={"data": {"diff": [
+            {"f12": s.split(".")[1], "f100": "半导体"} for s in secids if s.endswith("688981")]}})
+
+    monkeypatch.setattr(industry_index.httpx, "AsyncClient",
+                        lambda **kw: real_client(transport=httpx.MockTransport(handler), **kw))
+    return calls
+
+
+class TestIndustryIndex:
+    """刷新/持久化/补录"""
+
+    @pytest.mark.asyncio
+    async def test_refresh_persist_and_reload(self, tmp_path, http):
+        path = str(tmp_path / "industry.json")
+        index = IndustryIndex(path)
+        assert index.stale
+        assert await index.ensure_fresh()
+        assert len(index) == 149
+        assert index.get("000001") == "银行"
+        assert index.get("000007") == ""
+        assert not await index.ensure_fresh()          # 一周内不再刷新
+        assert http.count("/api/qt/clist/get") == 2
+
+        reloaded = IndustryIndex(path)
+        assert reloaded.lookup(["000002", "999999"]) == {"000002": "化学制药"}
+        assert not reloaded.stale
+
+    @pytest.mark.asyncio
+    async def test_add_missing_codes(self, tmp_path, http):
+        index = IndustryIndex(str(tmp_path / "industry.json"))
+        assert await index.add(["688981", "000001"]) == {"688981": "半导体"}
+        assert IndustryIndex(index.path).get("688981") == "半导体"
+        assert await index.add(["688981"]) == {}
+        assert len(http) == 1
+
+    @pytest.mark.asyncio
+    async def test_misses_cached_with_ttl(self, tmp_path, http, monkeypatch):
+        """查无行业的代码不再每次补查, 过期后再查"""
+        path = str(tmp_path / "industry.json")
+        assert await IndustryIndex(path).add(["000001"]) == {}
+        assert await IndustryIndex(path).add(["000001"]) == {}   # 其他进程 (cron) 读到落盘的 misses
+        assert len(http) == 1
+
+        later = time.time() + industry_index.MISS_SECONDS + 1
+        monkeypatch.setattr(industry_index.time, "time", lambda: later)
+        await IndustryIndex(path).add(["000001"])
+        assert len(http) == 2
+
+    @pytest.mark.asyncio
+    async def test_refresh_marks_dash_as_miss(self, tmp_path, http):
+        index = IndustryIndex(str(tmp_path / "industry.json"))
+        await index.refresh()
+        assert await index.add(["000007"]) == {}
+        assert "/api/qt/ulist.np/get" not in http
+
+    @pytest.mark.asyncio
+    async def test_background_refresh_does_not_block(self, tmp_path, monkeypatch):
+        import asyncio
+
+        index = IndustryIndex(str(tmp_path / "industry.json"))
+        started = asyncio.Event()
+
+        async def slow_refresh():
+            started.set()
+            await asyncio.sleep(10)
+
+        monkeypatch.setattr(index, "refresh", slow_refresh)
+        assert index.refresh_in_background()
+        assert not index.refresh_in_background()      # 已在刷新
+        assert index.lookup(["000001"]) == {}         # 照用现有索引
+        await asyncio.wait_for(started.wait(), 1)
+        index._refreshing.cancel()
+
+    @pytest.mark.asyncio
+    async def test_failed_refresh_backs_off(self, tmp_path, monkeypatch):
+        index = IndustryIndex(str(tmp_path / "industry.json"))
+        attempts = []
+
+        async def boom():
+            attempts.append(1)
+            raise httpx.ConnectError("offline")
+
+        monkeypatch.setattr(index, "refresh", boom)
+        assert not await index.ensure_fresh()
+        assert not await index.ensure_fresh()
+        assert len(attempts) == 1
+
+
+class TestScoringClassification:
+    """评分行业分组优先用真实行业"""
+
+    def test_index_overrides_name_guess(self, tmp_path, monkeypatch):
+        index = IndustryIndex(str(tmp_path / "industry.json"))
+        index._industries = {"600276": "化学制药", "002202": "风电设备", "600030": "证券"}
+        index.updated_at = time.time()
+        monkeypatch.setattr(industry_index, "_index", index)
+
+        assert _classify_industry("恒瑞医药", "600276") == "医药"
+        assert _classify_industry("金风科技", "002202") == "新能源"
+        assert _classify_industry("中信证券", "600030") == "default"
+        assert _classify_industry("贵州茅台", "600519") == "白酒"   # 索引缺失回退名称
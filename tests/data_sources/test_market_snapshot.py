@@ -0,0 +1,84 @@
+"""全市场快照扫描测试."""
+
+import sys
+from pathlib import Path
+
+import httpx
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "mcp-server"))
+
+from data_sources.market_snapshot import MarketSnapshotScanner, Screen
+
+
+def _row(i, chg=0.0, amount=1e8, vr=1.0, turnover=2.0, open_=10.0, pre=10.0):
+    return {"f12": f"{i:06d}", "f14": f"股票{i}", "f2": pre * (1 + chg / 100), "f3": chg, "f5": 1000,
+            "f6": amount, "f8": turnover, "f10": vr, "f15": 11, "f16": 9, "f17": open_, "f18": pre}
+
+
+def _universe():
+    rows = [_row(i) for i in range(250)]
+    rows[3] = _row(3, chg=9.98, amount=8e8)
+    rows[120] = _row(120, chg=6.5, vr=4.2, amount=2e8)
+    rows[201] = _row(201, chg=-7.1, open_=9.5)
+    rows[202] = _row(202, chg=120.0)                       # 新股首日
+    rows[203] = dict(_row(203), f2="-", f3="-", f6="-")     # 停牌
+    rows[240] = _row(240, turnover=22.0, open_=10.4)
+    return rows
+
+
+@pytest.fixture
+def scanner():
+    rows = _universe()
+    s = MarketSnapshotScanner(ttl=60)
+    s.pages = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        page, size = int(request.url.params["pn"]), int(request.url.params["pz"])
+        s.pages.append(page)
+        chunk = rows[(page - 1) * size: page * size]
+        return httpx.Response(200, json={"rc": 0, "data": {"total": len(rows), "diff": chunk}})
+
+    s._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return s
+
+
+class TestSnapshot:
+    """分页拉全 + 清洗"""
+
+    @pytest.mark.asyncio
+    async def test_full_universe_one_cycle(self, scanner):
+        df = await scanner.snapshot()
+        assert sorted(scanner.pages) == [1, 2, 3]
+        assert len(df) == 249                       # 剔除新股首日
+        assert df.loc[df.code == "000203", "price"].isna().all()
+        await scanner.snapshot()
+        await scanner.get_top("amount", 5)
+        assert len(scanner.pages) == 3              # ttl 内复用同一快照
+
+
+class TestScreens:
+    """向量化筛选"""
+
+    @pytest.mark.asyncio
+    async def test_scan_anomalies(self, scanner):
+        result = await scanner.scan_anomalies()
+        assert [s["code"] for s in result["big_gainers"]] == ["000003", "000120"]
+        assert [s["code"] for s in result["big_losers"]] == ["000201"]
+        assert [s["code"] for s in result["high_amount"]] == ["000003"]
+        assert [s["code"] for s in result["volume_surge"]] == ["000120"]
+        assert [s["code"] for s in result["high_turnover"]] == ["000240"]
+        assert [s["code"] for s in result["gap_up"]] == ["000240"]
+        assert [s["code"] for s in result["gap_down"]] == ["000201"]
+        assert result["stats"]["universe"] == 249
+        assert result["high_amount"][0]["amount_display"] == "8.0亿"
+
+    @pytest.mark.asyncio
+    async def test_custom_screen_and_missing_values(self, scanner):
+        hits, counts = await scanner.screen([
+            Screen("flat", lambda d: d["change_pct"] == 0, "amount", limit=3),
+        ])
+        assert counts["flat"] == 245
+        assert len(hits["flat"]) == 3
+        top = await scanner.get_top("change_pct", 1, ascending=True)
+        assert top[0]["code"] == "000201"
@@ -0,0 +1,143 @@
+"""新闻增量入库测试."""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "mcp-server"))
+
+from data_sources import multi_news
+from data_sources.multi_news import NewsItem, aggregate_news
+from data_sources.news_store import NewsStore, news_uid
+
+
+def _item(uid, title, t, sentiment=0.0):
+    return NewsItem(title=title, time=t, source="财联社", sentiment=sentiment, uid=uid)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return NewsStore(tmp_path / "news.db")
+
+
+class TestNewsStore:
+    """去重与高水位"""
+
+    def test_ingest_dedup_and_cursor(self, store):
+        items = [_item("1", "央行降准", "2025-01-02 09:00:00", 1.0),
+                 _item("2", "某公司减持", "2025-01-02 09:05:00", -1.0)]
+        assert store.ingest("cls", items) == 2
+        assert store.ingest("cls", items) == 0
+        assert store.cursor("cls") == "2025-01-02 09:05:00"
+
+        latest = store.latest("cls", 10)
+        assert [n.uid for n in latest] == ["2", "1"]
+        assert latest[0].sentiment == -1.0
+
+    def test_skipper(self, store):
+        store.ingest("cls", [_item("1", "a", "2025-01-02 09:00:00"), _item("2", "b", "2025-01-02 09:05:00")])
+        skip = store.skipper("cls")
+        assert skip("0", "2025-01-01 23:00:00")      # 早于高水位
+        assert skip("2", "2025-01-02 09:05:00")      # 已入库
+        assert not skip("3", "2025-01-02 09:05:00")  # 同一时刻的新条目
+        assert not skip("4", "")                     # 无时间只按 ID 判断
+        assert not store.skipper("jin10")("1", "2020-01-01 00:00:00")
+
+    def test_uid_fallback_hash(self):
+        assert news_uid(123, "x") == "123"
+        assert news_uid(None, "标题") == news_uid("", " 标题 ")
+        assert news_uid(None, "标题").startswith("h:")
+
+
+class TestIncrementalAggregate:
+    """轮询只评分新条目"""
+
+    @pytest.mark.asyncio
+    async def test_second_poll_scores_nothing(self, store, monkeypatch):
+        feed = [("1", "央行宣布降准 释放流动性", "2025-01-02 09:00:00"),
+                ("2", "特朗普宣布加征关税", "2025-01-02 09:01:00")]
+        scored = []
+
+        async def fake_fetch(self, limit=30, skip=None):
+            out = []
+            for uid, title, t in feed:
+                if skip and skip(uid, t):
+                    continue
+                sentiment, kw = multi_news.score_sentiment(title)
+                scored.append(uid)
+                out.append(NewsItem(title=title, time=t, source="财联社", sentiment=sentiment,
+                                    keywords=kw, uid=uid))
+            return out
+
+        async def empty_fetch(self, limit=30, skip=None):
+            return []
+
+        monkeypatch.setattr(multi_news.CailiansheSource, "fetch", fake_fetch)
+        for cls in (multi_news.Jin10Source, multi_news.EastMoneySource,
+                    multi_news.SinaLiveSource, multi_news.WallStreetCNSource):
+            monkeypatch.setattr(cls, "fetch", empty_fetch)
+
+        first = await aggregate_news(20, store=store)
+        assert scored == ["1", "2"]
+        assert first["sources"]["cls"] == {"status": "ok", "new": 2, "count": 2}
+
+        second = await aggregate_news(20, store=store)
+        assert scored == ["1", "2"]
+        assert second["sources"]["cls"]["new"] == 0
+        assert second["total_news"] == first["total_news"] == 2
+        assert second["score"] == first["score"]
+        # VIP 加权在入库时完成
+        assert second["critical_news"][0]["title"] == "特朗普宣布加征关税"
+
+
+class SlowStore(NewsStore):
+    """每次开 SQLite 连接阻塞 50ms, 模拟大库/磁盘慢."""
+
+    def _conn(self):
+        import time
+        time.sleep(0.05)
+        return super()._conn()
+
+
+async def max_loop_stall(coro):
+    """运行 coro, 同时测量事件循环最长一次无响应的时间."""
+    import asyncio
+    import time
+    gaps = []
+    done = asyncio.Event()
+
+    async def tick():
+        last = time.perf_counter()
+        while not done.is_set():
+            await asyncio.sleep(0.005)
+            now = time.perf_counter()
+            gaps.append(now - last)
+            last = now
+
+    ticker = asyncio.create_task(tick())
+    try:
+        result = await coro
+    finally:
+        done.set()
+        await ticker
+    return result, max(gaps)
+
+
+class TestStoreOffLoop:
+    """库操作在线程里执行, 不阻塞事件循环"""
+
+    @pytest.mark.asyncio
+    async def test_aggregate_does_not_block_loop(self, tmp_path, monkeypatch):
+        store = SlowStore(tmp_path / "news.db")
+
+        async def fetch(self, limit=30, skip=None):
+            return [_item(f"{type(self).__name__}-1", "央行宣布降准", "2025-01-02 09:00:00")]
+
+        for cls in (multi_news.CailiansheSource, multi_news.Jin10Source, multi_news.EastMoneySource,
+                    multi_news.SinaLiveSource, multi_news.WallStreetCNSource):
+            monkeypatch.setattr(cls, "fetch", fetch)
+
+        result, stall = await max_loop_stall(aggregate_news(20, store=store))
+        assert result["sources"]["cls"]["new"] == 1
+        assert stall < 0.04
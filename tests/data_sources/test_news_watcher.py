@@ -0,0 +1,192 @@
+"""新闻监听推送测试."""
+
+import asyncio
+import contextlib
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "mcp-server"))
+
+from data_sources.multi_news import NewsItem
+from data_sources.news_store import NewsStore
+from data_sources.news_watcher import NewsWatcher
+
+
+class FakeSource:
+    """按 feed 返回条目, 遵守 skip 回调; 与真实源一样默认吞掉异常, raise_errors 时抛出."""
+
+    def __init__(self, feed=None, fail=False):
+        self.feed = feed or []
+        self.fail = fail
+        self.polls = 0
+
+    async def fetch(self, limit=30, skip=None, raise_errors=False):
+        self.polls += 1
+        if self.fail:
+            if raise_errors:
+                raise RuntimeError("boom")
+            return []
+        out = []
+        for uid, title, t, importance in self.feed:
+            if skip and skip(uid, t):
+                continue
+            out.append(NewsItem(title=title, time=t, source="财联社", importance=importance, uid=uid))
+        return out
+
+
+@pytest.fixture
+def store(tmp_path):
+    return NewsStore(tmp_path / "news.db")
+
+
+class TestPollOnce:
+    """单轮轮询"""
+
+    @pytest.mark.asyncio
+    async def test_emits_only_new_items_critical_first(self, store):
+        src = FakeSource([("1", "某公司发布公告", "2025-01-02 09:00:00", 0),
+                          ("2", "央行宣布降准", "2025-01-02 09:01:00", 2)])
+        watcher = NewsWatcher(sources=[("cls", src)], store=store)
+        got = []
+        watcher.on_news(lambda name, item: got.append((name, item.uid)))
+
+        await watcher.poll_once("cls", src)
+        assert got == [("cls", "2"), ("cls", "1")]
+
+        src.feed.append(("3", "特朗普宣布加征关税", "2025-01-02 09:02:00", 0))
+        new = await watcher.poll_once("cls", src)
+        assert [n.uid for n in new] == ["3"]
+        assert new[0].importance == 2  # VIP 加权
+        assert [uid for _, uid in got] == ["2", "1", "3"]
+
+    @pytest.mark.asyncio
+    async def test_min_importance_and_async_callback(self, store):
+        src = FakeSource([("1", "普通消息", "2025-01-02 09:00:00", 0),
+                          ("2", "央行宣布降准", "2025-01-02 09:01:00", 2)])
+        watcher = NewsWatcher(sources=[("cls", src)], store=store, min_importance=2)
+        got = []
+
+        @watcher.on_news
+        async def collect(name, item):
+            got.append(item.uid)
+
+        await watcher.poll_once("cls", src)
+        assert got == ["2"]
+        assert store.cursor("cls") == "2025-01-02 09:01:00"  # 低重要度条目照样入库
+
+
+class TestStreaming:
+    """后台任务 + async 迭代器"""
+
+    @pytest.mark.asyncio
+    async def test_stream_receives_pushed_items(self, store):
+        src = FakeSource([("1", "央行宣布降准", "2025-01-02 09:00:00", 2)])
+        broken = FakeSource(fail=True)
+        watcher = NewsWatcher(sources=[("cls", src), ("jin10", broken)], store=store,
+                              min_interval=0.01, initial_interval=0.02, max_interval=0.05)
+
+        async def first_item():
+            async with contextlib.aclosing(aiter(watcher)) as stream:
+                async for name, item in stream:
+                    return name, item.uid
+
+        reader = asyncio.create_task(first_item())
+        await asyncio.sleep(0)
+        watcher.start()
+        assert await asyncio.wait_for(reader, 1) == ("cls", "1")
+        assert watcher.running
+
+        await asyncio.sleep(0.1)
+        await watcher.stop()
+        assert not watcher.running
+        status = watcher.status()
+        assert status["cls"]["new_items"] == 1
+        assert src.polls > 1
+        assert status["jin10"]["errors"] == broken.polls
+        assert not watcher._subscribers
+
+
+class TestSourceFailures:
+    """真实源请求失败时计入 errors 并退避"""
+
+    @pytest.mark.asyncio
+    async def test_failing_source_backs_off(self, store, monkeypatch):
+        import httpx
+
+        from data_sources import multi_news
+
+        class DownClient:
+            def __init__(self, *args, **kwargs):
+                pass
+
+            async def __aenter__(self):
+                return self
+
+            async def __aexit__(self, *exc):
+                return False
+
+            async def get(self, *args, **kwargs):
+                raise httpx.ConnectError("connection refused")
+
+        monkeypatch.setattr(multi_news.httpx, "AsyncClient", DownClient)
+        src = multi_news.CailiansheSource()
+        assert await src.fetch() == []  # 聚合接口照旧降级为空
+        with pytest.raises(httpx.ConnectError):
+            await src.fetch(raise_errors=True)
+
+        watcher = NewsWatcher(sources=[("cls", src)], store=store,
+                              min_interval=0.01, initial_interval=0.01, max_interval=10)
+        watcher.start()
+        await asyncio.sleep(0.05)
+        await watcher.stop()
+        status = watcher.status()["cls"]
+        assert status["errors"] == status["polls"] >= 1
+        assert watcher.state["cls"].interval >= 0.02  # ×2 退避
+
+
+class TestAdaptiveInterval:
+    """自适应轮询间隔"""
+
+    def test_adapt(self, store):
+        watcher = NewsWatcher(sources=[("cls", FakeSource())], store=store,
+                              min_interval=5, max_interval=120, initial_interval=20)
+        st = watcher.state["cls"]
+        watcher._adapt(st, 3, False)
+        assert st.interval == 10
+        watcher._adapt(st, 1, False)
+        watcher._adapt(st, 1, False)
+        assert st.interval == 5
+        watcher._adapt(st, 0, False)
+        assert st.interval == 7.5
+        watcher._adapt(st, 0, True)
+        assert st.interval == 15
+        for _ in range(10):
+            watcher._adapt(st, 0, True)
+        assert st.interval == 120
+
+
+class TestStoreOffLoop:
+    """poll_once 的库操作在线程里执行"""
+
+    @pytest.mark.asyncio
+    async def test_poll_does_not_block_loop(self, tmp_path):
+        import time
+
+        class SlowStore(NewsStore):
+            def _conn(self):
+                time.sleep(0.05)  # 模拟大库/磁盘慢
+                return super()._conn()
+
+        store = SlowStore(tmp_path / "news.db")
+        src = FakeSource([("1", "央行宣布降准", "2025-01-02 09:00:00", 2)])
+        watcher = NewsWatcher(sources=[("cls", src)], store=store)
+        poll = asyncio.create_task(watcher.poll_once("cls", src))
+        gaps, last = [], time.perf_counter()
+        while not poll.done():
+            await asyncio.sleep(0.005)
+            gaps.append(time.perf_counter() - last)
+            last = time.perf_counter()
+        assert [n.uid for n in poll.result()] == ["1"]
+        assert len(gaps) > 5 and max(gaps) < 0.04
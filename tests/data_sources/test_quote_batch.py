@@ -0,0 +1,111 @@
+"""列式行情批 (QuoteBatch) 测试."""
+
+import dataclasses
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "mcp-server"))
+
+from data_sources.base import QuoteData
+from data_sources.quote_batch import FIELDS, QuoteBatch, QuoteRow
+
+
+def _quotes(n=5):
+    return [QuoteData(code=f"{600000 + i}", name=f"股票{i}", price=10.0 + i, change_pct=i - 2.0, open=10.0,
+                      high=11.0 + i, low=9.5, pre_close=10.0, volume=1e6 * (i + 1), amount=1e8 * (i + 1),
+                      volume_ratio=0.5 * i, timestamp="20250102150000", source="tencent")
+            for i in range(n)]
+
+
+class TestQuoteData:
+    """QuoteData 使用 __slots__."""
+
+    def test_slotted(self):
+        q = _quotes(1)[0]
+        assert not hasattr(q, "__dict__")
+        with pytest.raises(AttributeError):
+            q.extra = 1
+        assert dataclasses.replace(q, price=12.0).price == 12.0
+
+
+class TestQuoteBatch:
+    """列式存储与行视图."""
+
+    def test_round_trip(self):
+        quotes = _quotes()
+        batch = QuoteBatch.from_quotes(quotes + [None])
+        assert len(batch) == 5
+        assert batch["price"].dtype == np.float64
+        assert batch.to_quotes() == quotes
+        assert batch[-1].to_quote() == quotes[-1]
+
+    def test_row_view_matches_quote(self):
+        quotes = _quotes()
+        row = QuoteBatch.from_quotes(quotes).get("600003")
+        assert isinstance(row, QuoteRow)
+        for f in FIELDS:
+            assert getattr(row, f) == getattr(quotes[3], f)
+        assert type(row.price) is float
+        json.dumps({"price": row.price, "name": row.name})
+        with pytest.raises(AttributeError):
+            row.price = 1.0
+        assert QuoteBatch.from_quotes(quotes).get("000000") is None
+
+    def test_take_with_mask(self):
+        batch = QuoteBatch.from_quotes(_quotes())
+        hot = batch.take(batch["volume_ratio"] > 1.0)
+        assert hot.codes == ["600003", "600004"]
+        assert [q.code for q in hot] == hot.codes
+        assert batch.take([4, 0]).codes == ["600004", "600000"]
+
+    def test_from_frame(self):
+        df = pd.DataFrame({"code": ["600519", "000001"], "name": ["贵州茅台", None],
+                           "price": [1500.0, np.nan], "change_pct": [1.2, 0.0]})
+        batch = QuoteBatch.from_frame(df, source="em_snapshot")
+        assert batch.get("000001").price == 0.0 and batch.get("000001").name == ""
+        assert batch[0].source == "em_snapshot" and batch[0].pe == 0.0
+
+    def test_smaller_than_object_list(self):
+        from cache.memory_cache import estimate_size
+        # 解析出的行情每个数值字段都是独立的 float 对象
+        quotes = [QuoteData(f"{i:06d}", f"股票{i}", *(float(i * 17 + k) for k in range(8)),
+                            *(float(i * 17 + k) for k in range(8, 15)), timestamp="20250102150000",
+                            source="tencent", outer_vol=i + 0.5, inner_vol=i + 0.25) for i in range(1000)]
+        batch = QuoteBatch.from_quotes(quotes)
+        assert estimate_size(batch) < estimate_size(quotes) * 0.7
+
+    def test_columns_must_align(self):
+        with pytest.raises(ValueError):
+            QuoteBatch({"code": ["a", "b"], "price": [1.0]})
+
+
+class TestDataManagerBatch:
+    """DataManager 行情以 QuoteBatch 形式缓存."""
+
+    @pytest.mark.asyncio
+    async def test_cached_as_batch(self):
+        from data_sources.base import FallbackChain, RealtimeSource
+        from data_sources.manager import DataManager
+
+        calls = []
+
+        class Fake(RealtimeSource):
+            name = "fake"
+
+            async def fetch_quotes(self, codes):
+                calls.append(codes)
+                return [q for q in _quotes() if q.code in codes]
+
+        dm = DataManager()
+        dm._realtime_chain = FallbackChain()
+        dm._realtime_chain.add_source(Fake())
+        codes = ["600001", "600002"]
+        batch = await dm.get_quote_batch(codes)
+        assert isinstance(batch, QuoteBatch) and batch.codes == codes
+        quotes = await dm.get_realtime_quotes(codes)
+        assert all(isinstance(q, QuoteData) for q in quotes) and len(calls) == 1
@@ -0,0 +1,82 @@
+"""同花顺涨跌停池分页测试."""
+
+import asyncio
+import sys
+from pathlib import Path
+
+import httpx
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "mcp-server"))
+
+from data_sources.ths_market import THSMarketScanner
+
+POOL_SIZES = {"limit_up_pool": 230, "lower_limit_pool": 12, "fried_plate_pool": 0}
+
+
+def _scanner(sizes=POOL_SIZES, fail_pages=()):
+    scanner = THSMarketScanner()
+    scanner.requests = []
+    scanner.in_flight = scanner.peak = 0
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        pool = request.url.path.rsplit("/", 1)[-1]
+        page = int(request.url.params["page"])
+        limit = int(request.url.params["limit"])
+        scanner.requests.append((pool, page))
+        scanner.in_flight += 1
+        scanner.peak = max(scanner.peak, scanner.in_flight)
+        await asyncio.sleep(0.01)
+        scanner.in_flight -= 1
+        if (pool, page) in fail_pages:
+            return httpx.Response(502)
+        total = sizes[pool]
+        start = (page - 1) * limit
+        info = [{"code": f"{i:06d}", "name": f"股票{i}", "change_tag": "FIRST_LIMIT" if i % 2 else "",
+                 "is_again_limit": int(i % 5 == 0)} for i in range(start, min(total, start + limit))]
+        return httpx.Response(200, json={"status_code": 0, "data": {
+            "info": info, "page": {"page": page, "limit": limit, "total": total}}})
+
+    scanner._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return scanner
+
+
+class TestLimitPoolPagination:
+    """分页拉全 + 并发"""
+
+    @pytest.mark.asyncio
+    async def test_fetches_all_pages(self):
+        scanner = _scanner()
+        pool = await scanner.get_limit_up_pool()
+        assert pool["total"] == 230
+        assert pool["count"] == 230
+        assert len({s["code"] for s in pool["stocks"]}) == 230
+        assert sorted(p for _, p in scanner.requests) == [1, 2, 3]
+        assert scanner.peak == 2  # 第 2、3 页并发
+
+        # 第二次按上次页数直接并发预取, 一个往返拿全
+        scanner.requests.clear()
+        scanner.peak = 0
+        pool = await scanner.get_limit_up_pool()
+        assert pool["count"] == 230
+        assert scanner.peak == 3
+
+    @pytest.mark.asyncio
+    async def test_single_page_when_requested(self):
+        scanner = _scanner()
+        pool = await scanner.get_limit_up_pool(page=2)
+        assert scanner.requests == [("limit_up_pool", 2)]
+        assert pool["count"] == 100
+        assert pool["stocks"][0]["code"] == "000100"
+
+    @pytest.mark.asyncio
+    async def test_three_pools_in_parallel(self):
+        scanner = _scanner(fail_pages={("limit_up_pool", 3), ("lower_limit_pool", 1)})
+        pools = await scanner.get_limit_pools()
+        assert set(pools) == {"limit_up", "limit_down", "fried_plate"}
+        assert pools["limit_up"]["count"] == 200
+        assert pools["limit_up"]["missing_pages"] == [3]
+        assert "error" in pools["limit_down"]
+        assert pools["fried_plate"] == {"pool_type": "fried_plate", "total": 0, "count": 0, "stocks": []}
+        # 三个池的第 1 页同时在途
+        assert scanner.peak >= 3
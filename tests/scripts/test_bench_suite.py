@@ -0,0 +1,96 @@
+"""基准测试套件 (scripts/bench_suite.py) 测试."""
+
+import asyncio
+import importlib.util
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "mcp-server"))
+
+BENCH_PATH = Path(__file__).parent.parent.parent / "mcp-server" / "scripts" / "bench_suite.py"
+
+
+def _load_bench():
+    spec = importlib.util.spec_from_file_location("bench_suite", BENCH_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+bench = _load_bench()
+
+
+def _stats(p50, peak=100.0):
+    return {"p50_ms": p50, "p95_ms": p50, "min_ms": p50, "peak_kib": peak, "blocks": 1, "repeat": 3}
+
+
+class TestStats:
+    """分位数与计时."""
+
+    def test_percentile(self):
+        assert bench.percentile([1, 2, 3, 4, 5], 50) == 3
+        assert bench.percentile([10, 20], 95) == pytest.approx(19.5)
+        assert bench.percentile([7], 95) == 7
+
+    def test_measure_sync_and_async(self):
+        loop = asyncio.new_event_loop()
+        calls = []
+
+        async def coro():
+            calls.append("async")
+            return [0] * 10_000
+
+        try:
+            sync = bench.measure(lambda: calls.append("sync") or [0] * 10_000, loop, repeat=3)
+            asynchronous = bench.measure(coro, loop, repeat=3)
+        finally:
+            loop.close()
+        # 预热 1 + 计时 3 + 内存 1
+        assert calls.count("sync") == calls.count("async") == 5
+        for result in (sync, asynchronous):
+            assert result["p95_ms"] >= result["p50_ms"] >= result["min_ms"] >= 0
+            assert result["peak_kib"] >= 70   # 10k 个指针
+            assert result["blocks"] > 0
+
+
+class TestCompare:
+    """基线对比."""
+
+    def test_flags_slowdown_and_memory(self):
+        baseline = {"a": {"10": _stats(10.0), "100": _stats(100.0, peak=1000.0)}}
+        results = {"a": {"10": _stats(11.0), "100": _stats(130.0, peak=2000.0)}}
+        regressions = bench.compare(results, baseline, threshold=0.2)
+        assert [(r["size"], r["metric"]) for r in regressions] == [(100, "p50_ms"), (100, "peak_kib")]
+        assert regressions[0]["ratio"] == 1.3
+
+    def test_noise_floor_and_missing(self):
+        baseline = {"a": {"10": _stats(0.1)}, "b": {"10": {"skipped": "no mcp"}}}
+        results = {"a": {"10": _stats(0.5)}, "b": {"10": _stats(5.0)}, "c": {"10": _stats(5.0)}}
+        # 0.1ms → 0.5ms 低于噪声下限; 基线跳过/缺失的用例不比较
+        assert bench.compare(results, baseline) == []
+
+
+class TestCases:
+    """用例在临时工作区内可运行."""
+
+    def test_fixture_quote_parses(self):
+        from data_sources.tencent import _parse_tencent_parts
+        quote = _parse_tencent_parts(bench.tencent_line("600000").split('"')[1].split("~"))
+        assert quote.code == "600000" and quote.price > 0
+
+    def test_small_suite(self):
+        home = os.environ.get("HOME")
+        with bench.Sandbox(6) as sb:
+            results = bench.run_suite(
+                sb, ["compute_technical", "compute_stock_score", "sqlite_read", "sqlite_write", "normalize_kline",
+                     "news_aggregate"],
+                [2, 6], repeat=1)
+            read = bench.CASES["sqlite_read"](sb, 2)()
+        assert os.environ.get("HOME") == home
+        assert all(len(df) > 40 for df in read)
+        for per_size in results.values():
+            assert set(per_size) == {"2", "6"}
+            assert all(stats["p50_ms"] > 0 for stats in per_size.values())
@@ -0,0 +1,247 @@
+"""quant.py CLI 测试 (daemon 模式, 启动耗时)."""
+
+import asyncio
+import importlib.util
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "mcp-server"))
+
+QUANT_PATH = Path(__file__).parent.parent.parent / "skills" / "trading-quant" / "scripts" / "quant.py"
+
+
+def _load_quant():
+    spec = importlib.util.spec_from_file_location("quant_cli", QUANT_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+# 单次 cron 调用的导入预算 (秒), 远低于 1s 启动目标
+IMPORT_BUDGET_S = 0.5
+
+# 轻量工具实际加载的模块 (参见 run_tool 各分支)
+_LIGHT_TOOL_IMPORTS = """
+import importlib.util, sys
+spec = importlib.util.spec_from_file_location("quant_cli", {path!r})
+m = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(m)
+from data_sources.eastmoney_northbound import NorthboundFlowSource
+from data_sources.ths_market import THSMarketScanner
+from analysis.scoring import compute_stock_score
+print("pandas" in sys.modules, "pandas_ta" in sys.modules)
+"""
+
+
+def _importtime(code: str) -> tuple[float, str, str]:
+    """python -X importtime 运行, 返回 (顶层模块累计导入秒数, stdout, stderr)."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True, text=True, timeout=60,
+    )
+    assert proc.returncode == 0, proc.stderr[-500:]
+    total_us = 0
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if not name[1:].startswith(" "):  # 只累计顶层导入, 子模块已含在其中
+            total_us += int(cumulative)
+    return total_us / 1e6, proc.stdout, proc.stderr
+
+
+@pytest.fixture
+def quant():
+    return _load_quant()
+
+
+class TestDaemon:
+    """daemon 调用与回退"""
+
+    @pytest.mark.asyncio
+    async def test_no_daemon_returns_none(self, quant, tmp_path):
+        """socket 不存在时回退进程内执行"""
+        assert await quant._call_daemon("ping", [], str(tmp_path / "none.sock")) is None
+
+    @pytest.mark.asyncio
+    async def test_no_daemon_env(self, quant, tmp_path, monkeypatch):
+        """QUANT_NO_DAEMON 强制进程内执行"""
+        sock = tmp_path / "stale.sock"
+        sock.touch()
+        monkeypatch.setenv("QUANT_NO_DAEMON", "1")
+        assert await quant._call_daemon("ping", [], str(sock)) is None
+
+    @pytest.mark.asyncio
+    async def test_round_trip(self, quant, tmp_path):
+        """daemon 在线时工具调用经 socket 返回结果"""
+        sock = str(tmp_path / "q.sock")
+        server = asyncio.create_task(quant.serve_daemon(sock))
+        for _ in range(50):
+            if Path(sock).exists():
+                break
+            await asyncio.sleep(0.02)
+        try:
+            pong = await quant._call_daemon("ping", [], sock)
+            assert pong["result"]["pong"] is True
+
+            resp = await quant._call_daemon("nosuchtool", [], sock)
+            assert resp["result"]["error"] == "Unknown tool: nosuchtool"
+        finally:
+            server.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await server
+        assert not Path(sock).exists()
+
+
+    @pytest.mark.asyncio
+    async def test_stalled_daemon_falls_back(self, quant, tmp_path, monkeypatch):
+        """daemon 接受连接但不回复: 超过工具超时 + 余量后返回 None, 由调用方进程内执行"""
+        import time
+        sock = str(tmp_path / "stalled.sock")
+        stalled = []
+
+        async def never_reply(reader, writer):
+            stalled.append(writer)  # 保持连接, 不回复
+            await reader.readline()
+
+        server = await asyncio.start_unix_server(never_reply, path=sock)
+        monkeypatch.setattr(quant, "DAEMON_REPLY_MARGIN", 0.1)
+        monkeypatch.setattr(quant, "PING_TIMEOUT", 0.1)
+        monkeypatch.setattr(quant.registry, "timeout_for", lambda name: 0.1)
+        try:
+            t0 = time.perf_counter()
+            assert await quant._call_daemon("stock_analysis", ["600519"], sock) is None
+            assert await quant._call_daemon("ping", [], sock) is None
+            assert time.perf_counter() - t0 < 1
+            assert quant._reply_timeout("nosuchtool") == quant.get_tool_timeout("default") + 0.1
+        finally:
+            for writer in stalled:
+                writer.close()
+            server.close()
+            await server.wait_closed()
+
+    def test_unlimited_tools_wait_for_reply(self, quant):
+        assert quant._reply_timeout("warm_klines") is None
+        assert quant._reply_timeout("stock_analysis") == 30 + quant.DAEMON_REPLY_MARGIN
+
+    @pytest.mark.asyncio
+    async def test_slow_kline_read_does_not_stall_other_clients(self, quant, tmp_path, monkeypatch):
+        """日K读取 (同步 SQLite/预热) 在线程中执行, 期间其他客户端照常得到响应"""
+        import time
+        from data_sources.base import QuoteData
+        from data_sources.capital_flow_manager import CapitalFlowManager
+        from data_sources.eastmoney_market import EastMoneyMarketData
+        from data_sources.eastmoney_news import EastMoneyNewsFetcher
+        from data_sources.tencent import TencentRealtimeSource
+
+        class Stub:
+            async def fetch_quotes(self, codes):
+                return [QuoteData(c, "x", 10, 1, 10, 10, 10, 10, 1e6, 1e7) for c in codes]
+
+            async def get_market_sentiment(self):
+                return None
+
+            async def get_stock_news_batch(self, stocks, limit=5):
+                return {}
+
+        class SlowDM:
+            def get_daily_klines(self, code):
+                time.sleep(0.6)
+                return None
+
+            async def close(self):
+                pass
+
+        for cls in (TencentRealtimeSource, EastMoneyMarketData, EastMoneyNewsFetcher, CapitalFlowManager):
+            quant._shared[cls] = Stub()
+        monkeypatch.setattr(quant, "_dm", SlowDM())
+        monkeypatch.setattr(quant, "_record_quotes", lambda quotes: None)
+
+        sock = str(tmp_path / "q.sock")
+        server = asyncio.create_task(quant.serve_daemon(sock))
+        for _ in range(50):
+            if Path(sock).exists():
+                break
+            await asyncio.sleep(0.02)
+        try:
+            slow = asyncio.create_task(quant._call_daemon("stock_analysis", ["600519"], sock))
+            await asyncio.sleep(0.1)
+            t0 = time.perf_counter()
+            pong = await quant._call_daemon("ping", [], sock)
+            assert pong["result"]["pong"] is True
+            assert time.perf_counter() - t0 < 0.3
+            assert not slow.done()
+            resp = await slow
+            assert resp["result"]["stocks"][0]["code"] == "600519"
+        finally:
+            server.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await server
+
+
+class TestStartupBudget:
+    """单次调用启动耗时 (python -X importtime)"""
+
+    def test_light_tool_imports_skip_pandas(self):
+        """轻量工具不加载 pandas / pandas_ta, 导入耗时在预算内"""
+        seconds, out, err = _importtime(_LIGHT_TOOL_IMPORTS.format(path=str(QUANT_PATH)))
+        assert out.split() == ["False", "False"], err[-2000:]
+        assert seconds < IMPORT_BUDGET_S, f"import took {seconds:.3f}s"
+
+
+class TestNewsAlerts:
+    """未开启监听时的 news_alerts"""
+
+    @pytest.mark.asyncio
+    async def test_polls_concurrently_and_reads_store(self, quant, tmp_path, monkeypatch):
+        """各源并发轮询; 已入库的关键新闻照样返回, 失败源记入 errors"""
+        import time
+        from data_sources import news_watcher
+        from data_sources.multi_news import NewsItem
+        from data_sources.news_store import NewsStore
+
+        class SlowSource:
+            def __init__(self, feed=()):
+                self.feed = list(feed)
+
+            async def fetch(self, limit=30, skip=None, raise_errors=False):
+                await asyncio.sleep(0.2)
+                return [n for n in self.feed if not (skip and skip(n.uid, n.time))]
+
+        class DownSource:
+            async def fetch(self, limit=30, skip=None, raise_errors=False):
+                raise RuntimeError("boom")
+
+        store = NewsStore(tmp_path / "news.db")
+        seen = NewsItem(title="央行宣布降准", time="2025-01-02 09:00:00", source="财联社", importance=2, uid="1")
+        store.ingest("cls", [seen])
+        fresh = NewsItem(title="某公司发布公告", time="2025-01-02 09:05:00", source="金十", importance=0, uid="2")
+        hot = NewsItem(title="美联储宣布降息", time="2025-01-02 09:06:00", source="金十", importance=2, uid="3")
+        sources = [("cls", SlowSource([seen])), ("jin10", SlowSource([fresh, hot])), ("em", DownSource())]
+        monkeypatch.setattr(news_watcher, "default_sources", lambda: sources)
+        monkeypatch.setattr(news_watcher, "get_news_store", lambda: store)
+
+        t0 = time.perf_counter()
+        result = await quant.registry.dispatch("news_alerts", ["2"], timeout=5)
+        assert time.perf_counter() - t0 < 0.35
+        assert [a["title"] for a in result["alerts"]] == ["美联储宣布降息", "央行宣布降准"]
+        assert result["errors"] == {"em": "boom"}
+        assert result["watching"] is False
+
+
+class TestSweepTool:
+    """sweep 工具参数"""
+
+    @pytest.mark.asyncio
+    async def test_index_code_passed_through(self, quant, monkeypatch):
+        from analysis import sweep as sweep_mod
+
+        calls = []
+        monkeypatch.setattr(sweep_mod, "sweep", lambda codes, **kw: calls.append((codes, kw)) or {"ok": True})
+        assert await quant.registry.dispatch("sweep", ["600519", "", "", "10", "000001"], timeout=5) == {"ok": True}
+        assert calls[-1] == (["600519"], {"split": None, "points": None, "horizon": 10, "index_code": "000001"})
+        await quant.registry.dispatch("sweep", ["all"], timeout=5)
+        assert calls[-1] == (None, {"split": None, "points": None, "horizon": 5, "index_code": None})
@@ -0,0 +1,59 @@
+"""stock_data 降级链路测试 (SQLite 持久化熔断状态)."""
+
+import pytest
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from stock_data.cache import SQLiteKlineCache
+from stock_data.chain import DataSourceChain
+
+
+class TestDataSourceChainPersistence:
+    """SourceStat 持久化测试."""
+
+    def _chain(self, db_path):
+        chain = DataSourceChain({"daily": ["sina", "baostock"]}, store=SQLiteKlineCache(db_path))
+        chain.THROTTLE_SECONDS = 0
+        return chain
+
+    def test_circuit_state_survives_restart(self, tmp_path):
+        """熔断打开后新进程的链路不再调用故障源."""
+        db = tmp_path / "cache.db"
+        chain = self._chain(db)
+        calls = []
+
+        def fetcher(source):
+            calls.append(source)
+            if source == "sina":
+                raise RuntimeError("down")
+            return "rows"
+
+        for _ in range(DataSourceChain.CIRCUIT_FAIL_THRESHOLD):
+            assert chain.fetch("daily", fetcher) == ("baostock", "rows")
+
+        calls.clear()
+        fresh = self._chain(db)
+        assert fresh.fetch("daily", fetcher) == ("baostock", "rows")
+        assert calls == ["baostock"]
+        assert fresh.health_report()["sina"]["circuit_open"]
+
+    def test_counts_accumulate_across_instances(self, tmp_path):
+        """多个实例的成功计数在存储中累加."""
+        db = tmp_path / "cache.db"
+        a = self._chain(db)
+        b = self._chain(db)
+        a.fetch("daily", lambda s: "rows")
+        b.fetch("daily", lambda s: "rows")
+
+        report = self._chain(db).health_report()
+        assert report["sina"]["success"] == 2
+
+    def test_memory_only_without_store(self):
+        """不传 store 时行为与原先一致."""
+        chain = DataSourceChain({"daily": ["sina"]})
+        chain.THROTTLE_SECONDS = 0
+        with pytest.raises(RuntimeError):
+            chain.fetch("daily", lambda s: (_ for _ in ()).throw(ValueError("x")))
+        assert chain.stats["sina"].fail == 1
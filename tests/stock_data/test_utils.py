@@ -0,0 +1,78 @@
+"""K 线标准化 (normalize_kline_df) 测试."""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from stock_data.cache import SQLiteKlineCache
+from stock_data.utils import STANDARD_COLUMNS, _resolve_columns, normalize_kline_df
+
+
+def _baostock(n=500):
+    dates = pd.bdate_range(end="2025-01-03", periods=n).strftime("%Y-%m-%d")
+    px = (10 + np.arange(n) / 100).astype(str)
+    return pd.DataFrame({"date": dates, "open": px, "high": px, "low": px, "close": px,
+                         "volume": [str(100 * i) for i in range(n)], "amount": px})
+
+
+class TestColumnMapping:
+    """源列映射与列名探测."""
+
+    def test_known_source_maps(self):
+        em = pd.DataFrame(columns=["日期", "股票代码", "开盘", "收盘", "最高", "最低", "成交量", "成交额"])
+        assert _resolve_columns(em, "eastmoney")["close"] == "收盘"
+        minute = pd.DataFrame(columns=["day", "open", "high", "low", "close", "volume"])
+        cols = _resolve_columns(minute, "sina")
+        assert cols["date"] == "day" and cols["amount"] is None
+        tdx = pd.DataFrame(columns=["open", "close", "high", "low", "vol", "amount", "datetime", "year"])
+        assert _resolve_columns(tdx, "pytdx")["volume"] == "vol"
+
+    def test_unknown_source_falls_back_to_aliases(self):
+        df = pd.DataFrame({"Time": ["2024/01/03", "2024/01/02", "bad"], "OPEN": ["1", "2", "3"], "High": [1, 2, 3],
+                           "Low": [1, 2, 3], "Close": [1, 2, 3], "Vol": [5, 6, 7]})
+        out = normalize_kline_df(df, "sh600519", "other", "daily", "")
+        assert out["date"].tolist() == ["2024-01-02 00:00:00", "2024-01-03 00:00:00"]
+        assert out["open"].tolist() == [2.0, 1.0] and out["amount"].isna().all()
+
+    def test_missing_required_column(self):
+        with pytest.raises(ValueError, match="missing required columns"):
+            normalize_kline_df(pd.DataFrame({"date": ["2024-01-02"], "open": [1]}), "600519", "sina", "daily", "")
+
+
+class TestNormalize:
+    """类型转换与日期输出形式."""
+
+    def test_standard_schema(self):
+        raw = _baostock()
+        raw.loc[3, "close"] = ""
+        out = normalize_kline_df(raw.iloc[::-1], "600519", "baostock", "daily", "qfq")
+        assert list(out.columns) == STANDARD_COLUMNS and len(out) == 499
+        assert out["date"].iloc[0] < out["date"].iloc[-1] == "2025-01-03 00:00:00"
+        assert out["close"].dtype == np.float64 and out["volume"].iloc[-1] == 49900.0
+        assert set(out["code"]) == {"600519"} and set(out["adjust"]) == {"qfq"}
+
+    def test_date_formats(self):
+        raw = _baostock(3)
+        as_dt = normalize_kline_df(raw, "600519", "baostock", "daily", "", date_format="datetime64")
+        as_int = normalize_kline_df(raw, "600519", "baostock", "daily", "", date_format="int64")
+        assert as_dt["date"].dtype == "datetime64[ns]"
+        assert as_int["date"].dtype == np.int64
+        assert as_int["date"].iloc[-1] == int(pd.Timestamp("2025-01-03").timestamp())
+        with pytest.raises(ValueError):
+            normalize_kline_df(raw, "600519", "baostock", "daily", "", date_format="epoch")
+
+    def test_empty(self):
+        assert list(normalize_kline_df(pd.DataFrame(), "600519", "sina", "daily", "").columns) == STANDARD_COLUMNS
+
+    @pytest.mark.parametrize("date_format", ["str", "datetime64", "int64"])
+    def test_cache_stores_same_date_text(self, tmp_path, date_format):
+        cache = SQLiteKlineCache(tmp_path / "cache.db")
+        cache.upsert(normalize_kline_df(_baostock(5), "600519", "baostock", "daily", "", date_format=date_format))
+        got = cache.get(code="600519", frequency="daily", adjust="", start="2025-01-01")
+        assert got["date"].tolist() == ["2025-01-01 00:00:00", "2025-01-02 00:00:00", "2025-01-03 00:00:00"]
+        assert got["amount"].notna().all()
@@ -0,0 +1,137 @@
+"""工具注册表测试 (分发与超时)."""
+
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "mcp-server"))
+
+from tools.registry import ToolOutput, ToolRegistry, get_tool_timeout, with_timeout
+
+
+@pytest.fixture
+def registry():
+    reg = ToolRegistry()
+
+    @reg.tool("fast")
+    async def _fast(args, out):
+        return {"args": args}
+
+    @reg.tool("overview", sections=("a_shares", "us_stocks", "commodities"))
+    async def _overview(args, out):
+        out.section("a_shares", ["600519"])
+        out["us_stocks"] = ["AAPL"]  # 写了一半
+        await asyncio.sleep(10)
+        out.section("us_stocks", ["AAPL", "NVDA"])
+        out.section("commodities", ["XAU"])
+
+    @reg.tool("filler", sections=("stocks",))
+    async def _filler(args, out):
+        out.section("stocks", [1, 2])
+
+    return reg
+
+
+class TestToolRegistry:
+    """注册与分发"""
+
+    @pytest.mark.asyncio
+    async def test_dispatch_returns_result(self, registry):
+        """未超时返回工具结果"""
+        assert await registry.dispatch("fast", ["a"], timeout=1) == {"args": ["a"]}
+
+    @pytest.mark.asyncio
+    async def test_dispatch_returns_out_when_none(self, registry):
+        """工具无返回值时返回分段输出"""
+        assert await registry.dispatch("filler", [], timeout=1) == {"stocks": [1, 2]}
+
+    @pytest.mark.asyncio
+    async def test_timeout_returns_partial_sections(self, registry):
+        """超时返回已完成分段 + timed_out_sections"""
+        result = await registry.dispatch("overview", [], timeout=0.05)
+        assert result["timed_out"] is True
+        assert result["a_shares"] == ["600519"]
+        assert result["us_stocks"] == ["AAPL"]
+        assert result["timed_out_sections"] == ["us_stocks", "commodities"]
+
+    def test_names_and_contains(self, registry):
+        assert registry.names() == ["fast", "overview", "filler"]
+        assert "fast" in registry
+        assert "missing" not in registry
+
+
+class TestToolTimeoutConfig:
+    """settings.yaml tool_timeout"""
+
+    def test_configured_and_default(self):
+        assert get_tool_timeout("stock_analysis") == 30
+        assert get_tool_timeout("no_such_tool") == 60
+
+    def test_zero_means_unlimited(self):
+        assert get_tool_timeout("warm_klines") is None
+
+    @pytest.mark.asyncio
+    async def test_with_timeout_returns_json(self, monkeypatch):
+        """MCP 工具超时返回 JSON 而不是挂起"""
+        monkeypatch.setattr("tools.registry.get_tool_timeout", lambda key: 0.05)
+
+        @with_timeout("stock_analysis")
+        async def slow_tool(codes: str = "") -> str:
+            await asyncio.sleep(10)
+            return "{}"
+
+        data = json.loads(await slow_tool())
+        assert data["timed_out"] is True
+        assert data["timed_out_sections"] == ["stock_analysis"]
+        assert slow_tool.__name__ == "slow_tool"
+
+    @pytest.mark.asyncio
+    async def test_with_timeout_returns_completed_sections(self, monkeypatch):
+        """慢分段超时, 其余分段照常返回"""
+        import inspect
+
+        from utils.fanout import fan_out
+
+        monkeypatch.setattr("tools.registry.get_tool_timeout", lambda key: 0.2)
+
+        @with_timeout("global_overview", sections=("a_shares", "us_stocks", "commodities"))
+        async def overview(out: ToolOutput | None = None) -> str:
+            out["markets"] = {}
+
+            async def _market(name, delay):
+                await asyncio.sleep(delay)
+                out["markets"][name] = {"count": 1}
+                out.complete(name)
+
+            await fan_out({"a_shares": _market("a_shares", 0), "us_stocks": _market("us_stocks", 10),
+                           "commodities": _market("commodities", 0.01)}, timeouts=30)
+            return json.dumps(out)
+
+        assert "out" not in inspect.signature(overview).parameters  # 不暴露给 MCP
+        data = json.loads(await overview())
+        assert data["timed_out"] is True
+        assert data["markets"] == {"a_shares": {"count": 1}, "commodities": {"count": 1}}
+        assert data["timed_out_sections"] == ["us_stocks"]
+
+    @pytest.mark.asyncio
+    async def test_with_timeout_completed_output(self, monkeypatch):
+        """未超时: 工具可不返回文本, 直接序列化 out"""
+        monkeypatch.setattr("tools.registry.get_tool_timeout", lambda key: 1)
+
+        @with_timeout("stock_analysis", sections=("stocks",))
+        async def analysis(codes: str = "", out: ToolOutput | None = None):
+            out.section("stocks", [codes])
+
+        assert json.loads(await analysis("600519")) == {"stocks": ["600519"]}
+
+
+class TestToolOutput:
+    def test_pending(self):
+        out = ToolOutput(("a", "b"))
+        out["a"] = []
+        assert out.pending() == ["a", "b"]
+        out.section("a", [1])
+        assert out.pending() == ["b"]
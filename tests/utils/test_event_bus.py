@@ -0,0 +1,79 @@
+"""事件总线测试."""
+
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "mcp-server"))
+
+from utils.event_bus import Event, EventBus
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+class TestEventBus:
+    """发布/订阅与去重"""
+
+    def test_dedup_window_per_type_and_key(self, clock):
+        bus = EventBus({"limit_up": 60, "default": 10}, clock=clock)
+        assert bus.publish(Event("limit_up", "600519", "涨停"))
+        assert not bus.publish(Event("limit_up", "600519", "涨停"))
+        assert bus.publish(Event("limit_up", "000858", "涨停"))
+        assert bus.publish(Event("volume_surge", "600519", "放量"))
+
+        clock.now = 30
+        assert not bus.publish(Event("limit_up", "600519", "涨停"))
+        assert bus.publish(Event("volume_surge", "600519", "放量"))  # default 10s 已过
+        clock.now = 61
+        assert bus.publish(Event("limit_up", "600519", "涨停"))
+        assert [e.seq for e in bus.history] == [1, 2, 3, 4, 5]
+
+    def test_typed_and_wildcard_subscribers(self, clock):
+        bus = EventBus({}, clock=clock)
+        limit_ups, everything = [], []
+        bus.subscribe("limit_up", limit_ups.append)
+
+        @bus.subscribe()
+        def collect(event):
+            everything.append(event.type)
+
+        bus.subscribe("limit_up", lambda e: 1 / 0)  # 订阅者异常不影响其他订阅者
+        bus.publish(Event("limit_up", "600519", "涨停"))
+        bus.publish(Event("northbound_swing", "market", "北向回落"))
+        assert [e.key for e in limit_ups] == ["600519"]
+        assert everything == ["limit_up", "northbound_swing"]
+
+        bus.unsubscribe("limit_up", limit_ups.append)
+        bus.publish(Event("limit_up", "000858", "涨停"))
+        assert len(limit_ups) == 1
+
+    @pytest.mark.asyncio
+    async def test_async_subscriber_and_since(self, clock):
+        bus = EventBus({}, clock=clock)
+        seen = []
+
+        async def handler(event):
+            await asyncio.sleep(0)
+            seen.append(event.key)
+
+        bus.subscribe("volume_surge", handler)
+        bus.publish(Event("volume_surge", "a", ""))
+        bus.publish(Event("limit_up", "b", ""))
+        bus.publish(Event("volume_surge", "c", ""))
+        await bus.drain()
+        assert seen == ["a", "c"]
+        assert [e.key for e in bus.since(1)] == ["b", "c"]
+        assert [e.key for e in bus.since(0, {"volume_surge"})] == ["a", "c"]
@@ -0,0 +1,55 @@
+"""并发扇出测试."""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "mcp-server"))
+
+from utils.fanout import fan_out, market_timeouts
+
+
+async def _slow(value, delay):
+    await asyncio.sleep(delay)
+    return value
+
+
+async def _boom():
+    raise RuntimeError("host down")
+
+
+class TestFanOut:
+    """多市场并发"""
+
+    @pytest.mark.asyncio
+    async def test_latency_is_max_not_sum(self):
+        """总耗时取最慢一路"""
+        started = time.perf_counter()
+        results, errors = await fan_out({
+            "a_shares": _slow("a", 0.1),
+            "us_stocks": _slow("us", 0.1),
+            "hk_stocks": _slow("hk", 0.1),
+        }, 1.0)
+        assert time.perf_counter() - started < 0.25
+        assert results == {"a_shares": "a", "us_stocks": "us", "hk_stocks": "hk"}
+        assert errors == {}
+
+    @pytest.mark.asyncio
+    async def test_timeout_and_error_isolated(self):
+        """单路超时/异常不影响其他市场"""
+        results, errors = await fan_out({
+            "a_shares": _slow("a", 0),
+            "us_stocks": _slow("us", 5),
+            "hk_stocks": _boom(),
+        }, {"us_stocks": 0.05, "default": 1.0})
+        assert results == {"a_shares": "a"}
+        assert errors["us_stocks"] == "timeout after 0.05s"
+        assert errors["hk_stocks"] == "host down"
+
+    def test_market_timeouts_from_config(self):
+        timeouts = market_timeouts(a_shares=60)
+        assert timeouts["a_shares"] == 60
+        assert timeouts["us_stocks"] == 10
@@ -0,0 +1,178 @@
+"""HTTP 录制/回放测试."""
+
+import gzip
+import sys
+import time
+from pathlib import Path
+
+import httpx
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "mcp-server"))
+
+from utils.http_replay import (
+    FixtureStore, RecordingTransport, ReplayTransport, patch_clients, recording, replaying, request_key,
+)
+
+
+def _tencent_line(code="600519", name="贵州茅台", price=1500.0):
+    parts = [""] * 50
+    parts[1], parts[2], parts[3], parts[4] = name, code, str(price), "1480"
+    parts[30], parts[32], parts[49] = "20250102150000", "1.35", "1.2"
+    return f'v_sh{code}="' + "~".join(parts) + '";'
+
+
+def _upstream(counter):
+    """模拟真实网络: 每次响应带递增序号, JSONP 请求按回调名包裹."""
+    def handler(request: httpx.Request) -> httpx.Response:
+        counter.append(request.url)
+        if request.url.host == "qt.gtimg.cn":
+            return httpx.Response(200, text=_tencent_line())
+        cb = request.url.params.get("cb")
+        body = f'{{"n": {len(counter)}}}'
+        return httpx.Response(200, text=f"{cb}({body})" if cb else body)
+    return httpx.MockTransport(handler)
+
+
+async def _record(path, urls):
+    store = FixtureStore(str(path))
+    seen = []
+    transport = RecordingTransport(store, inner=_upstream(seen))
+    async with httpx.AsyncClient(transport=transport) as client:
+        for url in urls:
+            await client.get(url)
+    store.save()
+    return store
+
+
+class TestRequestKey:
+    """请求指纹."""
+
+    def test_volatile_params_ignored(self):
+        a = httpx.Request("GET", "https://x.com/api?b=2&a=1&_=123&cb=jQuery_1")
+        b = httpx.Request("GET", "https://x.com/api?a=1&b=2&_=456&cb=jQuery_2")
+        assert request_key(a) == request_key(b) == "GET https://x.com/api?a=1&b=2"
+
+    def test_body_digest(self):
+        a = httpx.Request("POST", "https://x.com/api", content=b"x")
+        b = httpx.Request("POST", "https://x.com/api", content=b"y")
+        assert request_key(a) != request_key(b)
+
+
+class TestRecordReplay:
+    """录制与回放."""
+
+    @pytest.mark.asyncio
+    async def test_roundtrip_in_order(self, tmp_path):
+        path = tmp_path / "fx.jsonl.gz"
+        await _record(path, ["https://x.com/a?_=1", "https://x.com/a?_=2", "https://x.com/b"])
+        with gzip.open(path, "rt") as fh:
+            assert len(fh.readlines()) == 3
+
+        transport = ReplayTransport(FixtureStore(str(path)))
+        async with httpx.AsyncClient(transport=transport) as client:
+            bodies = [(await client.get(u)).json()["n"]
+                      for u in ("https://x.com/a?_=9", "https://x.com/a", "https://x.com/a", "https://x.com/b")]
+        # 同一指纹按录制顺序, 用完后重复最后一条
+        assert bodies == [1, 2, 2, 3]
+
+    @pytest.mark.asyncio
+    async def test_saved_file_is_byte_stable(self, tmp_path):
+        a, b = tmp_path / "a.jsonl.gz", tmp_path / "b.jsonl.gz"
+        await _record(a, ["https://x.com/a"])
+        store = FixtureStore(str(a))
+        store.path = str(b)
+        store.save()
+        assert a.read_bytes() == b.read_bytes()
+
+    @pytest.mark.asyncio
+    async def test_jsonp_callback_rewritten(self, tmp_path):
+        path = tmp_path / "fx.jsonl.gz"
+        await _record(path, ["https://s.com/search?cb=jQuery_news_1&q=1"])
+        transport = ReplayTransport(FixtureStore(str(path)))
+        async with httpx.AsyncClient(transport=transport) as client:
+            resp = await client.get("https://s.com/search?cb=jQuery_news_2&q=1")
+        assert resp.text == 'jQuery_news_2({"n": 1})'
+
+    @pytest.mark.asyncio
+    async def test_missing_fixture_is_connect_error(self, tmp_path):
+        transport = ReplayTransport(FixtureStore(str(tmp_path / "none.jsonl.gz")))
+        async with httpx.AsyncClient(transport=transport) as client:
+            with pytest.raises(httpx.ConnectError):
+                await client.get("https://x.com/a")
+        assert transport.misses == ["GET https://x.com/a"]
+
+
+class TestInjection:
+    """延迟与失败注入."""
+
+    @pytest.mark.asyncio
+    async def test_failures_deterministic_per_seed(self, tmp_path):
+        path = tmp_path / "fx.jsonl.gz"
+        await _record(path, [f"https://x.com/a?i={i}" for i in range(40)])
+
+        async def run(seed):
+            transport = ReplayTransport(FixtureStore(str(path)), failure_rate=0.5, seed=seed)
+            outcome = []
+            async with httpx.AsyncClient(transport=transport) as client:
+                for i in range(40):
+                    try:
+                        await client.get(f"https://x.com/a?i={i}")
+                        outcome.append(True)
+                    except httpx.ConnectError:
+                        outcome.append(False)
+            return outcome
+
+        first, again, other = await run(1), await run(1), await run(2)
+        assert first == again
+        assert first != other
+        assert 0 < sum(first) < 40
+
+    @pytest.mark.asyncio
+    async def test_faults_and_latency(self, tmp_path):
+        path = tmp_path / "fx.jsonl.gz"
+        await _record(path, ["https://x.com/a", "https://y.com/b"])
+        transport = ReplayTransport(FixtureStore(str(path)), latency=0.05, faults={"y.com": 503})
+        async with httpx.AsyncClient(transport=transport) as client:
+            started = time.perf_counter()
+            assert (await client.get("https://x.com/a")).status_code == 200
+            assert time.perf_counter() - started >= 0.05
+            assert (await client.get("https://y.com/b")).status_code == 503
+
+
+class TestPatchClients:
+    """数据源无需改动即可录制/回放."""
+
+    @pytest.mark.asyncio
+    async def test_tencent_source_offline(self, tmp_path):
+        from data_sources.tencent import TencentRealtimeSource
+
+        path = str(tmp_path / "tencent.jsonl.gz")
+        seen = []
+        store = FixtureStore(path)
+        with patch_clients(RecordingTransport(store, inner=_upstream(seen))):
+            source = TencentRealtimeSource()
+            live = await source.fetch_quotes(["600519"])
+            await source.close()
+        store.save()
+
+        async with replaying(path) as transport:
+            source = TencentRealtimeSource()
+            replayed = await source.fetch_quotes(["600519"])
+            await source.close()
+        assert [q.price for q in replayed] == [q.price for q in live] == [1500.0]
+        assert transport.misses == []
+        assert len(seen) == 1
+        # 退出后恢复原始构造函数
+        assert httpx.AsyncClient(transport=httpx.MockTransport(lambda r: httpx.Response(200)))
+
+    @pytest.mark.asyncio
+    async def test_recording_context_appends(self, tmp_path, monkeypatch):
+        path = str(tmp_path / "fx.jsonl.gz")
+        seen = []
+        monkeypatch.setattr(httpx, "AsyncHTTPTransport", lambda: _upstream(seen))
+        for _ in range(2):
+            async with recording(path):
+                async with httpx.AsyncClient() as client:
+                    await client.get("https://x.com/a")
+        assert len(FixtureStore(path)) == 2
@@ -0,0 +1,106 @@
+"""Aho-Corasick 关键词匹配测试 (与逐词 `in` 扫描结果一致)."""
+
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "mcp-server"))
+
+from data_sources.multi_news import (
+    BEARISH_KW, BULLISH_KW, LEXICON, NEG_CONTEXT, SECTOR_KEYWORDS, VIP_PERSONS, score_sentiment,
+)
+from data_sources.eastmoney_news import BEARISH_KEYWORDS, BULLISH_KEYWORDS, EastMoneyNewsFetcher
+from utils.keyword_matcher import KeywordMatcher
+
+
+def _reference_score(text, bullish, bearish, neg_context):
+    """原逐词扫描实现."""
+    score = 0.0
+    matched = []
+    for kw in bullish:
+        if kw in text:
+            if any(n + kw in text or kw + n in text for n in neg_context):
+                score -= 0.5
+                matched.append(f"~{kw}(反向)")
+            else:
+                score += 1.0
+                matched.append(f"+{kw}")
+    for kw in bearish:
+        if kw in text:
+            score -= 1.0
+            matched.append(f"-{kw}")
+    return round(max(-5.0, min(5.0, score)), 1), matched
+
+
+def _headlines(n=2000, seed=7):
+    rng = random.Random(seed)
+    vocab = (BULLISH_KW + BEARISH_KW + BULLISH_KEYWORDS + BEARISH_KEYWORDS + NEG_CONTEXT
+             + VIP_PERSONS + SECTOR_KEYWORDS + ["公司", "市场", "今日", "宣布", "，", "数据", "季度"] * 5)
+    return ["".join(rng.choice(vocab) for _ in range(rng.randint(1, 15))) for _ in range(n)]
+
+
+class TestKeywordMatcher:
+    """自动机匹配"""
+
+    def test_overlapping_and_nested(self):
+        m = KeywordMatcher(["突破", "突破性", "性能", "he", "she", "hers"])
+        assert m.find_all("突破性能") == {"突破", "突破性", "性能"}
+        assert m.find_all("ushers") == {"he", "she", "hers"}
+        assert m.find_all("") == set()
+
+    def test_matches_substring_semantics(self):
+        patterns = BULLISH_KW + BEARISH_KW + VIP_PERSONS
+        m = KeywordMatcher(patterns)
+        for text in _headlines(500):
+            assert m.find_all(text) == {p for p in patterns if p in text}
+
+
+class TestSentimentLexicon:
+    """评分与原实现一致"""
+
+    def test_multi_news_scores_identical(self):
+        for text in _headlines():
+            assert score_sentiment(text) == _reference_score(text, BULLISH_KW, BEARISH_KW, NEG_CONTEXT)
+
+    def test_eastmoney_scores_identical(self):
+        fetcher = EastMoneyNewsFetcher()
+        for text in _headlines():
+            assert fetcher._score_sentiment(text) == _reference_score(
+                text, BULLISH_KEYWORDS, BEARISH_KEYWORDS, EastMoneyNewsFetcher.NEGATIVE_CONTEXT)
+
+    def test_negated_context(self):
+        """利好词后接反向语境 → 各记 -0.5"""
+        assert score_sentiment("营收增长减少") == (-1.0, ["~增长(反向)", "~营收增长(反向)"])
+
+    def test_vip_first_in_list_and_sector(self):
+        for text in _headlines():
+            hits = LEXICON.scan(text)
+            expected_vip = next((v for v in VIP_PERSONS if v in text), None)
+            assert LEXICON.first_vip(hits) == expected_vip
+            assert bool(hits.sector) == any(sk in text for sk in SECTOR_KEYWORDS)
+
+    @pytest.mark.asyncio
+    async def test_fetch_and_boost_scan_each_title_once(self, monkeypatch):
+        """抓取时的扫描结果随 NewsItem 传给 boost_importance, 每条标题只扫描一次"""
+        import httpx
+        from data_sources import multi_news
+
+        roll = [{"id": 1, "title": "特朗普宣布加征关税", "ctime": 1735779600},
+                {"id": 2, "title": "芯片板块拉升 多股涨停", "ctime": 1735779660},
+                {"id": 3, "title": "某公司发布年报", "ctime": 1735779720}]
+        real_client = httpx.AsyncClient
+        handler = lambda request: httpx.Response(200, json={"data": {"roll_data": roll}})
+        monkeypatch.setattr(multi_news.httpx, "AsyncClient",
+                            lambda **kw: real_client(transport=httpx.MockTransport(handler), **kw))
+        scanned = []
+        real_scan = LEXICON.scan
+        monkeypatch.setattr(LEXICON, "scan", lambda text: scanned.append(text) or real_scan(text))
+
+        items = await multi_news.CailiansheSource().fetch()
+        for n in items:
+            multi_news.boost_importance(n)
+        assert scanned == [r["title"] for r in roll]
+        assert [n.importance for n in items] == [2, 1, 0]
+        assert "VIP:特朗普" in items[0].keywords
@@ -0,0 +1,147 @@
+"""Prometheus 指标导出测试."""
+
+import asyncio
+import sys
+import urllib.request
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "mcp-server"))
+
+from utils.metrics import (
+    METRICS, Family, MetricsRegistry, chain_families, memory_cache_families, start_http_server,
+)
+from utils.timing import TIMINGS, span
+
+
+def _sample(text, line_prefix):
+    return [line for line in text.splitlines() if line.startswith(line_prefix)]
+
+
+class TestRegistry:
+    """计数器 / 采集器 / 文本格式."""
+
+    def test_counter_labels_and_render(self):
+        reg = MetricsRegistry()
+        calls = reg.counter("calls_total", "Calls")
+        calls.inc(tool="a", status="ok")
+        calls.inc(2, tool="a", status="ok")
+        calls.inc(tool="b", status="timeout")
+        reg.gauge("up", "Up").set(1)
+        text = reg.render()
+        assert "# TYPE quant_calls_total counter" in text
+        assert 'quant_calls_total{status="ok",tool="a"} 3' in text
+        assert 'quant_calls_total{status="timeout",tool="b"} 1' in text
+        assert "quant_up 1" in text
+
+    def test_label_escaping(self):
+        family = Family("x", "gauge").add(1, name='a"b\\c')
+        assert family.render()[-1] == 'quant_x{name="a\\"b\\\\c"} 1'
+
+    def test_collectors_merge_and_failures_skipped(self):
+        reg = MetricsRegistry()
+        reg.counter("cache_lookups_total", "Lookups").inc(tier="file", result="hit")
+        reg.add_collector("mem", lambda: memory_cache_families(
+            "memory", {"size": 3, "max_size": 10, "hits": 5, "misses": 1}))
+        reg.add_collector("broken", lambda: 1 / 0)
+        text = reg.render()
+        # 原生计数器与采集结果同名时合并为一个指标族
+        assert text.count("# TYPE quant_cache_lookups_total counter") == 1
+        assert 'quant_cache_lookups_total{tier="memory",result="hit"} 5' in text
+        assert 'quant_cache_lookups_total{result="hit",tier="file"} 1' in text
+        assert 'quant_cache_entries{tier="memory"} 3' in text
+
+    def test_chain_families(self):
+        families = chain_families("realtime", {
+            "tencent": {"success": 9, "fail": 1, "avg_latency_ms": 120.0, "circuit_open": False},
+            "sina": {"success": 0, "fail": 3, "avg_latency": 0.0, "circuit_open": True},
+        })
+        lines = [line for f in families for line in f.render()]
+        assert 'quant_source_requests_total{chain="realtime",source="tencent",outcome="failure"} 1' in lines
+        assert 'quant_source_circuit_open{chain="realtime",source="sina"} 1' in lines
+        assert 'quant_source_avg_latency_seconds{chain="realtime",source="tencent"} 0.12' in lines
+
+    def test_stage_histogram_cumulative(self):
+        TIMINGS.reset()
+        for _ in range(3):
+            with span("stage.t"):
+                pass
+        text = MetricsRegistry().render()
+        buckets = _sample(text, 'quant_stage_duration_seconds_bucket{stage="stage.t"')
+        assert buckets[0].endswith(" 3") and buckets[-1] == 'quant_stage_duration_seconds_bucket{stage="stage.t",le="+Inf"} 3'
+        assert 'quant_stage_duration_seconds_count{stage="stage.t"} 3' in text
+        TIMINGS.reset()
+
+
+class TestInstrumentation:
+    """工具调用与熔断计数."""
+
+    @pytest.mark.asyncio
+    async def test_tool_calls_counted(self):
+        from tools.registry import TOOL_CALLS, ToolRegistry
+        reg = ToolRegistry()
+
+        @reg.tool("m_ok")
+        async def _ok(args, out):
+            return {}
+
+        @reg.tool("m_fail")
+        async def _fail(args, out):
+            raise RuntimeError("boom")
+
+        @reg.tool("m_slow")
+        async def _slow(args, out):
+            await asyncio.sleep(1)
+
+        await reg.dispatch("m_ok", [])
+        await reg.dispatch("m_slow", [], timeout=0.01)
+        with pytest.raises(RuntimeError):
+            await reg.dispatch("m_fail", [])
+        assert TOOL_CALLS.value(tool="m_ok", status="ok") == 1
+        assert TOOL_CALLS.value(tool="m_slow", status="timeout") == 1
+        assert TOOL_CALLS.value(tool="m_fail", status="error") == 1
+        assert TIMINGS.get("tool.m_ok").count >= 1
+
+    @pytest.mark.asyncio
+    async def test_circuit_trip_counted_once(self):
+        from data_sources.base import FallbackChain, RealtimeSource
+        from utils.metrics import CIRCUIT_TRIPS
+
+        class Dead(RealtimeSource):
+            name = "dead_for_metrics"
+
+            async def fetch_quotes(self, codes):
+                raise ConnectionError("down")
+
+        chain = FallbackChain()
+        chain.add_source(Dead())
+        for _ in range(5):
+            await chain.fetch_quotes(["600519"])
+        assert CIRCUIT_TRIPS.value(chain="realtime", source="dead_for_metrics") == 1
+
+
+class TestExporter:
+    """HTTP 导出."""
+
+    def test_serves_metrics(self):
+        reg = MetricsRegistry()
+        reg.counter("hits_total", "Hits").inc()
+        server = start_http_server(0, registry=reg)
+        try:
+            url = f"http://127.0.0.1:{server.server_address[1]}"
+            with urllib.request.urlopen(f"{url}/metrics", timeout=5) as resp:
+                assert resp.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+                assert "quant_hits_total 1" in resp.read().decode()
+            with pytest.raises(urllib.error.HTTPError):
+                urllib.request.urlopen(f"{url}/other", timeout=5)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def test_disabled_by_default(self, monkeypatch):
+        from utils import metrics
+        monkeypatch.delenv("QUANT_METRICS_PORT", raising=False)
+        assert metrics.configured_port() == 0
+        assert metrics.maybe_start_http_server() is None
+        assert METRICS.render().endswith("\n")
@@ -0,0 +1,55 @@
+"""近重复新闻聚类测试."""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "mcp-server"))
+
+from data_sources.multi_news import NewsItem, merge_near_duplicates
+from utils.near_dup import MinHasher, cluster_near_duplicates, jaccard, shingles
+
+
+class TestClustering:
+    """MinHash LSH 聚类"""
+
+    def test_rephrased_headlines_grouped(self):
+        titles = [
+            "特朗普宣布对进口汽车加征25%关税",
+            "央行宣布降准0.5个百分点，释放长期资金约1万亿",
+            "特朗普：将对所有进口汽车征收25%关税",
+            "央行：2月5日起下调存款准备金率0.5个百分点 释放长期资金约1万亿元",
+        ]
+        assert cluster_near_duplicates(titles) == [[0, 2], [1, 3]]
+
+    def test_shared_prefix_distinct_stories_split(self):
+        """前缀相同但数字不同的不同事件不合并"""
+        titles = ["A股三大指数集体收涨 沪指涨0.5%", "A股三大指数集体收跌 沪指跌1.2%"]
+        assert cluster_near_duplicates(titles) == [[0], [1]]
+
+    def test_empty_and_punctuation_only(self):
+        assert cluster_near_duplicates(["", "！！", "央行降准"]) == [[0], [1], [2]]
+
+    def test_signature_estimates_jaccard(self):
+        a = shingles("特朗普宣布对进口汽车加征25%关税")
+        b = shingles("特朗普：将对所有进口汽车征收25%关税")
+        hasher = MinHasher(256)
+        agree = sum(x == y for x, y in zip(hasher.signature(a), hasher.signature(b))) / 256
+        assert abs(agree - jaccard(a, b)) < 0.12
+
+
+class TestMergeNearDuplicates:
+    """聚类结果回写重要度"""
+
+    def test_source_count_boosts_importance(self):
+        news = [
+            NewsItem(title="特朗普宣布对进口汽车加征25%关税", time="", source="财联社"),
+            NewsItem(title="特朗普：将对所有进口汽车征收25%关税", time="", source="金十数据"),
+            NewsItem(title="特朗普宣布对进口汽车加征25%的关税", time="", source="新浪财经"),
+            NewsItem(title="某公司发布三季报", time="", source="东方财富"),
+        ]
+        unique = merge_near_duplicates(news)
+        assert [n.title for n in unique] == ["特朗普宣布对进口汽车加征25%关税", "某公司发布三季报"]
+        assert unique[0].source_count == 3
+        assert unique[0].importance == 2
+        assert unique[1].source_count == 1
+        assert unique[1].importance == 0
@@ -0,0 +1,110 @@
+"""性能剖析测试."""
+
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "mcp-server"))
+
+from utils.profiler import CProfileProfiler, SamplingProfiler, profile_requested, profiling
+
+
+def _busy(seconds):
+    end = time.perf_counter() + seconds
+    n = 0
+    while time.perf_counter() < end:
+        n += 1
+    return n
+
+
+def _hot_spot():
+    return _busy(0.15)
+
+
+class TestSampling:
+    """采样剖析."""
+
+    def test_collapsed_stacks_find_hot_spot(self, tmp_path):
+        with profiling("unit", mode="sample", interval=0.002, out_dir=str(tmp_path)) as prof:
+            _hot_spot()
+        assert isinstance(prof.profiler, SamplingProfiler)
+        assert prof.profiler.samples > 10
+        lines = Path(prof.files["collapsed"]).read_text().splitlines()
+        stack, count = lines[0].rsplit(" ", 1)
+        frames = stack.split(";")
+        assert int(count) > 0
+        # 根在前、叶在后
+        assert frames.index(next(f for f in frames if f.startswith("_hot_spot "))) < \
+            frames.index(next(f for f in frames if f.startswith("_busy ")))
+        top = prof.report()["top_self"]
+        assert top[0]["function"].startswith("_busy ")
+        assert "top 30 by self" in Path(prof.files["summary"]).read_text()
+
+    def test_async_idle_is_reported(self, tmp_path):
+        async def wait():
+            await asyncio.sleep(0.1)
+
+        with profiling("idle", mode="sample", interval=0.002, out_dir=str(tmp_path)) as prof:
+            asyncio.run(wait())
+        assert prof.report()["idle_pct"] > 50
+
+    def test_worker_threads_labelled(self, tmp_path):
+        async def offload():
+            await asyncio.to_thread(_busy, 0.1)
+
+        with profiling("thread", mode="sample", interval=0.002, out_dir=str(tmp_path)) as prof:
+            asyncio.run(offload())
+        roots = {stack[0] for stack in prof.profiler.stacks}
+        assert any(r.startswith("asyncio_") for r in roots)
+
+
+class TestCProfile:
+    """cProfile 后备."""
+
+    def test_writes_pstats(self, tmp_path):
+        with profiling("cp", mode="cprofile", out_dir=str(tmp_path)) as prof:
+            _hot_spot()
+        assert isinstance(prof.profiler, CProfileProfiler)
+        assert set(prof.files) == {"collapsed", "summary", "pstats"}
+        assert Path(prof.files["pstats"]).stat().st_size > 0
+        assert any(r["function"].startswith("_hot_spot ") for r in prof.report()["top_self"] + prof.profiler.top()["cumulative"])
+
+
+class TestToggle:
+    """按工具开启."""
+
+    def test_profile_requested(self, monkeypatch):
+        monkeypatch.delenv("QUANT_PROFILE", raising=False)
+        assert not profile_requested("stock_analysis")
+        monkeypatch.setenv("QUANT_PROFILE", "stock_analysis, warm_klines")
+        assert profile_requested("warm_klines") and not profile_requested("lhb")
+        monkeypatch.setenv("QUANT_PROFILE", "all")
+        assert profile_requested("lhb")
+
+    @pytest.mark.asyncio
+    async def test_dispatch_attaches_profile(self, tmp_path, monkeypatch):
+        from tools.registry import ToolRegistry, with_timeout
+        from utils import profiler
+        monkeypatch.setattr(profiler, "profile_dir", lambda: str(tmp_path))
+        reg = ToolRegistry()
+
+        @reg.tool("hot")
+        async def _hot(args, out):
+            out["n"] = _busy(0.05)
+
+        assert "_profile" not in await reg.dispatch("hot", [])
+        result = await reg.dispatch("hot", [], profile=True)
+        assert result["_profile"]["mode"] == "sample"
+        assert Path(result["_profile"]["files"]["collapsed"]).exists()
+        assert Path(result["_profile"]["files"]["collapsed"]).name.startswith("hot-")
+
+        @with_timeout("stock_analysis")
+        async def get_hot():
+            return json.dumps({"n": _busy(0.02)})
+
+        monkeypatch.setenv("QUANT_PROFILE", "get_hot")
+        assert "_profile" in json.loads(await get_hot())
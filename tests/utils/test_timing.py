@@ -0,0 +1,140 @@
+"""分阶段耗时统计测试."""
+
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "mcp-server"))
+
+from utils import timing
+from utils.timing import TIMINGS, Histogram, collect, span, timed
+
+
+@pytest.fixture(autouse=True)
+def _clean(monkeypatch):
+    monkeypatch.delenv("QUANT_TIMINGS", raising=False)
+    TIMINGS.reset()
+    yield
+    TIMINGS.reset()
+
+
+class TestHistogram:
+    """直方图."""
+
+    def test_buckets_and_percentiles(self):
+        h = Histogram()
+        for ms in [0.5] * 90 + [300] * 10:
+            h.observe(ms)
+        d = h.to_dict()
+        assert d["count"] == 100 and d["max_ms"] == 300
+        assert d["buckets"] == {"le_1": 90, "le_500": 10}
+        assert d["p50_ms"] <= 1
+        assert 200 <= d["p95_ms"] <= 300
+
+    def test_empty(self):
+        assert Histogram().to_dict()["p95_ms"] == 0
+
+
+class TestSpans:
+    """span / timed / collect."""
+
+    def test_span_records_on_error(self):
+        with pytest.raises(ValueError):
+            with span("stage.fail"):
+                raise ValueError
+        assert TIMINGS.get("stage.fail").count == 1
+
+    def test_timed_sync_and_async(self):
+        @timed("stage.sync")
+        def work(x):
+            return x * 2
+
+        @timed("stage.async")
+        async def awork(x):
+            await asyncio.sleep(0.01)
+            return x + 1
+
+        assert work(2) == 4
+        assert asyncio.run(awork(1)) == 2
+        assert work.__name__ == "work"
+        snap = TIMINGS.snapshot()
+        assert snap["stage.sync"]["count"] == 1
+        assert snap["stage.async"]["total_ms"] >= 10
+
+    def test_collect_spans_gathered_tasks(self):
+        @timed("fetch")
+        async def fetch():
+            await asyncio.sleep(0.02)
+
+        async def run():
+            with collect() as collected:
+                await asyncio.gather(fetch(), fetch(), fetch())
+                with span("score"):
+                    time.sleep(0.005)
+            # 收集器之外的 span 只进全局直方图
+            await fetch()
+            return collected
+
+        summary = asyncio.run(run()).summary()
+        assert summary["stages"]["fetch"]["count"] == 3
+        assert summary["stages"]["score"]["count"] == 1
+        # 并发同名 span 耗时相加, 超过墙钟时间
+        assert summary["stages"]["fetch"]["total_ms"] > summary["elapsed_ms"]
+        assert list(summary["stages"]) == ["fetch", "score"]
+        assert TIMINGS.get("fetch").count == 4
+
+    def test_enabled_flag(self, monkeypatch):
+        assert timing.timings_enabled() is False
+        monkeypatch.setenv("QUANT_TIMINGS", "1")
+        assert timing.timings_enabled() is True
+        monkeypatch.setenv("QUANT_TIMINGS", "off")
+        assert timing.timings_enabled() is False
+
+
+class TestToolOutput:
+    """工具输出 _timings 字段."""
+
+    @pytest.mark.asyncio
+    async def test_registry_attaches_when_requested(self, monkeypatch):
+        from tools.registry import ToolRegistry
+        reg = ToolRegistry()
+
+        @reg.tool("slow")
+        async def _slow(args, out):
+            with span("provider.x"):
+                await asyncio.sleep(0.01)
+            out["ok"] = True
+
+        assert "_timings" not in await reg.dispatch("slow", [])
+        result = await reg.dispatch("slow", [], timings=True)
+        assert result["_timings"]["stages"]["provider.x"]["count"] == 1
+        monkeypatch.setenv("QUANT_TIMINGS", "1")
+        assert "_timings" in await reg.dispatch("slow", [])
+
+    @pytest.mark.asyncio
+    async def test_with_timeout_injects_json(self, monkeypatch):
+        from tools.registry import with_timeout
+
+        @with_timeout("stock_analysis")
+        async def tool():
+            with span("scoring.x"):
+                pass
+            return json.dumps({"stocks": []})
+
+        assert "_timings" not in json.loads(await tool())
+        monkeypatch.setenv("QUANT_TIMINGS", "1")
+        payload = json.loads(await tool())
+        assert payload["stocks"] == [] and "scoring.x" in payload["_timings"]["stages"]
+
+    def test_compute_stock_score_stages(self):
+        from analysis.scoring import compute_stock_score
+        from data_sources.base import QuoteData
+        quote = QuoteData(code="600519", name="贵州茅台", price=1500, change_pct=1.0, open=1490, high=1510,
+                          low=1485, pre_close=1485, volume=1e6, amount=1.5e9)
+        with collect() as collected:
+            compute_stock_score(quote, None)
+        assert {"scoring.compute_stock_score", "scoring.technical", "scoring.capital"} <= set(collected.stages)
@@ -4,6 +4,7 @@ from __future__ import annotations
 
 import sqlite3
 from pathlib import Path
+from typing import Callable
 
 import pandas as pd
 
@@ -36,6 +37,21 @@ class SQLiteSnapshotCache:
                 )
                 """
             )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS source_stat (
+                    source TEXT PRIMARY KEY,
+                    success INTEGER NOT NULL DEFAULT 0,
+                    fail INTEGER NOT NULL DEFAULT 0,
+                    total_latency REAL NOT NULL DEFAULT 0,
+                    last_success REAL,
+                    fail_streak INTEGER NOT NULL DEFAULT 0,
+                    open_until REAL NOT NULL DEFAULT 0,
+                    last_call REAL NOT NULL DEFAULT 0,
+                    updated_at TEXT NOT NULL DEFAULT (datetime('now'))
+                )
+                """
+            )
             conn.commit()
 
     def get_latest_batch(self, symbols: list[str]) -> pd.DataFrame:
@@ -91,6 +107,50 @@ class SQLiteSnapshotCache:
             )
             conn.commit()
 
+    _STAT_COLUMNS = (
+        "success", "fail", "total_latency", "last_success",
+        "fail_streak", "open_until", "last_call",
+    )
+
+    def load_source_stats(self) -> dict[str, dict]:
+        """Persisted source chain stats, keyed by source name."""
+        cols = ",".join(self._STAT_COLUMNS)
+        with self._conn() as conn:
+            rows = conn.execute(f"SELECT source,{cols} FROM source_stat").fetchall()
+        return {r[0]: dict(zip(self._STAT_COLUMNS, r[1:])) for r in rows}
+
+    def update_source_stat(self, source: str, apply: Callable[[dict], dict]) -> dict:
+        """Read-modify-write one source's stats inside a single write transaction."""
+        cols = ",".join(self._STAT_COLUMNS)
+        conn = self._conn()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(f"SELECT {cols} FROM source_stat WHERE source=?", (source,)).fetchone()
+            state = apply(dict(zip(self._STAT_COLUMNS, row)) if row else {})
+            values = [state.get(c) for c in self._STAT_COLUMNS]
+            conn.execute(
+                f"""
+                INSERT INTO source_stat (source,{cols}) VALUES (?,?,?,?,?,?,?,?)
+                ON CONFLICT(source) DO UPDATE SET
+                    success=excluded.success,
+                    fail=excluded.fail,
+                    total_latency=excluded.total_latency,
+                    last_success=excluded.last_success,
+                    fail_streak=excluded.fail_streak,
+                    open_until=excluded.open_until,
+                    last_call=excluded.last_call,
+                    updated_at=datetime('now')
+                """,
+                [source, *values],
+            )
+            conn.commit()
+            return state
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
     def stats(self) -> dict:
         with self._conn() as conn:
             row = conn.execute(
@@ -20,7 +20,7 @@ class USDataManager:
 
     def __init__(self, cache_db_path: str = "us_data/cache.db") -> None:
         self.cache = SQLiteSnapshotCache(cache_db_path)
-        self.chain = DataSourceChain(self.PRIORITY)
+        self.chain = DataSourceChain(self.PRIORITY, store=self.cache)
         self.sources = {
             "yfinance": YFinanceSource(),
             "akshare": AKShareUSSource(),